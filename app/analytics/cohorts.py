@@ -0,0 +1,226 @@
+# app/analytics/cohorts.py
+
+"""
+Партии (когорты) рыбы: выживаемость и рост по каждому зарыблению.
+
+Каждое зарыбление (FishMoveType.STOCKING) создаёт партию. Её название - ref
+записи, если он задан и ещё не занят, иначе "<pond_id>#<номер строки>".
+В водоёме рыба хранится долями партий в порядке поступления; гибель, продажа
+и перевод-расход забирают рыбу по FIFO - сначала из самой старой доли.
+Если в ref расхода указано название партии, сначала списывается она.
+
+Перевод пишется двумя строками с общими полями (время, количество, ref,
+причина, пользователь): расход снимает доли партий с водоёма-источника,
+парный приход кладёт те же доли в водоём-получатель. Приход без пары
+(или сверх снятого) становится новой партией.
+
+Рыба из Pond.initial_qty в журнал не попадает: расход сверх известных партий
+учитывается как неотнесённый к партиям (untracked).
+
+Состояние - словари и короткие списки долей, поэтому строка журнала
+учитывается за O(число долей в водоёме), а полный пересчёт (rebuild) -
+один проход по журналу.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from app.analytics.columnar import to_unix
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.fish import FishMoveRow, FishMoveType
+from app.sheets import logs
+
+SECONDS_PER_DAY = 86400
+
+# Индексы в состоянии партии
+_POND, _TS, _STOCKED, _WEIGHT0, _DEATHS, _SOLD, _WEIGHT, _WEIGHT_TS = range(8)
+
+
+@dataclass(frozen=True)
+class Cohort:
+    id: str
+    pond_id: str                   # водоём зарыбления
+    stocked_at: datetime
+    stocked: int
+    deaths: int
+    sold: int
+    alive: int                     # живых во всех водоёмах (включая переведённых)
+    stock_weight_g: float | None
+    last_weight_g: float | None    # последний известный средний вес (по движениям партии)
+    last_weight_at: datetime | None
+
+    @property
+    def survival_pct(self) -> float:
+        return 100.0 * (self.stocked - self.deaths) / self.stocked if self.stocked else 0.0
+
+    @property
+    def daily_gain_g(self) -> float | None:
+        """Среднесуточный прирост от зарыбления до последнего известного веса."""
+        if self.stock_weight_g is None or self.last_weight_g is None or self.last_weight_at is None:
+            return None
+        days = (self.last_weight_at - self.stocked_at).total_seconds() / SECONDS_PER_DAY
+        return (self.last_weight_g - self.stock_weight_g) / days if days > 0 else None
+
+
+@dataclass(frozen=True)
+class CohortShare:
+    cohort: Cohort
+    quantity: int  # сколько рыбы партии сейчас в водоёме
+
+
+def _from_unix(ts: int) -> datetime:
+    return np.datetime64(int(ts), 's').item()
+
+
+def _transfer_key(row: FishMoveRow) -> str:
+    return '|'.join((row.ts.isoformat(), str(row.quantity), row.ref or '', row.reason, row.user))
+
+
+class CohortLedger(JournalProjection):
+    name = "cohorts"
+    sheet_name = settings.SHEETS.FISH_MOVES_LOG
+    model = FishMoveRow
+    # Доли партий списываются по FIFO - порядок строк важен
+    ordered = True
+
+    def reset(self) -> None:
+        # cohort_id -> [водоём, время зарыбления, зарыблено, вес при зарыблении,
+        #               погибло, продано, последний вес, время последнего веса]
+        self._cohorts: dict[str, list] = {}
+        # pond_id -> доли партий в порядке поступления: [cohort_id, количество]
+        self._portions: dict[str, list[list]] = {}
+        # pond_id -> расход сверх известных партий
+        self._untracked: dict[str, int] = {}
+        # Перевод-расход, ждущий парного прихода: ключ перевода -> снятые доли
+        self._in_transit: dict[str, list[list]] = {}
+
+    def apply(self, row: FishMoveRow) -> None:
+        if row.move_type == FishMoveType.STOCKING:
+            cohort_id = row.ref if row.ref and row.ref not in self._cohorts else None
+            self._new_cohort(row, row.quantity, cohort_id)
+        elif row.move_type == FishMoveType.TRANSFER_IN:
+            moved = self._in_transit.pop(_transfer_key(row), [])
+            for cohort_id, quantity in moved:
+                self._put(row.pond_id, cohort_id, quantity)
+            rest = row.quantity - sum(quantity for _, quantity in moved)
+            if rest > 0:
+                self._new_cohort(row, rest)
+        else:
+            taken = self._take(row.pond_id, row.quantity, row.ref)
+            if row.move_type == FishMoveType.TRANSFER_OUT:
+                self._in_transit[_transfer_key(row)] = taken
+            for cohort_id, quantity in taken:
+                cohort = self._cohorts[cohort_id]
+                if row.move_type == FishMoveType.DEATH:
+                    cohort[_DEATHS] += quantity
+                elif row.move_type == FishMoveType.SALE:
+                    cohort[_SOLD] += quantity
+                self._observe_weight(cohort, row)
+
+    def _new_cohort(self, row: FishMoveRow, quantity: int, cohort_id: str | None = None) -> None:
+        cohort_id = cohort_id or f"{row.pond_id}#{self.current_row}"
+        ts = int(to_unix(row.ts))
+        self._cohorts[cohort_id] = [row.pond_id, ts, quantity, row.avg_weight_g, 0, 0, row.avg_weight_g,
+                                    ts if row.avg_weight_g else None]
+        self._put(row.pond_id, cohort_id, quantity)
+
+    @staticmethod
+    def _observe_weight(cohort: list, row: FishMoveRow) -> None:
+        if not row.avg_weight_g:
+            return
+        ts = int(to_unix(row.ts))
+        if cohort[_WEIGHT_TS] is None or ts >= cohort[_WEIGHT_TS]:
+            cohort[_WEIGHT], cohort[_WEIGHT_TS] = row.avg_weight_g, ts
+
+    def _put(self, pond_id: str, cohort_id: str, quantity: int) -> None:
+        portions = self._portions.setdefault(pond_id, [])
+        if portions and portions[-1][0] == cohort_id:
+            portions[-1][1] += quantity
+        else:
+            portions.append([cohort_id, quantity])
+
+    def _take(self, pond_id: str, quantity: int, ref: str | None) -> list[list]:
+        """Снимает quantity рыбы с водоёма: сначала партию ref (если она там есть), затем по FIFO."""
+        portions = self._portions.get(pond_id, [])
+        order = list(range(len(portions)))
+        if ref:
+            named = [i for i in order if portions[i][0] == ref]
+            order = named + [i for i in order if portions[i][0] != ref]
+        taken = []
+        for i in order:
+            if quantity <= 0:
+                break
+            amount = min(portions[i][1], quantity)
+            portions[i][1] -= amount
+            quantity -= amount
+            taken.append([portions[i][0], amount])
+        portions[:] = [p for p in portions if p[1] > 0]
+        if quantity > 0:
+            self._untracked[pond_id] = self._untracked.get(pond_id, 0) + quantity
+        return taken
+
+    def dump_state(self) -> dict:
+        return {
+            'cohorts': self._cohorts,
+            'portions': self._portions,
+            'untracked': self._untracked,
+            'in_transit': self._in_transit,
+        }
+
+    def load_state(self, state: dict) -> None:
+        self._cohorts = {cohort_id: list(values) for cohort_id, values in state['cohorts'].items()}
+        self._portions = {
+            pond_id: [[cohort_id, int(quantity)] for cohort_id, quantity in portions]
+            for pond_id, portions in state['portions'].items()
+        }
+        self._untracked = {pond_id: int(quantity) for pond_id, quantity in state['untracked'].items()}
+        self._in_transit = {
+            key: [[cohort_id, int(quantity)] for cohort_id, quantity in portions]
+            for key, portions in state['in_transit'].items()
+        }
+
+    # --- ЗАПРОСЫ ---
+
+    def _cohort(self, cohort_id: str, alive: int) -> Cohort:
+        pond_id, ts, stocked, weight0, deaths, sold, weight, weight_ts = self._cohorts[cohort_id]
+        return Cohort(
+            cohort_id, pond_id, _from_unix(ts), stocked, deaths, sold, alive, weight0, weight,
+            _from_unix(weight_ts) if weight_ts is not None else None,
+        )
+
+    def _alive(self) -> dict[str, int]:
+        alive: dict[str, int] = {}
+        for portions in list(self._portions.values()) + list(self._in_transit.values()):
+            for cohort_id, quantity in portions:
+                alive[cohort_id] = alive.get(cohort_id, 0) + quantity
+        return alive
+
+    def cohorts(self, sync: bool = True) -> list[Cohort]:
+        """Все партии в порядке зарыбления."""
+        self.catch_up(sync=sync)
+        with self._lock:
+            alive = self._alive()
+            result = [self._cohort(cohort_id, alive.get(cohort_id, 0)) for cohort_id in self._cohorts]
+        return sorted(result, key=lambda c: c.stocked_at)
+
+    def pond_cohorts(self, pond_id: str, sync: bool = True) -> list[CohortShare]:
+        """Партии, рыба которых сейчас в водоёме, в порядке поступления (первой уйдёт первая)."""
+        self.catch_up(sync=sync)
+        with self._lock:
+            alive = self._alive()
+            return [
+                CohortShare(self._cohort(cohort_id, alive[cohort_id]), quantity)
+                for cohort_id, quantity in self._portions.get(pond_id, [])
+            ]
+
+    def untracked(self, pond_id: str, sync: bool = True) -> int:
+        """Сколько рыбы ушло из водоёма сверх известных партий (рыба из initial_qty)."""
+        self.catch_up(sync=sync)
+        return self._untracked.get(pond_id, 0)
+
+
+cohort_ledger = CohortLedger()
+logs.subscribe(settings.SHEETS.FISH_MOVES_LOG, cohort_ledger.record)
@@ -0,0 +1,207 @@
+# app/analytics/columnar.py
+
+"""
+Колоночное представление журналов для векторной аналитики на NumPy.
+
+Время хранится как int64 (unix-время в секундах), водоём - как категориальный
+код int32 (словарное кодирование pond_id), значения - float32. SortedSeries
+держит строки отсортированными по (водоём, время) вместе с накопленной суммой,
+поэтому сумма или интерполяция "на момент t" для любого набора (водоём, t)
+считается через searchsorted по составному ключу, без циклов Python по строкам.
+ColumnBuffer - колонка для проекций, которые дописывают строки по одной.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+TS_DTYPE = np.int64
+CODE_DTYPE = np.int32
+VALUE_DTYPE = np.float32
+
+# Составной ключ сортировки: (код водоёма << KEY_SHIFT) | unix-время в секундах.
+# 2**34 секунд хватает до 2514 года.
+KEY_SHIFT = 34
+_TS_MAX = (1 << KEY_SHIFT) - 1
+
+
+def to_unix(values) -> np.ndarray:
+    """datetime/datetime64/ISO-строки -> unix-время в секундах (int64)."""
+    return np.asarray(values, dtype='datetime64[s]').astype(TS_DTYPE)
+
+
+def parse_timestamps(values: list) -> np.ndarray:
+    """
+    Векторный разбор колонки ts. Нераспознанные значения получают NaT
+    (строки с ними отбрасываются загрузчиком).
+    """
+    try:
+        parsed = np.array(values, dtype='datetime64[us]')
+    except ValueError:
+        parsed = np.array([_parse_timestamp(v) for v in values], dtype='datetime64[us]')
+    return parsed.astype('datetime64[s]')
+
+
+def _parse_timestamp(value) -> np.datetime64:
+    if isinstance(value, datetime):
+        return np.datetime64(value, 'us')
+    try:
+        return np.datetime64(datetime.fromisoformat(str(value)), 'us')
+    except ValueError:
+        return np.datetime64('NaT')
+
+
+def parse_floats(values: list) -> np.ndarray:
+    """Векторный разбор числовой колонки; пустые и некорректные значения -> NaN."""
+    try:
+        return np.array([np.nan if v == '' or v is None else v for v in values], dtype=np.float64)
+    except (ValueError, TypeError):
+        return np.array([_parse_float(v) for v in values], dtype=np.float64)
+
+
+def _parse_float(value) -> float:
+    try:
+        return float(str(value).replace(',', '.'))
+    except ValueError:
+        return np.nan
+
+
+class Codes:
+    """Словарное кодирование строковых идентификаторов -> int32 (коды в порядке появления)."""
+
+    def __init__(self, ids=()):
+        self.ids: list[str] = []
+        self._codes: dict[str, int] = {}
+        for value in ids:
+            self.code(value)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.ids)
+            self.ids.append(value)
+        return code
+
+    def get(self, value: str) -> int:
+        """Код значения или -1, если оно не встречалось."""
+        return self._codes.get(value, -1)
+
+    def encode(self, values: list[str]) -> np.ndarray:
+        code = self.code
+        return np.fromiter((code(str(v)) for v in values), dtype=CODE_DTYPE, count=len(values))
+
+
+class PondCodes(Codes):
+    """Словарное кодирование pond_id -> int32."""
+
+
+class ColumnBuffer:
+    """
+    Колонка с дозаписью в конец: массив NumPy с запасом ёмкости,
+    который удваивается при заполнении (амортизированно O(1) на строку).
+    """
+
+    def __init__(self, dtype, values=()):
+        values = np.asarray(values, dtype=dtype)
+        self._data = np.empty(max(len(values) * 2, 64), dtype=dtype)
+        self._data[:len(values)] = values
+        self._size = len(values)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def values(self) -> np.ndarray:
+        """Заполненная часть колонки (представление без копирования)."""
+        return self._data[:self._size]
+
+    def append(self, value) -> None:
+        if self._size == len(self._data):
+            grown = np.empty(len(self._data) * 2, dtype=self._data.dtype)
+            grown[:self._size] = self._data
+            self._data = grown
+        self._data[self._size] = value
+        self._size += 1
+
+    def __setitem__(self, index: int, value) -> None:
+        self.values[index] = value
+
+    def tolist(self) -> list:
+        return self.values.tolist()
+
+
+@dataclass(frozen=True)
+class SortedSeries:
+    """Журнал в колоночном виде, отсортированный по (водоём, время)."""
+    pond: np.ndarray   # int32
+    ts: np.ndarray     # int64, unix-время в секундах
+    value: np.ndarray  # float32
+    key: np.ndarray    # int64, составной ключ (водоём, время)
+    cumsum: np.ndarray  # float64, накопленная сумма value с ведущим нулём
+    order: np.ndarray  # перестановка исходных строк в порядок series
+
+    @classmethod
+    def build(cls, pond: np.ndarray, ts: np.ndarray, value: np.ndarray) -> "SortedSeries":
+        pond = np.asarray(pond, dtype=CODE_DTYPE)
+        ts = np.clip(np.asarray(ts, dtype=TS_DTYPE), 0, _TS_MAX)
+        order = np.lexsort((ts, pond))
+        pond, ts = pond[order], ts[order]
+        return cls._with(pond, ts, np.asarray(value, dtype=VALUE_DTYPE)[order], _compose(pond, ts), order)
+
+    @classmethod
+    def _with(cls, pond, ts, value, key, order) -> "SortedSeries":
+        cumsum = np.zeros(len(value) + 1, dtype=np.float64)
+        np.cumsum(value, dtype=np.float64, out=cumsum[1:])
+        return cls(pond, ts, value, key, cumsum, order)
+
+    def with_values(self, value: np.ndarray) -> "SortedSeries":
+        """Та же сортировка, другая колонка значений (value уже в порядке series)."""
+        return self._with(self.pond, self.ts, np.asarray(value, dtype=VALUE_DTYPE), self.key, self.order)
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def _segment(self, pond: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        start = np.searchsorted(self.key, _compose(pond, 0), side='left')
+        end = np.searchsorted(self.key, _compose(pond + 1, 0), side='left')
+        return start, end
+
+    def sum_until(self, pond: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """Сумма значений водоёма pond по всем строкам с ts <= t (с broadcasting)."""
+        pond, t = np.broadcast_arrays(np.asarray(pond, dtype=CODE_DTYPE), np.asarray(t, dtype=TS_DTYPE))
+        end = np.searchsorted(self.key, _compose(pond, t), side='right')
+        start, _ = self._segment(pond)
+        return self.cumsum[end] - self.cumsum[start]
+
+    def interpolate(self, pond: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """
+        Линейная интерполяция значения водоёма на момент t.
+        До первой и после последней строки - ближайшее значение, без строк - NaN.
+        """
+        pond, t = np.broadcast_arrays(np.asarray(pond, dtype=CODE_DTYPE), np.asarray(t, dtype=TS_DTYPE))
+        start, end = self._segment(pond)
+        if not len(self):
+            return np.full(pond.shape, np.nan)
+        hi = np.searchsorted(self.key, _compose(pond, t), side='right')
+        lo = hi - 1
+        has_lo = lo >= start
+        has_hi = hi < end
+        lo_c = np.clip(lo, 0, len(self) - 1)
+        hi_c = np.clip(hi, 0, len(self) - 1)
+        v_lo = self.value[lo_c].astype(np.float64)
+        v_hi = self.value[hi_c].astype(np.float64)
+        ts_lo, ts_hi = self.ts[lo_c], self.ts[hi_c]
+        span = np.where(has_lo & has_hi, ts_hi - ts_lo, 1)
+        both = v_lo + (v_hi - v_lo) * (t - ts_lo) / span
+        return np.where(
+            has_lo & has_hi, both,
+            np.where(has_lo, v_lo, np.where(has_hi, v_hi, np.nan)),
+        )
+
+
+def _compose(pond, ts) -> np.ndarray:
+    return (np.asarray(pond, dtype=TS_DTYPE) << KEY_SHIFT) | np.asarray(ts, dtype=TS_DTYPE)
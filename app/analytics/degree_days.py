@@ -0,0 +1,112 @@
+# app/analytics/degree_days.py
+
+"""
+Градусо-дни по водоёмам: накопленная сумма тепла (°C·сут) для моделей роста.
+
+Температура между замерами WATER_QUALITY_LOG интерполируется линейно, поэтому
+интеграл между соседними замерами - площадь трапеции:
+    (T1 + T2) / 2 × (t2 - t1),
+где T - превышение температуры над DEGREE_DAYS_BASE_TEMP_C (не меньше нуля).
+Пропуски в замерах заполняются той же интерполяцией; до первого и после
+последнего замера температура считается равной ближайшему замеру.
+
+По каждому водоёму хранятся время замеров, T и накопленная сумма на момент
+каждого замера. Новый замер дописывается за O(1); запоздавший вставляется
+на своё место с пересчётом сумм после него. Сумма за любой интервал -
+разность накопленных значений на его концах (bisect + частичная трапеция).
+
+Ряд занимает три записи на каждый замер, поэтому на диск он не сохраняется:
+при запуске он один раз собирается из локальной реплики.
+"""
+
+from bisect import bisect_right
+from datetime import datetime
+
+from app.analytics.columnar import to_unix
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.pond import Pond
+from app.models.water import WaterQualityRow
+from app.sheets import logs
+
+SECONDS_PER_DAY = 86400
+
+
+def _effective(temperature_c: float) -> float:
+    return max(temperature_c - settings.DEGREE_DAYS_BASE_TEMP_C, 0.0)
+
+
+class DegreeDays(JournalProjection):
+    name = "degree_days"
+    sheet_name = settings.SHEETS.WATER_QUALITY_LOG
+    model = WaterQualityRow
+    checkpointed = False
+    # 2: ряд больше не пишется в контрольную точку, ранее сохранённые файлы не читаются
+    state_version = 2
+
+    def reset(self) -> None:
+        # pond_id -> (время замеров по возрастанию, T над базовой, накопленные °C·сут на момент замера)
+        self._series: dict[str, tuple[list[int], list[float], list[float]]] = {}
+
+    def apply(self, row: WaterQualityRow) -> None:
+        ts, value = int(to_unix(row.ts)), _effective(row.temperature_C)
+        times, values, cums = self._series.setdefault(row.pond_id, ([], [], []))
+        if not times or ts >= times[-1]:
+            cum = cums[-1] + (values[-1] + value) / 2 * (ts - times[-1]) / SECONDS_PER_DAY if times else 0.0
+            times.append(ts)
+            values.append(value)
+            cums.append(cum)
+            return
+        i = bisect_right(times, ts)
+        times.insert(i, ts)
+        values.insert(i, value)
+        cums.insert(i, 0.0)
+        for j in range(max(i, 1), len(times)):
+            cums[j] = cums[j - 1] + (values[j - 1] + values[j]) / 2 * (times[j] - times[j - 1]) / SECONDS_PER_DAY
+
+    def config_key(self):
+        return {'base_temp_c': settings.DEGREE_DAYS_BASE_TEMP_C}
+
+    def dump_state(self) -> dict:
+        return {'series': self._series}
+
+    def load_state(self, state: dict) -> None:
+        self._series = {
+            pond_id: ([int(t) for t in times], [float(v) for v in values], [float(c) for c in cums])
+            for pond_id, (times, values, cums) in state['series'].items()
+        }
+
+    @staticmethod
+    def _cumulative(series: tuple[list[int], list[float], list[float]], ts: int) -> float:
+        """Накопленные °C·сут на момент ts (отсчёт от первого замера)."""
+        times, values, cums = series
+        i = bisect_right(times, ts) - 1
+        if i < 0:
+            return values[0] * (ts - times[0]) / SECONDS_PER_DAY
+        if i == len(times) - 1:
+            return cums[i] + values[i] * (ts - times[i]) / SECONDS_PER_DAY
+        share = (ts - times[i]) / (times[i + 1] - times[i])
+        value = values[i] + (values[i + 1] - values[i]) * share
+        return cums[i] + (values[i] + value) / 2 * (ts - times[i]) / SECONDS_PER_DAY
+
+    def degree_days(
+        self, pond_id: str, since: datetime, until: datetime | None = None, sync: bool = True,
+    ) -> float | None:
+        """°C·сут водоёма за [since, until] (по умолчанию до сейчас); None, если замеров не было."""
+        self.catch_up(sync=sync)
+        with self._lock:
+            series = self._series.get(pond_id)
+            if series is None:
+                return None
+            start, end = int(to_unix(since)), int(to_unix(until or datetime.now()))
+            return self._cumulative(series, end) - self._cumulative(series, start)
+
+    def since_stocking(self, pond: Pond, when: datetime | None = None, sync: bool = True) -> float | None:
+        """°C·сут с даты зарыбления водоёма; None, если дата не задана или замеров не было."""
+        if pond.stocking_date is None:
+            return None
+        return self.degree_days(pond.id, datetime.combine(pond.stocking_date, datetime.min.time()), when, sync)
+
+
+degree_days = DegreeDays()
+logs.subscribe(settings.SHEETS.WATER_QUALITY_LOG, degree_days.record)
@@ -0,0 +1,161 @@
+# app/analytics/fcr.py
+
+"""
+Кормовой коэффициент (FCR) по водоёмам за произвольные окна времени.
+
+FCR = масса корма за окно / прирост биомассы за окно, где
+- биомасса B(t) = поголовье(t) × средний вес(t);
+- поголовье(t) = Pond.initial_qty + движения рыбы из FISH_MOVES_LOG до момента t;
+- средний вес(t) линейно интерполируется между взвешиваниями из WEIGHING_LOG
+  (до первого и после последнего взвешивания - постоянный);
+- прирост = B(конец) - B(начало) - чистый приток биомассы за окно: рыба, которую
+  завезли или перевели в водоём, приростом не считается, а проданная, погибшая
+  и переведённая - не считается потерей.
+
+Журналы загружаются в колоночные массивы (app.analytics.columnar), и все
+водоёмы и все окна считаются несколькими векторными проходами NumPy
+без циклов Python по строкам.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.analytics.columnar import (
+    CODE_DTYPE, PondCodes, SortedSeries, parse_floats, parse_timestamps, to_unix,
+)
+from app.config.settings import settings
+from app.models.fish import MOVE_SIGN
+from app.models.pond import Pond
+from app.utils.logger import log
+
+_SIGN_BY_VALUE = {move_type.value: sign for move_type, sign in MOVE_SIGN.items()}
+
+
+@dataclass(frozen=True)
+class FcrResult:
+    pond_ids: list[str]
+    starts: np.ndarray   # int64, unix-время начала окон
+    ends: np.ndarray     # int64, unix-время конца окон
+    feed_kg: np.ndarray  # (водоёмы, окна)
+    gain_kg: np.ndarray  # (водоёмы, окна)
+    fcr: np.ndarray      # (водоёмы, окна); NaN, если прироста нет или он неизвестен
+
+    def for_pond(self, pond_id: str) -> np.ndarray:
+        return self.fcr[self.pond_ids.index(pond_id)]
+
+
+class FcrDataset:
+    """Колоночные данные журналов, нужные для расчёта FCR."""
+
+    def __init__(
+        self,
+        codes: PondCodes,
+        initial_qty: np.ndarray,
+        feeding: SortedSeries,
+        weighing: SortedSeries,
+        population: SortedSeries,
+        avg_weight_g: np.ndarray | None = None,
+    ):
+        self.codes = codes
+        self.initial_qty = np.zeros(len(codes), dtype=np.float64)
+        self.initial_qty[:len(initial_qty)] = initial_qty
+        self.feeding = feeding
+        self.weighing = weighing
+        self.population = population
+        # Биомасса каждого движения: вес из самой записи, иначе - по взвешиваниям
+        move_weight = self.weighing.interpolate(population.pond, population.ts)
+        if avg_weight_g is not None:
+            move_weight = np.where(np.isnan(avg_weight_g), move_weight, avg_weight_g)
+        flow = population.value.astype(np.float64) * np.nan_to_num(move_weight) / 1000.0
+        self.biomass_flow = population.with_values(flow)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        codes: PondCodes,
+        initial_qty: np.ndarray,
+        feeding: tuple[np.ndarray, np.ndarray, np.ndarray],
+        weighing: tuple[np.ndarray, np.ndarray, np.ndarray],
+        moves: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    ) -> "FcrDataset":
+        """
+        Собирает набор из колонок: feeding = (pond, ts, mass_kg),
+        weighing = (pond, ts, avg_weight_g), moves = (pond, ts, signed_qty, avg_weight_g).
+        """
+        m_pond, m_ts, m_qty, m_weight = moves
+        population = SortedSeries.build(m_pond, m_ts, m_qty)
+        return cls(
+            codes,
+            initial_qty,
+            SortedSeries.build(*feeding),
+            SortedSeries.build(*weighing),
+            population,
+            np.asarray(m_weight, dtype=np.float64)[population.order],
+        )
+
+    def biomass_kg(self, pond: np.ndarray, t: np.ndarray) -> np.ndarray:
+        count = self.initial_qty[pond] + self.population.sum_until(pond, t)
+        return count * self.weighing.interpolate(pond, t) / 1000.0
+
+    def compute(self, starts, ends, pond_ids: list[str] | None = None) -> FcrResult:
+        """FCR для всех (или перечисленных) водоёмов и всех окон (starts[i], ends[i]]."""
+        starts, ends = to_unix(starts), to_unix(ends)
+        pond_ids = list(self.codes.ids) if pond_ids is None else list(pond_ids)
+        pond = np.array([self.codes.get(p) for p in pond_ids], dtype=CODE_DTYPE)
+        known = pond >= 0
+        p = np.where(known, pond, 0)[:, None]
+        t0, t1 = starts[None, :], ends[None, :]
+
+        feed = self.feeding.sum_until(p, t1) - self.feeding.sum_until(p, t0)
+        inflow = self.biomass_flow.sum_until(p, t1) - self.biomass_flow.sum_until(p, t0)
+        gain = self.biomass_kg(p, t1) - self.biomass_kg(p, t0) - inflow
+        feed[~known] = 0.0
+        gain[~known] = np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fcr = np.where(gain > 0, feed / gain, np.nan)
+        return FcrResult(pond_ids, starts, ends, feed, gain, fcr)
+
+
+def _column(rows: list[dict], name: str) -> list:
+    return [row.get(name, '') for row in rows]
+
+
+def _valid(ts: np.ndarray, *values: np.ndarray) -> np.ndarray:
+    mask = ~np.isnat(ts)
+    for value in values:
+        mask &= ~np.isnan(value)
+    return mask
+
+
+def load_dataset(ponds: list[Pond], source) -> FcrDataset:
+    """
+    Загружает FEEDING_LOG, WEIGHING_LOG и FISH_MOVES_LOG в колоночный вид.
+    source - реплика таблицы (app.sheets.replica.replica) или объект с тем же методом read().
+    """
+    codes = PondCodes(p.id for p in ponds)
+    initial_qty = np.array([p.initial_qty or 0 for p in ponds], dtype=np.float64)
+
+    rows = source.read(settings.SHEETS.FEEDING_LOG)
+    ts, mass = parse_timestamps(_column(rows, 'ts')), parse_floats(_column(rows, 'mass_kg'))
+    ok = _valid(ts, mass)
+    feeding = (codes.encode(_column(rows, 'pond_id'))[ok], to_unix(ts[ok]), mass[ok])
+
+    rows = source.read(settings.SHEETS.WEIGHING_LOG)
+    ts, weight = parse_timestamps(_column(rows, 'ts')), parse_floats(_column(rows, 'avg_weight_g'))
+    ok = _valid(ts, weight)
+    weighing = (codes.encode(_column(rows, 'pond_id'))[ok], to_unix(ts[ok]), weight[ok])
+
+    rows = source.read(settings.SHEETS.FISH_MOVES_LOG)
+    ts = parse_timestamps(_column(rows, 'ts'))
+    sign = np.array([_SIGN_BY_VALUE.get(v, np.nan) for v in _column(rows, 'move_type')], dtype=np.float64)
+    qty = sign * parse_floats(_column(rows, 'quantity'))
+    ok = _valid(ts, qty)
+    moves = (
+        codes.encode(_column(rows, 'pond_id'))[ok], to_unix(ts[ok]), qty[ok],
+        parse_floats(_column(rows, 'avg_weight_g'))[ok],
+    )
+    skipped = len(rows) - int(ok.sum())
+    if skipped:
+        log.warning(f"FCR: пропущено некорректных строк движения рыбы: {skipped}.")
+    return FcrDataset.from_arrays(codes, initial_qty, feeding, weighing, moves)
@@ -0,0 +1,125 @@
+# app/analytics/feed_forecast.py
+
+"""
+Прогноз исчерпания корма: на сколько дней хватит остатка на складе.
+
+Суточный расход каждого корма сглаживается экспоненциально (EWMA):
+при переходе кормлений на новый день закрытый день входит в оценку
+с весом alpha = 2 / (FEED_RATE_SPAN_DAYS + 1), а дни без кормлений - как нулевые.
+Состояние корма - (текущий день, расход за него, сглаженный расход, есть ли оценка),
+поэтому новое кормление учитывается за O(1), а периодическая проверка
+дочитывает только строки, появившиеся после прошлого запуска.
+
+Остаток берётся из FeedStockBalance (app.analytics.feed_stock).
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import date
+
+from app.analytics.feed_stock import FeedStockBalance, feed_stock
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.feeding import FeedingRow, FeedType
+from app.sheets import logs
+
+SECONDS_PER_HOUR = 3600
+
+# Индексы в состоянии корма
+_DAY, _DAY_KG, _RATE, _HAS_RATE = range(4)
+
+
+def _alpha() -> float:
+    return 2.0 / (settings.FEED_RATE_SPAN_DAYS + 1.0)
+
+
+@dataclass(frozen=True)
+class FeedForecast:
+    feed_type: FeedType
+    balance_kg: float
+    daily_kg: float          # сглаженный суточный расход
+    days_left: float | None  # None - расхода нет, корм не кончится
+
+    @property
+    def is_low(self) -> bool:
+        return self.days_left is not None and self.days_left < settings.FEED_LOW_STOCK_LEAD_DAYS
+
+
+class FeedConsumptionRate(JournalProjection):
+    """Сглаженный суточный расход по названию корма."""
+    name = "feed_consumption_rate"
+    sheet_name = settings.SHEETS.FEEDING_LOG
+    model = FeedingRow
+
+    def reset(self) -> None:
+        # feed_type -> [ordinal дня, кг за этот день, EWMA расхода, 1.0 если EWMA уже есть]
+        self._state: dict[str, list[float]] = {}
+
+    def apply(self, row: FeedingRow) -> None:
+        day = row.ts.date().toordinal()
+        state = self._state.get(row.feed_type)
+        if state is None:
+            self._state[row.feed_type] = [day, row.mass_kg, 0.0, 0.0]
+            return
+        if day > state[_DAY]:
+            state[_RATE], state[_HAS_RATE] = self._closed_rate(state, day), 1.0
+            state[_DAY], state[_DAY_KG] = day, 0.0
+        # Запоздавшая запись за прошлый день добавляется к текущему
+        state[_DAY_KG] += row.mass_kg
+
+    @staticmethod
+    def _closed_rate(state: list[float], until_day: int) -> float:
+        """EWMA после закрытия дня state[_DAY] и нулевых дней до until_day (не включая)."""
+        alpha = _alpha()
+        rate = alpha * state[_DAY_KG] + (1 - alpha) * state[_RATE] if state[_HAS_RATE] else state[_DAY_KG]
+        empty_days = until_day - state[_DAY] - 1
+        return rate * (1 - alpha) ** max(empty_days, 0)
+
+    def dump_state(self) -> dict:
+        return {'feeds': self._state}
+
+    def load_state(self, state: dict) -> None:
+        self._state = {feed: [float(v) for v in values] for feed, values in state['feeds'].items()}
+
+    def daily_kg(self, feed_name: str, today: date | None = None, sync: bool = True) -> float:
+        """
+        Сглаженный суточный расход на сегодня. Текущий (незакрытый) день
+        учитывается, только пока других данных нет.
+        """
+        self.catch_up(sync=sync)
+        today = (today or date.today()).toordinal()
+        with self._lock:
+            state = self._state.get(feed_name)
+            if state is None:
+                return 0.0
+            if today > state[_DAY]:
+                return self._closed_rate(state, today)
+            return state[_RATE] if state[_HAS_RATE] else state[_DAY_KG]
+
+
+class FeedDepletionForecast:
+    def __init__(self, rates: FeedConsumptionRate, stock: FeedStockBalance):
+        self.rates = rates
+        self.stock = stock
+        self._alerted_at: dict[str, float] = {}
+
+    def forecast(self, feed_type: FeedType, today: date | None = None) -> FeedForecast:
+        balance = max(self.stock.balance(feed_type), 0.0)
+        daily = self.rates.daily_kg(feed_type.name, today)
+        days_left = balance / daily if daily > 0 else None
+        return FeedForecast(feed_type, balance, daily, days_left)
+
+    def should_alert(self, feed_id: str, now: float | None = None) -> bool:
+        """Не чаще одного предупреждения на корм за FEED_LOW_STOCK_ALERT_COOLDOWN_HOURS (считая от mark_alerted)."""
+        now = time.time() if now is None else now
+        last = self._alerted_at.get(feed_id)
+        return last is None or now - last >= settings.FEED_LOW_STOCK_ALERT_COOLDOWN_HOURS * SECONDS_PER_HOUR
+
+    def mark_alerted(self, feed_id: str, now: float | None = None) -> None:
+        """Запоминает время отправленного предупреждения. Вызывается только после успешной отправки."""
+        self._alerted_at[feed_id] = time.time() if now is None else now
+
+
+feed_consumption_rate = FeedConsumptionRate()
+feed_depletion = FeedDepletionForecast(feed_consumption_rate, feed_stock)
+logs.subscribe(settings.SHEETS.FEEDING_LOG, feed_consumption_rate.record)
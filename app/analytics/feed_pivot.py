@@ -0,0 +1,117 @@
+# app/analytics/feed_pivot.py
+
+"""
+Сводная таблица кормления: масса корма по водоёмам и дням месяца для каждого типа корма.
+
+Проекция FEEDING_LOG хранит только матрицы месяцев формы (тип корма, водоём, день);
+водоёмы и типы корма кодируются словарём (Codes) в индексы осей. Каждое кормление
+добавляется в одну ячейку матрицы своего месяца - O(1), без хранения строк журнала.
+Новый водоём или тип корма дополняет матрицу нулями.
+
+Размер состояния зависит от числа месяцев, водоёмов и кормов, а не от длины
+журнала; в контрольную точку пишутся только ненулевые ячейки матриц.
+"""
+
+import calendar
+import csv
+import io
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from app.analytics.columnar import Codes
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.feeding import FeedingRow
+from app.sheets import logs
+
+
+@dataclass(frozen=True)
+class FeedPivotTable:
+    month: date              # первое число месяца
+    ponds: list[str]         # pond_id по оси водоёмов
+    feeds: list[str]         # тип корма по оси кормов
+    mass_kg: np.ndarray      # (корм, водоём, день месяца)
+
+    @property
+    def days(self) -> int:
+        return self.mass_kg.shape[2]
+
+    def totals(self) -> np.ndarray:
+        """Все корма вместе: (водоём, день)."""
+        return self.mass_kg.sum(axis=0)
+
+    def to_csv(self) -> bytes:
+        """Выгрузка: строка на (корм, водоём) с кормлением за месяц, столбцы - дни и итог."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerow(['feed_type', 'pond_id', *range(1, self.days + 1), 'total'])
+        for f, p in zip(*np.nonzero(self.mass_kg.sum(axis=2))):
+            row = self.mass_kg[f, p]
+            writer.writerow([self.feeds[f], self.ponds[p], *(f"{v:g}" for v in row.round(2)), f"{row.sum():g}"])
+        return buffer.getvalue().encode('utf-8-sig')
+
+
+class FeedPivot(JournalProjection):
+    name = "feed_pivot"
+    sheet_name = settings.SHEETS.FEEDING_LOG
+    model = FeedingRow
+    # 2: в состоянии матрицы месяцев вместо колонок журнала
+    state_version = 2
+
+    def reset(self) -> None:
+        self.ponds = Codes()
+        self.feeds = Codes()
+        # (год, месяц) -> матрица (корм, водоём, день)
+        self._months: dict[tuple[int, int], np.ndarray] = {}
+
+    def _matrix(self, year: int, month: int) -> np.ndarray:
+        """Матрица месяца, дополненная нулями до текущего числа водоёмов и кормов."""
+        matrix = self._months.get((year, month))
+        if matrix is None:
+            matrix = np.zeros((0, 0, calendar.monthrange(year, month)[1]), dtype=np.float64)
+        if matrix.shape[0] < len(self.feeds) or matrix.shape[1] < len(self.ponds):
+            matrix = self._months[(year, month)] = np.pad(
+                matrix, ((0, len(self.feeds) - matrix.shape[0]), (0, len(self.ponds) - matrix.shape[1]), (0, 0))
+            )
+        return matrix
+
+    def apply(self, row: FeedingRow) -> None:
+        pond, feed = self.ponds.code(row.pond_id), self.feeds.code(row.feed_type)
+        self._matrix(row.ts.year, row.ts.month)[feed, pond, row.ts.day - 1] += row.mass_kg
+
+    def dump_state(self) -> dict:
+        # Разреженно: [год, месяц, [[корм, водоём, день, кг], ...]]
+        return {
+            'ponds': self.ponds.ids,
+            'feeds': self.feeds.ids,
+            'months': [
+                [year, month, [[int(f), int(p), int(d), float(matrix[f, p, d])] for f, p, d in zip(*np.nonzero(matrix))]]
+                for (year, month), matrix in self._months.items()
+            ],
+        }
+
+    def load_state(self, state: dict) -> None:
+        self.ponds = Codes(state['ponds'])
+        self.feeds = Codes(state['feeds'])
+        self._months = {}
+        for year, month, cells in state['months']:
+            matrix = self._matrix(int(year), int(month))
+            for f, p, d, mass in cells:
+                matrix[int(f), int(p), int(d)] = float(mass)
+
+    def pivot(self, year: int, month: int, sync: bool = True) -> FeedPivotTable:
+        """Матрица кормления за месяц (копия)."""
+        self.catch_up(sync=sync)
+        with self._lock:
+            if (year, month) in self._months:
+                matrix = self._matrix(year, month).copy()
+            else:
+                days = calendar.monthrange(year, month)[1]
+                matrix = np.zeros((len(self.feeds), len(self.ponds), days), dtype=np.float64)
+            return FeedPivotTable(date(year, month, 1), list(self.ponds.ids), list(self.feeds.ids), matrix)
+
+
+feed_pivot = FeedPivot()
+logs.subscribe(settings.SHEETS.FEEDING_LOG, feed_pivot.record)
@@ -0,0 +1,86 @@
+# app/analytics/feed_stock.py
+
+"""
+Остаток корма на складе по каждому типу корма.
+
+Остаток = приход - расход по STOCK_MOVES_LOG - скормлено по FEEDING_LOG.
+Кормления ссылаются на корм только по названию (так их пишет сценарий
+кормления), поэтому складские операции тоже сводятся по feed_type_name -
+тем же ключом, что и партии корма в profit. Суммы хранятся в двух проекциях
+и сводятся при запросе остатка. Каждая новая запись учитывается за O(1).
+"""
+
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.feeding import FeedingRow, FeedType
+from app.models.stock import StockMoveRow, StockMoveType
+from app.sheets import logs
+
+# Точность хранения остатков, кг (убирает накопленную погрешность float)
+MASS_PRECISION = 3
+
+
+class StockMovesProjection(JournalProjection):
+    """Сальдо складских операций (приход минус расход) по названию корма."""
+    name = "stock_moves"
+    sheet_name = settings.SHEETS.STOCK_MOVES_LOG
+    model = StockMoveRow
+    # 2: ключ - feed_type_name вместо feed_type_id
+    state_version = 2
+
+    def reset(self) -> None:
+        self.net_kg: dict[str, float] = {}
+
+    def apply(self, row: StockMoveRow) -> None:
+        sign = 1 if row.move_type == StockMoveType.INCOME else -1
+        self.net_kg[row.feed_type_name] = self.net_kg.get(row.feed_type_name, 0.0) + sign * row.mass_kg
+
+    def dump_state(self) -> dict:
+        return {'net_kg': self.net_kg}
+
+    def load_state(self, state: dict) -> None:
+        self.net_kg = {name: float(mass) for name, mass in state['net_kg'].items()}
+
+
+class FeedingConsumption(JournalProjection):
+    """Сколько корма скормлено, по названию корма."""
+    name = "feeding_consumption"
+    sheet_name = settings.SHEETS.FEEDING_LOG
+    model = FeedingRow
+
+    def reset(self) -> None:
+        self.consumed_kg: dict[str, float] = {}
+
+    def apply(self, row: FeedingRow) -> None:
+        self.consumed_kg[row.feed_type] = self.consumed_kg.get(row.feed_type, 0.0) + row.mass_kg
+
+    def dump_state(self) -> dict:
+        return {'consumed_kg': self.consumed_kg}
+
+    def load_state(self, state: dict) -> None:
+        self.consumed_kg = {name: float(mass) for name, mass in state['consumed_kg'].items()}
+
+
+class FeedStockBalance:
+    def __init__(self, moves: StockMovesProjection, feedings: FeedingConsumption):
+        self.moves = moves
+        self.feedings = feedings
+
+    def balance(self, feed_type: FeedType) -> float:
+        """Текущий остаток корма на складе, кг."""
+        self.moves.catch_up()
+        self.feedings.catch_up()
+        net = self.moves.net_kg.get(feed_type.name, 0.0)
+        consumed = self.feedings.consumed_kg.get(feed_type.name, 0.0)
+        return round(net - consumed, MASS_PRECISION)
+
+    def can_consume(self, feed_type: FeedType, mass_kg: float) -> bool:
+        """Хватит ли остатка, чтобы списать mass_kg."""
+        return round(self.balance(feed_type) - mass_kg, MASS_PRECISION) >= 0
+
+
+stock_moves_projection = StockMovesProjection()
+feeding_consumption = FeedingConsumption()
+feed_stock = FeedStockBalance(stock_moves_projection, feeding_consumption)
+logs.subscribe(settings.SHEETS.STOCK_MOVES_LOG, stock_moves_projection.record)
+logs.subscribe(settings.SHEETS.FEEDING_LOG, feeding_consumption.record)
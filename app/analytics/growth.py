@@ -0,0 +1,148 @@
+# app/analytics/growth.py
+
+"""
+Модель роста рыбы и оценка текущей биомассы по водоёмам.
+
+Взвешивания (WEIGHING_LOG) редкие, поэтому вес на произвольную дату
+оценивается по кривой роста водоёма. Кривая кусочно-лог-линейная:
+между взвешиваниями ln(веса) меняется линейно (постоянная удельная скорость
+роста на отрезке), после последнего взвешивания вес экстраполируется
+со скоростью, оценённой МНК по последним GROWTH_TAIL_POINTS взвешиваниям,
+но не дальше GROWTH_MAX_EXTRAPOLATION_DAYS.
+
+Параметры кривых хранятся в проекции вместе с контрольной точкой;
+кривая водоёма пересчитывается только после нового взвешивания в нём.
+Биомасса = поголовье (population_ledger) × вес по кривой на нужную дату.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from app.analytics.columnar import to_unix
+from app.analytics.population import population_ledger
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.pond import Pond
+from app.models.weighing import WeighingRow
+from app.sheets import logs
+
+SECONDS_PER_DAY = 86400
+
+
+@dataclass(frozen=True)
+class GrowthCurve:
+    t: tuple[int, ...]        # unix-время взвешиваний, по возрастанию
+    log_w: tuple[float, ...]  # ln(среднего веса, г) в эти моменты
+    sgr: float                # удельная скорость роста после последнего взвешивания, 1/сутки
+
+    @classmethod
+    def fit(cls, samples: list[tuple[int, float]], tail_points: int) -> "GrowthCurve":
+        ts = np.array([s[0] for s in samples], dtype=np.int64)
+        log_w = np.log(np.array([s[1] for s in samples], dtype=np.float64))
+        # Несколько взвешиваний в один момент усредняются
+        t_unique, inverse = np.unique(ts, return_inverse=True)
+        log_w = np.bincount(inverse, weights=log_w) / np.bincount(inverse)
+        sgr = 0.0
+        if len(t_unique) >= 2:
+            tail_t = (t_unique[-tail_points:] - t_unique[-1]) / SECONDS_PER_DAY
+            tail_w = log_w[-tail_points:]
+            sgr = max(float(np.polyfit(tail_t, tail_w, 1)[0]), 0.0)
+        return cls(tuple(int(t) for t in t_unique), tuple(float(w) for w in log_w), sgr)
+
+    @property
+    def last_weighing_ts(self) -> int:
+        return self.t[-1]
+
+    def weight_at(self, ts: int, max_extrapolation_days: float) -> float:
+        """Оценка среднего веса (г) на момент ts."""
+        if ts <= self.t[-1]:
+            # До первого взвешивания np.interp держит первое значение
+            return float(np.exp(np.interp(ts, self.t, self.log_w)))
+        days = min((ts - self.t[-1]) / SECONDS_PER_DAY, max_extrapolation_days)
+        return float(np.exp(self.log_w[-1] + self.sgr * days))
+
+    def to_state(self) -> dict:
+        return {'t': list(self.t), 'log_w': list(self.log_w), 'sgr': self.sgr}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "GrowthCurve":
+        return cls(tuple(int(t) for t in state['t']), tuple(float(w) for w in state['log_w']), float(state['sgr']))
+
+
+class GrowthModel(JournalProjection):
+    name = "growth"
+    sheet_name = settings.SHEETS.WEIGHING_LOG
+    model = WeighingRow
+
+    def reset(self) -> None:
+        self._samples: dict[str, list[tuple[int, float]]] = {}
+        self._curves: dict[str, GrowthCurve] = {}
+
+    def apply(self, row: WeighingRow) -> None:
+        self._samples.setdefault(row.pond_id, []).append((int(to_unix(row.ts)), row.avg_weight_g))
+        # Кривая водоёма устарела, пересчитается при следующем запросе
+        self._curves.pop(row.pond_id, None)
+
+    def config_key(self):
+        # Сохранённые кривые подобраны по этому числу последних взвешиваний
+        return {'tail_points': settings.GROWTH_TAIL_POINTS}
+
+    def dump_state(self) -> dict:
+        return {
+            'samples': {pond_id: [list(s) for s in samples] for pond_id, samples in self._samples.items()},
+            'curves': {pond_id: curve.to_state() for pond_id, curve in self._curves.items()},
+        }
+
+    def load_state(self, state: dict) -> None:
+        self._samples = {
+            pond_id: [(int(t), float(w)) for t, w in samples] for pond_id, samples in state['samples'].items()
+        }
+        self._curves = {pond_id: GrowthCurve.from_state(c) for pond_id, c in state['curves'].items()}
+
+    def curve(self, pond_id: str, sync: bool = True) -> GrowthCurve | None:
+        """Кривая роста водоёма (None, если взвешиваний не было)."""
+        self.catch_up(sync=sync)
+        with self._lock:
+            curve = self._curves.get(pond_id)
+            if curve is None and self._samples.get(pond_id):
+                curve = self._curves[pond_id] = GrowthCurve.fit(self._samples[pond_id], settings.GROWTH_TAIL_POINTS)
+            return curve
+
+    def weight_g(self, pond_id: str, when: datetime | None = None, sync: bool = True) -> float | None:
+        """Оценка среднего веса рыбы в водоёме на дату when (по умолчанию - сейчас)."""
+        curve = self.curve(pond_id, sync)
+        if curve is None:
+            return None
+        ts = int(to_unix(when or datetime.now()))
+        return curve.weight_at(ts, settings.GROWTH_MAX_EXTRAPOLATION_DAYS)
+
+
+@dataclass(frozen=True)
+class BiomassEstimate:
+    pond: Pond
+    count: int
+    avg_weight_g: float | None
+    last_weighing: datetime | None
+
+    @property
+    def biomass_kg(self) -> float | None:
+        if self.avg_weight_g is None:
+            return None
+        return max(self.count, 0) * self.avg_weight_g / 1000
+
+
+def estimate_biomass(ponds: list[Pond], when: datetime | None = None) -> list[BiomassEstimate]:
+    """Оценка биомассы по водоёмам: поголовье × вес по кривой роста."""
+    counts = population_ledger.counts(ponds)
+    estimates = []
+    for pond in ponds:
+        curve = growth_model.curve(pond.id)
+        last = np.datetime64(curve.last_weighing_ts, 's').item() if curve else None
+        estimates.append(BiomassEstimate(pond, counts[pond.id], growth_model.weight_g(pond.id, when), last))
+    return estimates
+
+
+growth_model = GrowthModel()
+logs.subscribe(settings.SHEETS.WEIGHING_LOG, growth_model.record)
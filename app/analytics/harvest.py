@@ -0,0 +1,150 @@
+# app/analytics/harvest.py
+
+"""
+План вылова: когда водоём достигнет товарной массы и сколько рыбы выловим по неделям.
+
+Рост считается по термальному коэффициенту роста (TGC):
+    W(d)^(1/3) = W(0)^(1/3) + TGC / 1000 × (градусо-дни выше HARVEST_GROWTH_BASE_TEMP_C до дня d),
+падёж - постоянной суточной долей: N(d) = N(0) × (1 - m)^d,
+корм - по таблице кормления вида рыбы (RationGrid): N × W × норма(W, T) за каждый день до вылова.
+
+Все величины - массивы формы (сценарий, водоём, день): накопленные градусо-дни -
+один cumsum по оси дней, день вылова - argmax по маске "масса ≥ товарной",
+поэтому расчёт на всех водоёмах и сценариях не содержит циклов Python
+и занимает миллисекунды.
+
+Исходные данные по водоёму: текущее поголовье (PopulationLedger), средний вес
+по кривой роста (GrowthModel), средняя температура за HARVEST_TEMP_WINDOW_DAYS
+(WaterRollups) и суточный падёж по недельному окну (MortalityMonitor).
+Прогноза погоды нет, поэтому температура на горизонт берётся постоянной,
+а сценарии - её отклонения HARVEST_TEMP_SCENARIOS_C.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app.analytics.growth import growth_model
+from app.analytics.mortality import mortality_monitor
+from app.analytics.population import population_ledger
+from app.analytics.ration import RationGrid, grid_for, ration_grid
+from app.analytics.water import water_rollups
+from app.config.settings import settings
+from app.models.pond import Pond
+
+DAYS_PER_WEEK = 7
+
+
+@dataclass(frozen=True)
+class HarvestPlan:
+    start: date
+    ponds: list[Pond]               # водоёмы, для которых хватило данных
+    skipped: list[Pond]             # нет поголовья, взвешиваний или замеров температуры
+    offsets_c: np.ndarray           # (S,) отклонения температуры сценариев
+    harvest_day: np.ndarray         # (S, P) день достижения товарной массы, -1 - не успевает за горизонт
+    harvest_count: np.ndarray       # (S, P) поголовье в день вылова (или в конце горизонта)
+    harvest_kg: np.ndarray          # (S, P) биомасса в день вылова (или в конце горизонта)
+    feed_kg: np.ndarray             # (S, P, D) корм по дням до вылова
+
+    def harvest_date(self, scenario: int, pond: int) -> date | None:
+        day = int(self.harvest_day[scenario, pond])
+        return self.start + timedelta(days=day) if day >= 0 else None
+
+    def weekly_harvest_kg(self, scenario: int) -> np.ndarray:
+        """Биомасса вылова по неделям горизонта (неделя 0 начинается в start)."""
+        days = self.harvest_day[scenario]
+        reached = days >= 0
+        weeks = self.feed_kg.shape[2] // DAYS_PER_WEEK + 1
+        return np.bincount(days[reached] // DAYS_PER_WEEK, weights=self.harvest_kg[scenario, reached], minlength=weeks)
+
+    def weekly_feed_kg(self, scenario: int) -> np.ndarray:
+        """Потребность в корме по неделям горизонта (все водоёмы)."""
+        daily = self.feed_kg[scenario].sum(axis=0)
+        return np.bincount(np.arange(len(daily)) // DAYS_PER_WEEK, weights=daily)
+
+
+def simulate(
+    counts: np.ndarray,
+    weights_g: np.ndarray,
+    temperatures_c: np.ndarray,
+    daily_mortality_pct: np.ndarray,
+    horizon_days: int,
+    offsets_c: tuple[float, ...] | np.ndarray = (0.0,),
+    market_weight_g: float | None = None,
+    tgc: float | None = None,
+    base_temp_c: float | None = None,
+    grids: list[RationGrid] | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Векторная симуляция. counts, weights_g, daily_mortality_pct - (P,),
+    temperatures_c - (P,) или (P, D), offsets_c - (S,), grids - таблица кормления
+    каждого водоёма (по умолчанию у всех таблица вида по умолчанию).
+    Возвращает день вылова (S, P), поголовье и биомассу в день вылова (S, P) и корм по дням (S, P, D).
+    """
+    market_weight_g = settings.HARVEST_MARKET_WEIGHT_G if market_weight_g is None else market_weight_g
+    tgc = settings.HARVEST_TGC if tgc is None else tgc
+    base_temp_c = settings.HARVEST_GROWTH_BASE_TEMP_C if base_temp_c is None else base_temp_c
+
+    counts = np.asarray(counts, dtype=np.float64)
+    weights_g = np.asarray(weights_g, dtype=np.float64)
+    temperatures = np.asarray(temperatures_c, dtype=np.float64)
+    if temperatures.ndim == 1:
+        temperatures = np.repeat(temperatures[:, None], horizon_days, axis=1)
+    offsets = np.asarray(offsets_c, dtype=np.float64)
+    day = np.arange(horizon_days)
+
+    # (S, P, D): температура, градусо-дни до начала дня, масса и поголовье на начало дня
+    t = temperatures[None, :, :] + offsets[:, None, None]
+    degree_days = np.clip(t - base_temp_c, 0.0, None)
+    before = np.cumsum(degree_days, axis=2) - degree_days
+    weight = (np.cbrt(weights_g)[None, :, None] + tgc / 1000.0 * before) ** 3
+    survival = (1.0 - np.asarray(daily_mortality_pct, dtype=np.float64) / 100.0)[:, None] ** day[None, :]
+    count = counts[:, None] * survival
+
+    market = weight >= market_weight_g
+    reached = market.any(axis=2)
+    harvest_day = np.where(reached, market.argmax(axis=2), -1)
+    last = np.where(reached, harvest_day, horizon_days - 1)
+    s_idx, p_idx = np.indices(last.shape)
+    harvest_count = count[p_idx, last]
+    harvest_kg = harvest_count * weight[s_idx, p_idx, last] / 1000.0
+
+    biomass_kg = count[None, :, :] * weight / 1000.0
+    if not grids:
+        rates_pct = ration_grid.rates_pct(weight, t)
+    else:
+        rates_pct = np.stack([grid.rates_pct(weight[:, p], t[:, p]) for p, grid in enumerate(grids)], axis=1)
+    feed_kg = biomass_kg * rates_pct / 100.0
+    feed_kg = np.where(day[None, None, :] < np.where(reached, harvest_day, horizon_days)[:, :, None], feed_kg, 0.0)
+    return harvest_day, harvest_count, harvest_kg, feed_kg
+
+
+def plan_harvest(ponds: list[Pond], now: datetime | None = None, horizon_days: int | None = None) -> HarvestPlan:
+    """План вылова по водоёмам на horizon_days дней (по умолчанию HARVEST_HORIZON_DAYS) во всех сценариях."""
+    now = now or datetime.now()
+    horizon_days = horizon_days or settings.HARVEST_HORIZON_DAYS
+    since = now - timedelta(days=settings.HARVEST_TEMP_WINDOW_DAYS)
+    counts = population_ledger.counts(ponds)
+
+    planned, skipped, inputs = [], [], []
+    for pond in ponds:
+        weight = growth_model.weight_g(pond.id, now)
+        water = water_rollups.summary(pond.id, since)
+        if counts[pond.id] <= 0 or weight is None or water is None:
+            skipped.append(pond)
+            continue
+        mortality = mortality_monitor.rate(pond, now).pct_7d / DAYS_PER_WEEK
+        planned.append(pond)
+        inputs.append((
+            counts[pond.id], weight, water.metrics['temperature_C'].mean,
+            max(mortality, settings.HARVEST_MIN_DAILY_MORTALITY_PCT),
+        ))
+
+    offsets = np.asarray(settings.HARVEST_TEMP_SCENARIOS_C, dtype=np.float64)
+    columns = np.asarray(inputs, dtype=np.float64).reshape(-1, 4).T
+    harvest_day, harvest_count, harvest_kg, feed_kg = simulate(
+        columns[0], columns[1], columns[2], columns[3], horizon_days, offsets,
+        grids=[grid_for(pond.species) for pond in planned],
+    )
+    return HarvestPlan(now.date(), planned, skipped, offsets, harvest_day, harvest_count, harvest_kg, feed_kg)
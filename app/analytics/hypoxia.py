@@ -0,0 +1,139 @@
+# app/analytics/hypoxia.py
+
+"""
+Прогноз гипоксии по тренду растворённого кислорода (DO).
+
+Для каждого водоёма поддерживается экспоненциально взвешенная линейная
+регрессия DO (и температуры) от времени: вес замера убывает как
+exp(-возраст / HYPOXIA_TAU_HOURS). Хранятся только взвешенные суммы
+(S_w, S_ww, S_t, S_tt, S_y, S_ty, S_T), отсчитанные от времени последнего замера,
+поэтому новый замер обновляет состояние за O(1) без перечитывания журнала.
+
+Прогноз строится, только если тренд опирается на достаточно недавних замеров:
+эффективное число замеров (S_w)² / S_ww не меньше HYPOXIA_MIN_EFFECTIVE_READINGS.
+Давние замеры почти не имеют веса и в это число не входят.
+
+Порог зависит от температуры: в тёплой воде рыбе нужно больше кислорода,
+поэтому к DO_MIN добавляется HYPOXIA_TEMP_COEF мг/л на каждый градус
+выше HYPOXIA_TEMP_REF_C (по сглаженной текущей температуре).
+Если DO падает и по тренду пересечёт порог раньше чем через
+HYPOXIA_LEAD_HOURS, прогноз возвращается для раннего предупреждения.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+
+from app.analytics.columnar import to_unix
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.water import WaterQualityRow
+from app.sheets import logs
+
+SECONDS_PER_HOUR = 3600.0
+
+# Индексы в состоянии водоёма
+_T_LAST, _SWW, _SW, _ST, _STT, _SY, _STY, _STEMP = range(8)
+
+
+@dataclass(frozen=True)
+class HypoxiaForecast:
+    pond_id: str
+    do_now: float           # сглаженное текущее значение DO, мг/л
+    slope_per_hour: float   # тренд DO, мг/л в час (отрицательный)
+    temperature_C: float    # сглаженная текущая температура
+    threshold: float        # порог DO с поправкой на температуру
+    hours_to_threshold: float
+
+
+def _shift(state: list[float], dt_hours: float, decay: float) -> None:
+    """Переносит начало отсчёта времени на dt_hours вперёд и затухает веса."""
+    sw, st, stt, sy, sty, stemp = state[_SW], state[_ST], state[_STT], state[_SY], state[_STY], state[_STEMP]
+    # t_i' = t_i - dt
+    stt = stt - 2 * dt_hours * st + dt_hours * dt_hours * sw
+    st = st - dt_hours * sw
+    sty = sty - dt_hours * sy
+    state[_SW], state[_ST], state[_STT] = sw * decay, st * decay, stt * decay
+    state[_SY], state[_STY], state[_STEMP] = sy * decay, sty * decay, stemp * decay
+    state[_SWW] *= decay * decay
+
+
+class HypoxiaMonitor(JournalProjection):
+    name = "hypoxia"
+    sheet_name = settings.SHEETS.WATER_QUALITY_LOG
+    model = WaterQualityRow
+    # 2: вместо числа замеров за всю историю - сумма квадратов весов S_ww
+    state_version = 2
+
+    def reset(self) -> None:
+        # pond_id -> [t_last, S_ww, S_w, S_t, S_tt, S_y, S_ty, S_temp]; время - в часах относительно t_last
+        self._state: dict[str, list[float]] = {}
+        self._alerted_at: dict[str, float] = {}
+
+    def apply(self, row: WaterQualityRow) -> None:
+        ts_hours = int(to_unix(row.ts)) / SECONDS_PER_HOUR
+        state = self._state.get(row.pond_id)
+        if state is None:
+            state = self._state[row.pond_id] = [ts_hours, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+        dt = ts_hours - state[_T_LAST]
+        if dt < 0:
+            # Запоздавший замер (внесён задним числом) в тренд не попадает
+            return
+        if dt > 0:
+            _shift(state, dt, math.exp(-dt / settings.HYPOXIA_TAU_HOURS))
+            state[_T_LAST] = ts_hours
+        # Новый замер - в момент t = 0 с весом 1
+        state[_SWW] += 1.0
+        state[_SW] += 1.0
+        state[_SY] += row.dissolved_O2_mgL
+        state[_STEMP] += row.temperature_C
+
+    def config_key(self):
+        # Веса накопленных сумм затухают с этой постоянной времени
+        return {'tau_hours': settings.HYPOXIA_TAU_HOURS}
+
+    def dump_state(self) -> dict:
+        return {'ponds': self._state}
+
+    def load_state(self, state: dict) -> None:
+        self._state = {pond_id: [float(v) for v in values] for pond_id, values in state['ponds'].items()}
+
+    def forecast(self, pond_id: str) -> HypoxiaForecast | None:
+        """
+        Прогноз для водоёма, если DO снижается и пересечёт порог в пределах
+        HYPOXIA_LEAD_HOURS. None - если данных мало или опасности нет.
+        """
+        self.catch_up()
+        with self._lock:
+            state = self._state.get(pond_id)
+            if state is None or state[_SW] ** 2 < settings.HYPOXIA_MIN_EFFECTIVE_READINGS * state[_SWW]:
+                return None
+            sw, st, stt, sy, sty = state[_SW], state[_ST], state[_STT], state[_SY], state[_STY]
+            denominator = sw * stt - st * st
+            if denominator <= 1e-9:
+                return None
+            slope = (sw * sty - st * sy) / denominator
+            do_now = (sy - slope * st) / sw
+            temperature = state[_STEMP] / sw
+        threshold = settings.DO_MIN + settings.HYPOXIA_TEMP_COEF * max(0.0, temperature - settings.HYPOXIA_TEMP_REF_C)
+        if slope >= 0 or do_now <= threshold:
+            # Рост DO - не опасно; уже ниже порога - это обычное критическое оповещение
+            return None
+        hours = (do_now - threshold) / -slope
+        if hours > settings.HYPOXIA_LEAD_HOURS:
+            return None
+        return HypoxiaForecast(pond_id, do_now, slope, temperature, threshold, hours)
+
+    def should_alert(self, pond_id: str, now: float | None = None) -> bool:
+        """Не чаще одного предупреждения на водоём за HYPOXIA_ALERT_COOLDOWN_HOURS (считая от mark_alerted)."""
+        now = time.time() if now is None else now
+        last = self._alerted_at.get(pond_id)
+        return last is None or now - last >= settings.HYPOXIA_ALERT_COOLDOWN_HOURS * SECONDS_PER_HOUR
+
+    def mark_alerted(self, pond_id: str, now: float | None = None) -> None:
+        """Запоминает время отправленного предупреждения. Вызывается только после успешной отправки."""
+        self._alerted_at[pond_id] = time.time() if now is None else now
+
+
+hypoxia_monitor = HypoxiaMonitor()
+logs.subscribe(settings.SHEETS.WATER_QUALITY_LOG, hypoxia_monitor.record)
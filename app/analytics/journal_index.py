@@ -0,0 +1,125 @@
+# app/analytics/journal_index.py
+
+"""
+Запросы к журналам по времени: query(sheet, pond_id=None, since=..., until=...).
+
+Для каждого журнала со временем (ts) ведётся индекс - проекция, которая хранит
+по каждому водоёму (и отдельно по всему журналу) отсортированные по времени
+списки: unix-время записи и номер её строки в листе. Журналы почти всегда
+упорядочены по времени, поэтому новая запись обычно просто дописывается в конец;
+запоздавшая вставляется на своё место двоичным поиском.
+
+Запрос находит границы [since, until) двоичным поиском (bisect) и читает
+из локальной реплики только попавшие в диапазон строки - без полного чтения
+листа и фильтрации в Python.
+
+Индекс занимает две записи на строку журнала, поэтому на диск он не сохраняется:
+при запуске он один раз собирается из локальной реплики.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from app.analytics.columnar import to_unix
+from app.analytics.projection import JournalProjection, parse_record
+from app.config.settings import settings
+from app.models.base import BaseSheetModel
+from app.sheets import logs
+from app.sheets.schema import SHEET_TO_MODEL_MAP
+
+# Ключ индекса всего журнала (без разбивки по водоёмам)
+ALL_PONDS = ''
+
+INDEXED_SHEETS = (
+    settings.SHEETS.WATER_QUALITY_LOG,
+    settings.SHEETS.FEEDING_LOG,
+    settings.SHEETS.WEIGHING_LOG,
+    settings.SHEETS.FISH_MOVES_LOG,
+    settings.SHEETS.STOCK_MOVES_LOG,
+)
+
+
+class JournalIndex(JournalProjection):
+    """Индекс журнала: по водоёму - время записей по возрастанию и номера их строк."""
+    checkpointed = False
+
+    def __init__(self, sheet_name: str, state_dir: str | None = None, source=None):
+        self.sheet_name = sheet_name
+        self.model = SHEET_TO_MODEL_MAP[sheet_name]
+        self.name = f"journal_index_{sheet_name.lower()}"
+        super().__init__(state_dir, source)
+
+    def reset(self) -> None:
+        # pond_id -> (unix-время по возрастанию, номера строк в том же порядке)
+        self._index: dict[str, tuple[list[int], list[int]]] = {}
+
+    def apply(self, row: BaseSheetModel) -> None:
+        ts = int(to_unix(row.ts))
+        pond_id = getattr(row, 'pond_id', None)
+        for key in (ALL_PONDS, pond_id) if pond_id else (ALL_PONDS,):
+            times, rows = self._index.setdefault(key, ([], []))
+            if not times or ts >= times[-1]:
+                times.append(ts)
+                rows.append(self.current_row)
+            else:
+                i = bisect_right(times, ts)
+                times.insert(i, ts)
+                rows.insert(i, self.current_row)
+
+    def dump_state(self) -> dict:
+        return {'index': self._index}
+
+    def load_state(self, state: dict) -> None:
+        self._index = {
+            key: ([int(t) for t in times], [int(r) for r in rows])
+            for key, (times, rows) in state['index'].items()
+        }
+
+    def row_numbers(
+        self, pond_id: str | None = None, since: datetime | None = None, until: datetime | None = None,
+        sync: bool = True,
+    ) -> list[int]:
+        """Номера строк с ts в [since, until) в порядке времени."""
+        self.catch_up(sync=sync)
+        with self._lock:
+            entry = self._index.get(pond_id or ALL_PONDS)
+            if entry is None:
+                return []
+            times, rows = entry
+            lo = bisect_left(times, int(to_unix(since))) if since is not None else 0
+            hi = bisect_left(times, int(to_unix(until))) if until is not None else len(times)
+            return rows[lo:hi]
+
+    def query(
+        self, pond_id: str | None = None, since: datetime | None = None, until: datetime | None = None,
+        sync: bool = True,
+    ) -> list[BaseSheetModel]:
+        """Записи журнала с ts в [since, until) (по водоёму, если задан) в порядке времени."""
+        numbers = self.row_numbers(pond_id, since, until, sync)
+        records = self._source.rows_at(self.sheet_name, numbers)
+        result = []
+        for number in numbers:
+            record = records.get(number)
+            # Строку, записанную ботом, реплика ещё могла не дочитать (sync=False)
+            if record is None:
+                continue
+            row = parse_record(self.model, record, self.sheet_name, number)
+            if row is not None:
+                result.append(row)
+        return result
+
+
+journal_indexes = {sheet_name: JournalIndex(sheet_name) for sheet_name in INDEXED_SHEETS}
+for _sheet_name, _index in journal_indexes.items():
+    logs.subscribe(_sheet_name, _index.record)
+
+
+def query(
+    sheet_name: str, pond_id: str | None = None, since: datetime | None = None, until: datetime | None = None,
+    sync: bool = True,
+) -> list[BaseSheetModel]:
+    """Записи журнала sheet_name с ts в [since, until), по водоёму pond_id, если задан."""
+    index = journal_indexes.get(sheet_name)
+    if index is None:
+        raise ValueError(f"Журнал '{sheet_name}' не индексируется, допустимы: {', '.join(INDEXED_SHEETS)}")
+    return index.query(pond_id, since, until, sync)
@@ -0,0 +1,124 @@
+# app/analytics/mortality.py
+
+"""
+Мониторинг падежа: гибель рыбы в % от живого поголовья за 24 часа и 7 дней.
+
+Для каждого водоёма гибель (FishMoveType.DEATH) складывается в кольцевой буфер
+из RING_HOURS почасовых ячеек: ячейка hour % RING_HOURS хранит номер часа
+и число погибших за этот час. Новая запись обновляет одну ячейку за O(1)
+(ячейку, оставшуюся от часа неделю назад, перед записью обнуляем).
+Сумма за окно - проход по фиксированным 168 ячейкам, без чтения журнала.
+
+Процент считается от поголовья на начало окна: текущее поголовье
+плюс погибшие за окно.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.analytics.columnar import to_unix
+from app.analytics.population import population_ledger
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.fish import FishMoveRow, FishMoveType
+from app.models.pond import Pond
+from app.sheets import logs
+
+SECONDS_PER_HOUR = 3600
+RING_HOURS = 7 * 24
+WINDOWS_HOURS = (24, RING_HOURS)
+
+
+@dataclass(frozen=True)
+class MortalityRate:
+    pond: Pond
+    population: int   # текущее живое поголовье
+    deaths_24h: int
+    deaths_7d: int
+
+    @staticmethod
+    def _pct(deaths: int, population: int) -> float:
+        base = population + deaths
+        return 100.0 * deaths / base if base > 0 else 0.0
+
+    @property
+    def pct_24h(self) -> float:
+        return self._pct(self.deaths_24h, self.population)
+
+    @property
+    def pct_7d(self) -> float:
+        return self._pct(self.deaths_7d, self.population)
+
+    @property
+    def exceeded(self) -> bool:
+        return self.pct_24h >= settings.MORTALITY_ALERT_PCT_24H or self.pct_7d >= settings.MORTALITY_ALERT_PCT_7D
+
+
+def _hour(ts: datetime | None) -> int:
+    return int(to_unix(ts or datetime.now())) // SECONDS_PER_HOUR
+
+
+class MortalityMonitor(JournalProjection):
+    name = "mortality"
+    sheet_name = settings.SHEETS.FISH_MOVES_LOG
+    model = FishMoveRow
+
+    def reset(self) -> None:
+        # pond_id -> [номера часов ячеек, число погибших в ячейках]
+        self._rings: dict[str, tuple[list[int], list[int]]] = {}
+        self._alerted_at: dict[str, float] = {}
+
+    def apply(self, row: FishMoveRow) -> None:
+        if row.move_type != FishMoveType.DEATH:
+            return
+        hour = _hour(row.ts)
+        hours, deaths = self._rings.setdefault(row.pond_id, ([-1] * RING_HOURS, [0] * RING_HOURS))
+        slot = hour % RING_HOURS
+        if hours[slot] == hour:
+            deaths[slot] += row.quantity
+        elif hours[slot] < hour:
+            hours[slot], deaths[slot] = hour, row.quantity
+        # Иначе запись старше недели от уже учтённых - в окна она не попадает
+
+    def dump_state(self) -> dict:
+        return {'rings': {pond_id: [hours, deaths] for pond_id, (hours, deaths) in self._rings.items()}}
+
+    def load_state(self, state: dict) -> None:
+        self._rings = {
+            pond_id: ([int(h) for h in hours], [int(d) for d in deaths])
+            for pond_id, (hours, deaths) in state['rings'].items()
+        }
+
+    def deaths(self, pond_id: str, window_hours: int, now: datetime | None = None, sync: bool = True) -> int:
+        """Погибло в водоёме за последние window_hours часов (не больше RING_HOURS)."""
+        self.catch_up(sync=sync)
+        return self._deaths(pond_id, window_hours, _hour(now))
+
+    def _deaths(self, pond_id: str, window_hours: int, now_hour: int) -> int:
+        with self._lock:
+            ring = self._rings.get(pond_id)
+            if ring is None:
+                return 0
+            first = now_hour - min(window_hours, RING_HOURS)
+            return sum(d for h, d in zip(*ring) if first < h <= now_hour)
+
+    def rate(self, pond: Pond, now: datetime | None = None, sync: bool = True) -> MortalityRate:
+        self.catch_up(sync=sync)
+        now_hour = _hour(now)
+        deaths_24h, deaths_7d = (self._deaths(pond.id, w, now_hour) for w in WINDOWS_HOURS)
+        return MortalityRate(pond, population_ledger.count(pond, sync=sync), deaths_24h, deaths_7d)
+
+    def should_alert(self, pond_id: str, now: float | None = None) -> bool:
+        """Не чаще одного предупреждения на водоём за MORTALITY_ALERT_COOLDOWN_HOURS (считая от mark_alerted)."""
+        now = time.time() if now is None else now
+        last = self._alerted_at.get(pond_id)
+        return last is None or now - last >= settings.MORTALITY_ALERT_COOLDOWN_HOURS * SECONDS_PER_HOUR
+
+    def mark_alerted(self, pond_id: str, now: float | None = None) -> None:
+        """Запоминает время отправленного предупреждения. Вызывается только после успешной отправки."""
+        self._alerted_at[pond_id] = time.time() if now is None else now
+
+
+mortality_monitor = MortalityMonitor()
+logs.subscribe(settings.SHEETS.FISH_MOVES_LOG, mortality_monitor.record)
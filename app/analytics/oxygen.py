@@ -0,0 +1,53 @@
+# app/analytics/oxygen.py
+
+"""
+Насыщение воды кислородом: DO в % от равновесной растворимости.
+
+Растворимость кислорода в пресной воде при 1 атм - уравнение Бенсона-Краузе
+(1984), поправка на давление по высоте водоёма над уровнем моря
+(SITE_ALTITUDE_M: барометрическая формула, с учётом давления водяного пара).
+Всё это считается один раз при импорте в таблицу с шагом 1 °C; поиск -
+линейная интерполяция по таблице, без логарифмов и экспонент на каждый замер.
+"""
+
+import numpy as np
+
+from app.config.settings import settings
+
+# Узлы таблицы, °C. За пределами диапазона берётся крайнее значение.
+SOLUBILITY_TEMPS_C = np.arange(0.0, 41.0)
+
+
+def _solubility_sea_level(temperature_c: np.ndarray) -> np.ndarray:
+    """Растворимость O2, мг/л, в пресной воде при 1 атм (Бенсон-Краузе)."""
+    t = temperature_c + 273.15
+    return np.exp(-139.34411 + 1.575701e5 / t - 6.642308e7 / t ** 2 + 1.243800e10 / t ** 3 - 8.621949e11 / t ** 4)
+
+
+def _pressure_factor(temperature_c: np.ndarray, altitude_m: float) -> np.ndarray:
+    """Поправка растворимости на атмосферное давление на высоте altitude_m."""
+    pressure_atm = (1.0 - 2.25577e-5 * altitude_m) ** 5.25588
+    t = temperature_c + 273.15
+    vapour_atm = np.exp(11.8571 - 3840.70 / t - 216961.0 / t ** 2)
+    theta = 0.000975 - 1.426e-5 * temperature_c + 6.436e-8 * temperature_c ** 2
+    return pressure_atm * (1.0 - vapour_atm / pressure_atm) * (1.0 - theta * pressure_atm) / (
+        (1.0 - vapour_atm) * (1.0 - theta)
+    )
+
+
+def build_table(altitude_m: float) -> np.ndarray:
+    """Растворимость O2, мг/л, в узлах SOLUBILITY_TEMPS_C на заданной высоте."""
+    return _solubility_sea_level(SOLUBILITY_TEMPS_C) * _pressure_factor(SOLUBILITY_TEMPS_C, altitude_m)
+
+
+SOLUBILITY_MG_L = build_table(settings.SITE_ALTITUDE_M)
+
+
+def solubility_mg_l(temperature_c):
+    """Равновесная растворимость O2 при данной температуре (число или массив)."""
+    return np.interp(temperature_c, SOLUBILITY_TEMPS_C, SOLUBILITY_MG_L)
+
+
+def saturation_pct(do_mg_l, temperature_c):
+    """DO в % насыщения (число или массив)."""
+    return 100.0 * np.asarray(do_mg_l, dtype=np.float64) / solubility_mg_l(temperature_c)
@@ -0,0 +1,169 @@
+# app/analytics/plausibility.py
+
+"""
+Проверка правдоподобия новых замеров по истории водоёма.
+
+Глобальные диапазоны (DO_MIN..DO_MAX и т.п.) пропускают опечатки вроде 65 °C
+вместо 6.5 °C, если они попадают в допустимые пределы. Поэтому по каждому
+водоёму и показателю воды ведутся экспоненциально взвешенные среднее и дисперсия:
+вес замера убывает вдвое за PLAUSIBILITY_HALF_LIFE_DAYS, так что сезонный
+дрейф температуры и DO не накапливается в "нормы" за всю историю.
+Взвешенный алгоритм Уэлфорда (West, 1979):
+    W += w;  d = x - mean;  mean += w / W × d;  M2 += w × d × (x - mean),
+дисперсия = M2 / W. При замере новее всех прежних W и M2 сначала умножаются
+на 2^(-Δt / полураспад), и новый замер получает вес 1; запоздавший замер
+добавляется сразу с весом 2^(-Δt / полураспад). Обновление - O(1) на строку,
+итог не зависит от порядка строк.
+
+Средний вес рыбы растёт, и его история - плохая норма. Поэтому взвешивание
+сравнивается с прогнозом кривой роста водоёма (GrowthModel) на дату взвешивания,
+отклонение - PLAUSIBILITY_WEIGHT_REL_STD_PCT от прогноза.
+
+Перед сохранением значение сравнивается с нормой: если оно дальше
+PLAUSIBILITY_SIGMAS стандартных отклонений, оператор получает
+предупреждение на шаге подтверждения.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.analytics.columnar import to_unix
+from app.analytics.growth import GrowthModel, growth_model
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.water import WaterQualityRow
+from app.sheets import logs
+
+SECONDS_PER_DAY = 86400
+
+# Индексы в состоянии показателя: число замеров, время самого нового замера,
+# сумма весов, среднее, M2
+_N, _T, _W, _MEAN, _M2 = range(5)
+
+
+@dataclass(frozen=True)
+class Deviation:
+    metric: str
+    value: float
+    mean: float
+    std: float
+    sigmas: float  # на сколько стандартных отклонений значение отличается от нормы
+
+
+class RunningStats(JournalProjection):
+    """
+    Экспоненциально взвешенные среднее и дисперсия по водоёмам. Наследник задаёт
+    name, sheet_name, model и metrics - поля модели, по которым ведётся статистика.
+    """
+    metrics: tuple[str, ...]
+    # 2: экспоненциально взвешенная статистика вместо статистики за всю историю
+    state_version = 2
+
+    def __init__(self, state_dir: str | None = None, source=None, half_life_days: float | None = None):
+        self.half_life_days = settings.PLAUSIBILITY_HALF_LIFE_DAYS if half_life_days is None else half_life_days
+        super().__init__(state_dir, source)
+
+    def reset(self) -> None:
+        # pond_id -> показатель -> [n, время нового замера, W, среднее, M2]
+        self._stats: dict[str, dict[str, list[float]]] = {}
+
+    def apply(self, row) -> None:
+        pond = self._stats.setdefault(row.pond_id, {})
+        ts = float(to_unix(row.ts))
+        half_life_s = self.half_life_days * SECONDS_PER_DAY
+        for metric in self.metrics:
+            value = getattr(row, metric)
+            state = pond.setdefault(metric, [0, ts, 0.0, 0.0, 0.0])
+            if ts >= state[_T]:
+                decay = 2.0 ** (-(ts - state[_T]) / half_life_s)
+                state[_W] *= decay
+                state[_M2] *= decay
+                state[_T] = ts
+                weight = 1.0
+            else:
+                weight = 2.0 ** (-(state[_T] - ts) / half_life_s)
+            state[_N] += 1
+            state[_W] += weight
+            delta = value - state[_MEAN]
+            state[_MEAN] += weight / state[_W] * delta
+            state[_M2] += weight * delta * (value - state[_MEAN])
+
+    def config_key(self):
+        return {'metrics': list(self.metrics), 'half_life_days': self.half_life_days}
+
+    def dump_state(self) -> dict:
+        return {'ponds': self._stats}
+
+    def load_state(self, state: dict) -> None:
+        self._stats = {
+            pond_id: {metric: [int(s[_N]), *(float(v) for v in s[_T:])] for metric, s in metrics.items()}
+            for pond_id, metrics in state['ponds'].items()
+        }
+
+    def stats(self, pond_id: str, metric: str, sync: bool = True) -> tuple[int, float, float] | None:
+        """(число замеров, взвешенное среднее, взвешенное стандартное отклонение) или None, если замеров не было."""
+        self.catch_up(sync=sync)
+        with self._lock:
+            state = self._stats.get(pond_id, {}).get(metric)
+            if state is None:
+                return None
+            n, _, weight, mean, m2 = state
+        return int(n), mean, math.sqrt(max(m2, 0.0) / weight) if weight > 0 else 0.0
+
+    def check(self, pond_id: str, values: dict[str, float], sync: bool = True) -> list[Deviation]:
+        """Показатели из values, выходящие за PLAUSIBILITY_SIGMAS отклонений от недавней истории водоёма."""
+        deviations = []
+        for metric, value in values.items():
+            stats = self.stats(pond_id, metric, sync)
+            if stats is None or stats[0] < settings.PLAUSIBILITY_MIN_READINGS:
+                continue
+            _, mean, std = stats
+            std = max(std, settings.PLAUSIBILITY_MIN_STD.get(metric, 0.0))
+            if std <= 0:
+                continue
+            sigmas = abs(value - mean) / std
+            if sigmas > settings.PLAUSIBILITY_SIGMAS:
+                deviations.append(Deviation(metric, value, mean, std, sigmas))
+        return deviations
+
+
+class WaterPlausibility(RunningStats):
+    name = "plausibility_water"
+    sheet_name = settings.SHEETS.WATER_QUALITY_LOG
+    model = WaterQualityRow
+    metrics = ('dissolved_O2_mgL', 'temperature_C')
+
+
+class WeighingPlausibility:
+    """Средний вес против прогноза кривой роста водоёма на дату взвешивания."""
+    metric = 'avg_weight_g'
+
+    def __init__(self, growth: GrowthModel):
+        self.growth = growth
+
+    def check(
+        self, pond_id: str, values: dict[str, float], sync: bool = True, when: datetime | None = None,
+    ) -> list[Deviation]:
+        """Средний вес из values, если он дальше PLAUSIBILITY_SIGMAS отклонений от прогноза роста."""
+        value = values.get(self.metric)
+        curve = self.growth.curve(pond_id, sync)
+        # По одному взвешиванию скорость роста неизвестна - прогноз не строится
+        if value is None or curve is None or len(curve.t) < 2:
+            return []
+        ts = int(to_unix(when or datetime.now()))
+        expected = curve.weight_at(ts, settings.GROWTH_MAX_EXTRAPOLATION_DAYS)
+        std = max(
+            expected * settings.PLAUSIBILITY_WEIGHT_REL_STD_PCT / 100,
+            settings.PLAUSIBILITY_MIN_STD.get(self.metric, 0.0),
+        )
+        sigmas = abs(value - expected) / std
+        if sigmas <= settings.PLAUSIBILITY_SIGMAS:
+            return []
+        return [Deviation(self.metric, value, expected, std, sigmas)]
+
+
+water_plausibility = WaterPlausibility()
+logs.subscribe(settings.SHEETS.WATER_QUALITY_LOG, water_plausibility.record)
+
+weighing_plausibility = WeighingPlausibility(growth_model)
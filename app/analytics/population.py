@@ -0,0 +1,50 @@
+# app/analytics/population.py
+
+"""
+Журнал поголовья: сколько рыбы сейчас в каждом водоёме.
+
+Поголовье = Pond.initial_qty + сумма движений из FISH_MOVES_LOG
+(зарыбление и перевод-приход - плюс, продажа, гибель и перевод-расход - минус).
+Хранятся только суммарные дельты по водоёмам, поэтому новая запись учитывается за O(1).
+"""
+
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.fish import FishMoveRow, MOVE_SIGN
+from app.models.pond import Pond
+from app.sheets import logs
+
+
+class PopulationLedger(JournalProjection):
+    name = "population"
+    sheet_name = settings.SHEETS.FISH_MOVES_LOG
+    model = FishMoveRow
+
+    def reset(self) -> None:
+        self._deltas: dict[str, int] = {}
+
+    def apply(self, row: FishMoveRow) -> None:
+        self._deltas[row.pond_id] = self._deltas.get(row.pond_id, 0) + MOVE_SIGN[row.move_type] * row.quantity
+
+    def dump_state(self) -> dict:
+        return {'deltas': self._deltas}
+
+    def load_state(self, state: dict) -> None:
+        self._deltas = {pond_id: int(delta) for pond_id, delta in state['deltas'].items()}
+
+    def delta(self, pond_id: str, sync: bool = True) -> int:
+        """Изменение поголовья водоёма по журналу движений (без initial_qty)."""
+        self.catch_up(sync=sync)
+        return self._deltas.get(pond_id, 0)
+
+    def count(self, pond: Pond, sync: bool = True) -> int:
+        """Текущее поголовье водоёма."""
+        return (pond.initial_qty or 0) + self.delta(pond.id, sync)
+
+    def counts(self, ponds: list[Pond]) -> dict[str, int]:
+        self.catch_up()
+        return {pond.id: (pond.initial_qty or 0) + self._deltas.get(pond.id, 0) for pond in ponds}
+
+
+population_ledger = PopulationLedger()
+logs.subscribe(settings.SHEETS.FISH_MOVES_LOG, population_ledger.record)
@@ -0,0 +1,222 @@
+# app/analytics/profit.py
+
+"""
+Прибыль по водоёмам: выручка от продажи рыбы минус стоимость скормленного корма.
+
+- Партии корма - приходы из STOCK_MOVES_LOG с ценой за кг (unit_cost). По каждому
+  корму хранятся накопленная масса и накопленная стоимость партий в порядке прихода.
+  Корм определяется по названию - так же, как его записывает сценарий кормления.
+- Кормления каждого корма выстраиваются на ось "сколько кг уже скормлено":
+  кормление занимает на ней отрезок [до, после).
+- FIFO (FEED_COST_METHOD = "fifo"): стоимость отрезка = F(после) - F(до),
+  где F(x) - стоимость первых x кг партий.
+  Средневзвешенная ("average"): масса × средняя цена всех партий, которые нужны,
+  чтобы покрыть отрезок.
+- Выручка - сумма amount у продаж (SALE) из FISH_MOVES_LOG.
+
+Отрезки на оси только растут, поэтому кормления, уже покрытые партиями, образуют
+префикс. Запрос оценивает только кормления, появившиеся после прошлого запроса
+(или ждавшие прихода партии), и добавляет их к суммам по водоёмам - сразу обоими
+методами. Партии только дописываются, поэтому оценка покрытого кормления больше
+не меняется: FeedUsage хранит (и пишет в контрольную точку) суммы по водоёмам
+и лишь хвост ещё не оценённых кормлений.
+
+Списания со склада (outcome) не закреплены за водоёмом и в ось не входят.
+Партия без цены оценивается по средней цене предыдущих партий этого корма.
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.feeding import FeedingRow
+from app.models.fish import FishMoveRow, FishMoveType
+from app.models.pond import Pond
+from app.models.stock import StockMoveRow, StockMoveType
+from app.sheets import logs
+
+# Допуск при сравнении масс, кг (накопленная погрешность float)
+MASS_EPS = 1e-6
+
+
+@dataclass(frozen=True)
+class PondProfit:
+    pond: Pond
+    revenue: float          # выручка от продаж рыбы, грн
+    feed_kg: float          # скормлено всего, кг
+    feed_cost: float        # стоимость оценённого корма, грн
+    unvalued_feed_kg: float  # скормлено сверх известных партий - пока не оценено
+
+    @property
+    def profit(self) -> float:
+        return self.revenue - self.feed_cost
+
+
+class FeedLots(JournalProjection):
+    """Партии корма: накопленные масса и стоимость приходов по названию корма."""
+    name = "feed_lots"
+    sheet_name = settings.SHEETS.STOCK_MOVES_LOG
+    model = StockMoveRow
+    # Партии выстраиваются в порядке прихода
+    ordered = True
+
+    def reset(self) -> None:
+        # Списки начинаются с нуля: cum_kg[i] - масса первых i партий
+        self.cum_kg: dict[str, list[float]] = {}
+        self.cum_cost: dict[str, list[float]] = {}
+
+    def apply(self, row: StockMoveRow) -> None:
+        if row.move_type != StockMoveType.INCOME:
+            return
+        kg = self.cum_kg.setdefault(row.feed_type_name, [0.0])
+        cost = self.cum_cost.setdefault(row.feed_type_name, [0.0])
+        unit_cost = row.unit_cost
+        if unit_cost is None:
+            unit_cost = cost[-1] / kg[-1] if kg[-1] > 0 else 0.0
+        kg.append(kg[-1] + row.mass_kg)
+        cost.append(cost[-1] + row.mass_kg * unit_cost)
+
+    def dump_state(self) -> dict:
+        return {'cum_kg': self.cum_kg, 'cum_cost': self.cum_cost}
+
+    def load_state(self, state: dict) -> None:
+        self.cum_kg = {feed: [float(v) for v in values] for feed, values in state['cum_kg'].items()}
+        self.cum_cost = {feed: [float(v) for v in values] for feed, values in state['cum_cost'].items()}
+
+    def received_kg(self, feed: str) -> float:
+        kg = self.cum_kg.get(feed)
+        return kg[-1] if kg else 0.0
+
+    def _cost_of_first(self, feed: str, mass: float) -> float:
+        """Стоимость первых mass кг партий корма (mass не больше полученного)."""
+        kg, cost = self.cum_kg[feed], self.cum_cost[feed]
+        i = bisect_right(kg, mass) - 1
+        if i >= len(kg) - 1:
+            return cost[-1]
+        return cost[i] + (mass - kg[i]) * (cost[i + 1] - cost[i]) / (kg[i + 1] - kg[i])
+
+    def fifo_cost(self, feed: str, start: float, end: float) -> float:
+        return self._cost_of_first(feed, end) - self._cost_of_first(feed, start)
+
+    def average_cost(self, feed: str, start: float, end: float) -> float:
+        kg, cost = self.cum_kg[feed], self.cum_cost[feed]
+        lots = max(bisect_left(kg, end - MASS_EPS), 1)
+        return (end - start) * cost[lots] / kg[lots]
+
+
+class FeedUsage(JournalProjection):
+    """Кормления на оси расхода каждого корма: оценённые - суммами по водоёмам, остальные - (водоём, до, после)."""
+    name = "feed_usage"
+    sheet_name = settings.SHEETS.FEEDING_LOG
+    model = FeedingRow
+    # Кормления выстраиваются на оси расхода в порядке записи
+    ordered = True
+    # 2: оценённые кормления свёрнуты в суммы, в состоянии только неоценённый хвост
+    state_version = 2
+
+    def reset(self) -> None:
+        # Корм -> израсходовано по оси и ещё не оценённые кормления по порядку
+        self.consumed_kg: dict[str, float] = {}
+        self.unvalued: dict[str, list[tuple[str, float, float]]] = {}
+        # Водоём -> скормлено, из них оценено, и стоимость оценённого по каждому методу
+        self.feed_kg: dict[str, float] = {}
+        self.valued_kg: dict[str, float] = {}
+        self.cost: dict[str, dict[str, float]] = {'fifo': {}, 'average': {}}
+
+    def apply(self, row: FeedingRow) -> None:
+        start = self.consumed_kg.get(row.feed_type, 0.0)
+        self.consumed_kg[row.feed_type] = start + row.mass_kg
+        self.unvalued.setdefault(row.feed_type, []).append((row.pond_id, start, start + row.mass_kg))
+        self.feed_kg[row.pond_id] = self.feed_kg.get(row.pond_id, 0.0) + row.mass_kg
+
+    def value(self, lots: FeedLots) -> None:
+        """Оценивает кормления, уже покрытые партиями, и сворачивает их в суммы по водоёмам."""
+        for feed, intervals in self.unvalued.items():
+            received = lots.received_kg(feed)
+            i = 0
+            while i < len(intervals) and intervals[i][2] <= received + MASS_EPS:
+                pond_id, start, end = intervals[i]
+                for method, cost_of in (('fifo', lots.fifo_cost), ('average', lots.average_cost)):
+                    costs = self.cost[method]
+                    costs[pond_id] = costs.get(pond_id, 0.0) + cost_of(feed, start, end)
+                self.valued_kg[pond_id] = self.valued_kg.get(pond_id, 0.0) + end - start
+                i += 1
+            del intervals[:i]
+
+    def dump_state(self) -> dict:
+        return {
+            'consumed_kg': self.consumed_kg,
+            'unvalued': self.unvalued,
+            'feed_kg': self.feed_kg,
+            'valued_kg': self.valued_kg,
+            'cost': self.cost,
+        }
+
+    def load_state(self, state: dict) -> None:
+        self.consumed_kg = {feed: float(mass) for feed, mass in state['consumed_kg'].items()}
+        self.unvalued = {
+            feed: [(pond_id, float(start), float(end)) for pond_id, start, end in values]
+            for feed, values in state['unvalued'].items()
+        }
+        self.feed_kg = {pond_id: float(mass) for pond_id, mass in state['feed_kg'].items()}
+        self.valued_kg = {pond_id: float(mass) for pond_id, mass in state['valued_kg'].items()}
+        self.cost = {
+            method: {pond_id: float(amount) for pond_id, amount in costs.items()}
+            for method, costs in state['cost'].items()
+        }
+
+
+class FishSales(JournalProjection):
+    """Выручка от продажи рыбы по водоёмам."""
+    name = "fish_sales"
+    sheet_name = settings.SHEETS.FISH_MOVES_LOG
+    model = FishMoveRow
+
+    def reset(self) -> None:
+        self.revenue: dict[str, float] = {}
+
+    def apply(self, row: FishMoveRow) -> None:
+        if row.move_type == FishMoveType.SALE and row.amount:
+            self.revenue[row.pond_id] = self.revenue.get(row.pond_id, 0.0) + row.amount
+
+    def dump_state(self) -> dict:
+        return {'revenue': self.revenue}
+
+    def load_state(self, state: dict) -> None:
+        self.revenue = {pond_id: float(amount) for pond_id, amount in state['revenue'].items()}
+
+
+class ProfitLedger:
+    def __init__(self, lots: FeedLots, usage: FeedUsage, sales: FishSales, method: str | None = None):
+        self.lots = lots
+        self.usage = usage
+        self.sales = sales
+        self.method = method
+
+    def profit(self, ponds: list[Pond]) -> list[PondProfit]:
+        for projection in (self.lots, self.usage, self.sales):
+            projection.catch_up()
+        with self.lots._lock, self.usage._lock, self.sales._lock:
+            self.usage.value(self.lots)
+            costs = self.usage.cost[self.method or settings.FEED_COST_METHOD]
+            result = []
+            for pond in ponds:
+                feed_kg = self.usage.feed_kg.get(pond.id, 0.0)
+                result.append(PondProfit(
+                    pond,
+                    self.sales.revenue.get(pond.id, 0.0),
+                    feed_kg,
+                    costs.get(pond.id, 0.0),
+                    max(feed_kg - self.usage.valued_kg.get(pond.id, 0.0), 0.0),
+                ))
+        return result
+
+
+feed_lots = FeedLots()
+feed_usage = FeedUsage()
+fish_sales = FishSales()
+profit_ledger = ProfitLedger(feed_lots, feed_usage, fish_sales)
+logs.subscribe(settings.SHEETS.STOCK_MOVES_LOG, feed_lots.record)
+logs.subscribe(settings.SHEETS.FEEDING_LOG, feed_usage.record)
+logs.subscribe(settings.SHEETS.FISH_MOVES_LOG, fish_sales.record)
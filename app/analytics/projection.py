@@ -0,0 +1,244 @@
+# app/analytics/projection.py
+
+"""
+Инкрементальные проекции журналов.
+
+Проекция - агрегированное состояние (остатки, счётчики, суммы), вычисленное
+по строкам одного журнала. Вместо пересчёта всей истории при каждом запросе:
+- при первом обращении состояние поднимается из контрольной точки
+  (ANALYTICS_STATE_DIR/<name>.json) и дочитывается только хвост журнала из реплики;
+- строки, которые дописывает сам бот, применяются сразу через подписку
+  на logs.subscribe (record) - без обращения к Sheets;
+- если журнал в таблице стал короче учтённого (строки удалили вручную),
+  проекция пересобирается с нуля.
+
+Правки уже учтённых строк в середине журнала проекция не замечает:
+для этого её нужно пересобрать (rebuild).
+
+Строки, записанные ботом, могут прийти раньше строк, которые между двумя
+дочитываниями дописали в таблицу вручную. Для сумм и счётчиков порядок неважен,
+а проекции с ordered = True (FIFO и другие зависящие от порядка) применяют
+строку бота сразу, только если она следующая по номеру; иначе она будет
+прочитана при catch_up вместе с пропущенными строками, в порядке листа.
+"""
+
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from pydantic import ValidationError
+
+from app.config.settings import settings
+from app.models.base import BaseSheetModel
+from app.sheets.replica import replica, FIRST_DATA_ROW
+from app.utils.logger import log
+
+
+_OPTIONAL_COLUMNS: dict[type, frozenset[str]] = {}
+
+
+def _optional_columns(model: type[BaseSheetModel]) -> frozenset[str]:
+    columns = _OPTIONAL_COLUMNS.get(model)
+    if columns is None:
+        columns = _OPTIONAL_COLUMNS[model] = frozenset(
+            info.alias or name for name, info in model.model_fields.items() if not info.is_required()
+        )
+    return columns
+
+
+def parse_record(model: type[BaseSheetModel], record: dict, sheet_name: str, row_number: int) -> BaseSheetModel | None:
+    """
+    Превращает строку реплики в модель. Пустая ячейка необязательного поля считается
+    отсутствующей (поле получит значение по умолчанию). Некорректная строка пропускается
+    с записью в лог.
+    """
+    optional = _optional_columns(model)
+    try:
+        return model.model_validate({k: v for k, v in record.items() if v != '' or k not in optional})
+    except ValidationError as e:
+        log.warning(f"Строка {row_number} листа '{sheet_name}' пропущена: {e.error_count()} ошибок валидации.")
+        return None
+
+
+class JournalProjection(ABC):
+    """
+    Базовый класс проекции. Наследник задаёт name, sheet_name, model
+    и реализует reset/apply/dump_state/load_state.
+    """
+    name: str
+    sheet_name: str
+    model: type[BaseSheetModel]
+    # Меняется при несовместимом изменении формата состояния: старая контрольная точка отбрасывается
+    state_version: int = 1
+    # False - состояние не сохраняется на диск и при запуске собирается из локальной реплики.
+    # Для проекций, чьё состояние растёт с каждой строкой журнала: записывать его целиком
+    # при каждом дочитывании дороже, чем один раз пересобрать без обращения к Sheets
+    checkpointed: bool = True
+    # True - результат зависит от порядка строк: record() не применяет строку,
+    # если перед ней в листе есть ещё не прочитанные строки
+    ordered: bool = False
+
+    def __init__(self, state_dir: str | None = None, source=None):
+        # None - общая реплика и каталог из настроек; они берутся при обращении,
+        # поэтому их можно подменить уже после создания проекции-синглтона
+        self._state_dir = state_dir
+        self._explicit_source = source
+        self._lock = threading.RLock()
+        self._loaded = False
+        # Сколько строк журнала (начиная с FIRST_DATA_ROW) уже учтено
+        self.row_count = 0
+        # Номера строк за пределами row_count, уже применённые через record()
+        self._pending: set[int] = set()
+        # Номер строки листа, которую сейчас учитывает apply
+        self.current_row = 0
+        self.reset()
+
+    @property
+    def _source(self):
+        return replica if self._explicit_source is None else self._explicit_source
+
+    @property
+    def _path(self) -> str:
+        return os.path.join(self._state_dir or settings.ANALYTICS_STATE_DIR, f"{self.name}.json")
+
+    # --- ДЛЯ НАСЛЕДНИКОВ ---
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Сбрасывает состояние к пустому журналу."""
+
+    @abstractmethod
+    def apply(self, row: BaseSheetModel) -> None:
+        """Учитывает одну строку журнала. Должно работать за O(1)."""
+
+    @abstractmethod
+    def dump_state(self) -> dict:
+        """Состояние для контрольной точки (JSON-совместимое)."""
+
+    @abstractmethod
+    def load_state(self, state: dict) -> None:
+        """Восстанавливает состояние из контрольной точки."""
+
+    def config_key(self):
+        """
+        Настройки, от которых зависит состояние (JSON-совместимое значение). Записывается
+        в заголовок контрольной точки; если оно изменилось, проекция пересобирается.
+        """
+        return None
+
+    # --- ЖИЗНЕННЫЙ ЦИКЛ ---
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def catch_up(self, max_age: float | None = None, sync: bool = True) -> int:
+        """
+        Дочитывает из реплики строки журнала, появившиеся после последней учтённой.
+        При sync=False реплика не синхронизируется с Sheets, читаются только локальные строки.
+        Возвращает число прочитанных строк.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load_checkpoint()
+                self._loaded = True
+            if sync:
+                mark = self._source.refresh(self.sheet_name, max_age)
+            else:
+                mark = self._source.watermark(self.sheet_name)
+            if mark is not None and mark.row_count < self.row_count:
+                log.warning(
+                    f"Журнал '{self.sheet_name}' короче учтённого ({mark.row_count} < {self.row_count}), "
+                    f"проекция '{self.name}' пересобирается."
+                )
+                self._reset_all()
+            start_row = FIRST_DATA_ROW + self.row_count
+            records = self._source.rows(self.sheet_name, start_row=start_row)
+            for offset, record in enumerate(records):
+                row_number = start_row + offset
+                if row_number in self._pending:
+                    continue
+                row = parse_record(self.model, record, self.sheet_name, row_number)
+                if row is not None:
+                    self.current_row = row_number
+                    self.apply(row)
+            if records:
+                self.row_count += len(records)
+                next_row = FIRST_DATA_ROW + self.row_count
+                self._pending = {n for n in self._pending if n >= next_row}
+                self.save_checkpoint()
+            return len(records)
+
+    def rebuild(self) -> int:
+        """Пересчитывает проекцию по всему журналу."""
+        with self._lock:
+            self._reset_all()
+            self._loaded = True
+            return self.catch_up()
+
+    def record(self, row: BaseSheetModel, row_number: int) -> None:
+        """
+        Подписчик logs.subscribe: учитывает строку, только что записанную ботом.
+        Пока проекция не загружена, ничего не делает - строка будет прочитана при catch_up.
+        """
+        with self._lock:
+            if not self._loaded:
+                return
+            if row_number < FIRST_DATA_ROW + self.row_count or row_number in self._pending:
+                return
+            if self.ordered and row_number != FIRST_DATA_ROW + self.row_count + len(self._pending):
+                return
+            self._pending.add(row_number)
+            self.current_row = row_number
+            self.apply(row)
+
+    def _reset_all(self) -> None:
+        self.row_count = 0
+        self._pending.clear()
+        self.reset()
+
+    # --- КОНТРОЛЬНАЯ ТОЧКА ---
+
+    def _load_checkpoint(self) -> None:
+        if not self.checkpointed:
+            return
+        try:
+            with open(self._path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.state_version or data.get('sheet') != self.sheet_name:
+                log.info(f"Контрольная точка проекции '{self.name}' устарела, проекция будет пересобрана.")
+                return
+            # Через JSON, чтобы кортежи и списки в ключе сравнивались одинаково
+            if data.get('config') != json.loads(json.dumps(self.config_key())):
+                log.info(f"Изменились настройки проекции '{self.name}', проекция будет пересобрана.")
+                return
+            self.load_state(data['state'])
+            self.row_count = int(data['row_count'])
+            self._pending = set(data.get('pending', []))
+        except FileNotFoundError:
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            log.error(f"Не удалось прочитать контрольную точку проекции '{self.name}': {e}")
+            self._reset_all()
+
+    def save_checkpoint(self) -> None:
+        if not self.checkpointed:
+            return
+        data = {
+            'version': self.state_version,
+            'sheet': self.sheet_name,
+            'config': self.config_key(),
+            'row_count': self.row_count,
+            'pending': sorted(self._pending),
+            'state': self.dump_state(),
+        }
+        try:
+            os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            # Атомарная замена: после сбоя остаётся либо старая, либо новая контрольная точка
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            log.error(f"Не удалось сохранить контрольную точку проекции '{self.name}': {e}")
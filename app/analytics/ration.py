@@ -0,0 +1,196 @@
+# app/analytics/ration.py
+
+"""
+Рекомендация суточного рациона с учётом температуры воды.
+
+Норма кормления (% биомассы в сутки) берётся из таблицы кормления вида рыбы
+водоёма (Pond.species) по средней массе рыбы и температуре; для не указанного
+или неизвестного вида - из таблицы карпа. Каждая таблица один раз при импорте
+развёртывается в плотную сетку (температура с шагом RATION_GRID_TEMP_STEP,
+масса - равномерно по логарифму), поэтому запрос - это вычисление двух
+индексов без интерполяции на лету.
+
+Из суточного рациона вычитается корм, уже скормленный в водоём сегодня
+(проекция FeedingByDay), и оператор видит остаток на сегодня.
+
+Входные данные берутся только из проекций в памяти (поголовье, кривая роста,
+последний почасовой агрегат температуры, кормления по дням) без синхронизации
+реплики, то есть рекомендация не добавляет обращений к Google Sheets.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app.analytics.growth import growth_model
+from app.analytics.population import population_ledger
+from app.analytics.projection import JournalProjection
+from app.analytics.water import water_rollups
+from app.config.settings import settings
+from app.models.feeding import FeedingRow
+from app.models.pond import Pond
+from app.sheets import logs
+
+# Таблицы кормления: средняя масса рыбы (г) × температура воды (°C) -> % биомассы в сутки.
+# Карп: ниже 8 °C практически не питается.
+CARP_WEIGHT_CLASSES_G = (1, 5, 20, 50, 100, 200, 500, 1000, 2000)
+CARP_TEMPERATURES_C = (8, 12, 16, 20, 24, 28, 32)
+CARP_FEEDING_RATE_PCT = (
+    (0.0, 3.0, 6.0, 9.0, 12.0, 12.0, 8.0),
+    (0.0, 2.5, 5.0, 7.0, 9.0, 9.0, 6.0),
+    (0.0, 2.0, 3.5, 5.0, 6.5, 6.5, 4.5),
+    (0.0, 1.5, 2.8, 4.0, 5.0, 5.0, 3.5),
+    (0.0, 1.2, 2.2, 3.2, 4.0, 4.0, 2.8),
+    (0.0, 1.0, 1.8, 2.6, 3.2, 3.2, 2.2),
+    (0.0, 0.8, 1.4, 2.0, 2.5, 2.5, 1.7),
+    (0.0, 0.6, 1.1, 1.6, 2.0, 2.0, 1.4),
+    (0.0, 0.5, 0.9, 1.3, 1.6, 1.6, 1.1),
+)
+
+# Форель: холодноводная, питается уже при 2 °C, при 22 °C и выше кормление прекращают.
+TROUT_WEIGHT_CLASSES_G = (1, 5, 20, 50, 100, 200, 500, 1000)
+TROUT_TEMPERATURES_C = (2, 6, 10, 14, 18, 22)
+TROUT_FEEDING_RATE_PCT = (
+    (1.0, 2.4, 4.0, 5.2, 4.2, 0.0),
+    (0.8, 1.9, 3.2, 4.2, 3.4, 0.0),
+    (0.6, 1.4, 2.4, 3.1, 2.5, 0.0),
+    (0.5, 1.1, 1.9, 2.4, 2.0, 0.0),
+    (0.4, 0.9, 1.5, 1.9, 1.6, 0.0),
+    (0.3, 0.7, 1.2, 1.5, 1.2, 0.0),
+    (0.25, 0.5, 0.9, 1.1, 0.9, 0.0),
+    (0.2, 0.4, 0.7, 0.9, 0.7, 0.0),
+)
+
+# Вид рыбы (Pond.species в нижнем регистре) -> (массы, температуры, нормы)
+FEEDING_TABLES = {
+    'карп': (CARP_WEIGHT_CLASSES_G, CARP_TEMPERATURES_C, CARP_FEEDING_RATE_PCT),
+    'форель': (TROUT_WEIGHT_CLASSES_G, TROUT_TEMPERATURES_C, TROUT_FEEDING_RATE_PCT),
+}
+# Таблица для водоёмов без вида или с видом, для которого таблицы нет
+DEFAULT_SPECIES = 'карп'
+
+RATION_GRID_TEMP_STEP = 0.1
+RATION_GRID_WEIGHT_POINTS = 256
+
+
+class RationGrid:
+    """Таблица кормления, заранее интерполированная на плотную сетку."""
+
+    def __init__(self, weights_g=CARP_WEIGHT_CLASSES_G, temperatures_c=CARP_TEMPERATURES_C, rates_pct=CARP_FEEDING_RATE_PCT):
+        rates = np.asarray(rates_pct, dtype=np.float64)
+        log_weights = np.log(np.asarray(weights_g, dtype=np.float64))
+        self.t0 = float(temperatures_c[0])
+        self.t_step = RATION_GRID_TEMP_STEP
+        self.lw0 = float(log_weights[0])
+        self.lw_step = float(log_weights[-1] - log_weights[0]) / (RATION_GRID_WEIGHT_POINTS - 1)
+        t_grid = np.arange(self.t0, temperatures_c[-1] + self.t_step / 2, self.t_step)
+        lw_grid = self.lw0 + self.lw_step * np.arange(RATION_GRID_WEIGHT_POINTS)
+        # Сначала по массе для каждой температуры таблицы, затем по температуре
+        by_weight = np.stack([np.interp(lw_grid, log_weights, rates[:, j]) for j in range(rates.shape[1])], axis=1)
+        self.grid = np.stack([np.interp(t_grid, temperatures_c, row) for row in by_weight], axis=0).astype(np.float32)
+
+    def rate_pct(self, avg_weight_g: float, temperature_c: float) -> float:
+        """Норма кормления, % биомассы в сутки (значения за краями сетки - по ближайшему краю)."""
+        if temperature_c < self.t0:
+            return 0.0
+        i = int(round((np.log(max(avg_weight_g, 1e-6)) - self.lw0) / self.lw_step))
+        j = int(round((temperature_c - self.t0) / self.t_step))
+        i = min(max(i, 0), self.grid.shape[0] - 1)
+        j = min(max(j, 0), self.grid.shape[1] - 1)
+        return float(self.grid[i, j])
+
+    def rates_pct(self, avg_weight_g: np.ndarray, temperature_c: np.ndarray) -> np.ndarray:
+        """Векторная версия rate_pct для массивов одинаковой (или совместимой) формы."""
+        weight, temperature = np.broadcast_arrays(np.asarray(avg_weight_g), np.asarray(temperature_c))
+        i = np.rint((np.log(np.maximum(weight, 1e-6)) - self.lw0) / self.lw_step).astype(np.intp)
+        j = np.rint((temperature - self.t0) / self.t_step).astype(np.intp)
+        rates = self.grid[np.clip(i, 0, self.grid.shape[0] - 1), np.clip(j, 0, self.grid.shape[1] - 1)]
+        return np.where(temperature < self.t0, 0.0, rates)
+
+
+class FeedingByDay(JournalProjection):
+    """Сколько корма скормлено в водоём за каждый день."""
+    name = "feeding_by_day"
+    sheet_name = settings.SHEETS.FEEDING_LOG
+    model = FeedingRow
+
+    def reset(self) -> None:
+        # pond_id -> дата ISO -> кг
+        self._fed: dict[str, dict[str, float]] = {}
+
+    def apply(self, row: FeedingRow) -> None:
+        days = self._fed.setdefault(row.pond_id, {})
+        day = row.ts.date().isoformat()
+        days[day] = days.get(day, 0.0) + row.mass_kg
+
+    def dump_state(self) -> dict:
+        return {'fed': self._fed}
+
+    def load_state(self, state: dict) -> None:
+        self._fed = {
+            pond_id: {day: float(mass) for day, mass in days.items()}
+            for pond_id, days in state['fed'].items()
+        }
+
+    def fed_kg(self, pond_id: str, day: date, sync: bool = True) -> float:
+        """Скормлено в водоём за день, кг."""
+        self.catch_up(sync=sync)
+        with self._lock:
+            return self._fed.get(pond_id, {}).get(day.isoformat(), 0.0)
+
+
+@dataclass(frozen=True)
+class RationSuggestion:
+    pond: Pond
+    count: int
+    avg_weight_g: float
+    temperature_C: float
+    rate_pct: float
+    fed_today_kg: float = 0.0
+
+    @property
+    def biomass_kg(self) -> float:
+        return self.count * self.avg_weight_g / 1000
+
+    @property
+    def ration_kg(self) -> float:
+        return self.biomass_kg * self.rate_pct / 100
+
+    @property
+    def remaining_kg(self) -> float:
+        """Сколько ещё можно скормить сегодня."""
+        return max(self.ration_kg - self.fed_today_kg, 0.0)
+
+
+def grid_for(species: str | None) -> RationGrid:
+    """Сетка кормления для вида рыбы; для не указанного или неизвестного вида - сетка DEFAULT_SPECIES."""
+    return ration_grids.get((species or '').strip().lower(), ration_grid)
+
+
+def suggest_ration(pond: Pond, now: datetime | None = None) -> RationSuggestion | None:
+    """
+    Суточный рацион для водоёма и уже скормленное за сегодня или None, если нет данных:
+    поголовья, взвешиваний или замера температуры не старше RATION_TEMP_MAX_AGE_HOURS.
+    """
+    now = now or datetime.now()
+    count = population_ledger.count(pond, sync=False)
+    if count <= 0:
+        return None
+    weight = growth_model.weight_g(pond.id, now, sync=False)
+    if weight is None:
+        return None
+    latest = water_rollups.latest(pond.id, sync=False)
+    if latest is None or now - latest.start > timedelta(hours=settings.RATION_TEMP_MAX_AGE_HOURS):
+        return None
+    temperature = latest.metrics['temperature_C'].mean
+    fed_today = feeding_by_day.fed_kg(pond.id, now.date(), sync=False)
+    rate = grid_for(pond.species).rate_pct(weight, temperature)
+    return RationSuggestion(pond, count, weight, temperature, rate, fed_today)
+
+
+ration_grids = {species: RationGrid(*table) for species, table in FEEDING_TABLES.items()}
+ration_grid = ration_grids[DEFAULT_SPECIES]
+
+feeding_by_day = FeedingByDay()
+logs.subscribe(settings.SHEETS.FEEDING_LOG, feeding_by_day.record)
@@ -0,0 +1,214 @@
+# app/analytics/reconcile.py
+
+"""
+Сверка согласованности журналов: все инварианты за один проход по каждому листу.
+
+Сначала из справочников строятся хеш-таблицы (водоёмы, корма, заказы),
+затем каждый журнал читается из локальной реплики потоком (SheetReplica.iter_rows)
+ровно один раз, и каждая строка проверяется по всем правилам сразу:
+
+- движения рыбы: неизвестный водоём, неверный тип или количество,
+  уход поголовья водоёма в минус (по порядку строк, от initial_qty),
+  перевод-расход без парного перевода-прихода и наоборот;
+- кормления: неизвестный или неактивный водоём, неизвестный корм;
+- замеры воды и взвешивания: неизвестный водоём;
+- складские операции: неизвестный feed_type_id;
+- позиции заказов: заказ не найден; сумма позиций не совпадает с total_amount заказа.
+
+Пары переводов сводятся хеш-соединением по общим полям записи
+(время, количество, ref, причина, пользователь) - так их пишет сценарий перевода.
+Значения берутся из реплики как есть, без моделей Pydantic: некорректная строка
+становится нарушением, а не исключением.
+"""
+
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+
+from app.config.settings import settings
+from app.models.fish import MOVE_SIGN, FishMoveType
+from app.sheets.replica import SheetReplica, replica
+
+# Допуск при сравнении суммы позиций с суммой заказа, грн
+AMOUNT_EPS = 0.01
+
+_MOVE_TYPES = {move_type.value: move_type for move_type in FishMoveType}
+_TRANSFERS = (FishMoveType.TRANSFER_OUT, FishMoveType.TRANSFER_IN)
+
+RULES = {
+    'unknown_pond': "Неизвестный водоём",
+    'inactive_pond': "Кормление неактивного водоёма",
+    'invalid_move': "Неверный тип или количество движения рыбы",
+    'negative_population': "Поголовье водоёма ушло в минус",
+    'unmatched_transfer_out': "Перевод-расход без перевода-прихода",
+    'unmatched_transfer_in': "Перевод-приход без перевода-расхода",
+    'unknown_feed': "Неизвестный корм",
+    'missing_order': "Позиция ссылается на несуществующий заказ",
+    'duplicate_order': "Повтор order_id",
+    'order_total_mismatch': "Сумма позиций не совпадает с суммой заказа",
+}
+
+
+@dataclass(frozen=True)
+class Violation:
+    sheet: str
+    row: int      # номер строки в листе
+    rule: str     # ключ из RULES
+    message: str
+
+
+@dataclass
+class ReconcileReport:
+    violations: list[Violation] = field(default_factory=list)
+    rows_checked: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def by_rule(self) -> Counter:
+        return Counter(v.rule for v in self.violations)
+
+    def add(self, sheet: str, row: int, rule: str, message: str) -> None:
+        self.violations.append(Violation(sheet, row, rule, message))
+
+
+def _number(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_true(value) -> bool:
+    return str(value).strip().lower() in ('true', '1', 'yes')
+
+
+class Reconciler:
+    def __init__(self, source: SheetReplica = replica):
+        self.source = source
+
+    def _rows(self, sheet_name: str, sync: bool, *columns: str):
+        if sync:
+            self.source.refresh(sheet_name)
+        return self.source.iter_rows(sheet_name, columns=list(columns))
+
+    def run(self, sync: bool = True) -> ReconcileReport:
+        started = time.perf_counter()
+        report = ReconcileReport()
+        sheets = settings.SHEETS
+
+        # --- Справочники: хеш-таблицы для соединений ---
+        ponds: dict[str, bool] = {}      # pond_id -> активен
+        initial: dict[str, int] = {}     # pond_id -> initial_qty
+        for _, record in self._rows(sheets.PONDS, sync, 'pond_id', 'initial_qty', 'is_active'):
+            pond_id = str(record.get('pond_id', ''))
+            ponds[pond_id] = _is_true(record.get('is_active'))
+            initial[pond_id] = int(_number(record.get('initial_qty')) or 0)
+        feed_ids: set[str] = set()
+        feed_names: set[str] = set()
+        for _, record in self._rows(sheets.FEED_TYPES, sync, 'feed_id', 'name'):
+            feed_ids.add(str(record.get('feed_id', '')))
+            feed_names.add(str(record.get('name', '')))
+        orders: dict[str, tuple[int, float]] = {}  # order_id -> (строка, total_amount)
+        for row, record in self._rows(sheets.SALES_ORDERS, sync, 'order_id', 'total_amount'):
+            report.rows_checked += 1
+            order_id = str(record.get('order_id', ''))
+            if order_id in orders:
+                report.add(sheets.SALES_ORDERS, row, 'duplicate_order',
+                           f"order_id {order_id} уже есть в строке {orders[order_id][0]}")
+            orders[order_id] = (row, _number(record.get('total_amount')) or 0.0)
+
+        # --- Движения рыбы ---
+        sheet = sheets.FISH_MOVES_LOG
+        population = dict(initial)
+        negative: set[str] = set()
+        pending_out: dict[tuple, deque[int]] = defaultdict(deque)
+        pending_in: dict[tuple, deque[int]] = defaultdict(deque)
+        for row, record in self._rows(sheet, sync, 'ts', 'pond_id', 'move_type', 'quantity', 'reason', 'ref', 'user'):
+            report.rows_checked += 1
+            pond_id = str(record.get('pond_id', ''))
+            if pond_id not in ponds:
+                report.add(sheet, row, 'unknown_pond', f"Водоём '{pond_id}' не найден")
+            quantity = _number(record.get('quantity'))
+            move_type = _MOVE_TYPES.get(record.get('move_type'))
+            if move_type is None or quantity is None or quantity <= 0:
+                report.add(sheet, row, 'invalid_move',
+                           f"Тип '{record.get('move_type')}', количество '{record.get('quantity')}'")
+                continue
+            quantity = int(quantity)
+
+            count = population.get(pond_id, 0) + MOVE_SIGN[move_type] * quantity
+            population[pond_id] = count
+            if count < 0 and pond_id not in negative:
+                # О каждом водоёме сообщаем один раз - в строке, где поголовье впервые ушло в минус
+                negative.add(pond_id)
+                report.add(sheet, row, 'negative_population', f"Водоём '{pond_id}': поголовье {count}")
+
+            if move_type in _TRANSFERS:
+                key = (str(record.get('ts', '')), quantity, str(record.get('ref', '')),
+                       str(record.get('reason', '')), str(record.get('user', '')))
+                mine, other = (pending_out, pending_in) if move_type == FishMoveType.TRANSFER_OUT \
+                    else (pending_in, pending_out)
+                matched = other.get(key)
+                if matched:
+                    matched.popleft()
+                    if not matched:
+                        del other[key]
+                else:
+                    mine[key].append(row)
+        for pending, rule in ((pending_out, 'unmatched_transfer_out'), (pending_in, 'unmatched_transfer_in')):
+            for key, rows in pending.items():
+                for row in rows:
+                    report.add(sheet, row, rule, f"{key[1]} шт., {key[0]}")
+
+        # --- Кормления ---
+        sheet = sheets.FEEDING_LOG
+        for row, record in self._rows(sheet, sync, 'pond_id', 'feed_type'):
+            report.rows_checked += 1
+            pond_id = str(record.get('pond_id', ''))
+            active = ponds.get(pond_id)
+            if active is None:
+                report.add(sheet, row, 'unknown_pond', f"Водоём '{pond_id}' не найден")
+            elif not active:
+                report.add(sheet, row, 'inactive_pond', f"Водоём '{pond_id}' неактивен")
+            feed = str(record.get('feed_type', ''))
+            if feed not in feed_names:
+                report.add(sheet, row, 'unknown_feed', f"Корм '{feed}' не найден")
+
+        # --- Замеры воды и взвешивания ---
+        for sheet in (sheets.WATER_QUALITY_LOG, sheets.WEIGHING_LOG):
+            for row, record in self._rows(sheet, sync, 'pond_id'):
+                report.rows_checked += 1
+                pond_id = str(record.get('pond_id', ''))
+                if pond_id not in ponds:
+                    report.add(sheet, row, 'unknown_pond', f"Водоём '{pond_id}' не найден")
+
+        # --- Склад ---
+        sheet = sheets.STOCK_MOVES_LOG
+        for row, record in self._rows(sheet, sync, 'feed_type_id'):
+            report.rows_checked += 1
+            feed_id = str(record.get('feed_type_id', ''))
+            if feed_id not in feed_ids:
+                report.add(sheet, row, 'unknown_feed', f"Корм '{feed_id}' не найден")
+
+        # --- Позиции заказов ---
+        sheet = sheets.SALES_ORDER_ITEMS
+        totals: dict[str, float] = {}
+        for row, record in self._rows(sheet, sync, 'order_id', 'quantity', 'price_per_unit'):
+            report.rows_checked += 1
+            order_id = str(record.get('order_id', ''))
+            if order_id not in orders:
+                report.add(sheet, row, 'missing_order', f"Заказ '{order_id}' не найден")
+                continue
+            amount = (_number(record.get('quantity')) or 0.0) * (_number(record.get('price_per_unit')) or 0.0)
+            totals[order_id] = totals.get(order_id, 0.0) + amount
+        for order_id, (row, total) in orders.items():
+            items = totals.get(order_id, 0.0)
+            if abs(items - total) > AMOUNT_EPS:
+                report.add(sheets.SALES_ORDERS, row, 'order_total_mismatch',
+                           f"Заказ '{order_id}': позиции {items:.2f}, заказ {total:.2f}")
+
+        report.elapsed_s = time.perf_counter() - started
+        return report
+
+
+reconciler = Reconciler()
@@ -0,0 +1,254 @@
+# app/analytics/sales.py
+
+"""
+Колоночная аналитика продаж по SALES_ORDERS и SALES_ORDER_ITEMS.
+
+Заказы и позиции хранятся не списками моделей, а колонками NumPy
+(ColumnBuffer): время, клиент, статус заказа; заказ, товар, количество
+и сумма позиции. Строковые идентификаторы (заказ, товар, клиент, статус)
+кодируются словарём в int32. Группировка по товару, дню, клиенту
+или статусу - один проход np.bincount по маске, без циклов Python по строкам.
+
+Обе таблицы - проекции: новые заказы и позиции дописываются инкрементально
+(подписка на logs и дочитывание хвоста реплики). Колонки позиций растут с каждой
+строкой журнала, поэтому на диск не сохраняются и при запуске собираются из
+локальной реплики. Статус заказа меняется
+на месте, поэтому после каждой синхронизации листа заказов колонка статусов
+перечитывается из локальной реплики целиком (заказов на порядок меньше, чем позиций).
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import numpy as np
+
+from app.analytics.columnar import CODE_DTYPE, TS_DTYPE, Codes, ColumnBuffer, to_unix
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.order import SalesOrderItemRow, SalesOrderRow
+from app.sheets import logs
+
+SECONDS_PER_DAY = 86400
+GROUP_BY = ('product', 'day', 'client', 'status')
+
+
+@dataclass(frozen=True)
+class SalesGroup:
+    key: str | date      # id товара / клиента, статус или день
+    label: str           # название товара, имя клиента, статус или день
+    revenue: float
+    quantity: float
+    orders: int
+
+
+class SalesOrders(JournalProjection):
+    """Заказы в колонках: время, код клиента, код статуса (строка заказа = код order_id)."""
+    name = "sales_orders"
+    sheet_name = settings.SHEETS.SALES_ORDERS
+    model = SalesOrderRow
+
+    def reset(self) -> None:
+        self.ids = Codes()
+        self.clients = Codes()
+        self.client_names: list[str] = []
+        self.statuses = Codes()
+        self.ts = ColumnBuffer(TS_DTYPE)
+        self.client = ColumnBuffer(CODE_DTYPE)
+        self.status = ColumnBuffer(CODE_DTYPE)
+        self._statuses_synced_at: float | None = None
+
+    def apply(self, row: SalesOrderRow) -> None:
+        client = self.clients.code(str(row.client_id))
+        if client == len(self.client_names):
+            self.client_names.append(row.client_name)
+        else:
+            self.client_names[client] = row.client_name
+        values = (int(to_unix(row.ts)), client, self.statuses.code(row.status))
+        index = self.ids.get(row.id)
+        if index < 0:
+            self.ids.code(row.id)
+            for column, value in zip((self.ts, self.client, self.status), values):
+                column.append(value)
+        else:
+            # Повтор order_id: действует последняя строка
+            for column, value in zip((self.ts, self.client, self.status), values):
+                column[index] = value
+
+    def dump_state(self) -> dict:
+        return {
+            'ids': self.ids.ids,
+            'clients': self.clients.ids,
+            'client_names': self.client_names,
+            'statuses': self.statuses.ids,
+            'ts': self.ts.tolist(),
+            'client': self.client.tolist(),
+            'status': self.status.tolist(),
+        }
+
+    def load_state(self, state: dict) -> None:
+        self.ids = Codes(state['ids'])
+        self.clients = Codes(state['clients'])
+        self.client_names = list(state['client_names'])
+        self.statuses = Codes(state['statuses'])
+        self.ts = ColumnBuffer(TS_DTYPE, state['ts'])
+        self.client = ColumnBuffer(CODE_DTYPE, state['client'])
+        self.status = ColumnBuffer(CODE_DTYPE, state['status'])
+
+    def catch_up(self, max_age: float | None = None, sync: bool = True) -> int:
+        count = super().catch_up(max_age, sync)
+        with self._lock:
+            mark = self._source.watermark(self.sheet_name)
+            if mark is not None and mark.synced_at != self._statuses_synced_at:
+                self._refresh_statuses()
+                self._statuses_synced_at = mark.synced_at
+        return count
+
+    def _refresh_statuses(self) -> None:
+        """Перечитывает статусы уже учтённых заказов из локальной реплики."""
+        for record in self._source.rows(self.sheet_name):
+            index = self.ids.get(str(record.get('order_id', '')))
+            status = record.get('status')
+            if index >= 0 and status:
+                self.status[index] = self.statuses.code(str(status))
+
+
+class SalesItems(JournalProjection):
+    """Позиции заказов в колонках: код заказа, код товара, количество, сумма."""
+    name = "sales_items"
+    sheet_name = settings.SHEETS.SALES_ORDER_ITEMS
+    model = SalesOrderItemRow
+    checkpointed = False
+
+    def reset(self) -> None:
+        self.orders = Codes()
+        self.products = Codes()
+        self.product_names: list[str] = []
+        self.order = ColumnBuffer(CODE_DTYPE)
+        self.product = ColumnBuffer(CODE_DTYPE)
+        self.quantity = ColumnBuffer(np.float64)
+        self.amount = ColumnBuffer(np.float64)
+
+    def apply(self, row: SalesOrderItemRow) -> None:
+        product = self.products.code(row.product_id)
+        if product == len(self.product_names):
+            self.product_names.append(row.product_name)
+        else:
+            self.product_names[product] = row.product_name
+        self.order.append(self.orders.code(row.order_id))
+        self.product.append(product)
+        self.quantity.append(row.quantity)
+        self.amount.append(row.quantity * row.price_per_unit)
+
+    def dump_state(self) -> dict:
+        return {
+            'orders': self.orders.ids,
+            'products': self.products.ids,
+            'product_names': self.product_names,
+            'order': self.order.tolist(),
+            'product': self.product.tolist(),
+            'quantity': self.quantity.tolist(),
+            'amount': self.amount.tolist(),
+        }
+
+    def load_state(self, state: dict) -> None:
+        self.orders = Codes(state['orders'])
+        self.products = Codes(state['products'])
+        self.product_names = list(state['product_names'])
+        self.order = ColumnBuffer(CODE_DTYPE, state['order'])
+        self.product = ColumnBuffer(CODE_DTYPE, state['product'])
+        self.quantity = ColumnBuffer(np.float64, state['quantity'])
+        self.amount = ColumnBuffer(np.float64, state['amount'])
+
+
+class SalesAnalytics:
+    """Агрегаты продаж: выручка, количество и число заказов в разрезе товара, дня, клиента или статуса."""
+
+    def __init__(self, orders: SalesOrders, items: SalesItems):
+        self.orders = orders
+        self.items = items
+        # Код заказа в словаре позиций -> строка заказа в SalesOrders (-1, если заказ неизвестен)
+        self._join = np.empty(0, dtype=CODE_DTYPE)
+        self._join_key: tuple = ()
+
+    def _order_rows(self) -> np.ndarray:
+        # Словари сравниваются и по идентичности: после пересборки проекции они новые
+        key = (id(self.items.orders), len(self.items.orders), id(self.orders.ids), len(self.orders.ids))
+        if key != self._join_key:
+            get = self.orders.ids.get
+            self._join = np.fromiter(
+                (get(order_id) for order_id in self.items.orders.ids), dtype=CODE_DTYPE, count=key[1]
+            )
+            self._join_key = key
+        return self._join
+
+    def aggregate(
+        self,
+        by: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        statuses: list[str] | None = None,
+        exclude_statuses: list[str] | None = None,
+        sync: bool = True,
+    ) -> list[SalesGroup]:
+        """
+        Группировка позиций заказов с ts в [since, until).
+        Дни - по возрастанию, остальные разрезы - по убыванию выручки.
+        """
+        if by not in GROUP_BY:
+            raise ValueError(f"Неизвестный разрез '{by}', допустимы: {', '.join(GROUP_BY)}")
+        self.orders.catch_up(sync=sync)
+        self.items.catch_up(sync=sync)
+        with self.orders._lock, self.items._lock:
+            order_row = self._order_rows()[self.items.order.values]
+            mask = order_row >= 0
+            order_row = np.where(mask, order_row, 0)
+            ts = self.orders.ts.values[order_row]
+            if since is not None:
+                mask &= ts >= to_unix(since)
+            if until is not None:
+                mask &= ts < to_unix(until)
+            status = self.orders.status.values[order_row]
+            if statuses is not None:
+                mask &= np.isin(status, [self.orders.statuses.get(s) for s in statuses])
+            if exclude_statuses:
+                mask &= ~np.isin(status, [self.orders.statuses.get(s) for s in exclude_statuses])
+
+            if by == 'product':
+                codes, keys, labels = self.items.product.values, self.items.products.ids, self.items.product_names
+            elif by == 'client':
+                codes = self.orders.client.values[order_row]
+                keys, labels = self.orders.clients.ids, self.orders.client_names
+            elif by == 'status':
+                codes, keys = status, self.orders.statuses.ids
+                labels = keys
+            else:
+                days = ts // SECONDS_PER_DAY
+                first = int(days[mask].min()) if mask.any() else 0
+                codes = np.where(mask, days - first, 0)
+                span = int(codes.max()) + 1 if mask.any() else 0
+                keys = [np.datetime64(first + i, 'D').item() for i in range(span)]
+                labels = [f"{day:%d.%m.%Y}" for day in keys]
+
+            codes, order_row = codes[mask].astype(np.int64), order_row[mask]
+            size = len(keys)
+            revenue = np.bincount(codes, weights=self.items.amount.values[mask], minlength=size)
+            quantity = np.bincount(codes, weights=self.items.quantity.values[mask], minlength=size)
+            # Число различных заказов в группе: уникальные пары (группа, заказ)
+            n_orders = max(len(self.orders.ids), 1)
+            pairs = np.unique(codes * n_orders + order_row)
+            orders = np.bincount(pairs // n_orders, minlength=size)
+
+        present = np.flatnonzero(orders)
+        if by != 'day':
+            present = present[np.argsort(-revenue[present], kind='stable')]
+        return [
+            SalesGroup(keys[i], labels[i], float(revenue[i]), float(quantity[i]), int(orders[i]))
+            for i in present
+        ]
+
+
+sales_orders = SalesOrders()
+sales_items = SalesItems()
+sales_analytics = SalesAnalytics(sales_orders, sales_items)
+logs.subscribe(settings.SHEETS.SALES_ORDERS, sales_orders.record)
+logs.subscribe(settings.SHEETS.SALES_ORDER_ITEMS, sales_items.record)
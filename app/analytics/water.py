@@ -0,0 +1,166 @@
+# app/analytics/water.py
+
+"""
+Агрегаты качества воды по водоёмам: почасовые и посуточные
+min / max / mean / count для каждого показателя из METRICS, включая
+насыщение кислородом (для старых строк без сохранённого значения оно
+считается по таблице растворимости при учёте строки).
+
+Хранится только по одной записи на (водоём, гранулярность, начало интервала),
+новый замер обновляет два агрегата за O(1). Запросы по диапазону времени
+читают агрегаты (bisect по отсортированным началам интервалов),
+а не сырые строки WATER_QUALITY_LOG.
+"""
+
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from app.analytics.columnar import to_unix
+from app.analytics.oxygen import saturation_pct
+from app.analytics.projection import JournalProjection
+from app.config.settings import settings
+from app.models.water import WaterQualityRow
+from app.sheets import logs
+
+# Гранулярность агрегатов: название -> длина интервала в секундах
+GRANULARITIES = {'hour': 3600, 'day': 86400}
+
+
+@dataclass(frozen=True)
+class MetricStats:
+    min: float
+    max: float
+    mean: float
+
+
+@dataclass(frozen=True)
+class RollupBucket:
+    start: datetime
+    count: int
+    metrics: dict[str, MetricStats]
+
+
+class WaterRollups(JournalProjection):
+    name = "water_rollups"
+    sheet_name = settings.SHEETS.WATER_QUALITY_LOG
+    model = WaterQualityRow
+    # Агрегируемые показатели (поля WaterQualityRow).
+    # При изменении набора нужно увеличить state_version, чтобы агрегаты пересобрались.
+    METRICS = ('dissolved_O2_mgL', 'temperature_C', 'do_saturation_pct')
+    state_version = 2
+
+    def reset(self) -> None:
+        # (pond_id, granularity) -> {начало интервала: [count, min, max, sum, min, max, sum, ...]}
+        self._buckets: dict[tuple[str, str], dict[int, list[float]]] = {}
+        # (pond_id, granularity) -> отсортированные начала интервалов
+        self._starts: dict[tuple[str, str], list[int]] = {}
+
+    def apply(self, row: WaterQualityRow) -> None:
+        ts = int(to_unix(row.ts))
+        values = [getattr(row, metric) for metric in self.METRICS]
+        if row.do_saturation_pct is None:
+            # Старые строки - без сохранённого насыщения: считаем по таблице один раз при учёте
+            values[self.METRICS.index('do_saturation_pct')] = float(
+                saturation_pct(row.dissolved_O2_mgL, row.temperature_C)
+            )
+        for granularity, length in GRANULARITIES.items():
+            self._add(row.pond_id, granularity, ts - ts % length, values)
+
+    def _add(self, pond_id: str, granularity: str, start: int, values: list[float]) -> None:
+        key = (pond_id, granularity)
+        buckets = self._buckets.setdefault(key, {})
+        agg = buckets.get(start)
+        if agg is None:
+            buckets[start] = [1] + [v for value in values for v in (value, value, value)]
+            starts = self._starts.setdefault(key, [])
+            # Замеры приходят почти всегда по порядку: тогда это просто append
+            if not starts or starts[-1] < start:
+                starts.append(start)
+            else:
+                insort(starts, start)
+            return
+        agg[0] += 1
+        for i, value in enumerate(values):
+            base = 1 + 3 * i
+            if value < agg[base]:
+                agg[base] = value
+            if value > agg[base + 1]:
+                agg[base + 1] = value
+            agg[base + 2] += value
+
+    def config_key(self):
+        # Насыщение старых строк считается по таблице растворимости для этой высоты
+        return {'altitude_m': settings.SITE_ALTITUDE_M}
+
+    def dump_state(self) -> dict:
+        return {
+            'buckets': [
+                [pond_id, granularity, [[start, *agg] for start, agg in buckets.items()]]
+                for (pond_id, granularity), buckets in self._buckets.items()
+            ],
+        }
+
+    def load_state(self, state: dict) -> None:
+        for pond_id, granularity, rows in state['buckets']:
+            key = (pond_id, granularity)
+            self._buckets[key] = {int(r[0]): [int(r[1]), *r[2:]] for r in rows}
+            self._starts[key] = sorted(self._buckets[key])
+
+    def query(
+        self,
+        pond_id: str,
+        granularity: str = 'hour',
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[RollupBucket]:
+        """Агрегаты водоёма, чьи интервалы начинаются в [since, until)."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Неизвестная гранулярность: {granularity}")
+        self.catch_up()
+        with self._lock:
+            key = (pond_id, granularity)
+            starts = self._starts.get(key, [])
+            lo = bisect_left(starts, int(to_unix(since))) if since else 0
+            hi = bisect_left(starts, int(to_unix(until))) if until else len(starts)
+            buckets = self._buckets.get(key, {})
+            return [self._to_bucket(start, buckets[start]) for start in starts[lo:hi]]
+
+    def latest(self, pond_id: str, sync: bool = True) -> RollupBucket | None:
+        """Последний почасовой агрегат водоёма."""
+        self.catch_up(sync=sync)
+        with self._lock:
+            starts = self._starts.get((pond_id, 'hour'))
+            if not starts:
+                return None
+            return self._to_bucket(starts[-1], self._buckets[(pond_id, 'hour')][starts[-1]])
+
+    def summary(self, pond_id: str, since: datetime, until: datetime | None = None) -> RollupBucket | None:
+        """Один агрегат за весь диапазон, собранный из посуточных (None, если замеров не было)."""
+        buckets = self.query(pond_id, 'day', since, until)
+        if not buckets:
+            return None
+        count = sum(b.count for b in buckets)
+        metrics = {
+            metric: MetricStats(
+                min(b.metrics[metric].min for b in buckets),
+                max(b.metrics[metric].max for b in buckets),
+                sum(b.metrics[metric].mean * b.count for b in buckets) / count,
+            )
+            for metric in self.METRICS
+        }
+        return RollupBucket(buckets[0].start, count, metrics)
+
+    def _to_bucket(self, start: int, agg: list[float]) -> RollupBucket:
+        count = int(agg[0])
+        metrics = {
+            metric: MetricStats(agg[1 + 3 * i], agg[2 + 3 * i], agg[3 + 3 * i] / count)
+            for i, metric in enumerate(self.METRICS)
+        }
+        return RollupBucket(np.datetime64(start, 's').item(), count, metrics)
+
+
+water_rollups = WaterRollups()
+logs.subscribe(settings.SHEETS.WATER_QUALITY_LOG, water_rollups.record)
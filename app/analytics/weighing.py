@@ -0,0 +1,96 @@
+# app/analytics/weighing.py
+
+"""
+Статистика выборки контрольного взвешивания.
+
+Оператор присылает веса отдельных рыб сообщением (через пробел, перевод строки
+или ";", дробная часть - через точку или запятую) или CSV-файлом (значения
+через "," или ";"; из строки берётся последнее число, строки без чисел -
+например, заголовок - пропускаются).
+Среднее, стандартное отклонение, CV и гистограмма размерных классов
+считаются векторно на NumPy.
+
+Исходная выборка хранится компактно: веса округляются до 0.1 г, переводятся
+в uint32 (little-endian), сжимаются zlib и кодируются base64 - одна ячейка
+листа WEIGHING_SAMPLES на взвешивание.
+"""
+
+import base64
+import re
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.config.settings import settings
+
+# Точность хранения выборки: 10 = десятые доли грамма
+SAMPLE_SCALE = 10
+SAMPLE_DTYPE = np.dtype('<u4')
+
+_MESSAGE_SEPARATORS = re.compile(r'[\s;]+')
+_CSV_SEPARATORS = re.compile(r'[,;\t]')
+
+
+@dataclass(frozen=True)
+class SampleStats:
+    size: int
+    mean_g: float
+    std_g: float        # выборочное (n - 1)
+    cv_pct: float
+    min_g: float
+    max_g: float
+    histogram: list[tuple[float, float, int]]  # размерные классы: (от, до, штук)
+
+
+def _validated(weights: list[float]) -> np.ndarray:
+    sample = np.asarray(weights, dtype=np.float64)
+    if sample.size == 0:
+        raise ValueError("В выборке нет ни одного веса")
+    if sample.size > settings.WEIGHING_SAMPLE_MAX_SIZE:
+        raise ValueError(f"Слишком большая выборка (больше {settings.WEIGHING_SAMPLE_MAX_SIZE})")
+    if not np.all((sample > 0) & (sample <= settings.WEIGHING_AVG_WEIGHT_MAX_G)):
+        raise ValueError(f"Вес каждой рыбы должен быть в пределах 0-{settings.WEIGHING_AVG_WEIGHT_MAX_G} г")
+    return sample
+
+
+def parse_sample(text: str) -> np.ndarray:
+    """Веса из сообщения; ValueError, если есть нечисловые значения или веса вне пределов."""
+    tokens = [t for t in _MESSAGE_SEPARATORS.split(text.strip()) if t]
+    return _validated([float(t.replace(',', '.')) for t in tokens])
+
+
+def parse_csv(data: bytes) -> np.ndarray:
+    """Веса из CSV-файла: последнее числовое значение каждой строки (перед ним может быть номер рыбы)."""
+    weights = []
+    for line in data.decode('utf-8-sig', errors='replace').splitlines():
+        numbers = []
+        for cell in _CSV_SEPARATORS.split(line):
+            try:
+                numbers.append(float(cell.strip().strip('"')))
+            except ValueError:
+                continue
+        if numbers:
+            weights.append(numbers[-1])
+    return _validated(weights)
+
+
+def summarize(sample: np.ndarray, bins: int | None = None) -> SampleStats:
+    bins = bins or settings.WEIGHING_HISTOGRAM_BINS
+    mean = float(sample.mean())
+    std = float(sample.std(ddof=1)) if sample.size > 1 else 0.0
+    counts, edges = np.histogram(sample, bins=bins)
+    histogram = [(float(lo), float(hi), int(n)) for lo, hi, n in zip(edges[:-1], edges[1:], counts)]
+    return SampleStats(
+        int(sample.size), mean, std, 100.0 * std / mean, float(sample.min()), float(sample.max()), histogram
+    )
+
+
+def encode_sample(sample: np.ndarray) -> str:
+    packed = np.rint(np.asarray(sample) * SAMPLE_SCALE).astype(SAMPLE_DTYPE).tobytes()
+    return base64.b64encode(zlib.compress(packed, 9)).decode('ascii')
+
+
+def decode_sample(encoded: str) -> np.ndarray:
+    packed = zlib.decompress(base64.b64decode(encoded))
+    return np.frombuffer(packed, dtype=SAMPLE_DTYPE).astype(np.float64) / SAMPLE_SCALE
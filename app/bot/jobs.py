@@ -0,0 +1,45 @@
+# app/bot/jobs.py
+
+"""Периодические фоновые задачи бота (JobQueue python-telegram-bot)."""
+
+from telegram.ext import Application, ContextTypes
+
+from app.analytics.feed_forecast import feed_depletion
+from app.bot.notifications import notify_admins
+from app.config.settings import settings
+from app.sheets import references
+from app.utils.logger import log
+
+
+async def feed_depletion_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Предупреждает администраторов о кормах, которых осталось меньше чем на FEED_LOW_STOCK_LEAD_DAYS."""
+    try:
+        forecasts = [feed_depletion.forecast(ft) for ft in references.get_active_feed_types()]
+    except Exception as e:
+        log.error(f"Ошибка прогноза исчерпания корма: {e}")
+        return
+    low = [f for f in forecasts if f.is_low and feed_depletion.should_alert(f.feed_type.id)]
+    if not low:
+        return
+    lines = ["📉 Заканчивается корм:"]
+    for f in sorted(low, key=lambda f: f.days_left):
+        lines.append(
+            f"• {f.feed_type.name}: остаток {f.balance_kg:.1f} кг, расход ≈ {f.daily_kg:.1f} кг/сут "
+            f"- хватит на {f.days_left:.1f} дн."
+        )
+    log.info(f"Низкий остаток корма: {', '.join(f.feed_type.name for f in low)}.")
+    # Пауза до следующего предупреждения начинается только после доставки:
+    # иначе сбой отправки заглушил бы предупреждение на весь период
+    if await notify_admins(context, "\n".join(lines)):
+        for f in low:
+            feed_depletion.mark_alerted(f.feed_type.id)
+
+
+def schedule_jobs(application: Application) -> None:
+    """Регистрирует периодические задачи. Без JobQueue (не установлен extra job-queue) задачи не запускаются."""
+    if application.job_queue is None:
+        log.warning("JobQueue недоступна: фоновые проверки отключены. Установите python-telegram-bot[job-queue].")
+        return
+    application.job_queue.run_repeating(
+        feed_depletion_job, interval=settings.FEED_FORECAST_INTERVAL_S, first=60, name="feed_depletion"
+    )
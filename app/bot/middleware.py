@@ -2,7 +2,11 @@ from functools import wraps
 from telegram import Update
 from telegram.ext import ContextTypes
 from app.models.user import UserRole
-from app.sheets.references import get_user_by_id
+from app.config.settings import settings
+from app.sheets.references import get_user_by_id, is_sheet_unavailable, is_sheet_stale
+
+SHEETS_UNAVAILABLE_TEXT = "⚠️ Сервис временно недоступен (нет связи с Google Sheets). Попробуйте позже."
+SHEETS_STALE_TEXT = "⚠️ Нет связи с Google Sheets: данные могут быть устаревшими."
 
 def restricted(allowed_roles: list[UserRole], self_register: bool = False):
     """
@@ -16,6 +20,10 @@ def restricted(allowed_roles: list[UserRole], self_register: bool = False):
             user = get_user_by_id(user_id)
 
             if not user:
+                # Пустой список пользователей из-за сбоя Sheets - это не "не зарегистрирован"
+                if is_sheet_unavailable(settings.SHEETS.USERS):
+                    await update.message.reply_text(SHEETS_UNAVAILABLE_TEXT)
+                    return
                 if self_register:
                     await update.message.reply_text(
                         "Вы не зарегистрированы в системе. "
@@ -33,6 +41,10 @@ def restricted(allowed_roles: list[UserRole], self_register: bool = False):
                 await update.message.reply_text("⛔️ У вас нет доступа к этой команде.")
                 return
             
+            # Пользователь найден в локальной копии, но свежие данные прочитать не удалось
+            if is_sheet_stale(settings.SHEETS.USERS):
+                await update.message.reply_text(SHEETS_STALE_TEXT)
+
             context.user_data['current_user'] = user
             return await func(update, context, *args, **kwargs)
         return wrapped
@@ -4,15 +4,17 @@ from telegram.error import Forbidden
 from app.sheets import references
 from app.utils.logger import log
 
-async def notify_admins(context: ContextTypes.DEFAULT_TYPE, message: str, parse_mode: str = None):
+async def notify_admins(context: ContextTypes.DEFAULT_TYPE, message: str, parse_mode: str = None) -> bool:
     """
     Отправляет сообщение всем администраторам, у которых включены уведомления.
+    Возвращает True, если сообщение доставлено хотя бы одному администратору.
     """
     admin_users = references.get_admins()
     if not admin_users:
         log.warning("В системе не найдены администраторы для отправки уведомления.")
-        return
+        return False
 
+    delivered = False
     for admin in admin_users:
         # --- ГЛАВНОЕ ИЗМЕНЕНИЕ: Проверяем флаг ---
         if not admin.notifications_enabled:
@@ -24,7 +26,9 @@ async def notify_admins(context: ContextTypes.DEFAULT_TYPE, message: str, parse_
                 text=message,
                 parse_mode=parse_mode
             )
+            delivered = True
         except Forbidden:
             log.warning(f"Не удалось отправить уведомление администратору {admin.name} ({admin.id}). Бот заблокирован.")
         except Exception as e:
-            log.error(f"Непредвиденная ошибка при отправке уведомления администратору {admin.id}: {e}")
\ No newline at end of file
+            log.error(f"Непредвиденная ошибка при отправке уведомления администратору {admin.id}: {e}")
+    return delivered
\ No newline at end of file
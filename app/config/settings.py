@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Определяем базовую директорию проекта
@@ -15,6 +16,7 @@ class SheetNames:
     WATER_QUALITY_LOG = "WATER_QUALITY_LOG"
     FEEDING_LOG = "FEEDING_LOG"
     WEIGHING_LOG = "WEIGHING_LOG"
+    WEIGHING_SAMPLES = "WEIGHING_SAMPLES"
     FISH_MOVES_LOG = "FISH_MOVES_LOG"
     STOCK_MOVES_LOG = "STOCK_MOVES_LOG"
     SALES_ORDERS = "SALES_ORDERS"
@@ -44,14 +46,104 @@ class Settings(BaseSettings):
     DO_MAX: float = 20.0
     TEMP_MIN: float = -2.0
     TEMP_MAX: float = 35.0
+    # Насыщение кислородом: алерт, если DO ниже этой доли от равновесной растворимости
+    DO_SATURATION_MIN_PCT: float = 50.0
+    # Высота водоёмов над уровнем моря, м (поправка растворимости кислорода на давление)
+    SITE_ALTITUDE_M: float = 0.0
+
+    # Прогноз гипоксии: экспоненциально взвешенный тренд DO по последним замерам
+    HYPOXIA_TAU_HOURS: float = 6.0            # постоянная затухания весов замеров
+    HYPOXIA_LEAD_HOURS: float = 6.0           # предупреждать, если порог будет пройден раньше
+    # Минимум эффективного числа замеров (Σw)²/Σw² для прогноза: учитываются только
+    # недавние замеры; три замера с интервалом в час дают ≈2.9
+    HYPOXIA_MIN_EFFECTIVE_READINGS: float = 2.5
+    HYPOXIA_TEMP_REF_C: float = 20.0          # выше этой температуры порог DO поднимается
+    HYPOXIA_TEMP_COEF: float = 0.1            # на сколько мг/л на каждый °C выше опорной
+    HYPOXIA_ALERT_COOLDOWN_HOURS: float = 3.0  # не повторять предупреждение по водоёму чаще
+
+    # Мониторинг падежа: гибель в % от живого поголовья за скользящие окна
+    MORTALITY_ALERT_PCT_24H: float = 1.0       # порог за последние 24 часа
+    MORTALITY_ALERT_PCT_7D: float = 3.0        # порог за последние 7 дней
+    MORTALITY_ALERT_COOLDOWN_HOURS: float = 12.0
 
     # Пороги для взвешивания
     WEIGHING_AVG_WEIGHT_MAX_G: int = 10000
+    # Выборка взвешивания: число размерных классов гистограммы и максимальный размер выборки
+    WEIGHING_HISTOGRAM_BINS: int = 6
+    WEIGHING_SAMPLE_MAX_SIZE: int = 5000
+
+    # Проверка правдоподобия новых замеров по истории водоёма: предупреждать, если значение
+    # отличается от нормы больше чем на PLAUSIBILITY_SIGMAS стандартных отклонений.
+    # Норма воды - экспоненциально взвешенное среднее, вес замера убывает вдвое за
+    # PLAUSIBILITY_HALF_LIFE_DAYS; до PLAUSIBILITY_MIN_READINGS замеров проверка не делается.
+    # Норма веса - прогноз кривой роста, отклонение - PLAUSIBILITY_WEIGHT_REL_STD_PCT от прогноза.
+    # PLAUSIBILITY_MIN_STD - нижняя граница отклонения по показателю, чтобы почти постоянная
+    # история не давала ложных тревог
+    PLAUSIBILITY_SIGMAS: float = 3.0
+    PLAUSIBILITY_MIN_READINGS: int = 5
+    PLAUSIBILITY_HALF_LIFE_DAYS: float = 14.0
+    PLAUSIBILITY_WEIGHT_REL_STD_PCT: float = 10.0
+    PLAUSIBILITY_MIN_STD: dict[str, float] = {'dissolved_O2_mgL': 0.3, 'temperature_C': 0.5, 'avg_weight_g': 1.0}
 
     # Пороги для валидации вводимых данных
     MAX_FEEDING_MASS_KG: int = 500
     MAX_AVG_FISH_WEIGHT_G: int = 10000
+    # Запрещать кормление, если остатка корма на складе не хватает. По умолчанию выключено:
+    # пока начальные остатки не внесены приходом, остаток любого корма равен нулю и бот
+    # отклонял бы все кормления. Включать после того, как по каждому корму оформлен приход
+    # фактического остатка через складские операции; до этого остаток только показывается
+    FEED_STOCK_ENFORCE: bool = False
     
+    # Соединение с Google API: упреждающее обновление токена и пул keep-alive соединений
+    GOOGLE_TOKEN_REFRESH_MARGIN_S: int = 300
+    SHEETS_HTTP_POOL_SIZE: int = 10
+
+    # Circuit breaker для чтения из Google Sheets
+    SHEETS_BREAKER_FAILURE_THRESHOLD: int = 3
+    SHEETS_BREAKER_RESET_TIMEOUT_S: float = 30.0
+
+    # Локальная реплика таблицы в SQLite
+    REPLICA_DB_PATH: str = os.path.join(BASE_DIR, 'data', 'replica.sqlite3')
+    REPLICA_MAX_AGE_S: float = 60.0
+    REPLICA_SYNC_INTERVAL_S: float = 30.0
+    REPLICA_JOURNAL_FULL_SYNC_S: float = 6 * 3600.0
+
+    # Инкрементальные проекции журналов (аналитика): каталог контрольных точек
+    ANALYTICS_STATE_DIR: str = os.path.join(BASE_DIR, 'data', 'state')
+
+    # Модель роста: по скольким последним взвешиваниям оценивается скорость роста
+    # и на сколько дней после последнего взвешивания её можно экстраполировать
+    GROWTH_TAIL_POINTS: int = 3
+    GROWTH_MAX_EXTRAPOLATION_DAYS: int = 30
+
+    # Градусо-дни: суммируется превышение температуры воды над этой базовой (°C)
+    DEGREE_DAYS_BASE_TEMP_C: float = 0.0
+
+    # Рекомендация суточного рациона: насколько свежим должен быть замер температуры
+    RATION_TEMP_MAX_AGE_HOURS: float = 48.0
+
+    # План вылова: рост по термальному коэффициенту (TGC), падёж и корм по дням на горизонт
+    HARVEST_MARKET_WEIGHT_G: float = 1000.0       # товарная масса
+    HARVEST_HORIZON_DAYS: int = 180
+    HARVEST_TGC: float = 3.0                       # прирост куб. корня массы на 1000 градусо-дней
+    HARVEST_GROWTH_BASE_TEMP_C: float = 8.0        # ниже этой температуры рыба не растёт
+    HARVEST_TEMP_WINDOW_DAYS: int = 7              # по скольким дням замеров берётся температура водоёма
+    HARVEST_TEMP_SCENARIOS_C: list[float] = [-2.0, 0.0, 2.0]  # сценарии: отклонение температуры
+    HARVEST_MIN_DAILY_MORTALITY_PCT: float = 0.02  # суточный падёж, если за неделю падежа не было
+
+    # Прогноз исчерпания корма: экспоненциально взвешенный суточный расход
+    FEED_RATE_SPAN_DAYS: float = 7.0              # "память" сглаживания (alpha = 2 / (span + 1))
+    FEED_LOW_STOCK_LEAD_DAYS: float = 5.0         # предупреждать, если корма осталось меньше чем на столько дней
+    FEED_FORECAST_INTERVAL_S: int = 6 * 60 * 60   # период фоновой проверки
+    FEED_LOW_STOCK_ALERT_COOLDOWN_HOURS: float = 24.0
+
+    # Сводная таблица кормления (водоём × день): сколько последних дней показывать в сообщении,
+    # полный месяц выгружается CSV-файлом
+    FEED_PIVOT_TEXT_DAYS: int = 7
+
+    # Оценка себестоимости корма для прибыли по водоёмам: "fifo" или "average" (средневзвешенная)
+    FEED_COST_METHOD: Literal['fifo', 'average'] = 'fifo'
+
     # Настройки интерфейса
     PAGINATION_PAGE_SIZE: int = 5
 
@@ -1,8 +1,14 @@
 # app/flows/admin.py
 
+import asyncio
+import html
+from datetime import datetime, timedelta
 from enum import Enum, auto
+
+import numpy as np
 from app.bot.keyboards import ReplyButton
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardRemove
+from telegram.constants import MessageLimit
 from telegram.ext import (
     ContextTypes,
     ConversationHandler,
@@ -15,9 +21,43 @@ from app.bot.middleware import restricted
 from app.bot.keyboards import create_paginated_keyboard, create_main_menu_keyboard, ReplyButton
 from app.models.user import User, UserRole
 from app.sheets import references
+from app.config.settings import settings
+from app.analytics.growth import estimate_biomass
+from app.analytics.degree_days import degree_days
+from app.analytics.water import water_rollups
+from app.analytics.sales import sales_analytics
+from app.analytics.profit import profit_ledger
+from app.analytics.reconcile import RULES, reconciler
+from app.analytics.cohorts import cohort_ledger
+from app.analytics.harvest import DAYS_PER_WEEK, plan_harvest
+from app.analytics.feed_pivot import feed_pivot
 from app.utils.logger import log
 from .common import cancel
 
+# Сколько нарушений сверки показывать в сообщении (лимит длины сообщения Telegram)
+RECONCILE_SHOWN_VIOLATIONS = 10
+# Ширина колонки с названием водоёма в сводной таблице кормления
+PIVOT_NAME_WIDTH = 10
+
+
+def _fit_message(lines: list[str], footer: str) -> str:
+    """
+    Склеивает строки отчёта в одно сообщение Telegram. Если текст длиннее лимита,
+    последние строки отбрасываются целиком (HTML-теги внутри строки не разрываются)
+    и добавляется footer.
+    """
+    text = "\n".join(lines)
+    if len(text) <= MessageLimit.MAX_TEXT_LENGTH:
+        return text
+    budget = MessageLimit.MAX_TEXT_LENGTH - len(footer) - 1
+    kept, size = [], 0
+    for line in lines:
+        size += len(line) + 1
+        if size > budget:
+            break
+        kept.append(line)
+    return "\n".join(kept + [footer])
+
 class AdminState(Enum):
     ADMIN_MENU = auto()
     USER_MENU = auto()
@@ -26,6 +66,7 @@ class AdminState(Enum):
     ORDER_LIST = auto()
     ORDER_DETAILS = auto()
     SELECT_ROLE = auto()
+    ANALYTICS_MENU = auto()
 
 
 @restricted(allowed_roles=[UserRole.ADMIN])
@@ -34,6 +75,7 @@ async def admin_panel_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     keyboard = [
         [InlineKeyboardButton("👤 Управление пользователями", callback_data="goto_users")],
         [InlineKeyboardButton("📦 Управление заказами", callback_data="goto_orders")],
+        [InlineKeyboardButton("📊 Аналитика", callback_data="goto_analytics")],
         [InlineKeyboardButton("↩️ Выход", callback_data="exit")],
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -301,6 +343,294 @@ async def change_order_status(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     return await show_new_orders(update, context)
 
+# === ВЕТКА АНАЛИТИКИ ===
+
+async def show_analytics_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> AdminState:
+    """Меню аналитических отчётов."""
+    query = update.callback_query
+    await query.answer()
+    keyboard = [
+        [InlineKeyboardButton("🐟 Биомасса по водоёмам", callback_data="analytics_biomass")],
+        [InlineKeyboardButton("💧 Качество воды за неделю", callback_data="analytics_water")],
+        [InlineKeyboardButton("💰 Продажи за 30 дней", callback_data="analytics_sales")],
+        [InlineKeyboardButton("📈 Прибыль по водоёмам", callback_data="analytics_profit")],
+        [InlineKeyboardButton("🐠 Партии рыбы", callback_data="analytics_cohorts")],
+        [InlineKeyboardButton("🗓 План вылова", callback_data="analytics_harvest")],
+        [InlineKeyboardButton("🌾 Кормление по дням", callback_data="analytics_feed_pivot")],
+        [InlineKeyboardButton("🧮 Сверка данных", callback_data="analytics_reconcile")],
+        [InlineKeyboardButton("⬅️ Назад", callback_data="back_to_admin_menu")]
+    ]
+    await query.edit_message_text("Аналитика:", reply_markup=InlineKeyboardMarkup(keyboard))
+    return AdminState.ANALYTICS_MENU
+
+async def show_biomass(update: Update, context: ContextTypes.DEFAULT_TYPE) -> AdminState:
+    """Оценка текущей биомассы: поголовье × вес по кривой роста водоёма."""
+    query = update.callback_query
+    await query.answer()
+    keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="goto_analytics")]]
+    try:
+        estimates = estimate_biomass(references.get_active_ponds())
+        degree_days_by_pond = {e.pond.id: degree_days.since_stocking(e.pond) for e in estimates}
+    except Exception as e:
+        log.error(f"Ошибка оценки биомассы: {e}")
+        await query.edit_message_text("❌ Не удалось рассчитать биомассу.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    if not estimates:
+        await query.edit_message_text("Нет активных водоёмов.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    lines = ["<b>Оценка биомассы на сегодня:</b>\n"]
+    total_kg = 0.0
+    for e in estimates:
+        if e.biomass_kg is None:
+            lines.append(f"• {html.escape(e.pond.name)}: {e.count} шт., взвешиваний не было")
+            continue
+        total_kg += e.biomass_kg
+        line = (
+            f"• {html.escape(e.pond.name)}: {e.count} шт. × {e.avg_weight_g:.0f} г ≈ <b>{e.biomass_kg:.1f} кг</b> "
+            f"(взвешивание {e.last_weighing:%d.%m.%Y})"
+        )
+        dd = degree_days_by_pond[e.pond.id]
+        if dd is not None:
+            line += f", {dd:.0f} °C·сут с зарыбления"
+        lines.append(line)
+    lines.append(f"\n<b>Итого: {total_kg:.1f} кг</b>")
+    await query.edit_message_text("\n".join(lines), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    return AdminState.ANALYTICS_MENU
+
+async def show_water_report(update: Update, context: ContextTypes.DEFAULT_TYPE) -> AdminState:
+    """Сводка качества воды за 7 дней по посуточным агрегатам."""
+    query = update.callback_query
+    await query.answer()
+    keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="goto_analytics")]]
+    since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=6)
+    try:
+        lines = ["<b>Качество воды за 7 дней:</b>\n"]
+        for pond in references.get_active_ponds():
+            summary = water_rollups.summary(pond.id, since)
+            if summary is None:
+                lines.append(f"• {html.escape(pond.name)}: замеров не было")
+                continue
+            do, temp = summary.metrics['dissolved_O2_mgL'], summary.metrics['temperature_C']
+            sat = summary.metrics['do_saturation_pct']
+            lines.append(
+                f"• {html.escape(pond.name)}: DO мин {do.min:.1f} / ср {do.mean:.1f} мг/л "
+                f"({sat.min:.0f}…{sat.max:.0f}% насыщения), "
+                f"t {temp.min:.1f}…{temp.max:.1f} °C, замеров: {summary.count}"
+            )
+    except Exception as e:
+        log.error(f"Ошибка построения сводки качества воды: {e}")
+        await query.edit_message_text("❌ Не удалось построить сводку.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+    await query.edit_message_text("\n".join(lines), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    return AdminState.ANALYTICS_MENU
+
+async def show_sales_report(update: Update, context: ContextTypes.DEFAULT_TYPE) -> AdminState:
+    """Выручка за 30 дней по статусам и по товарам (без отменённых заказов)."""
+    query = update.callback_query
+    await query.answer()
+    keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="goto_analytics")]]
+    since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=29)
+    try:
+        by_status = sales_analytics.aggregate('status', since=since)
+        by_product = sales_analytics.aggregate('product', since=since, exclude_statuses=["cancelled"])
+    except Exception as e:
+        log.error(f"Ошибка построения отчёта по продажам: {e}")
+        await query.edit_message_text("❌ Не удалось построить отчёт.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    if not by_status:
+        await query.edit_message_text("За 30 дней заказов не было.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    lines = ["<b>Продажи за 30 дней:</b>\n"]
+    for g in by_status:
+        lines.append(f"• {html.escape(g.label)}: {g.orders} заказов на {g.revenue:.2f} грн")
+    lines.append("\n<b>По товарам (без отменённых):</b>")
+    for g in by_product[:10]:
+        lines.append(f"• {html.escape(g.label)}: {g.quantity:g} ед. в {g.orders} заказах, <b>{g.revenue:.2f} грн</b>")
+    total = sum(g.revenue for g in by_product)
+    lines.append(f"\n<b>Итого: {total:.2f} грн</b>")
+    await query.edit_message_text("\n".join(lines), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    return AdminState.ANALYTICS_MENU
+
+async def show_profit_report(update: Update, context: ContextTypes.DEFAULT_TYPE) -> AdminState:
+    """Прибыль по водоёмам: выручка от продажи рыбы минус себестоимость скормленного корма."""
+    query = update.callback_query
+    await query.answer()
+    keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="goto_analytics")]]
+    try:
+        profits = profit_ledger.profit(references.get_all_ponds())
+    except Exception as e:
+        log.error(f"Ошибка расчёта прибыли по водоёмам: {e}")
+        await query.edit_message_text("❌ Не удалось рассчитать прибыль.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    profits = [p for p in profits if p.revenue or p.feed_kg]
+    if not profits:
+        await query.edit_message_text("Нет ни продаж, ни кормлений.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    lines = ["<b>Прибыль по водоёмам:</b>\n"]
+    for p in profits:
+        line = (
+            f"• {html.escape(p.pond.name)}: выручка {p.revenue:.2f} грн, корм {p.feed_kg:.1f} кг на {p.feed_cost:.2f} грн "
+            f"→ <b>{p.profit:.2f} грн</b>"
+        )
+        if p.unvalued_feed_kg > 0:
+            line += f" (не оценено {p.unvalued_feed_kg:.1f} кг корма - нет партии с ценой)"
+        lines.append(line)
+    lines.append(f"\n<b>Итого: {sum(p.profit for p in profits):.2f} грн</b>")
+    await query.edit_message_text("\n".join(lines), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    return AdminState.ANALYTICS_MENU
+
+async def show_cohorts_report(update: Update, context: ContextTypes.DEFAULT_TYPE) -> AdminState:
+    """Партии рыбы по водоёмам: остаток, выживаемость и прирост каждой партии."""
+    query = update.callback_query
+    await query.answer()
+    keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="goto_analytics")]]
+    try:
+        ponds = references.get_active_ponds()
+        shares = {pond.id: cohort_ledger.pond_cohorts(pond.id) for pond in ponds}
+    except Exception as e:
+        log.error(f"Ошибка расчёта партий рыбы: {e}")
+        await query.edit_message_text("❌ Не удалось рассчитать партии рыбы.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    lines = ["<b>Партии рыбы в водоёмах:</b>\n"]
+    for pond in ponds:
+        if not shares[pond.id]:
+            continue
+        lines.append(f"<b>{html.escape(pond.name)}</b>")
+        for share in shares[pond.id]:
+            c = share.cohort
+            line = (
+                f"• {html.escape(c.id)} (зарыбление {c.stocked_at:%d.%m.%Y}): {share.quantity} шт., "
+                f"выживаемость {c.survival_pct:.1f}%"
+            )
+            if c.daily_gain_g is not None:
+                line += f", прирост {c.daily_gain_g:.1f} г/сут"
+            lines.append(line)
+    if len(lines) == 1:
+        lines.append("Зарыблений в журнале нет.")
+    text = _fit_message(lines, "… список сокращён: не помещается в одно сообщение.")
+    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    return AdminState.ANALYTICS_MENU
+
+async def show_harvest_plan(update: Update, context: ContextTypes.DEFAULT_TYPE) -> AdminState:
+    """План вылова: дата товарной массы по водоёмам, вылов и корм по неделям."""
+    query = update.callback_query
+    await query.answer()
+    keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="goto_analytics")]]
+    try:
+        plan = plan_harvest(references.get_active_ponds())
+    except Exception as e:
+        log.error(f"Ошибка расчёта плана вылова: {e}")
+        await query.edit_message_text("❌ Не удалось рассчитать план вылова.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    if not plan.ponds:
+        await query.edit_message_text(
+            "Нет водоёмов с поголовьем, взвешиваниями и свежими замерами температуры.",
+            reply_markup=InlineKeyboardMarkup(keyboard),
+        )
+        return AdminState.ANALYTICS_MENU
+
+    # Основной сценарий - без отклонения температуры (или средний из заданных)
+    offsets = list(plan.offsets_c)
+    base = offsets.index(0.0) if 0.0 in offsets else len(offsets) // 2
+    lines = [f"<b>План вылова (товарная масса {settings.HARVEST_MARKET_WEIGHT_G:.0f} г):</b>\n"]
+    for p, pond in enumerate(plan.ponds):
+        harvest_date = plan.harvest_date(base, p)
+        if harvest_date is None:
+            lines.append(f"• {html.escape(pond.name)}: не достигнет за {plan.feed_kg.shape[2]} дн.")
+            continue
+        scenarios = ", ".join(
+            f"{offsets[s]:+.0f} °C: " + (f"{d:%d.%m}" if (d := plan.harvest_date(s, p)) else "—")
+            for s in range(len(offsets)) if s != base
+        )
+        line = f"• {html.escape(pond.name)}: <b>{harvest_date:%d.%m.%Y}</b>, ≈{plan.harvest_kg[base, p]:.0f} кг"
+        lines.append(line + (f" ({scenarios})" if scenarios else ""))
+    if plan.skipped:
+        lines.append(f"Нет данных: {', '.join(html.escape(pond.name) for pond in plan.skipped)}")
+
+    weekly = plan.weekly_harvest_kg(base)
+    feed = plan.weekly_feed_kg(base)
+    if weekly.any():
+        lines.append("\n<b>Вылов по неделям:</b>")
+        for week in np.flatnonzero(weekly):
+            lines.append(f"• неделя с {plan.start + timedelta(days=int(week) * DAYS_PER_WEEK):%d.%m}: {weekly[week]:.0f} кг")
+    lines.append(f"\nКорм на ближайшие 4 недели: ≈{feed[:4].sum():.0f} кг")
+    await query.edit_message_text("\n".join(lines), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    return AdminState.ANALYTICS_MENU
+
+async def show_feed_pivot(update: Update, context: ContextTypes.DEFAULT_TYPE) -> AdminState:
+    """Кормление за текущий месяц: водоём × день по типам корма, полный месяц - CSV-файлом."""
+    query = update.callback_query
+    await query.answer()
+    keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="goto_analytics")]]
+    today = datetime.now().date()
+    try:
+        table = feed_pivot.pivot(today.year, today.month)
+        names = {pond.id: pond.name for pond in references.get_active_ponds()}
+    except Exception as e:
+        log.error(f"Ошибка построения сводной таблицы кормления: {e}")
+        await query.edit_message_text("❌ Не удалось построить таблицу кормления.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    if not table.mass_kg.any():
+        await query.edit_message_text(
+            f"Кормлений за {today:%m.%Y} не было.", reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        return AdminState.ANALYTICS_MENU
+
+    # В сообщении - последние FEED_PIVOT_TEXT_DAYS дней и итог за месяц, кг
+    last = today.day
+    first = max(1, last - settings.FEED_PIVOT_TEXT_DAYS + 1)
+    header = " " * PIVOT_NAME_WIDTH + "".join(f"{day:>4}" for day in range(first, last + 1)) + "     Σ"
+    lines = [f"<b>Кормление за {today:%m.%Y}, кг</b> (дни {first}–{last}, полный месяц - в файле)"]
+    for f in np.flatnonzero(table.mass_kg.sum(axis=(1, 2))):
+        rows = [header]
+        for p in np.flatnonzero(table.mass_kg[f].sum(axis=1)):
+            name = names.get(table.ponds[p], table.ponds[p])[:PIVOT_NAME_WIDTH]
+            days = table.mass_kg[f, p, first - 1:last]
+            cells = "".join(f"{v:>4.0f}" if v else "   ·" for v in days)
+            rows.append(f"{name:<{PIVOT_NAME_WIDTH}}{cells}{table.mass_kg[f, p].sum():>6.0f}")
+        body = html.escape("\n".join(rows))
+        lines.append(f"\n🌾 {html.escape(table.feeds[f])}\n<pre>{body}</pre>")
+    text = _fit_message(lines, "\n… остальные корма не помещаются в сообщение - смотрите файл.")
+    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    await context.bot.send_document(
+        chat_id=query.message.chat_id, document=table.to_csv(), filename=f"feeding_{today:%Y_%m}.csv"
+    )
+    return AdminState.ANALYTICS_MENU
+
+async def show_reconcile_report(update: Update, context: ContextTypes.DEFAULT_TYPE) -> AdminState:
+    """Сверка согласованности журналов: число нарушений по правилам и первые из них."""
+    query = update.callback_query
+    await query.answer()
+    keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="goto_analytics")]]
+    try:
+        # Полный проход по журналам - в отдельном потоке, чтобы не блокировать бота
+        report = await asyncio.to_thread(reconciler.run)
+    except Exception as e:
+        log.error(f"Ошибка сверки журналов: {e}")
+        await query.edit_message_text("❌ Не удалось выполнить сверку.", reply_markup=InlineKeyboardMarkup(keyboard))
+        return AdminState.ANALYTICS_MENU
+
+    lines = [f"<b>Сверка данных:</b> проверено {report.rows_checked} строк за {report.elapsed_s:.1f} с\n"]
+    if not report.violations:
+        lines.append("✅ Нарушений не найдено.")
+    else:
+        for rule, count in report.by_rule.most_common():
+            lines.append(f"• {RULES[rule]}: {count}")
+        lines.append("\n<b>Первые нарушения:</b>")
+        for v in report.violations[:RECONCILE_SHOWN_VIOLATIONS]:
+            lines.append(f"• {v.sheet}, строка {v.row}: {html.escape(v.message)}")
+    await query.edit_message_text("\n".join(lines), reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    return AdminState.ANALYTICS_MENU
+
 async def exit_admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
@@ -319,6 +649,7 @@ admin_conv_handler = ConversationHandler(
         AdminState.ADMIN_MENU: [
             CallbackQueryHandler(show_user_menu, pattern="^goto_users$"),
             CallbackQueryHandler(show_new_orders, pattern="^goto_orders$"),
+            CallbackQueryHandler(show_analytics_menu, pattern="^goto_analytics$"),
             CallbackQueryHandler(exit_admin_panel, pattern="^exit$"),
             # FIX: Add a handler for the 'back' button in this state
             CallbackQueryHandler(admin_panel_start, pattern="^back_to_admin_menu$"), 
@@ -349,6 +680,18 @@ admin_conv_handler = ConversationHandler(
         AdminState.ORDER_DETAILS: [
             CallbackQueryHandler(change_order_status, pattern="^status_"),
             CallbackQueryHandler(show_new_orders, pattern="^goto_orders$"),
+        ],
+        AdminState.ANALYTICS_MENU: [
+            CallbackQueryHandler(show_biomass, pattern="^analytics_biomass$"),
+            CallbackQueryHandler(show_water_report, pattern="^analytics_water$"),
+            CallbackQueryHandler(show_sales_report, pattern="^analytics_sales$"),
+            CallbackQueryHandler(show_profit_report, pattern="^analytics_profit$"),
+            CallbackQueryHandler(show_cohorts_report, pattern="^analytics_cohorts$"),
+            CallbackQueryHandler(show_harvest_plan, pattern="^analytics_harvest$"),
+            CallbackQueryHandler(show_feed_pivot, pattern="^analytics_feed_pivot$"),
+            CallbackQueryHandler(show_reconcile_report, pattern="^analytics_reconcile$"),
+            CallbackQueryHandler(show_analytics_menu, pattern="^goto_analytics$"),
+            CallbackQueryHandler(admin_panel_start, pattern="^back_to_admin_menu$"),
         ]
     },
     fallbacks=[CommandHandler("cancel", cancel)],
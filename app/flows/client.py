@@ -167,6 +167,7 @@ async def finalize_order(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         logs.append_sales_order(order_row)
         
         admin_order_details = ""
+        item_rows = []
         # ИСПРАВЛЕНИЕ 2 (улучшение надежности)
         for item_data in cart.values():
             product_obj = Product.model_validate(item_data['product'])
@@ -178,8 +179,10 @@ async def finalize_order(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 quantity=item_data['quantity'], 
                 price_per_unit=product_obj.price
             )
-            logs.append_sales_order_item(item_row)
+            item_rows.append(item_row)
             admin_order_details += f" • {item_row.product_name}: {item_row.quantity} {product_obj.unit}\n"
+        # Позиции заказа - одним запросом
+        logs.append_sales_order_items(item_rows)
 
         references.get_all_orders.cache_clear()
         references.get_all_order_items.cache_clear()
@@ -9,8 +9,13 @@ from __future__ import annotations # Позволяет использовать
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 
+from app.analytics.feed_stock import feed_stock
+from app.bot.middleware import SHEETS_STALE_TEXT, SHEETS_UNAVAILABLE_TEXT
+from app.config.settings import settings
 from app.models.user import User # <-- ДОБАВЛЕН ИМПОРТ
 from app.sheets import references
+from app.sheets.references import is_sheet_stale, is_sheet_unavailable
+from app.utils.logger import log
 
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -57,6 +62,9 @@ async def ask_for_pond_selection(update: Update, text: str) -> bool:
     
     # Обрабатываем случай, когда водоёмов нет
     if not ponds:
+        if is_sheet_unavailable(settings.SHEETS.PONDS):
+            await update.message.reply_text(SHEETS_UNAVAILABLE_TEXT)
+            return False
         await update.message.reply_text(
             "В системе нет активных водоёмов. Обратитесь к администратору, чтобы добавить или активировать их."
         )
@@ -68,11 +76,23 @@ async def ask_for_pond_selection(update: Update, text: str) -> bool:
         for p in ponds
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
+    if is_sheet_stale(settings.SHEETS.PONDS):
+        text = f"{SHEETS_STALE_TEXT}\n\n{text}"
     
     # Отправляем сообщение с запросом
     await update.message.reply_text(text, reply_markup=reply_markup)
     return True
 
+def stock_hint(feed_type) -> str:
+    """Строка с остатком корма на складе или пустая строка, если остаток не удалось рассчитать."""
+    try:
+        balance = feed_stock.balance(feed_type)
+    except Exception as e:
+        # Остаток - справочная информация, его ошибка не должна прерывать диалог
+        log.error(f"Не удалось рассчитать остаток корма {feed_type.id}: {e}")
+        return ""
+    return f"\nОстаток на складе: {balance} кг."
+
 async def handle_expired_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Обрабатывает нажатия на inline-кнопки, которые "устарели" после перезапуска бота.
@@ -1,7 +1,7 @@
 # app/flows/operator.py
 
 from app.bot.keyboards import ReplyButton
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum, auto
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
@@ -16,12 +16,21 @@ from app.bot.middleware import restricted
 from app.models.user import UserRole
 from app.models.water import WaterQualityRow
 from app.models.feeding import FeedingRow
-from app.models.weighing import WeighingRow
+from app.models.weighing import WeighingRow, WeighingSampleRow
 from app.models.fish import FishMoveRow, FishMoveType
 from app.sheets import references, logs
+from app.analytics.population import population_ledger
+from app.analytics.feed_stock import feed_stock
+from app.analytics.hypoxia import hypoxia_monitor
+from app.analytics.ration import suggest_ration
+from app.analytics.mortality import mortality_monitor
+from app.analytics.oxygen import saturation_pct
+from app.analytics.plausibility import water_plausibility, weighing_plausibility
+from app.analytics.weighing import encode_sample, parse_csv, parse_sample, summarize
+from app.config.settings import settings
 from app.bot.notifications import notify_admins
 from app.utils.logger import log
-from .common import cancel, ask_for_pond_selection
+from .common import cancel, ask_for_pond_selection, stock_hint
 
 
 class State(Enum):
@@ -51,11 +60,38 @@ class State(Enum):
     SELECT_POND_FM_DEST = auto()
     ENTER_QUANTITY_FM = auto()
     ENTER_AVG_WEIGHT_FM = auto()
+    ENTER_AMOUNT_FM = auto()
     ENTER_REASON_FM = auto()
     ENTER_REF_FM = auto()
     CONFIRM_FISH_MOVE = auto()
 
 
+_METRIC_LABELS = {
+    'dissolved_O2_mgL': ("DO", "мг/л"),
+    'temperature_C': ("Температура", "°C"),
+    'avg_weight_g': ("Средний вес", "г"),
+}
+
+
+def _plausibility_warning(stats, pond, values: dict[str, float]) -> str:
+    """Предупреждение о значениях, далёких от истории водоёма, или пустая строка."""
+    try:
+        deviations = stats.check(pond.id, values)
+    except Exception as e:
+        log.error(f"Не удалось проверить правдоподобие замера для водоёма {pond.id}: {e}")
+        return ""
+    if not deviations:
+        return ""
+    lines = []
+    for d in deviations:
+        label, unit = _METRIC_LABELS[d.metric]
+        lines.append(
+            f"{label}: {d.value:g} {unit} - обычно {d.mean:.1f} ± {d.std:.1f} {unit} "
+            f"(отклонение {d.sigmas:.1f}σ)"
+        )
+    return "\n\n⚠️ Проверьте значения, они необычны для этого водоёма:\n" + "\n".join(lines)
+
+
 # === СЦЕНАРИЙ ЗАМЕРА ВОДЫ ===
 
 @restricted(allowed_roles=[UserRole.OPERATOR, UserRole.ADMIN])
@@ -98,8 +134,13 @@ async def temp_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> S
 
         summary = (f"Подтвердите данные:\n\n"
                    f"Водоём: {context.user_data['pond'].name}\n"
-                   f"DO: {context.user_data['do']} мг/л\n"
+                   f"DO: {context.user_data['do']} мг/л "
+                   f"({saturation_pct(context.user_data['do'], temp_value):.0f}% насыщения)\n"
                    f"Температура: {temp_value} °C")
+        summary += _plausibility_warning(
+            water_plausibility, context.user_data['pond'],
+            {'dissolved_O2_mgL': context.user_data['do'], 'temperature_C': temp_value},
+        )
         keyboard = [[InlineKeyboardButton("✅ Сохранить", callback_data="confirm_save"), InlineKeyboardButton("❌ Отмена", callback_data="cancel_op")]]
         await update.message.reply_text(summary, reply_markup=InlineKeyboardMarkup(keyboard))
         return State.CONFIRM_WATER
@@ -108,6 +149,29 @@ async def temp_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> S
         return State.ENTER_TEMP
 
 
+async def _warn_hypoxia_forecast(context: ContextTypes.DEFAULT_TYPE, pond) -> bool:
+    """Раннее предупреждение, если по тренду DO скоро опустится ниже порога."""
+    try:
+        forecast = hypoxia_monitor.forecast(pond.id)
+    except Exception as e:
+        log.error(f"Ошибка прогноза DO для водоёма {pond.id}: {e}")
+        return False
+    if forecast is None or not hypoxia_monitor.should_alert(pond.id):
+        return False
+    eta = datetime.now() + timedelta(hours=forecast.hours_to_threshold)
+    delivered = await notify_admins(context, (
+        f"⚠️ Прогноз гипоксии!\n"
+        f"Водоём: {pond.name}\n"
+        f"DO сейчас ≈ {forecast.do_now:.1f} мг/л, снижается на {-forecast.slope_per_hour:.2f} мг/л в час.\n"
+        f"Порог {forecast.threshold:.1f} мг/л (при {forecast.temperature_C:.1f} °C) "
+        f"будет достигнут примерно через {forecast.hours_to_threshold:.1f} ч (≈ {eta:%H:%M})."
+    ))
+    # Пауза начинается только после доставки, иначе сбой отправки заглушил бы следующее предупреждение
+    if delivered:
+        hypoxia_monitor.mark_alerted(pond.id)
+    return delivered
+
+
 async def save_water_data(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
@@ -117,17 +181,20 @@ async def save_water_data(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             pond_id=context.user_data['pond'].id,
             dissolved_O2_mgL=context.user_data['do'],
             temperature_C=context.user_data['temp'],
-            user=f"{context.user_data['current_user'].name} ({context.user_data['current_user'].id})"
+            user=f"{context.user_data['current_user'].name} ({context.user_data['current_user'].id})",
+            do_saturation_pct=round(float(saturation_pct(context.user_data['do'], context.user_data['temp'])), 1),
         )
         logs.append_water_quality(row_data)
         if row_data.is_critical():
             alert_message = (f"🚨 ВНИМАНИЕ! Критические параметры воды!\n"
                              f"Водоём: {context.user_data['pond'].name}\n"
-                             f"DO: {row_data.dissolved_O2_mgL} мг/л\n"
+                             f"DO: {row_data.dissolved_O2_mgL} мг/л ({row_data.do_saturation_pct:.0f}% насыщения)\n"
                              f"Температура: {row_data.temperature_C} °C")
             await notify_admins(context, alert_message)
             
             await query.edit_message_text(f"Сохранено! Администраторы уведомлены о крит. параметрах.")
+        elif await _warn_hypoxia_forecast(context, context.user_data['pond']):
+            await query.edit_message_text("✅ Данные сохранены. ⚠️ DO снижается - администраторы предупреждены.")
         else:
             await query.edit_message_text("✅ Данные успешно сохранены.")
     except Exception as e:
@@ -190,14 +257,70 @@ async def feed_type_selected(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return ConversationHandler.END
     context.user_data['feed_type'] = feed_type
 
-    await query.edit_message_text(f"Корм: {feed_type.name}.\n\nВведите массу корма в кг (например, 25.5):")
+    ration_text = _ration_hint(context.user_data['pond'])
+    await query.edit_message_text(f"Корм: {feed_type.name}.{stock_hint(feed_type)}{ration_text}\n\nВведите массу корма в кг (например, 25.5):")
     return State.ENTER_MASS_F
 
 
+def _population_hint(pond) -> str:
+    """Строка с текущим поголовьем водоёма или пустая строка, если его не удалось рассчитать."""
+    try:
+        count = population_ledger.count(pond)
+    except Exception as e:
+        # Поголовье - справочная информация, его ошибка не должна прерывать диалог
+        log.error(f"Не удалось рассчитать поголовье водоёма {pond.id}: {e}")
+        return ""
+    return f"\nСейчас в водоёме: {count} шт."
+
+
+def _ration_hint(pond) -> str:
+    """Строка с рекомендуемым суточным рационом или пустая строка, если данных для расчёта нет."""
+    try:
+        suggestion = suggest_ration(pond)
+    except Exception as e:
+        log.error(f"Не удалось рассчитать рацион для водоёма {pond.id}: {e}")
+        return ""
+    if suggestion is None:
+        return ""
+    text = (
+        f"\n💡 Рекомендуемый суточный рацион: {suggestion.ration_kg:.1f} кг "
+        f"({suggestion.rate_pct:.1f}% от ~{suggestion.biomass_kg:.0f} кг биомассы "
+        f"при {suggestion.temperature_C:.1f} °C, ср. вес {suggestion.avg_weight_g:.0f} г)."
+    )
+    if suggestion.fed_today_kg > 0:
+        text += (
+            f"\nСегодня уже скормлено {suggestion.fed_today_kg:.1f} кг, "
+            f"осталось {suggestion.remaining_kg:.1f} кг."
+        )
+    return text
+
+
+def _feed_shortage(feed_type, mass: float) -> float | None:
+    """Остаток корма, если его не хватает на кормление, иначе None.
+
+    Если остаток посчитать не удалось, кормление не блокируем.
+    """
+    try:
+        if feed_stock.can_consume(feed_type, mass):
+            return None
+        return feed_stock.balance(feed_type)
+    except Exception as e:
+        log.error(f"Не удалось проверить остаток корма {feed_type.id}: {e}")
+        return None
+
+
 async def mass_received_feeding(update: Update, context: ContextTypes.DEFAULT_TYPE) -> State:
     try:
         mass = float(update.message.text.replace(',', '.'))
         FeedingRow.model_validate({'ts': datetime.now(), 'pond_id': 'test', 'feed_type': 'test', 'mass_kg': mass, 'user': 'test'})
+        feed_type = context.user_data['feed_type']
+        balance = _feed_shortage(feed_type, mass) if settings.FEED_STOCK_ENFORCE else None
+        if balance is not None:
+            await update.message.reply_text(
+                f"❗️Недостаточно корма на складе. Остаток '{feed_type.name}': {balance} кг.\n"
+                "Введите меньшую массу или оформите приход корма через складские операции."
+            )
+            return State.ENTER_MASS_F
         context.user_data['mass'] = mass
 
         summary = (f"Подтвердите данные:\n\n"
@@ -262,39 +385,90 @@ async def pond_selected_for_weighing(update: Update, context: ContextTypes.DEFAU
         await query.edit_message_text("Ошибка: водоём не найден.")
         return ConversationHandler.END
     context.user_data['pond'] = pond
-    await query.edit_message_text(f"Водоём: {pond.name}.\n\nВведите средний вес одной рыбы в граммах (например, 350.5):")
+    await query.edit_message_text(
+        f"Водоём: {pond.name}.\n\nВведите средний вес одной рыбы в граммах (например, 350.5) "
+        f"или веса всей выборки через пробел. Выборку можно прислать и CSV-файлом."
+    )
     return State.ENTER_WEIGHT
 
 
+async def _confirm_weighing(update: Update, context: ContextTypes.DEFAULT_TYPE, sample=None) -> State:
+    """Сохраняет средний вес (и статистику выборки, если она есть) и просит подтверждения."""
+    summary = f"Подтвердите данные:\n\nВодоём: {context.user_data['pond'].name}\n"
+    if sample is None:
+        context.user_data.pop('sample', None)
+        context.user_data.pop('sample_stats', None)
+        summary += f"Средний вес: {context.user_data['weight']} г"
+    else:
+        stats = summarize(sample)
+        context.user_data['sample'] = sample
+        context.user_data['sample_stats'] = stats
+        context.user_data['weight'] = round(stats.mean_g, 1)
+        summary += (
+            f"Выборка: {stats.size} шт., {stats.min_g:g}…{stats.max_g:g} г\n"
+            f"Средний вес: {stats.mean_g:.1f} г, σ {stats.std_g:.1f} г, CV {stats.cv_pct:.1f}%\n"
+            f"Размерные классы:\n"
+        )
+        summary += "\n".join(f"  {lo:.0f}–{hi:.0f} г: {n} шт." for lo, hi, n in stats.histogram)
+    summary += _plausibility_warning(
+        weighing_plausibility, context.user_data['pond'], {'avg_weight_g': context.user_data['weight']}
+    )
+    keyboard = [[InlineKeyboardButton("✅ Сохранить", callback_data="confirm_save"), InlineKeyboardButton("❌ Отмена", callback_data="cancel_op")]]
+    await update.message.reply_text(summary, reply_markup=InlineKeyboardMarkup(keyboard))
+    return State.CONFIRM_WEIGHING
+
+
 async def weight_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> State:
     try:
-        weight = float(update.message.text.replace(',', '.'))
+        sample = parse_sample(update.message.text)
+        if sample.size > 1:
+            return await _confirm_weighing(update, context, sample)
+        weight = float(sample[0])
         WeighingRow.model_validate({'ts': datetime.now(), 'pond_id': 'test', 'avg_weight_g': weight, 'user': 'test'})
         context.user_data['weight'] = weight
-
-        summary = (f"Подтвердите данные:\n\n"
-                   f"Водоём: {context.user_data['pond'].name}\n"
-                   f"Средний вес: {weight} г")
-        keyboard = [[InlineKeyboardButton("✅ Сохранить", callback_data="confirm_save"), InlineKeyboardButton("❌ Отмена", callback_data="cancel_op")]]
-        await update.message.reply_text(summary, reply_markup=InlineKeyboardMarkup(keyboard))
-        return State.CONFIRM_WEIGHING
+        return await _confirm_weighing(update, context)
 
     except (ValueError, TypeError):
-        await update.message.reply_text("❗️Неверный формат. Введите положительное число.")
+        await update.message.reply_text(
+            "❗️Неверный формат. Введите положительное число или веса выборки через пробел "
+            f"(каждый до {settings.WEIGHING_AVG_WEIGHT_MAX_G} г)."
+        )
+        return State.ENTER_WEIGHT
+
+
+async def sample_file_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> State:
+    """Выборка взвешивания CSV-файлом."""
+    try:
+        file = await update.message.document.get_file()
+        data = await file.download_as_bytearray()
+        sample = parse_csv(bytes(data))
+    except ValueError as e:
+        await update.message.reply_text(f"❗️Не удалось прочитать выборку из файла: {e}")
         return State.ENTER_WEIGHT
+    return await _confirm_weighing(update, context, sample)
 
 
 async def save_weighing_data(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
     try:
+        now = datetime.now()
+        pond_id = context.user_data['pond'].id
+        stats = context.user_data.get('sample_stats')
         row = WeighingRow(
-            ts=datetime.now(),
-            pond_id=context.user_data['pond'].id,
+            ts=now,
+            pond_id=pond_id,
             avg_weight_g=context.user_data['weight'],
-            user=f"{context.user_data['current_user'].name} ({context.user_data['current_user'].id})"
+            user=f"{context.user_data['current_user'].name} ({context.user_data['current_user'].id})",
+            sample_size=stats.size if stats else None,
+            std_g=round(stats.std_g, 2) if stats else None,
+            cv_pct=round(stats.cv_pct, 2) if stats else None,
         )
         logs.append_weighing(row)
+        if stats:
+            logs.append_weighing_sample(WeighingSampleRow(
+                ts=now, pond_id=pond_id, sample_size=stats.size, weights=encode_sample(context.user_data['sample'])
+            ))
         await query.edit_message_text(f"✅ Данные о взвешивании для водоёма '{context.user_data['pond'].name}' сохранены.")
     except Exception as e:
         log.error(f"Ошибка сохранения данных о взвешивании: {e}")
@@ -308,7 +482,10 @@ weighing_conv_handler = ConversationHandler(
     entry_points=[MessageHandler(filters.Text(ReplyButton.WEIGHING), weighing_start)],
     states={
         State.SELECT_POND_WGH: [CallbackQueryHandler(pond_selected_for_weighing, pattern="^pond_")],
-        State.ENTER_WEIGHT: [MessageHandler(filters.TEXT & ~filters.COMMAND, weight_received)],
+        State.ENTER_WEIGHT: [
+            MessageHandler(filters.TEXT & ~filters.COMMAND, weight_received),
+            MessageHandler(filters.Document.ALL, sample_file_received),
+        ],
         State.CONFIRM_WEIGHING: [
             CallbackQueryHandler(save_weighing_data, pattern="^confirm_save$"),
             CallbackQueryHandler(cancel, pattern="^cancel_op$")
@@ -345,7 +522,10 @@ async def pond_src_selected_for_move(update: Update, context: ContextTypes.DEFAU
         [InlineKeyboardButton("☠️ Гибель", callback_data=f"move_{FishMoveType.DEATH.value}")],
         [InlineKeyboardButton("➡️ Перевод в другой водоём", callback_data="move_transfer")]
     ]
-    await query.edit_message_text(f"Водоём-источник: {pond.name}.\n\nВыберите тип операции:", reply_markup=InlineKeyboardMarkup(keyboard))
+    await query.edit_message_text(
+        f"Водоём-источник: {pond.name}.{_population_hint(pond)}\n\nВыберите тип операции:",
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
     return State.SELECT_MOVE_TYPE
 
 
@@ -419,6 +599,9 @@ async def avg_weight_received_fm(update: Update, context: ContextTypes.DEFAULT_T
         weight = float(update.message.text.replace(',', '.'))
         if weight < 0: raise ValueError
         context.user_data['avg_weight_g'] = weight if weight > 0 else None
+        if context.user_data['move_type'] == FishMoveType.SALE:
+            await update.message.reply_text("Введите сумму продажи в грн (или 'нет', если неизвестна):")
+            return State.ENTER_AMOUNT_FM
         await update.message.reply_text("Введите причину или комментарий (например, 'Плановый перевод'):")
         return State.ENTER_REASON_FM
     except (ValueError, TypeError):
@@ -426,9 +609,29 @@ async def avg_weight_received_fm(update: Update, context: ContextTypes.DEFAULT_T
         return State.ENTER_AVG_WEIGHT_FM
 
 
+async def amount_received_fm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> State:
+    # Только для продажи: выручка нужна для расчёта прибыли по водоёму
+    text = update.message.text.strip()
+    try:
+        if text.lower() == 'нет':
+            amount = None
+        else:
+            amount = float(text.replace(',', '.'))
+            if amount < 0: raise ValueError
+        context.user_data['amount'] = amount
+        await update.message.reply_text("Введите причину или комментарий (например, 'Продажа клиенту'):")
+        return State.ENTER_REASON_FM
+    except (ValueError, TypeError):
+        await update.message.reply_text("❗️Неверный формат. Введите неотрицательное число или 'нет'.")
+        return State.ENTER_AMOUNT_FM
+
+
 async def reason_received_fm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> State:
     context.user_data['reason'] = update.message.text
-    await update.message.reply_text("Введите ссылку на документ/заказ (например, 'Акт #25'). Можно пропустить, написав 'нет':")
+    await update.message.reply_text(
+        "Введите ссылку на документ/заказ (например, 'Акт #25'). При зарыблении она станет названием партии, "
+        "при списании можно указать партию, из которой списать рыбу. Можно пропустить, написав 'нет':"
+    )
     return State.ENTER_REF_FM
 
 
@@ -462,6 +665,12 @@ async def ref_received_fm(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     summary += (
         f"<b>Количество:</b> {quantity} шт.\n"
         f"<b>Средний вес:</b> {avg_weight or 'не указан'} г\n"
+    )
+    if move_type == FishMoveType.SALE:
+        amount = context.user_data.get('amount')
+        amount_text = f"{amount:.2f} грн" if amount is not None else "не указана"
+        summary += f"<b>Сумма:</b> {amount_text}\n"
+    summary += (
         f"<b>Причина:</b> {reason}\n"
         f"<b>Ссылка (ref):</b> {ref or 'нет'}"
     )
@@ -470,6 +679,28 @@ async def ref_received_fm(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     return State.CONFIRM_FISH_MOVE
 
 
+async def _warn_mortality(context: ContextTypes.DEFAULT_TYPE, pond) -> bool:
+    """Оповещает администраторов, если гибель за 24 часа или 7 дней превысила порог."""
+    try:
+        rate = mortality_monitor.rate(pond)
+    except Exception as e:
+        log.error(f"Ошибка расчёта падежа для водоёма {pond.id}: {e}")
+        return False
+    if not rate.exceeded or not mortality_monitor.should_alert(pond.id):
+        return False
+    delivered = await notify_admins(context, (
+        f"☠️ Повышенный падёж!\n"
+        f"Водоём: {pond.name}\n"
+        f"За 24 ч: {rate.deaths_24h} шт. ({rate.pct_24h:.2f}%, порог {settings.MORTALITY_ALERT_PCT_24H}%)\n"
+        f"За 7 дней: {rate.deaths_7d} шт. ({rate.pct_7d:.2f}%, порог {settings.MORTALITY_ALERT_PCT_7D}%)\n"
+        f"Живое поголовье: {rate.population} шт."
+    ))
+    # Пауза начинается только после доставки, иначе сбой отправки заглушил бы следующее предупреждение
+    if delivered:
+        mortality_monitor.mark_alerted(pond.id)
+    return delivered
+
+
 async def save_fish_move_data(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
@@ -501,8 +732,8 @@ async def save_fish_move_data(update: Update, context: ContextTypes.DEFAULT_TYPE
                 move_type=FishMoveType.TRANSFER_IN,
                 **common_data
             )
-            logs.append_fish_move(row_out)
-            logs.append_fish_move(row_in)
+            # Обе записи - одним запросом, чтобы перевод не записался наполовину
+            logs.append_fish_moves([row_out, row_in])
             await query.edit_message_text(f"✅ Перевод {common_data['quantity']} шт. из '{pond_src.name}' в '{pond_dest.name}' успешно зарегистрирован.")
 
         else:  # Иначе создаем одну запись
@@ -511,10 +742,14 @@ async def save_fish_move_data(update: Update, context: ContextTypes.DEFAULT_TYPE
             row = FishMoveRow(
                 pond_id=pond.id,
                 move_type=move_type,
+                amount=context.user_data.get('amount'),
                 **common_data
             )
             logs.append_fish_move(row)
-            await query.edit_message_text(f"✅ Операция '{move_type.value}' для водоёма '{pond.name}' успешно сохранена.")
+            text = f"✅ Операция '{move_type.value}' для водоёма '{pond.name}' успешно сохранена."
+            if move_type == FishMoveType.DEATH and await _warn_mortality(context, pond):
+                text += "\n⚠️ Падёж выше порога - администраторы предупреждены."
+            await query.edit_message_text(text)
 
     except Exception as e:
         log.error(f"Ошибка сохранения данных о движении рыбы: {e}")
@@ -531,6 +766,7 @@ fish_move_conv_handler = ConversationHandler(
         State.SELECT_POND_FM_DEST: [CallbackQueryHandler(pond_dest_selected_for_move, pattern="^ponddest_")],
         State.ENTER_QUANTITY_FM: [MessageHandler(filters.TEXT & ~filters.COMMAND, quantity_received_fm)],
         State.ENTER_AVG_WEIGHT_FM: [MessageHandler(filters.TEXT & ~filters.COMMAND, avg_weight_received_fm)],
+        State.ENTER_AMOUNT_FM: [MessageHandler(filters.TEXT & ~filters.COMMAND, amount_received_fm)],
         State.ENTER_REASON_FM: [MessageHandler(filters.TEXT & ~filters.COMMAND, reason_received_fm)],
         State.ENTER_REF_FM: [MessageHandler(filters.TEXT & ~filters.COMMAND, ref_received_fm)],
         State.CONFIRM_FISH_MOVE: [CallbackQueryHandler(save_fish_move_data, pattern="^confirm_save$"), CallbackQueryHandler(cancel, pattern="^cancel_op$")],
@@ -8,9 +8,10 @@
 2. Бот предлагает выбрать тип корма из справочника.
 3. Бот предлагает выбрать тип операции: "Приход" или "Расход".
 4. Бот запрашивает массу корма в килограммах.
-5. Бот запрашивает причину или комментарий к операции.
-6. Бот показывает сводку данных и просит подтвердить сохранение.
-7. После подтверждения данные записываются в лог складских операций.
+5. Для прихода бот запрашивает цену за кг (нужна для расчёта себестоимости корма).
+6. Бот запрашивает причину или комментарий к операции.
+7. Бот показывает сводку данных и просит подтвердить сохранение.
+8. После подтверждения данные записываются в лог складских операций.
 """
 from app.bot.keyboards import ReplyButton
 from datetime import datetime
@@ -29,7 +30,7 @@ from app.bot.middleware import restricted
 from app.models.user import UserRole
 from app.models.stock import StockMoveRow, StockMoveType
 from app.sheets import references, logs
-from .common import cancel
+from .common import cancel, stock_hint
 
 
 class StockState(Enum):
@@ -37,6 +38,7 @@ class StockState(Enum):
     SELECT_FEED = auto()
     SELECT_TYPE = auto()
     ENTER_MASS = auto()
+    ENTER_COST = auto()
     ENTER_REASON = auto()
     CONFIRM = auto()
 
@@ -73,7 +75,7 @@ async def feed_selected(update: Update, context: ContextTypes.DEFAULT_TYPE) -> S
         [InlineKeyboardButton("⬆️ Приход на склад", callback_data=f"type_{StockMoveType.INCOME.value}")],
         [InlineKeyboardButton("⬇️ Расход со склада", callback_data=f"type_{StockMoveType.OUTCOME.value}")]
     ]
-    await query.edit_message_text(f"Корм: {feed_type.name}.\nВыберите тип операции:", reply_markup=InlineKeyboardMarkup(keyboard))
+    await query.edit_message_text(f"Корм: {feed_type.name}.{stock_hint(feed_type)}\nВыберите тип операции:", reply_markup=InlineKeyboardMarkup(keyboard))
     return StockState.SELECT_TYPE
 
 
@@ -97,6 +99,9 @@ async def mass_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> S
         if mass <= 0:
             raise ValueError("Масса должна быть положительным числом.")
         context.user_data['stock_mass'] = mass
+        if context.user_data['stock_move_type'] == StockMoveType.INCOME:
+            await update.message.reply_text("Введите цену корма за кг в грн (например, 32.5). Если неизвестна, напишите 'нет':")
+            return StockState.ENTER_COST
         await update.message.reply_text("Введите причину/комментарий (например, 'Закупка по накладной #123', 'Списание по акту'):")
         return StockState.ENTER_REASON
     except (ValueError, TypeError):
@@ -104,6 +109,26 @@ async def mass_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> S
         return StockState.ENTER_MASS
 
 
+async def cost_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> StockState:
+    """
+    Принимает цену партии за кг (только для прихода) и запрашивает причину операции.
+    """
+    text = update.message.text.strip()
+    try:
+        if text.lower() == 'нет':
+            unit_cost = None
+        else:
+            unit_cost = float(text.replace(',', '.'))
+            if unit_cost < 0:
+                raise ValueError("Цена не может быть отрицательной.")
+        context.user_data['stock_unit_cost'] = unit_cost
+        await update.message.reply_text("Введите причину/комментарий (например, 'Закупка по накладной #123', 'Списание по акту'):")
+        return StockState.ENTER_REASON
+    except (ValueError, TypeError):
+        await update.message.reply_text("❗️Неверный формат. Введите неотрицательное число или 'нет'.")
+        return StockState.ENTER_COST
+
+
 async def reason_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> StockState:
     """
     Принимает причину, формирует сводку и запрашивает подтверждение.
@@ -114,14 +139,18 @@ async def reason_received(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     move_type = context.user_data['stock_move_type']
     mass = context.user_data['stock_mass']
     reason = context.user_data['stock_reason']
+    unit_cost = context.user_data.get('stock_unit_cost')
 
     summary = (
         f"<b>Подтвердите операцию:</b>\n\n"
         f"<b>Корм:</b> {feed.name}\n"
         f"<b>Операция:</b> {'Приход' if move_type == StockMoveType.INCOME else 'Расход'}\n"
         f"<b>Масса:</b> {mass} кг\n"
-        f"<b>Причина:</b> {reason}"
     )
+    if move_type == StockMoveType.INCOME:
+        cost_text = f"{unit_cost:.2f} грн/кг" if unit_cost is not None else "не указана"
+        summary += f"<b>Цена:</b> {cost_text}\n"
+    summary += f"<b>Причина:</b> {reason}"
     keyboard = [[
         InlineKeyboardButton("✅ Сохранить", callback_data="save"),
         InlineKeyboardButton("❌ Отмена", callback_data="cancel_op")
@@ -144,7 +173,8 @@ async def save_stock_move(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             move_type=context.user_data['stock_move_type'],
             mass_kg=context.user_data['stock_mass'],
             reason=context.user_data['stock_reason'],
-            user=f"{context.user_data['current_user'].name} ({context.user_data['current_user'].id})"
+            user=f"{context.user_data['current_user'].name} ({context.user_data['current_user'].id})",
+            unit_cost=context.user_data.get('stock_unit_cost'),
         )
         logs.append_stock_move(row)
         await query.edit_message_text("✅ Складская операция успешно сохранена.")
@@ -163,6 +193,7 @@ stock_conv_handler = ConversationHandler(
         StockState.SELECT_FEED: [CallbackQueryHandler(feed_selected, pattern="^feed_")],
         StockState.SELECT_TYPE: [CallbackQueryHandler(type_selected, pattern="^type_")],
         StockState.ENTER_MASS: [MessageHandler(filters.TEXT & ~filters.COMMAND, mass_received)],
+        StockState.ENTER_COST: [MessageHandler(filters.TEXT & ~filters.COMMAND, cost_received)],
         StockState.ENTER_REASON: [MessageHandler(filters.TEXT & ~filters.COMMAND, reason_received)],
         StockState.CONFIRM: [
             CallbackQueryHandler(save_stock_move, pattern="^save$"),
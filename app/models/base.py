@@ -1,5 +1,84 @@
+import types
+from datetime import date, datetime
+from enum import Enum
+from operator import attrgetter, methodcaller
+from typing import Any, Callable, Iterable, Union, get_args, get_origin
+
 from pydantic import BaseModel, Field
 
+
+def _convert_dynamic(value: Any) -> Any:
+    """Запасной конвертер для колонок, тип которых нельзя определить заранее."""
+    if hasattr(value, 'value'):  # Enum
+        return value.value
+    if hasattr(value, 'isoformat'):  # datetime/date
+        return value.isoformat()
+    return value
+
+
+_enum_to_cell = attrgetter('value')
+_datetime_to_cell = methodcaller('isoformat')
+
+
+def _converter_for(annotation: Any) -> Callable[[Any], Any] | None:
+    """
+    Подбирает конвертер значения колонки по аннотации поля.
+    None означает, что значение записывается в таблицу как есть.
+    """
+    if get_origin(annotation) in (Union, types.UnionType):
+        candidates = [arg for arg in get_args(annotation) if arg is not type(None)]
+    else:
+        candidates = [annotation]
+
+    if not all(isinstance(arg, type) for arg in candidates):
+        return _convert_dynamic
+    if all(issubclass(arg, Enum) for arg in candidates):
+        return _enum_to_cell
+    if all(issubclass(arg, (date, datetime)) for arg in candidates):
+        return _datetime_to_cell
+    if any(issubclass(arg, (Enum, date)) for arg in candidates):
+        return _convert_dynamic
+    return None
+
+
+class SheetRowSerializer:
+    """
+    Сериализатор строк для конкретной модели.
+    Собирается один раз на класс: для каждой колонки заранее выбран конвертер
+    (Enum, datetime или "как есть"), поэтому при записи не строится промежуточный dict
+    и не проверяется тип каждого значения.
+    """
+    __slots__ = ('_getter', '_single', '_converters')
+
+    def __init__(self, field_names: list[str], converters: list[Callable[[Any], Any] | None]):
+        self._getter = attrgetter(*field_names)
+        # attrgetter с одним аргументом возвращает значение, а не кортеж
+        self._single = len(field_names) == 1
+        self._converters = tuple((i, conv) for i, conv in enumerate(converters) if conv is not None)
+
+    @classmethod
+    def for_model(cls, model_class: type[BaseModel]) -> "SheetRowSerializer":
+        names = list(model_class.model_fields)
+        converters = [_converter_for(info.annotation) for info in model_class.model_fields.values()]
+        return cls(names, converters)
+
+    def to_row(self, item: BaseModel) -> list:
+        values = self._getter(item)
+        row = [values] if self._single else list(values)
+        for index, convert in self._converters:
+            value = row[index]
+            if value is not None:
+                row[index] = convert(value)
+        return row
+
+    def to_rows(self, items: Iterable[BaseModel]) -> list[list]:
+        to_row = self.to_row
+        return [to_row(item) for item in items]
+
+
+_SERIALIZERS: dict[type, SheetRowSerializer] = {}
+
+
 class BaseSheetModel(BaseModel):
     """
     Базовая модель для всех сущностей, которые хранятся в Google Sheets.
@@ -19,23 +98,23 @@ class BaseSheetModel(BaseModel):
             headers.append(field_info.alias or field_name)
         return headers
 
+    @classmethod
+    def get_row_serializer(cls) -> SheetRowSerializer:
+        """Возвращает (и при первом обращении собирает) сериализатор строк для этого класса."""
+        serializer = _SERIALIZERS.get(cls)
+        if serializer is None:
+            serializer = _SERIALIZERS[cls] = SheetRowSerializer.for_model(cls)
+        return serializer
+
     def to_sheet_row(self) -> list:
         """
-        Динамически преобразует экземпляр модели в список для записи в Google Sheets.
+        Преобразует экземпляр модели в список для записи в Google Sheets.
         Порядок значений соответствует порядку в get_sheet_headers().
+        Enum записывается как .value, datetime/date - в формате ISO.
         """
-        # model_dump преобразует модель в словарь. 
-        # by_alias=True гарантирует, что ключами будут псевдонимы (user_id вместо id).
-        # .values() возвращает значения в порядке объявления полей.
-        
-        # Обработка Enum и datetime
-        row_data = self.model_dump(by_alias=True)
-        processed_values = []
-        for value in row_data.values():
-            if hasattr(value, 'value'): # Проверяем, является ли объект Enum
-                processed_values.append(value.value)
-            elif hasattr(value, 'isoformat'): # Проверяем, является ли объект datetime/date
-                processed_values.append(value.isoformat())
-            else:
-                processed_values.append(value)
-        return processed_values
\ No newline at end of file
+        return type(self).get_row_serializer().to_row(self)
+
+    @classmethod
+    def to_sheet_rows(cls, items: Iterable["BaseSheetModel"]) -> list[list]:
+        """Пакетный вариант to_sheet_row() для записи через append_rows."""
+        return cls.get_row_serializer().to_rows(items)
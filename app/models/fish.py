@@ -10,6 +10,15 @@ class FishMoveType(str, Enum):
     TRANSFER_IN = "transfer_in"   # Перевод (приход)  <-- ИЗМЕНЕНО
     TRANSFER_OUT = "transfer_out" # Перевод (расход) <-- ИЗМЕНЕНО
 
+# Знак движения для поголовья водоёма: приход - плюс, расход - минус
+MOVE_SIGN = {
+    FishMoveType.STOCKING: 1,
+    FishMoveType.TRANSFER_IN: 1,
+    FishMoveType.SALE: -1,
+    FishMoveType.DEATH: -1,
+    FishMoveType.TRANSFER_OUT: -1,
+}
+
 class FishMoveRow(BaseSheetModel):
     ts: datetime
     pond_id: str
@@ -19,9 +28,16 @@ class FishMoveRow(BaseSheetModel):
     reason: str = ""
     ref: str | None = None
     user: str
+    amount: float | None = None  # сумма продажи, грн (только для продажи)
 
     @field_validator('quantity')
     def validate_quantity(cls, v):
         if v <= 0:
             raise ValueError("Количество должно быть положительным числом")
+        return v
+
+    @field_validator('amount')
+    def validate_amount(cls, v):
+        if v is not None and v < 0:
+            raise ValueError("Сумма не может быть отрицательной")
         return v
\ No newline at end of file
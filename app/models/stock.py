@@ -17,9 +17,16 @@ class StockMoveRow(BaseSheetModel):
     mass_kg: float
     reason: str
     user: str
+    unit_cost: float | None = None  # цена партии за кг (только для прихода)
 
     @field_validator('mass_kg')
     def validate_mass(cls, v):
         if v <= 0:
             raise ValueError("Масса должна быть положительным числом")
-        return v
\ No newline at end of file
+        return v
+
+    @field_validator('unit_cost')
+    def validate_unit_cost(cls, v):
+        if v is not None and v < 0:
+            raise ValueError("Цена не может быть отрицательной")
+        return v
@@ -10,6 +10,8 @@ class WaterQualityRow(BaseSheetModel):
     temperature_C: float
     notes: str = ""
     user: str
+    # DO в % насыщения при температуре замера (app.analytics.oxygen); в старых строках пусто
+    do_saturation_pct: float | None = None
 
     @field_validator('dissolved_O2_mgL')
     def validate_do(cls, v):
@@ -29,4 +31,5 @@ class WaterQualityRow(BaseSheetModel):
         """Проверяет, выходят ли параметры за критические пороги."""
         return (self.dissolved_O2_mgL < settings.DO_MIN or
                 self.temperature_C < settings.TEMP_MIN or
-                self.temperature_C > settings.TEMP_MAX)
\ No newline at end of file
+                self.temperature_C > settings.TEMP_MAX or
+                (self.do_saturation_pct is not None and self.do_saturation_pct < settings.DO_SATURATION_MIN_PCT))
\ No newline at end of file
@@ -8,9 +8,20 @@ class WeighingRow(BaseSheetModel):
     pond_id: str
     avg_weight_g: float
     user: str
+    # Статистика выборки (только если взвешивали выборку, а не вводили средний вес)
+    sample_size: int | None = None
+    std_g: float | None = None
+    cv_pct: float | None = None
 
     @field_validator('avg_weight_g')
     def validate_weight(cls, v):
         if not 0 < v <= settings.WEIGHING_AVG_WEIGHT_MAX_G:
             raise ValueError(f"Средний вес должен быть в разумных пределах (0-{settings.WEIGHING_AVG_WEIGHT_MAX_G} г)")
-        return v
\ No newline at end of file
+        return v
+
+class WeighingSampleRow(BaseSheetModel):
+    """Исходная выборка взвешивания в сжатом виде (см. app.analytics.weighing.encode_sample)."""
+    ts: datetime
+    pond_id: str
+    sample_size: int
+    weights: str
@@ -0,0 +1,112 @@
+# app/sheets/auth.py
+
+"""
+Авторизация сервисного аккаунта Google и общий HTTP-сеанс для всех обращений к Sheets.
+
+gspread.service_account() обновляет токен лениво: раз в час запрос, которому не повезло,
+ждёт обмен токена. Здесь токен обновляется фоновым потоком заранее (за
+GOOGLE_TOKEN_REFRESH_MARGIN_S до истечения), а все запросы идут через один
+AuthorizedSession с пулом keep-alive соединений, поэтому TLS-рукопожатие
+не повторяется на каждый вызов.
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import gspread
+import requests
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+
+from app.config.settings import settings
+from app.utils.logger import log
+
+# Пауза перед повторной попыткой, если обновить токен не удалось
+RETRY_DELAY_S = 30
+
+
+def _pooled_adapter() -> HTTPAdapter:
+    return HTTPAdapter(
+        pool_connections=settings.SHEETS_HTTP_POOL_SIZE,
+        pool_maxsize=settings.SHEETS_HTTP_POOL_SIZE,
+    )
+
+
+def build_token_request() -> Request:
+    """
+    Транспорт для обмена токена: обычный requests.Session с пулом соединений.
+    Не AuthorizedSession - иначе запрос к OAuth сам вызывает before_request
+    (и лишний обмен токена, пока его ещё нет) и получает заголовок Bearer.
+    """
+    session = requests.Session()
+    session.mount("https://", _pooled_adapter())
+    return Request(session)
+
+
+def build_session(credentials: Credentials, token_request: Request | None = None) -> AuthorizedSession:
+    """Создаёт общий сеанс с пулом keep-alive соединений к API Google."""
+    session = AuthorizedSession(credentials, auth_request=token_request or build_token_request())
+    session.mount("https://", _pooled_adapter())
+    return session
+
+
+class TokenRefresher:
+    """Фоновый поток, обновляющий токен сервисного аккаунта до его истечения."""
+
+    def __init__(self, credentials: Credentials, request: Request, margin_s: float):
+        self.credentials = credentials
+        self._request = request
+        self._margin = timedelta(seconds=margin_s)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def refresh_now(self) -> None:
+        with self._lock:
+            self.credentials.refresh(self._request)
+        log.debug(f"Токен сервисного аккаунта обновлён, истекает в {self.credentials.expiry}.")
+
+    def seconds_until_refresh(self) -> float:
+        """Сколько ждать до следующего планового обновления (0 - обновить сразу)."""
+        expiry = self.credentials.expiry
+        if not self.credentials.token or expiry is None:
+            return 0.0
+        # google-auth хранит expiry как naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        delay = (expiry - self._margin - now).total_seconds()
+        return max(delay, 0.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.seconds_until_refresh()):
+            try:
+                self.refresh_now()
+            except Exception as e:
+                log.error(f"Не удалось заранее обновить токен Google: {e}")
+                if self._stop.wait(RETRY_DELAY_S):
+                    return
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="gsheets-token-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def authorize_service_account(filename: str) -> tuple[gspread.Client, TokenRefresher]:
+    """
+    Аналог gspread.service_account(), но с общим пулом соединений
+    и фоновым упреждающим обновлением токена.
+    """
+    credentials = Credentials.from_service_account_file(filename, scopes=gspread.auth.DEFAULT_SCOPES)
+    token_request = build_token_request()
+    session = build_session(credentials, token_request)
+    refresher = TokenRefresher(credentials, token_request, settings.GOOGLE_TOKEN_REFRESH_MARGIN_S)
+    # Первый токен получаем сразу, чтобы его не ждал первый пользовательский запрос
+    refresher.refresh_now()
+    refresher.start()
+    return gspread.Client(auth=credentials, session=session), refresher
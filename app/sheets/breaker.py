@@ -0,0 +1,92 @@
+# app/sheets/breaker.py
+
+"""
+Circuit breaker для обращений к Google Sheets.
+
+CLOSED    - запросы идут в Sheets как обычно;
+OPEN      - после failure_threshold ошибок подряд запросы не выполняются,
+            клиент отдаёт последний удачный снимок листа;
+HALF_OPEN - по истечении reset_timeout пропускается одна пробная операция:
+            успех закрывает breaker, ошибка снова его открывает.
+"""
+
+import threading
+import time
+from enum import Enum
+from typing import Callable
+
+from app.utils import metrics
+from app.utils.logger import log
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        on_open: Callable[[], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._on_open = on_open
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> BreakerState:
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Можно ли сейчас обращаться к Sheets."""
+        with self._lock:
+            if self._state == BreakerState.CLOSED:
+                return True
+            if self._state == BreakerState.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._transition(BreakerState.HALF_OPEN)
+            # HALF_OPEN: пропускаем только одну пробную операцию
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self._state != BreakerState.CLOSED:
+                self._transition(BreakerState.CLOSED)
+
+    def record_failure(self) -> None:
+        opened = False
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == BreakerState.HALF_OPEN or (
+                self._state == BreakerState.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = self._clock()
+                self._transition(BreakerState.OPEN)
+                opened = True
+        if opened and self._on_open:
+            self._on_open()
+
+    def _transition(self, new_state: BreakerState) -> None:
+        old_state, self._state = self._state, new_state
+        metrics.increment("sheets_breaker_transition", breaker=self.name, from_state=old_state.value, to_state=new_state.value)
+        level = "WARNING" if new_state == BreakerState.OPEN else "INFO"
+        log.log(level, f"Circuit breaker '{self.name}': {old_state.value} -> {new_state.value}")
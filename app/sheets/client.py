@@ -1,41 +1,178 @@
+import re
+import threading
 import gspread
+from enum import Enum
+from gspread.utils import numericise_all
 from functools import lru_cache
 from app.config.settings import settings
+from app.sheets.auth import authorize_service_account
+from app.sheets.breaker import CircuitBreaker, BreakerState
 from app.utils.logger import log
 
+
+class ReadStatus(str, Enum):
+    """Качество данных, которые вернул последний вызов get_sheet_data для листа."""
+    FRESH = "fresh"              # прочитано из Sheets только что
+    STALE = "stale"              # Sheets недоступен, отдан последний удачный снимок
+    UNAVAILABLE = "unavailable"  # Sheets недоступен, снимка ещё нет
+    MISSING = "missing"          # листа нет в таблице (переименован или удалён)
+
+
+def _first_updated_row(response) -> int | None:
+    """Номер первой строки из ответа append (updates.updatedRange, например "'LOG'!A5:H5")."""
+    try:
+        updated_range = response['updates']['updatedRange']
+    except (KeyError, TypeError):
+        return None
+    match = re.search(r'![A-Z]+(\d+)', updated_range)
+    return int(match.group(1)) if match else None
+
+
 class GoogleSheetsClient:
     def __init__(self):
         try:
-            gc = gspread.service_account(filename=settings.GOOGLE_CREDENTIALS_FILE)
+            gc, self.token_refresher = authorize_service_account(settings.GOOGLE_CREDENTIALS_FILE)
             self.spreadsheet = gc.open_by_key(settings.GOOGLE_SHEETS_ID)
             log.info("Успешное подключение к Google Sheets.")
         except Exception as e:
             log.critical(f"Ошибка подключения к Google Sheets: {e}")
             raise
+        self.breaker = CircuitBreaker(
+            "sheets_read",
+            failure_threshold=settings.SHEETS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.SHEETS_BREAKER_RESET_TIMEOUT_S,
+            on_open=lambda: self._schedule_probe(),
+        )
+        # Последний удачный снимок каждого листа (last-known-good)
+        self._last_good: dict[str, list[dict]] = {}
+        self._read_status: dict[str, ReadStatus] = {}
 
     # @lru_cache - Кэш нужно сбрасывать при изменениях, поэтому для справочников его лучше убрать или сделать умнее
     def get_sheet_data(self, sheet_name: str) -> list[dict]:
-        """Получает все данные с листа."""
+        """
+        Получает все данные с листа.
+        Если Sheets недоступен (или breaker открыт), возвращает последний удачный снимок
+        листа; качество ответа можно узнать через get_read_status().
+        """
+        if not self.breaker.allow_request():
+            return self._fallback(sheet_name)
         try:
             worksheet = self.spreadsheet.worksheet(sheet_name)
             # Очищаем кэш для этого метода, если он используется
             # GoogleSheetsClient.get_sheet_data.cache_clear()
-            return worksheet.get_all_records()
+            records = worksheet.get_all_records()
         except gspread.exceptions.WorksheetNotFound:
+            # Ответ от Sheets получен, это не сбой соединения. Но и не пустой лист:
+            # по статусу MISSING реплика не стирает свои строки
+            self.breaker.record_success()
             log.error(f"Лист '{sheet_name}' не найден.")
+            self._read_status[sheet_name] = ReadStatus.MISSING
             return []
         except Exception as e:
+            self.breaker.record_failure()
             log.error(f"Ошибка при чтении листа '{sheet_name}': {e}")
+            return self._fallback(sheet_name)
+        self.breaker.record_success()
+        # Вызывающий код может менять строки на месте, поэтому храним и отдаём копии
+        self._last_good[sheet_name] = [dict(row) for row in records]
+        self._read_status[sheet_name] = ReadStatus.FRESH
+        return records
+
+    def get_records_from(self, sheet_name: str, start_row: int) -> list[dict] | None:
+        """
+        Читает строки листа начиная с start_row (нумерация листа, заголовок - строка 1)
+        в том же виде, что и get_all_records. Используется для дочитывания хвоста журналов.
+        Возвращает None, если прочитать не удалось.
+        """
+        if not self.breaker.allow_request():
+            return None
+        try:
+            worksheet = self.spreadsheet.worksheet(sheet_name)
+            if start_row > worksheet.row_count:
+                self.breaker.record_success()
+                return []
+            header_range, values_range = worksheet.batch_get(['1:1', f'{start_row}:{worksheet.row_count}'])
+        except gspread.exceptions.WorksheetNotFound:
+            self.breaker.record_success()
+            log.error(f"Лист '{sheet_name}' не найден.")
+            return None
+        except Exception as e:
+            self.breaker.record_failure()
+            log.error(f"Ошибка при чтении хвоста листа '{sheet_name}' со строки {start_row}: {e}")
+            return None
+        self.breaker.record_success()
+        headers = header_range[0] if header_range else []
+        width = len(headers)
+        records = []
+        for row in values_range:
+            row = numericise_all(list(row) + [''] * (width - len(row)))
+            records.append(dict(zip(headers, row)))
+        return records
+
+    def get_read_status(self, sheet_name: str) -> ReadStatus:
+        """Качество данных последнего чтения листа (FRESH, если лист ещё не читался)."""
+        return self._read_status.get(sheet_name, ReadStatus.FRESH)
+
+    def _fallback(self, sheet_name: str) -> list[dict]:
+        snapshot = self._last_good.get(sheet_name)
+        if snapshot is None:
+            self._read_status[sheet_name] = ReadStatus.UNAVAILABLE
             return []
+        log.warning(f"Sheets недоступен, для листа '{sheet_name}' отдан последний известный снимок.")
+        self._read_status[sheet_name] = ReadStatus.STALE
+        return [dict(row) for row in snapshot]
+
+    def _schedule_probe(self):
+        """Планирует фоновую проверку доступности Sheets после открытия breaker."""
+        timer = threading.Timer(self.breaker.reset_timeout, self._probe)
+        timer.daemon = True
+        timer.start()
+
+    def _probe(self):
+        if self.breaker.state == BreakerState.CLOSED:
+            return
+        if not self.breaker.allow_request():
+            # Таймер мог сработать чуть раньше срока; пробная операция уже идёт в HALF_OPEN
+            if self.breaker.state == BreakerState.OPEN:
+                self._schedule_probe()
+            return
+        try:
+            self.spreadsheet.fetch_sheet_metadata()
+        except Exception as e:
+            log.warning(f"Проверка доступности Google Sheets не удалась: {e}")
+            self.breaker.record_failure()  # снова откроет breaker и запланирует новую проверку
+            return
+        self.breaker.record_success()
 
-    def append_row(self, sheet_name: str, data: list):
-        """Добавляет строку в конец указанного листа (журнала)."""
+    def append_row(self, sheet_name: str, data: list) -> int | None:
+        """
+        Добавляет строку в конец указанного листа (журнала).
+        Возвращает номер записанной строки листа или None, если запись не удалась.
+        """
         try:
             worksheet = self.spreadsheet.worksheet(sheet_name)
-            worksheet.append_row(data, value_input_option='USER_ENTERED')
+            response = worksheet.append_row(data, value_input_option='USER_ENTERED')
             log.info(f"Строка добавлена в лист '{sheet_name}'.")
+            return _first_updated_row(response)
         except Exception as e:
             log.error(f"Ошибка при записи в лист '{sheet_name}': {e}")
+            return None
+
+    def append_rows(self, sheet_name: str, rows: list[list]) -> int | None:
+        """
+        Добавляет несколько строк в конец листа одним запросом.
+        Возвращает номер первой записанной строки листа или None.
+        """
+        if not rows:
+            return None
+        try:
+            worksheet = self.spreadsheet.worksheet(sheet_name)
+            response = worksheet.append_rows(rows, value_input_option='USER_ENTERED')
+            log.info(f"В лист '{sheet_name}' добавлено строк: {len(rows)}.")
+            return _first_updated_row(response)
+        except Exception as e:
+            log.error(f"Ошибка при пакетной записи в лист '{sheet_name}': {e}")
+            return None
     
     def update_cell_by_match(self, sheet_name: str, match_col: int, match_val: str | int, target_col: int, new_val: str):
         """Находит строку по значению в колонке и обновляет ячейку в другой колонке."""
@@ -1,47 +1,114 @@
+from typing import Callable
+
 from app.sheets.client import gs_client
+from app.sheets.replica import replica
 from app.models.user import User
 from app.models.pond import Pond
 from app.models.product import Product
 from app.models.water import WaterQualityRow
 from app.models.feeding import FeedingRow, FeedType 
 from app.models.order import SalesOrderRow, SalesOrderItemRow
-from app.models.weighing import WeighingRow
+from app.models.weighing import WeighingRow, WeighingSampleRow
 from app.models.fish import FishMoveRow
 from app.models.stock import StockMoveRow
+from app.models.base import BaseSheetModel
 from app.config.settings import settings
+from app.utils.logger import log
+
+# Подписчики на новые строки журналов: listener(row, row_number)
+JournalListener = Callable[[BaseSheetModel, int], None]
+_listeners: dict[str, list[JournalListener]] = {}
+
+
+def subscribe(sheet_name: str, listener: JournalListener) -> None:
+    """Подписывает listener на строки, которые бот дописывает в журнал sheet_name."""
+    _listeners.setdefault(sheet_name, []).append(listener)
+
+
+def unsubscribe(sheet_name: str, listener: JournalListener) -> None:
+    listeners = _listeners.get(sheet_name, [])
+    if listener in listeners:
+        listeners.remove(listener)
+
+
+def _append(sheet_name: str, data: list) -> int | None:
+    """Дописывает строку в лист и помечает таблицу реплики для дочитывания."""
+    row_number = gs_client.append_row(sheet_name, data)
+    replica.invalidate(sheet_name)
+    return row_number
+
+
+def _notify(sheet_name: str, row: BaseSheetModel, row_number: int) -> None:
+    for listener in list(_listeners.get(sheet_name, [])):
+        try:
+            listener(row, row_number)
+        except Exception as e:
+            log.error(f"Ошибка в подписчике журнала '{sheet_name}': {e}")
+
+
+def _append_journal(sheet_name: str, row: BaseSheetModel) -> int | None:
+    """Дописывает строку журнала и сообщает подписчикам номер записанной строки."""
+    row_number = _append(sheet_name, row.to_sheet_row())
+    if isinstance(row_number, int):
+        _notify(sheet_name, row, row_number)
+    return row_number
+
+
+def _append_journal_rows(sheet_name: str, rows: list[BaseSheetModel]) -> int | None:
+    """
+    Дописывает несколько строк журнала одним запросом: они либо записываются все,
+    либо ни одна. Возвращает номер первой строки; подписчики получают каждую строку.
+    """
+    if not rows:
+        return None
+    row_number = gs_client.append_rows(sheet_name, type(rows[0]).to_sheet_rows(rows))
+    replica.invalidate(sheet_name)
+    if isinstance(row_number, int):
+        for offset, row in enumerate(rows):
+            _notify(sheet_name, row, row_number + offset)
+    return row_number
 
 def append_new_user(user: User):
-    gs_client.append_row(settings.SHEETS.USERS, [user.id, user.name, user.phone, user.role.value])
+    _append(settings.SHEETS.USERS, [user.id, user.name, user.phone, user.role.value])
 
 def append_pond(pond: Pond):
-    gs_client.append_row(settings.SHEETS.PONDS, pond.to_sheet_row())
+    _append(settings.SHEETS.PONDS, pond.to_sheet_row())
 
 def append_product(product: Product):
-    gs_client.append_row(
+    _append(
         settings.SHEETS.PRODUCTS, 
         [product.id, product.name, product.description, product.price, product.unit, True]
     )
 
 def append_feed_type(feed_type: FeedType): # Новая функция для добавления типа корма
-    gs_client.append_row(settings.SHEETS.FEED_TYPES, feed_type.to_sheet_row())
+    _append(settings.SHEETS.FEED_TYPES, feed_type.to_sheet_row())
+
+def append_water_quality(row: WaterQualityRow) -> int | None:
+    return _append_journal(settings.SHEETS.WATER_QUALITY_LOG, row)
+
+def append_feeding(row: FeedingRow) -> int | None:
+    return _append_journal(settings.SHEETS.FEEDING_LOG, row)
+
+def append_sales_order(row: SalesOrderRow) -> int | None:
+    return _append_journal(settings.SHEETS.SALES_ORDERS, row)
 
-def append_water_quality(row: WaterQualityRow):
-    gs_client.append_row(settings.SHEETS.WATER_QUALITY_LOG, row.to_sheet_row())
+def append_sales_order_item(row: SalesOrderItemRow) -> int | None:
+    return _append_journal(settings.SHEETS.SALES_ORDER_ITEMS, row)
 
-def append_feeding(row: FeedingRow):
-    gs_client.append_row(settings.SHEETS.FEEDING_LOG, row.to_sheet_row())
+def append_sales_order_items(rows: list[SalesOrderItemRow]) -> int | None:
+    return _append_journal_rows(settings.SHEETS.SALES_ORDER_ITEMS, rows)
 
-def append_sales_order(row: SalesOrderRow):
-    gs_client.append_row(settings.SHEETS.SALES_ORDERS, row.to_sheet_row())
+def append_weighing(row: WeighingRow) -> int | None:
+    return _append_journal(settings.SHEETS.WEIGHING_LOG, row)
 
-def append_sales_order_item(row: SalesOrderItemRow):
-    gs_client.append_row(settings.SHEETS.SALES_ORDER_ITEMS, row.to_sheet_row())
+def append_weighing_sample(row: WeighingSampleRow) -> int | None:
+    return _append_journal(settings.SHEETS.WEIGHING_SAMPLES, row)
 
-def append_weighing(row: WeighingRow):
-    gs_client.append_row(settings.SHEETS.WEIGHING_LOG, row.to_sheet_row())
+def append_fish_move(row: FishMoveRow) -> int | None:
+    return _append_journal(settings.SHEETS.FISH_MOVES_LOG, row)
 
-def append_fish_move(row: FishMoveRow):
-    gs_client.append_row(settings.SHEETS.FISH_MOVES_LOG, row.to_sheet_row())
+def append_fish_moves(rows: list[FishMoveRow]) -> int | None:
+    return _append_journal_rows(settings.SHEETS.FISH_MOVES_LOG, rows)
 
-def append_stock_move(row: StockMoveRow):
-    gs_client.append_row(settings.SHEETS.STOCK_MOVES_LOG, row.to_sheet_row())
\ No newline at end of file
+def append_stock_move(row: StockMoveRow) -> int | None:
+    return _append_journal(settings.SHEETS.STOCK_MOVES_LOG, row)
\ No newline at end of file
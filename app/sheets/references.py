@@ -2,7 +2,9 @@
 
 from cachetools import cached, TTLCache
 from datetime import date, datetime # Добавлен импорт datetime для отладки
-from app.sheets.client import gs_client
+from app.sheets.client import gs_client, ReadStatus
+from app.sheets.replica import replica
+from app.sheets.snapshots import ReferenceSnapshot
 from app.models.user import User, UserRole
 from app.models.pond import Pond
 from app.models.feeding import FeedType
@@ -27,21 +29,62 @@ order_cache = TTLCache(maxsize=10, ttl=60)
 order_item_cache = TTLCache(maxsize=10, ttl=60)
 
 
+def _parse_pond(row: dict) -> Pond:
+    # Handle empty but existing date strings
+    if 'stocking_date' in row and row['stocking_date']:
+        try:
+            # Assuming date is in ISO format YYYY-MM-DD
+            row['stocking_date'] = date.fromisoformat(row['stocking_date'])
+        except (ValueError, TypeError):
+            row['stocking_date'] = None
+    else:
+        row['stocking_date'] = None
+
+    # Handle empty initial quantity
+    if 'initial_qty' in row and row['initial_qty'] == '':
+        row['initial_qty'] = None
+
+    return Pond.model_validate(row)
+
+# --- СНИМКИ СПРАВОЧНИКОВ (построчный diff при обновлении кэша) ---
+user_snapshot = ReferenceSnapshot(settings.SHEETS.USERS, User.model_validate, key=lambda u: u.id)
+pond_snapshot = ReferenceSnapshot(settings.SHEETS.PONDS, _parse_pond, key=lambda p: p.id)
+feed_type_snapshot = ReferenceSnapshot(settings.SHEETS.FEED_TYPES, FeedType.model_validate, key=lambda ft: ft.id)
+product_snapshot = ReferenceSnapshot(settings.SHEETS.PRODUCTS, Product.model_validate, key=lambda p: p.id)
+order_snapshot = ReferenceSnapshot(settings.SHEETS.SALES_ORDERS, SalesOrderRow.model_validate, key=lambda o: o.id)
+
+
+def is_sheet_unavailable(sheet_name: str) -> bool:
+    """True, если лист не удалось прочитать (или его нет в таблице) и локальной реплики нет."""
+    status = gs_client.get_read_status(sheet_name)
+    return status in (ReadStatus.UNAVAILABLE, ReadStatus.MISSING) and replica.watermark(sheet_name) is None
+
+
+def is_sheet_stale(sheet_name: str) -> bool:
+    """True, если свежие данные листа прочитать не удалось и отдаются локальная реплика или последний снимок."""
+    return gs_client.get_read_status(sheet_name) != ReadStatus.FRESH and not is_sheet_unavailable(sheet_name)
+
+
+def _update_cell(sheet_name: str, match_col: int, match_val, target_col: int, new_val) -> bool:
+    """Обновляет ячейку в Sheets и помечает таблицу реплики для пересинхронизации."""
+    updated = gs_client.update_cell_by_match(sheet_name, match_col, match_val, target_col, new_val)
+    replica.invalidate(sheet_name)
+    return updated
+
+
 # --- USERS ---
 @cached(user_cache) # Используем user_cache
 def get_all_users() -> list[User]:
-    users_data = gs_client.get_sheet_data(settings.SHEETS.USERS)
-    return [User.model_validate(row) for row in users_data]
+    users_data = replica.read(settings.SHEETS.USERS)
+    return user_snapshot.refresh(users_data)
 
 def get_user_by_id(user_id: int) -> User | None:
-    for user in get_all_users():
-        if user.id == user_id:
-            return user
-    return None
+    get_all_users()
+    return user_snapshot.get(user_id)
 
 def update_user_role(user_id: int, new_role: UserRole) -> bool:
     user_cache.clear() # Clear specific cache after update
-    return gs_client.update_cell_by_match(settings.SHEETS.USERS, 1, user_id, USER_COLUMN_MAP['role'], new_role.value)
+    return _update_cell(settings.SHEETS.USERS, 1, user_id, USER_COLUMN_MAP['role'], new_role.value)
 
 def get_admins() -> list[User]:
     """Возвращает список всех администраторов с активными уведомлениями."""
@@ -50,38 +93,19 @@ def get_admins() -> list[User]:
 # --- PONDS ---
 @cached(pond_cache) # Используем pond_cache
 def get_all_ponds() -> list[Pond]:
-    ponds_data = gs_client.get_sheet_data(settings.SHEETS.PONDS)
-    parsed_ponds = []
-    for row in ponds_data:
-        # Handle empty but existing date strings
-        if 'stocking_date' in row and row['stocking_date']:
-            try:
-                # Assuming date is in ISO format YYYY-MM-DD
-                row['stocking_date'] = date.fromisoformat(row['stocking_date'])
-            except (ValueError, TypeError):
-                row['stocking_date'] = None
-        else:
-            row['stocking_date'] = None
-        
-        # Handle empty initial quantity
-        if 'initial_qty' in row and row['initial_qty'] == '':
-            row['initial_qty'] = None
-
-        parsed_ponds.append(Pond.model_validate(row))
-    return parsed_ponds
+    ponds_data = replica.read(settings.SHEETS.PONDS)
+    return pond_snapshot.refresh(ponds_data)
 
 def get_pond_by_id(pond_id: str) -> Pond | None:
-    for pond in get_all_ponds():
-        if pond.id == pond_id:
-            return pond
-    return None
+    get_all_ponds()
+    return pond_snapshot.get(pond_id)
 
 def get_active_ponds() -> list[Pond]:
     return [p for p in get_all_ponds() if p.is_active]
 
 def update_pond_status(pond_id: str, is_active: bool) -> bool:
     pond_cache.clear() # Clear specific cache
-    return gs_client.update_cell_by_match(settings.SHEETS.PONDS, 1, pond_id, POND_COLUMN_MAP['is_active'], str(is_active).upper())
+    return _update_cell(settings.SHEETS.PONDS, 1, pond_id, POND_COLUMN_MAP['is_active'], str(is_active).upper())
 
 def update_pond_details(pond_id: str, field_name: str, new_value: any) -> bool:
     col_index = POND_COLUMN_MAP.get(field_name)
@@ -89,26 +113,24 @@ def update_pond_details(pond_id: str, field_name: str, new_value: any) -> bool:
         log.error(f"Неизвестное поле '{field_name}' для обновления в листе PONDS.")
         return False
     pond_cache.clear() # Clear specific cache
-    return gs_client.update_cell_by_match(settings.SHEETS.PONDS, 1, pond_id, col_index, new_value)
+    return _update_cell(settings.SHEETS.PONDS, 1, pond_id, col_index, new_value)
 
 # --- FEED TYPES ---
 @cached(feed_type_cache) # Используем feed_type_cache
 def get_feed_types() -> list[FeedType]:
-    feed_data = gs_client.get_sheet_data(settings.SHEETS.FEED_TYPES)
-    return [FeedType.model_validate(row) for row in feed_data]
+    feed_data = replica.read(settings.SHEETS.FEED_TYPES)
+    return feed_type_snapshot.refresh(feed_data)
 
 def get_feed_type_by_id(feed_id: str) -> FeedType | None:
-    for feed_type in get_feed_types():
-        if feed_type.id == feed_id:
-            return feed_type
-    return None
+    get_feed_types()
+    return feed_type_snapshot.get(feed_id)
 
 def get_active_feed_types() -> list[FeedType]:
     return [ft for ft in get_feed_types() if ft.is_active]
 
 def update_feed_type_status(feed_id: str, is_active: bool) -> bool:
     feed_type_cache.clear() # Clear specific cache
-    return gs_client.update_cell_by_match(settings.SHEETS.FEED_TYPES, 1, feed_id, FEED_TYPE_COLUMN_MAP['is_active'], str(is_active).upper())
+    return _update_cell(settings.SHEETS.FEED_TYPES, 1, feed_id, FEED_TYPE_COLUMN_MAP['is_active'], str(is_active).upper())
 
 def update_feed_type_details(feed_id: str, field_name: str, new_value: str) -> bool:
     col_index = FEED_TYPE_COLUMN_MAP.get(field_name)
@@ -116,26 +138,24 @@ def update_feed_type_details(feed_id: str, field_name: str, new_value: str) -> b
         log.error(f"Неизвестное поле '{field_name}' для обновления в листе FEED_TYPES.")
         return False
     feed_type_cache.clear() # Clear specific cache
-    return gs_client.update_cell_by_match(settings.SHEETS.FEED_TYPES, 1, feed_id, col_index, new_value)
+    return _update_cell(settings.SHEETS.FEED_TYPES, 1, feed_id, col_index, new_value)
 
 # --- PRODUCTS ---
 @cached(product_cache) # Используем product_cache
 def get_all_products() -> list[Product]:
-    products_data = gs_client.get_sheet_data(settings.SHEETS.PRODUCTS)
-    return [Product.model_validate(row) for row in products_data]
+    products_data = replica.read(settings.SHEETS.PRODUCTS)
+    return product_snapshot.refresh(products_data)
 
 def get_product_by_id(product_id: str) -> Product | None:
-    for product in get_all_products():
-        if product.id == product_id:
-            return product
-    return None
+    get_all_products()
+    return product_snapshot.get(product_id)
 
 def get_available_products() -> list[Product]:
     return [p for p in get_all_products() if p.is_available]
 
 def update_product_status(product_id: str, is_available: bool) -> bool:
     product_cache.clear() # Clear specific cache
-    return gs_client.update_cell_by_match(settings.SHEETS.PRODUCTS, 1, product_id, PRODUCT_COLUMN_MAP['is_available'], str(is_available).upper())
+    return _update_cell(settings.SHEETS.PRODUCTS, 1, product_id, PRODUCT_COLUMN_MAP['is_available'], str(is_available).upper())
 
 def update_product_details(product_id: str, field_name: str, new_value: any) -> bool:
     col_index = PRODUCT_COLUMN_MAP.get(field_name)
@@ -143,21 +163,21 @@ def update_product_details(product_id: str, field_name: str, new_value: any) ->
         log.error(f"Неизвестное поле '{field_name}' для обновления в листе PRODUCTS.")
         return False
     product_cache.clear() # Clear specific cache
-    return gs_client.update_cell_by_match(settings.SHEETS.PRODUCTS, 1, product_id, col_index, new_value)
+    return _update_cell(settings.SHEETS.PRODUCTS, 1, product_id, col_index, new_value)
 
 # --- ORDERS ---
 @cached(order_cache) # Используем order_cache
 def get_all_orders() -> list[SalesOrderRow]:
     """Возвращает список всех заказов из листа."""
-    orders_data = gs_client.get_sheet_data(settings.SHEETS.SALES_ORDERS)
-    return [SalesOrderRow.model_validate(row) for row in orders_data]
+    orders_data = replica.read(settings.SHEETS.SALES_ORDERS)
+    return order_snapshot.refresh(orders_data)
 
 def get_orders_by_status(status: str) -> list[SalesOrderRow]:
     return [order for order in get_all_orders() if order.status == status]
 
 @cached(order_item_cache) # Используем order_item_cache
 def get_all_order_items() -> list[SalesOrderItemRow]:
-    items_data = gs_client.get_sheet_data(settings.SHEETS.SALES_ORDER_ITEMS)
+    items_data = replica.read(settings.SHEETS.SALES_ORDER_ITEMS)
     return [SalesOrderItemRow.model_validate(row) for row in items_data]
 
 def get_order_items(order_id: str) -> list[SalesOrderItemRow]:
@@ -166,13 +186,13 @@ def get_order_items(order_id: str) -> list[SalesOrderItemRow]:
 
 def update_order_status(order_id: str, new_status: str) -> bool:
     order_cache.clear() # Clear specific cache
-    return gs_client.update_cell_by_match(settings.SHEETS.SALES_ORDERS, 1, order_id, ORDER_COLUMN_MAP['status'], new_status)
+    return _update_cell(settings.SHEETS.SALES_ORDERS, 1, order_id, ORDER_COLUMN_MAP['status'], new_status)
 
 def update_user_notification_status(user_id: int, status: bool) -> bool:
     """Обновляет статус уведомлений для пользователя."""
     user_cache.clear() # Очищаем кэш после обновления
     # В таблице булево значение должно быть строкой 'TRUE' или 'FALSE'
     status_str = str(status).upper()
-    return gs_client.update_cell_by_match(
+    return _update_cell(
         settings.SHEETS.USERS, 1, user_id, USER_COLUMN_MAP['notifications_enabled'], status_str
     )
\ No newline at end of file
@@ -0,0 +1,308 @@
+# app/sheets/replica.py
+
+"""
+Локальная реплика Google Таблицы в SQLite.
+
+Каждый лист из SHEET_TO_MODEL_MAP зеркалируется в одноимённую таблицу:
+колонки - заголовки модели, плюс служебные _row (номер строки в листе)
+и _hash (хэш сырых значений строки).
+
+Синхронизация:
+- журналы (JOURNAL_SHEETS) дочитываются с хвоста: запрашиваются только строки
+  после последней синхронизированной; раз в REPLICA_JOURNAL_FULL_SYNC_S журнал
+  сверяется целиком, чтобы подхватить ручные правки;
+- справочники читаются целиком, но в SQLite переписываются только строки
+  с изменившимся хэшем, лишние строки удаляются.
+
+Для каждой таблицы хранится водяной знак свежести (время последней синхронизации
+и число строк). Чтения обслуживаются локально; сеть трогается, только если таблица
+ещё ни разу не синхронизировалась или её данные старше REPLICA_MAX_AGE_S.
+Запрос к Sheets выполняется без общей блокировки (синхронизации одного листа
+упорядочены отдельной блокировкой листа), поэтому чтения не ждут сеть.
+
+Если колонки модели изменились (добавлено поле), таблица при открытии БД
+пересоздаётся, а её водяной знак удаляется - следующая синхронизация
+перечитает лист целиком.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from app.config.settings import settings
+from app.sheets.client import gs_client, ReadStatus
+from app.sheets.schema import SHEET_TO_MODEL_MAP, JOURNAL_SHEETS
+from app.utils.logger import log
+
+# Номер первой строки с данными (строка 1 - заголовки)
+FIRST_DATA_ROW = 2
+# Сколько номеров строк передавать в одном запросе rows_at (лимит параметров SQLite)
+ROWS_AT_BATCH = 500
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """Водяной знак свежести таблицы реплики."""
+    synced_at: float      # unix-время последней успешной синхронизации
+    row_count: int        # число строк данных в листе на момент синхронизации
+    full_synced_at: float  # unix-время последней полной сверки
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.synced_at
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _stable_hash(values: tuple) -> int:
+    """Хэш строки, одинаковый между перезапусками процесса (в отличие от hash())."""
+    digest = hashlib.blake2b(json.dumps(values, ensure_ascii=False, default=str).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class SheetReplica:
+    def __init__(self, db_path: str, client=gs_client, models: dict = SHEET_TO_MODEL_MAP):
+        self.db_path = db_path
+        self._client = client
+        self._columns = {sheet: model.get_sheet_headers() for sheet, model in models.items()}
+        self._lock = threading.RLock()
+        # Синхронизации одного листа не должны идти параллельно (водяной знак пишется по результату запроса)
+        self._sync_locks = {sheet: threading.Lock() for sheet in self._columns}
+        self._conn: sqlite3.Connection | None = None
+        self._dirty: set[str] = set()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # --- СХЕМА ---
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Подключение ленивое: импорт модуля не должен создавать файл БД
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    if self.db_path != ':memory:':
+                        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+                    conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    self._create_schema(conn)
+                    self._conn = conn
+        return self._conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _watermarks ("
+            "sheet_name TEXT PRIMARY KEY, synced_at REAL NOT NULL, row_count INTEGER NOT NULL, "
+            "full_synced_at REAL NOT NULL DEFAULT 0)"
+        )
+        for sheet_name, columns in self._columns.items():
+            existing = [r[1] for r in conn.execute(f"PRAGMA table_info({_quote(sheet_name)})")]
+            if existing and existing != ['_row', '_hash', *columns]:
+                log.info(f"Реплика '{sheet_name}': изменились колонки, таблица будет перечитана из Sheets.")
+                conn.execute(f"DROP TABLE {_quote(sheet_name)}")
+                conn.execute("DELETE FROM _watermarks WHERE sheet_name = ?", (sheet_name,))
+            cols = ", ".join(_quote(c) for c in columns)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {_quote(sheet_name)} "
+                f"(_row INTEGER PRIMARY KEY, _hash INTEGER NOT NULL, {cols})"
+            )
+        conn.commit()
+
+    # --- ЧТЕНИЕ ---
+
+    def watermark(self, sheet_name: str) -> Watermark | None:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT synced_at, row_count, full_synced_at FROM _watermarks WHERE sheet_name = ?", (sheet_name,)
+            ).fetchone()
+        return Watermark(*row) if row else None
+
+    def read(self, sheet_name: str, max_age: float | None = None) -> list[dict]:
+        """
+        Возвращает строки листа в виде словарей (как gs_client.get_sheet_data).
+        Синхронизирует таблицу перед чтением, только если она устарела или помечена изменённой.
+        """
+        self.refresh(sheet_name, max_age)
+        return self.rows(sheet_name)
+
+    def refresh(self, sheet_name: str, max_age: float | None = None) -> Watermark | None:
+        """Синхронизирует таблицу, если она устарела или помечена изменённой; возвращает водяной знак."""
+        max_age = settings.REPLICA_MAX_AGE_S if max_age is None else max_age
+        mark = self.watermark(sheet_name)
+        if mark is None or sheet_name in self._dirty or mark.age > max_age:
+            self.sync(sheet_name)
+            mark = self.watermark(sheet_name)
+        return mark
+
+    def rows(self, sheet_name: str, start_row: int = FIRST_DATA_ROW) -> list[dict]:
+        """Строки листа из реплики без обращения к сети, начиная с номера строки листа start_row."""
+        columns = self._columns[sheet_name]
+        with self._lock:
+            values_list = self.conn.execute(
+                f"SELECT {', '.join(_quote(c) for c in columns)} FROM {_quote(sheet_name)} "
+                f"WHERE _row >= ? ORDER BY _row",
+                (start_row,),
+            ).fetchall()
+        # NULL означает, что такой колонки нет в листе: ключ опускаем, как get_all_records
+        return [
+            {c: v for c, v in zip(columns, values) if v is not None}
+            for values in values_list
+        ]
+
+    def rows_at(self, sheet_name: str, row_numbers: list[int]) -> dict[int, dict]:
+        """Строки листа с заданными номерами: {номер строки: словарь}. Отсутствующие номера пропускаются."""
+        columns = self._columns[sheet_name]
+        result: dict[int, dict] = {}
+        with self._lock:
+            for i in range(0, len(row_numbers), ROWS_AT_BATCH):
+                batch = row_numbers[i:i + ROWS_AT_BATCH]
+                values_list = self.conn.execute(
+                    f"SELECT _row, {', '.join(_quote(c) for c in columns)} FROM {_quote(sheet_name)} "
+                    f"WHERE _row IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for row_number, *values in values_list:
+                    result[row_number] = {c: v for c, v in zip(columns, values) if v is not None}
+        return result
+
+    def iter_rows(
+        self, sheet_name: str, start_row: int = FIRST_DATA_ROW, chunk_size: int = 10_000,
+        columns: list[str] | None = None,
+    ):
+        """
+        Потоковое чтение листа из реплики: пары (номер строки, словарь) порциями по chunk_size,
+        без загрузки всего листа в память. Блокировка берётся только на чтение порции.
+        columns ограничивает набор читаемых колонок.
+        """
+        columns = columns or self._columns[sheet_name]
+        query = (
+            f"SELECT _row, {', '.join(_quote(c) for c in columns)} FROM {_quote(sheet_name)} "
+            f"WHERE _row >= ? ORDER BY _row LIMIT ?"
+        )
+        while True:
+            with self._lock:
+                chunk = self.conn.execute(query, (start_row, chunk_size)).fetchall()
+            for row_number, *values in chunk:
+                yield row_number, {c: v for c, v in zip(columns, values) if v is not None}
+            if len(chunk) < chunk_size:
+                return
+            start_row = chunk[-1][0] + 1
+
+    def invalidate(self, sheet_name: str) -> None:
+        """Помечает таблицу изменённой: следующее чтение сначала синхронизирует её."""
+        self._dirty.add(sheet_name)
+
+    # --- СИНХРОНИЗАЦИЯ ---
+
+    def sync(self, sheet_name: str) -> bool:
+        """Синхронизирует одну таблицу. Возвращает False, если Sheets недоступен."""
+        with self._sync_locks[sheet_name]:
+            # Снимаем отметку до чтения: запись, сделанная во время синхронизации, снова её поставит
+            self._dirty.discard(sheet_name)
+            mark = self.watermark(sheet_name)
+            full_due = mark is None or time.time() - mark.full_synced_at > settings.REPLICA_JOURNAL_FULL_SYNC_S
+            if sheet_name in JOURNAL_SHEETS and not full_due:
+                ok = self._sync_tail(sheet_name, mark)
+            else:
+                ok = self._sync_diff(sheet_name)
+            if not ok:
+                self._dirty.add(sheet_name)
+            return ok
+
+    def sync_all(self) -> None:
+        for sheet_name in self._columns:
+            self.sync(sheet_name)
+
+    def _sync_tail(self, sheet_name: str, mark: Watermark) -> bool:
+        start_row = FIRST_DATA_ROW + mark.row_count
+        records = self._client.get_records_from(sheet_name, start_row)
+        if records is None:
+            return False
+        with self._lock:
+            self._upsert(sheet_name, [(start_row + i, record) for i, record in enumerate(records)])
+            self._set_watermark(sheet_name, mark.row_count + len(records), mark.full_synced_at)
+            self.conn.commit()
+        if records:
+            log.debug(f"Реплика '{sheet_name}': дочитано строк с хвоста: {len(records)}.")
+        return True
+
+    def _sync_diff(self, sheet_name: str) -> bool:
+        records = self._client.get_sheet_data(sheet_name)
+        # Устаревший снимок или ненайденный лист - не повод удалять локальные строки
+        if self._client.get_read_status(sheet_name) != ReadStatus.FRESH:
+            return False
+        with self._lock:
+            known = dict(self.conn.execute(f"SELECT _row, _hash FROM {_quote(sheet_name)}"))
+        changed = []
+        for i, record in enumerate(records):
+            row_number = FIRST_DATA_ROW + i
+            if known.get(row_number) != self._row_hash(sheet_name, record):
+                changed.append((row_number, record))
+        last_row = FIRST_DATA_ROW + len(records)
+        with self._lock:
+            self._upsert(sheet_name, changed)
+            deleted = self.conn.execute(f"DELETE FROM {_quote(sheet_name)} WHERE _row >= ?", (last_row,)).rowcount
+            self._set_watermark(sheet_name, len(records), time.time())
+            self.conn.commit()
+        if changed or deleted:
+            log.debug(f"Реплика '{sheet_name}': обновлено строк {len(changed)}, удалено {deleted}.")
+        return True
+
+    def _row_values(self, sheet_name: str, record: dict) -> tuple:
+        return tuple(record.get(c) for c in self._columns[sheet_name])
+
+    def _row_hash(self, sheet_name: str, record: dict) -> int:
+        return _stable_hash(self._row_values(sheet_name, record))
+
+    def _upsert(self, sheet_name: str, numbered_records: list[tuple[int, dict]]) -> None:
+        if not numbered_records:
+            return
+        columns = self._columns[sheet_name]
+        placeholders = ", ".join("?" * (len(columns) + 2))
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO {_quote(sheet_name)} (_row, _hash, {', '.join(_quote(c) for c in columns)}) "
+            f"VALUES ({placeholders})",
+            [
+                (row_number, _stable_hash(values), *values)
+                for row_number, values in (
+                    (n, self._row_values(sheet_name, record)) for n, record in numbered_records
+                )
+            ],
+        )
+
+    def _set_watermark(self, sheet_name: str, row_count: int, full_synced_at: float) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO _watermarks (sheet_name, synced_at, row_count, full_synced_at) VALUES (?, ?, ?, ?)",
+            (sheet_name, time.time(), row_count, full_synced_at),
+        )
+
+    # --- ФОНОВАЯ СИНХРОНИЗАЦИЯ ---
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync_all()
+            except Exception as e:
+                log.error(f"Ошибка фоновой синхронизации реплики: {e}")
+            self._stop.wait(interval)
+
+    def start_background_sync(self, interval: float | None = None) -> None:
+        """Запускает поток, периодически синхронизирующий все таблицы."""
+        if self._thread and self._thread.is_alive():
+            return
+        interval = settings.REPLICA_SYNC_INTERVAL_S if interval is None else interval
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="sheets-replica-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+replica = SheetReplica(settings.REPLICA_DB_PATH)
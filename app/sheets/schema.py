@@ -0,0 +1,48 @@
+# app/sheets/schema.py
+
+"""
+Соответствие листов Google Таблицы и Pydantic моделей.
+Модели - единственный источник правды о колонках листов.
+"""
+
+from app.config.settings import settings
+from app.models.user import User
+from app.models.pond import Pond
+from app.models.product import Product
+from app.models.feeding import FeedType, FeedingRow
+from app.models.order import SalesOrderRow, SalesOrderItemRow
+from app.models.water import WaterQualityRow
+from app.models.weighing import WeighingRow, WeighingSampleRow
+from app.models.fish import FishMoveRow
+from app.models.stock import StockMoveRow
+
+# Ключ: имя листа из settings.SHEETS
+# Значение: класс Pydantic модели, соответствующий этому листу
+SHEET_TO_MODEL_MAP = {
+    settings.SHEETS.USERS: User,
+    settings.SHEETS.PONDS: Pond,
+    settings.SHEETS.PRODUCTS: Product,
+    settings.SHEETS.FEED_TYPES: FeedType,
+
+    settings.SHEETS.SALES_ORDERS: SalesOrderRow,
+    settings.SHEETS.SALES_ORDER_ITEMS: SalesOrderItemRow,
+
+    settings.SHEETS.WATER_QUALITY_LOG: WaterQualityRow,
+    settings.SHEETS.FEEDING_LOG: FeedingRow,
+    settings.SHEETS.WEIGHING_LOG: WeighingRow,
+    settings.SHEETS.WEIGHING_SAMPLES: WeighingSampleRow,
+    settings.SHEETS.FISH_MOVES_LOG: FishMoveRow,
+    settings.SHEETS.STOCK_MOVES_LOG: StockMoveRow,
+}
+
+# Листы, в которые строки только дописываются (append-only журналы).
+# Остальные листы могут меняться на месте (статусы, флаги активности).
+JOURNAL_SHEETS = frozenset({
+    settings.SHEETS.SALES_ORDER_ITEMS,
+    settings.SHEETS.WATER_QUALITY_LOG,
+    settings.SHEETS.FEEDING_LOG,
+    settings.SHEETS.WEIGHING_LOG,
+    settings.SHEETS.WEIGHING_SAMPLES,
+    settings.SHEETS.FISH_MOVES_LOG,
+    settings.SHEETS.STOCK_MOVES_LOG,
+})
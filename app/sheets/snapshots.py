@@ -0,0 +1,70 @@
+# app/sheets/snapshots.py
+
+"""
+Снимки справочных листов с построчным сравнением.
+
+При обновлении кэша справочника лист по-прежнему читается целиком, но строки,
+которые не изменились с прошлого чтения (совпадают сырые значения), повторно
+не валидируются через Pydantic. Удалённые строки исчезают из индекса.
+"""
+
+from typing import Callable, Generic, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+def row_key(row: dict) -> tuple:
+    """Сырые значения строки в порядке колонок листа - ключ для поиска неизменённых строк."""
+    return tuple(row.items())
+
+
+class ReferenceSnapshot(Generic[T]):
+    """
+    Последний прочитанный срез справочного листа.
+
+    decode - функция, превращающая сырую строку (dict) в модель;
+    key - функция, возвращающая id модели для индекса.
+    """
+
+    def __init__(self, sheet_name: str, decode: Callable[[dict], T], key: Callable[[T], Hashable]):
+        self.sheet_name = sheet_name
+        self._decode = decode
+        self._key = key
+        # Ключ - сами значения, а не их хэш: при совпадении хэшей разных строк
+        # иначе вернулась бы чужая модель
+        self._by_row: dict[tuple, T] = {}
+        self._by_id: dict[Hashable, T] = {}
+        self._items: list[T] = []
+
+    @property
+    def items(self) -> list[T]:
+        return self._items
+
+    def get(self, item_id: Hashable) -> T | None:
+        return self._by_id.get(item_id)
+
+    def refresh(self, rows: list[dict]) -> list[T]:
+        """Применяет новое чтение листа: декодирует только новые или изменённые строки и пересобирает индекс по id."""
+        by_row: dict[tuple, T] = {}
+        by_id: dict[Hashable, T] = {}
+        items: list[T] = []
+
+        for row in rows:
+            # Ключ берётся до декодирования: некоторые декодеры меняют row на месте
+            values = row_key(row)
+            item = by_row.get(values)
+            if item is None:
+                item = self._by_row.get(values)
+            if item is None:
+                item = self._decode(row)
+            by_row[values] = item
+            # При дублировании id в листе выигрывает первая строка, как при линейном поиске
+            by_id.setdefault(self._key(item), item)
+            items.append(item)
+
+        self._by_row, self._by_id, self._items = by_row, by_id, items
+        return items
+
+    def clear(self) -> None:
+        """Сбрасывает снимок: следующее чтение декодирует все строки заново."""
+        self._by_row, self._by_id, self._items = {}, {}, []
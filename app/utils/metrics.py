@@ -0,0 +1,38 @@
+"""
+Простейшие внутрипроцессные метрики (счётчики).
+
+Внешней системы метрик у бота нет, поэтому счётчики хранятся только в памяти
+процесса; снять их значения можно через get() и snapshot().
+"""
+
+import threading
+from collections import Counter
+
+_lock = threading.Lock()
+_counters: Counter = Counter()
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+def increment(name: str, value: int = 1, **labels) -> None:
+    """Увеличивает счётчик name с указанными метками."""
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def get(name: str, **labels) -> int:
+    with _lock:
+        return _counters[_key(name, labels)]
+
+
+def snapshot() -> dict[tuple, int]:
+    """Возвращает копию всех счётчиков: {(name, ((label, value), ...)): count}."""
+    with _lock:
+        return dict(_counters)
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
@@ -3,6 +3,8 @@ from telegram.ext import ApplicationBuilder, PicklePersistence
 from app.config.settings import settings
 from app.utils.logger import log
 from app.bot.handlers import register_handlers
+from app.bot.jobs import schedule_jobs
+from app.sheets.replica import replica
 
 def main() -> None:  # <-- FIX 1: Not an async function
     """Основная функция для запуска бота."""
@@ -12,10 +14,16 @@ def main() -> None:  # <-- FIX 1: Not an async function
     persistence = PicklePersistence(filepath="bot_persistence")
     application = ApplicationBuilder().token(settings.BOT_TOKEN).persistence(persistence).build()
 
+    # Фоновая синхронизация локальной реплики таблицы
+    replica.start_background_sync()
+
     # Регистрация обработчиков
     register_handlers(application)
     log.info("Обработчики успешно зарегистрированы.")
 
+    # Периодические проверки (прогноз исчерпания корма)
+    schedule_jobs(application)
+
     # Запуск бота
     # Note: The webhook logic here is async, but run_polling is not.
     # For simplicity, we'll focus on run_polling which is what you're using.
@@ -0,0 +1,77 @@
+"""
+Микро-бенчмарк сериализации строк для записи в Google Sheets.
+
+Сравнивает старый путь (model_dump + проверка каждого значения через hasattr)
+с предсобранным сериализатором BaseSheetModel.get_row_serializer()
+для каждой модели из SHEET_TO_MODEL_MAP, в том числе в пакетном режиме.
+
+Запуск: python scripts/bench_serializers.py [количество_повторов]
+"""
+import os
+import sys
+import timeit
+from datetime import date, datetime
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from app.models.user import User, UserRole
+from app.models.pond import Pond
+from app.models.product import Product
+from app.models.feeding import FeedType, FeedingRow
+from app.models.order import SalesOrderRow, SalesOrderItemRow
+from app.models.water import WaterQualityRow
+from app.models.weighing import WeighingRow
+from app.models.fish import FishMoveRow, FishMoveType
+from app.models.stock import StockMoveRow, StockMoveType
+
+BATCH_SIZE = 500
+
+SAMPLES = [
+    User(user_id=1, user_name="Admin", phone_number="380501112233", role=UserRole.ADMIN),
+    Pond(pond_id="P-001", name="Ставок №1", species="Карп", stocking_date=date(2025, 4, 1), initial_qty=1000, is_active=True),
+    Product(product_id="PR-1", name="Карп", description="Живой", price=120.0, unit="кг", is_available=True),
+    FeedType(feed_id="F-1", name="Стартер", is_active=True),
+    SalesOrderRow(order_id="ORD-1", ts=datetime.now(), client_id=1, client_name="Клиент", phone="555", total_amount=500.0),
+    SalesOrderItemRow(order_id="ORD-1", product_id="PR-1", product_name="Карп", quantity=2, price_per_unit=120.0),
+    WaterQualityRow(ts=datetime.now(), pond_id="P-001", dissolved_O2_mgL=7.5, temperature_C=18.0, user="op"),
+    FeedingRow(ts=datetime.now(), pond_id="P-001", feed_type="Стартер", mass_kg=12.5, user="op"),
+    WeighingRow(ts=datetime.now(), pond_id="P-001", avg_weight_g=350.0, user="op"),
+    FishMoveRow(ts=datetime.now(), pond_id="P-001", move_type=FishMoveType.SALE, quantity=10, user="op"),
+    StockMoveRow(ts=datetime.now(), feed_type_id="F-1", feed_type_name="Стартер", move_type=StockMoveType.INCOME,
+                 mass_kg=100.0, reason="Закупка", user="op"),
+]
+
+
+def legacy_to_sheet_row(item) -> list:
+    """Прежняя реализация to_sheet_row, оставлена для сравнения."""
+    processed_values = []
+    for value in item.model_dump(by_alias=True).values():
+        if hasattr(value, 'value'):
+            processed_values.append(value.value)
+        elif hasattr(value, 'isoformat'):
+            processed_values.append(value.isoformat())
+        else:
+            processed_values.append(value)
+    return processed_values
+
+
+def run(number: int) -> None:
+    print(f"{'Модель':<20} {'legacy, мкс':>12} {'compiled, мкс':>14} {'x':>6} {'batch/строка, мкс':>18}")
+    for item in SAMPLES:
+        model_class = type(item)
+        assert legacy_to_sheet_row(item) == item.to_sheet_row(), model_class.__name__
+
+        legacy = timeit.timeit(lambda: legacy_to_sheet_row(item), number=number) / number * 1e6
+        compiled = timeit.timeit(item.to_sheet_row, number=number) / number * 1e6
+
+        batch = [item] * BATCH_SIZE
+        batch_runs = max(1, number // BATCH_SIZE)
+        batched = timeit.timeit(lambda: model_class.to_sheet_rows(batch), number=batch_runs)
+        batched = batched / (batch_runs * BATCH_SIZE) * 1e6
+
+        print(f"{model_class.__name__:<20} {legacy:>12.2f} {compiled:>14.2f} {legacy / compiled:>6.1f} {batched:>18.2f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
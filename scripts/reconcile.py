@@ -0,0 +1,32 @@
+"""
+Сверка согласованности журналов Google Таблицы.
+
+Синхронизирует локальную реплику, один раз проходит по всем журналам
+(app.analytics.reconcile) и печатает нарушения с номерами строк.
+Код возврата 1, если нарушения найдены.
+
+Запуск: python scripts/reconcile.py [--no-sync]
+"""
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from app.analytics.reconcile import RULES, reconciler
+
+
+def main() -> int:
+    report = reconciler.run(sync='--no-sync' not in sys.argv[1:])
+    for v in report.violations:
+        print(f"{v.sheet}:{v.row}\t{v.rule}\t{v.message}")
+    print(f"\nПроверено строк: {report.rows_checked} за {report.elapsed_s:.2f} с")
+    for rule, count in report.by_rule.most_common():
+        print(f"  {RULES[rule]}: {count}")
+    if not report.violations:
+        print("Нарушений не найдено.")
+    return 1 if report.violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,36 +9,10 @@ sys.path.insert(0, project_root)
 from app.config.settings import settings
 from app.utils.logger import log
 
-# --- ИМПОРТИРУЕМ ВСЕ НАШИ МОДЕЛИ ---
-from app.models.user import User
-from app.models.pond import Pond
-from app.models.product import Product
-from app.models.feeding import FeedType, FeedingRow
-from app.models.order import SalesOrderRow, SalesOrderItemRow
-from app.models.water import WaterQualityRow
-from app.models.weighing import WeighingRow
-from app.models.fish import FishMoveRow
-from app.models.stock import StockMoveRow
-
-
-# --- ДИНАМИЧЕСКИ ОПРЕДЕЛЯЕМ СТРУКТУРУ ТАБЛИЦ ИЗ МОДЕЛЕЙ ---
+# --- СТРУКТУРА ТАБЛИЦ ОПРЕДЕЛЯЕТСЯ МОДЕЛЯМИ (см. app/sheets/schema.py) ---
 # Ключ: имя листа из settings.SHEETS
 # Значение: класс Pydantic модели, соответствующий этому листу
-SHEET_TO_MODEL_MAP = {
-    settings.SHEETS.USERS: User,
-    settings.SHEETS.PONDS: Pond,
-    settings.SHEETS.PRODUCTS: Product,
-    settings.SHEETS.FEED_TYPES: FeedType,
-    
-    settings.SHEETS.SALES_ORDERS: SalesOrderRow,
-    settings.SHEETS.SALES_ORDER_ITEMS: SalesOrderItemRow,
-    
-    settings.SHEETS.WATER_QUALITY_LOG: WaterQualityRow,
-    settings.SHEETS.FEEDING_LOG: FeedingRow,
-    settings.SHEETS.WEIGHING_LOG: WeighingRow,
-    settings.SHEETS.FISH_MOVES_LOG: FishMoveRow,
-    settings.SHEETS.STOCK_MOVES_LOG: StockMoveRow,
-}
+from app.sheets.schema import SHEET_TO_MODEL_MAP
 
 def initialize_google_sheets():
     """
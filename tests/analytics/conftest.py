@@ -0,0 +1,22 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.sheets.client import ReadStatus
+from app.sheets.replica import SheetReplica
+
+
+@pytest.fixture
+def client():
+    """Клиент Sheets: чтения успешны, листы и хвосты журналов по умолчанию пустые."""
+    client = MagicMock()
+    client.get_read_status.return_value = ReadStatus.FRESH
+    client.get_records_from.return_value = []
+    client.get_sheet_data.return_value = []
+    return client
+
+@pytest.fixture
+def make_replica(client):
+    """Реплика в памяти с заданными листами: make_replica({лист: модель})."""
+    def make(models: dict) -> SheetReplica:
+        return SheetReplica(':memory:', client=client, models=models)
+    return make
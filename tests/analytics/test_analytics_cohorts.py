@@ -0,0 +1,104 @@
+import time
+
+import pytest
+from datetime import datetime
+
+from app.analytics.cohorts import CohortLedger
+from app.config.settings import settings
+from app.models.fish import FishMoveRow
+
+MOVES = settings.SHEETS.FISH_MOVES_LOG
+
+
+@pytest.fixture
+def replica(make_replica):
+    return make_replica({MOVES: FishMoveRow})
+
+@pytest.fixture
+def ledger(replica, tmp_path):
+    return CohortLedger(state_dir=str(tmp_path), source=replica)
+
+def _move(day: int, pond_id: str, move_type: str, quantity: int, weight: float | str = '', ref: str = '') -> dict:
+    return {'ts': f'2025-05-{day:02d}T08:00:00', 'pond_id': pond_id, 'move_type': move_type, 'quantity': quantity,
+            'avg_weight_g': weight, 'reason': '', 'ref': ref, 'user': 'op'}
+
+
+def test_consumption_is_fifo_and_by_explicit_reference(ledger, client):
+    """Тест: гибель и продажа списываются со старейшей партии, ref выбирает партию явно."""
+    client.get_sheet_data.return_value = [
+        _move(1, 'P1', 'stocking', 1000, 10, ref='Весна'),
+        _move(5, 'P1', 'stocking', 500, 20),
+        _move(6, 'P1', 'death', 1100),                        # 1000 из "Весна" + 100 из второй
+        _move(7, 'P1', 'sale', 50, 30, ref='P1#3'),           # явно из второй партии
+    ]
+    shares = ledger.pond_cohorts('P1')
+    assert [(s.cohort.id, s.quantity) for s in shares] == [('P1#3', 350)]
+
+    spring, second = ledger.cohorts()
+    assert (spring.id, spring.stocked, spring.deaths, spring.alive) == ('Весна', 1000, 1000, 0)
+    assert spring.survival_pct == 0.0
+    assert (second.deaths, second.sold, second.alive) == (100, 50, 350)
+    assert second.survival_pct == pytest.approx(80.0)
+    assert second.stocked_at == datetime(2025, 5, 5, 8)
+    assert second.daily_gain_g == pytest.approx(5.0)  # 20 г -> 30 г за 2 дня
+
+def test_transfer_moves_cohort_shares_between_ponds(ledger, client):
+    """Тест: перевод переносит доли партий, приход без пары и расход сверх партий учитываются отдельно."""
+    client.get_sheet_data.return_value = [
+        _move(1, 'P1', 'stocking', 100),
+        _move(2, 'P1', 'stocking', 100),
+        _move(3, 'P1', 'transfer_out', 150, ref='T1'),
+        _move(3, 'P2', 'transfer_in', 150, ref='T1'),
+        _move(4, 'P3', 'transfer_in', 40),                    # приход без пары - новая партия
+        _move(5, 'P1', 'death', 70),                          # 50 из партий + 20 сверх
+    ]
+    assert [(s.cohort.id, s.quantity) for s in ledger.pond_cohorts('P2')] == [('P1#2', 100), ('P1#3', 50)]
+    assert ledger.pond_cohorts('P1') == []
+    assert ledger.untracked('P1') == 20
+    assert [(s.cohort.id, s.quantity) for s in ledger.pond_cohorts('P3')] == [('P3#6', 40)]
+    assert {c.id: c.alive for c in ledger.cohorts()} == {'P1#2': 100, 'P1#3': 50, 'P3#6': 40}
+
+def test_state_survives_restart(ledger, replica, client, tmp_path):
+    """Тест: партии поднимаются из контрольной точки, хвост журнала дочитывается."""
+    client.get_sheet_data.return_value = [_move(1, 'P1', 'stocking', 100), _move(2, 'P1', 'death', 10)]
+    ledger.cohorts()
+
+    client.get_records_from.return_value = [_move(3, 'P1', 'death', 5)]
+    replica.invalidate(MOVES)
+    restored = CohortLedger(state_dir=str(tmp_path), source=replica)
+    assert [(s.cohort.deaths, s.quantity) for s in restored.pond_cohorts('P1')] == [(15, 85)]
+
+def test_full_recompute_is_fast(ledger, client):
+    """Тест: пересчёт партий по 20 тыс. движений - меньше секунды."""
+    moves = []
+    for i in range(2_000):
+        pond = f'P{i % 20}'
+        day = 1 + i % 28
+        moves.append(_move(day, pond, 'stocking', 1000, 5))
+        moves += [_move(day, pond, 'death', 10)] * 5
+        moves += [_move(day, pond, 'transfer_out', 100, ref=f'T{i}'), _move(day, 'P99', 'transfer_in', 100, ref=f'T{i}')]
+        moves += [_move(day, pond, 'sale', 200, 300)] * 2
+    client.get_sheet_data.return_value = moves
+    ledger.cohorts()
+
+    started = time.perf_counter()
+    ledger.rebuild()
+    assert time.perf_counter() - started < 1
+    assert sum(c.alive for c in ledger.cohorts()) == 2_000 * (1000 - 50 - 400)
+
+def test_bot_row_waits_for_unread_manual_rows(ledger, replica, client):
+    """Тест: строка бота после вручную дописанной ещё не прочитанной строки применяется в порядке листа."""
+    client.get_sheet_data.return_value = [_move(1, 'P1', 'stocking', 100), _move(2, 'P1', 'stocking', 100)]
+    ledger.cohorts()
+
+    # Строка 4 дописана вручную, бот записал строку 5: сначала нужно зарыбление, затем гибель
+    death = FishMoveRow.model_validate(_move(4, 'P1', 'death', 250, 10))
+    ledger.record(death, 5)
+    client.get_records_from.return_value = [_move(3, 'P1', 'stocking', 100), _move(4, 'P1', 'death', 250)]
+    replica.invalidate(MOVES)
+    assert [(s.cohort.id, s.quantity) for s in ledger.pond_cohorts('P1')] == [('P1#4', 50)]
+    assert ledger.untracked('P1') == 0
+
+    # Следующая по номеру строка бота применяется сразу, без чтения листа
+    ledger.record(FishMoveRow.model_validate(_move(5, 'P1', 'death', 10, 10)), 6)
+    assert [(s.cohort.id, s.quantity) for s in ledger.pond_cohorts('P1', sync=False)] == [('P1#4', 40)]
@@ -0,0 +1,62 @@
+import os
+import pytest
+from datetime import date, datetime
+
+from app.analytics.degree_days import DegreeDays
+from app.config.settings import settings
+from app.models.pond import Pond
+from app.models.water import WaterQualityRow
+
+WATER = settings.SHEETS.WATER_QUALITY_LOG
+
+
+@pytest.fixture
+def replica(make_replica):
+    return make_replica({WATER: WaterQualityRow})
+
+@pytest.fixture
+def tracker(replica, tmp_path):
+    return DegreeDays(state_dir=str(tmp_path), source=replica)
+
+def _reading(ts: str, temperature: float, pond_id: str = 'P1') -> dict:
+    return {'ts': ts, 'pond_id': pond_id, 'dissolved_O2_mgL': 7.0, 'temperature_C': temperature, 'user': 'op'}
+
+
+def test_trapezoidal_integration_with_gap_interpolation(tracker, client):
+    """Тест: трапеции между замерами, линейная интерполяция пропуска, края - по ближайшему замеру."""
+    client.get_sheet_data.return_value = [
+        _reading('2025-05-01T00:00:00', 10.0),
+        _reading('2025-05-02T00:00:00', 20.0),   # (10 + 20) / 2 × 1 сут = 15
+        _reading('2025-05-06T00:00:00', 20.0),   # пропуск 4 сут по 20 °C = 80
+    ]
+    assert tracker.degree_days('P1', datetime(2025, 5, 1), datetime(2025, 5, 6)) == pytest.approx(95.0)
+    # Середина первого интервала: T(12:00) = 15, площадь (10 + 15) / 2 × 0.5 = 6.25
+    assert tracker.degree_days('P1', datetime(2025, 5, 1), datetime(2025, 5, 1, 12)) == pytest.approx(6.25)
+    # До первого замера и после последнего - ближайшая температура
+    assert tracker.degree_days('P1', datetime(2025, 4, 30), datetime(2025, 5, 1)) == pytest.approx(10.0)
+    assert tracker.degree_days('P1', datetime(2025, 5, 6), datetime(2025, 5, 8)) == pytest.approx(40.0)
+    assert tracker.degree_days('P2', datetime(2025, 5, 1)) is None
+
+def test_since_stocking_and_late_reading(tracker, client):
+    """Тест: отсчёт от даты зарыбления; запоздавший замер вставляется с пересчётом сумм."""
+    client.get_sheet_data.return_value = [
+        _reading('2025-05-01T00:00:00', 10.0),
+        _reading('2025-05-03T00:00:00', 10.0),
+        _reading('2025-05-02T00:00:00', 20.0),   # запоздавший замер
+    ]
+    pond = Pond(pond_id='P1', name='Пруд 1', is_active=True, stocking_date=date(2025, 5, 1))
+    assert tracker.since_stocking(pond, datetime(2025, 5, 3)) == pytest.approx(30.0)
+    assert tracker.since_stocking(Pond(pond_id='P1', name='Пруд 1', is_active=True)) is None
+
+def test_base_temperature_and_restart(tracker, replica, client, tmp_path, monkeypatch):
+    """Тест: учитывается только тепло выше базовой температуры; после перезапуска ряд собирается из реплики."""
+    monkeypatch.setattr(settings, 'DEGREE_DAYS_BASE_TEMP_C', 12.0)
+    client.get_sheet_data.return_value = [_reading('2025-05-01T00:00:00', 10.0), _reading('2025-05-02T00:00:00', 20.0)]
+    assert tracker.degree_days('P1', datetime(2025, 5, 1), datetime(2025, 5, 2)) == pytest.approx(4.0)
+
+    client.get_records_from.return_value = [_reading('2025-05-03T00:00:00', 20.0)]
+    replica.invalidate(WATER)
+    restored = DegreeDays(state_dir=str(tmp_path), source=replica)
+    assert restored.degree_days('P1', datetime(2025, 5, 1), datetime(2025, 5, 3)) == pytest.approx(12.0)
+    assert restored.row_count == 3
+    assert not os.listdir(tmp_path)
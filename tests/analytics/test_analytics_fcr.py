@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from app.analytics.columnar import PondCodes, SortedSeries, to_unix
+from app.analytics.fcr import FcrDataset, load_dataset
+from app.models.pond import Pond
+from app.config.settings import settings
+
+DAY0 = datetime(2025, 5, 1)
+
+
+def _day(n: float) -> int:
+    return int(to_unix(DAY0 + timedelta(days=n)))
+
+def _dataset(moves=()) -> FcrDataset:
+    codes = PondCodes(["P1", "P2"])
+    feeding = (np.zeros(10), [_day(k + 0.5) for k in range(10)], np.full(10, 5.0))
+    weighing = (np.array([0, 0]), [_day(0), _day(10)], np.array([100.0, 200.0]))
+    m_pond, m_ts, m_qty, m_weight = zip(*moves) if moves else ((), (), (), ())
+    return FcrDataset.from_arrays(
+        codes, np.array([1000, 500]), feeding, weighing,
+        (np.array(m_pond), np.array(m_ts, dtype=np.int64), np.array(m_qty, dtype=float), np.array(m_weight, dtype=float)),
+    )
+
+def test_sorted_series_sums_and_interpolates_per_pond():
+    """Тест: накопленные суммы и интерполяция считаются отдельно по каждому водоёму."""
+    series = SortedSeries.build(np.array([1, 0, 0, 1]), np.array([10, 30, 10, 20]), np.array([1.0, 3.0, 2.0, 4.0]))
+    assert series.sum_until(np.array([0, 1]), 25).tolist() == [2.0, 5.0]
+    assert series.interpolate(0, np.array([0, 20, 40])).tolist() == [2.0, 2.5, 3.0]
+    assert np.isnan(series.interpolate(2, 20))
+
+def test_fcr_without_moves():
+    """Тест: FCR = корм / (B(конец) - B(начало))."""
+    result = _dataset().compute([DAY0], [DAY0 + timedelta(days=10)])
+    assert result.feed_kg[0, 0] == pytest.approx(50.0)
+    assert result.gain_kg[0, 0] == pytest.approx(100.0)
+    assert result.for_pond("P1")[0] == pytest.approx(0.5)
+    # У P2 нет взвешиваний: прирост неизвестен
+    assert np.isnan(result.for_pond("P2")[0])
+
+def test_fcr_accounts_for_removed_biomass():
+    """Тест: погибшая рыба не уменьшает прирост, её биомасса берётся по интерполированному весу."""
+    result = _dataset(moves=[(0, _day(5), -100, np.nan)]).compute([DAY0], [DAY0 + timedelta(days=10)])
+    # B0 = 1000 * 0.1 = 100 кг, B1 = 900 * 0.2 = 180 кг, ушло 100 * 0.15 = 15 кг
+    assert result.gain_kg[0, 0] == pytest.approx(95.0)
+    assert result.fcr[0, 0] == pytest.approx(50 / 95)
+
+def test_fcr_many_windows_matches_single_window():
+    """Тест: окна считаются одним вызовом и совпадают с расчётом по одному окну."""
+    dataset = _dataset(moves=[(0, _day(5), -100, 120.0)])
+    starts = [DAY0 + timedelta(days=k) for k in range(0, 10, 2)]
+    ends = [s + timedelta(days=2) for s in starts]
+    batch = dataset.compute(starts, ends)
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        single = dataset.compute([start], [end])
+        assert batch.fcr[0, i] == pytest.approx(single.fcr[0, 0])
+
+def test_unknown_pond_gives_nan():
+    """Тест: водоём без данных не ломает расчёт."""
+    result = _dataset().compute([DAY0], [DAY0 + timedelta(days=1)], pond_ids=["P1", "NOPE"])
+    assert np.isnan(result.for_pond("NOPE")[0])
+
+def test_load_dataset_skips_invalid_rows():
+    """Тест: загрузка из реплики отбрасывает строки с некорректным временем или числом."""
+    sheets = {
+        settings.SHEETS.FEEDING_LOG: [
+            {'ts': '2025-05-01T12:00:00', 'pond_id': 'P1', 'feed_type': 'F', 'mass_kg': 5.0, 'user': 'op'},
+            {'ts': 'вчера', 'pond_id': 'P1', 'feed_type': 'F', 'mass_kg': 5.0, 'user': 'op'},
+            {'ts': '2025-05-02T12:00:00', 'pond_id': 'P1', 'feed_type': 'F', 'mass_kg': '', 'user': 'op'},
+        ],
+        settings.SHEETS.WEIGHING_LOG: [
+            {'ts': '2025-05-01T00:00:00', 'pond_id': 'P1', 'avg_weight_g': 100, 'user': 'op'},
+            {'ts': '2025-05-11T00:00:00', 'pond_id': 'P1', 'avg_weight_g': 200, 'user': 'op'},
+        ],
+        settings.SHEETS.FISH_MOVES_LOG: [
+            {'ts': '2025-05-06T00:00:00', 'pond_id': 'P1', 'move_type': 'death', 'quantity': 100, 'avg_weight_g': ''},
+            {'ts': '2025-05-06T00:00:00', 'pond_id': 'P1', 'move_type': 'unknown', 'quantity': 5, 'avg_weight_g': ''},
+        ],
+    }
+    source = MagicMock()
+    source.read.side_effect = sheets.__getitem__
+
+    dataset = load_dataset([Pond(pond_id="P1", name="Пруд", initial_qty=1000, is_active=True)], source=source)
+
+    assert len(dataset.feeding) == 1
+    assert len(dataset.population) == 1
+    result = dataset.compute([DAY0], [DAY0 + timedelta(days=10)])
+    assert result.gain_kg[0, 0] == pytest.approx(95.0)
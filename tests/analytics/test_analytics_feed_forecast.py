@@ -0,0 +1,66 @@
+import pytest
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+from app.analytics.feed_forecast import FeedConsumptionRate, FeedDepletionForecast
+from app.config.settings import settings
+from app.models.feeding import FeedingRow, FeedType
+
+FEEDING = settings.SHEETS.FEEDING_LOG
+
+
+@pytest.fixture
+def rates(make_replica, tmp_path):
+    replica = make_replica({FEEDING: FeedingRow})
+    return FeedConsumptionRate(state_dir=str(tmp_path), source=replica)
+
+def _feeding(day: int, mass: float, feed: str = "Стартовый", hour: int = 9) -> dict:
+    return {'ts': datetime(2025, 5, day, hour).isoformat(), 'pond_id': 'P1', 'feed_type': feed, 'mass_kg': mass, 'user': 'op'}
+
+def test_ewma_of_daily_consumption(client, rates, monkeypatch):
+    """Тест: суточные суммы сглаживаются EWMA, дни без кормлений считаются нулевыми."""
+    monkeypatch.setattr(settings, 'FEED_RATE_SPAN_DAYS', 3.0)  # alpha = 0.5
+    client.get_sheet_data.return_value = [
+        _feeding(1, 10), _feeding(1, 10, hour=18),
+        _feeding(2, 40),
+        _feeding(3, 5, feed="Другой"),
+        _feeding(4, 100),
+    ]
+    # 1 мая: 20; 2 мая: 0.5*40 + 0.5*20 = 30; 3 мая без кормлений: 15; 4 мая (идёт) не учитывается
+    assert rates.daily_kg("Стартовый", date(2025, 5, 4)) == pytest.approx(15.0)
+    # На 5 мая закрыт день 4 мая: 0.5*100 + 0.5*15 = 57.5; на 6 мая 5 мая - пустой: 28.75
+    assert rates.daily_kg("Стартовый", date(2025, 5, 5), sync=False) == pytest.approx(57.5)
+    assert rates.daily_kg("Стартовый", date(2025, 5, 6), sync=False) == pytest.approx(28.75)
+    assert rates.daily_kg("Неизвестный") == 0.0
+
+def test_incremental_record_matches_full_read(client, rates, tmp_path, monkeypatch):
+    """Тест: запись через record даёт тот же результат, что и чтение журнала, и переживает перезапуск."""
+    monkeypatch.setattr(settings, 'FEED_RATE_SPAN_DAYS', 3.0)
+    client.get_sheet_data.return_value = [_feeding(1, 20)]
+    rates.catch_up()
+    rates.record(FeedingRow.model_validate(_feeding(2, 40)), 3)
+    assert rates.daily_kg("Стартовый", date(2025, 5, 3), sync=False) == pytest.approx(30.0)
+    rates.save_checkpoint()
+
+    restored = FeedConsumptionRate(state_dir=str(tmp_path), source=rates._source)
+    assert restored.daily_kg("Стартовый", date(2025, 5, 3), sync=False) == pytest.approx(30.0)
+
+def test_forecast_days_left():
+    """Тест: дни до исчерпания = остаток / сглаженный расход; без расхода прогноза нет."""
+    feed_type = FeedType(feed_id="F1", name="Стартовый", is_active=True)
+    rates, stock = MagicMock(), MagicMock()
+    stock.balance.return_value = 120.0
+    rates.daily_kg.return_value = 30.0
+    forecaster = FeedDepletionForecast(rates, stock)
+
+    forecast = forecaster.forecast(feed_type)
+    assert forecast.days_left == pytest.approx(4.0)
+    assert forecast.is_low  # меньше FEED_LOW_STOCK_LEAD_DAYS = 5
+
+    rates.daily_kg.return_value = 0.0
+    assert forecaster.forecast(feed_type).days_left is None
+    assert forecaster.should_alert("F1", now=0.0)
+    # Пока предупреждение не отправлено, пауза не начинается
+    assert forecaster.should_alert("F1", now=60.0)
+    forecaster.mark_alerted("F1", now=60.0)
+    assert not forecaster.should_alert("F1", now=120.0)
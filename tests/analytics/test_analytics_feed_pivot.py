@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+from datetime import datetime
+
+from app.analytics.feed_pivot import FeedPivot
+from app.models.feeding import FeedingRow
+from app.config.settings import settings
+
+FEEDING = settings.SHEETS.FEEDING_LOG
+
+
+def _feeding(ts: str, pond_id: str, feed: str, mass: float) -> dict:
+    return {'ts': ts, 'pond_id': pond_id, 'feed_type': feed, 'mass_kg': mass, 'user': 'op'}
+
+@pytest.fixture
+def pivot(make_replica, client, tmp_path):
+    client.get_sheet_data.return_value = [
+        _feeding('2025-05-01T08:00:00', 'P1', 'Старт', 10.0),
+        _feeding('2025-05-01T18:00:00', 'P1', 'Старт', 5.0),     # тот же день - суммируется
+        _feeding('2025-05-02T08:00:00', 'P2', 'Старт', 7.0),
+        _feeding('2025-05-31T23:30:00', 'P2', 'Гроуэр', 3.0),
+        _feeding('2025-06-01T00:10:00', 'P1', 'Гроуэр', 99.0),   # следующий месяц
+    ]
+    replica = make_replica({FEEDING: FeedingRow})
+    return FeedPivot(state_dir=str(tmp_path), source=replica)
+
+
+def test_month_matrix(pivot):
+    """Тест: матрица (корм, водоём, день) за месяц складывает кормления по ячейкам."""
+    table = pivot.pivot(2025, 5)
+    assert (table.ponds, table.feeds, table.days) == (['P1', 'P2'], ['Старт', 'Гроуэр'], 31)
+    assert table.mass_kg[0, 0, 0] == 15.0
+    assert table.mass_kg[0, 1, 1] == 7.0
+    assert table.mass_kg[1, 1, 30] == 3.0
+    assert table.mass_kg.sum() == 25.0
+    assert table.totals()[1].sum() == 10.0
+    assert pivot.pivot(2025, 6).mass_kg[1, 0, 0] == 99.0
+    # Месяц без кормлений - нули нужной формы
+    assert pivot.pivot(2025, 2).mass_kg.shape == (2, 2, 28) and not pivot.pivot(2025, 2).mass_kg.any()
+
+def test_new_feeding_updates_month_in_place(pivot):
+    """Тест: новое кормление добавляется в одну ячейку матрицы месяца."""
+    pivot.pivot(2025, 5)
+    pivot.record(FeedingRow(ts=datetime(2025, 5, 2, 12), pond_id='P2', feed_type='Старт', mass_kg=3.0, user='op'), 7)
+    pivot.record(FeedingRow(ts=datetime(2025, 5, 3, 9), pond_id='P3', feed_type='Финиш', mass_kg=2.0, user='op'), 8)
+    table = pivot.pivot(2025, 5, sync=False)
+    assert table.mass_kg[0, 1, 1] == 10.0
+    # Новый водоём и тип корма - матрица дополнена нулями
+    assert table.mass_kg.shape == (3, 3, 31)
+    assert table.mass_kg[2, 2, 2] == 2.0
+    # Возвращается копия: правка результата не портит кэш
+    table.mass_kg[:] = 0
+    assert pivot.pivot(2025, 5, sync=False).mass_kg.sum() == 30.0
+
+def test_csv_export_and_restart(pivot, tmp_path):
+    """Тест: CSV - строка на (корм, водоём) с днями и итогом; матрицы месяцев переживают перезапуск."""
+    table = pivot.pivot(2025, 5)
+    lines = table.to_csv().decode('utf-8-sig').splitlines()
+    assert lines[0].split(';')[:3] == ['feed_type', 'pond_id', '1'] and lines[0].endswith(';31;total')
+    assert len(lines) == 4
+    assert lines[1].startswith('Старт;P1;15;0;') and lines[1].endswith(';15')
+
+    restarted = FeedPivot(state_dir=str(tmp_path), source=pivot._source)
+    assert np.array_equal(restarted.pivot(2025, 5, sync=False).mass_kg, table.mass_kg)
+
+def test_checkpoint_does_not_grow_with_journal(make_replica, client, tmp_path):
+    """Тест: в контрольной точке - ненулевые ячейки месяцев, а не строки журнала."""
+    client.get_sheet_data.return_value = [
+        _feeding(f'2025-05-01T{hour:02d}:00:00', 'P1', 'Старт', 1.0) for hour in range(24)
+    ] * 50
+    pivot = FeedPivot(state_dir=str(tmp_path), source=make_replica({FEEDING: FeedingRow}))
+    assert pivot.pivot(2025, 5).mass_kg[0, 0, 0] == 1200.0
+    assert pivot.dump_state()['months'] == [[2025, 5, [[0, 0, 0, 1200.0]]]]
@@ -0,0 +1,69 @@
+import pytest
+
+from app.analytics.feed_stock import StockMovesProjection, FeedingConsumption, FeedStockBalance
+from app.models.feeding import FeedType, FeedingRow
+from app.models.stock import StockMoveRow, StockMoveType
+from app.config.settings import settings
+
+STOCK = settings.SHEETS.STOCK_MOVES_LOG
+FEEDING = settings.SHEETS.FEEDING_LOG
+
+
+@pytest.fixture
+def replica(make_replica):
+    return make_replica({STOCK: StockMoveRow, FEEDING: FeedingRow})
+
+@pytest.fixture
+def feed_type():
+    return FeedType(feed_id="F1", name="Стартовый", is_active=True)
+
+@pytest.fixture
+def feed_stock(replica, tmp_path):
+    return FeedStockBalance(
+        StockMovesProjection(state_dir=str(tmp_path), source=replica),
+        FeedingConsumption(state_dir=str(tmp_path), source=replica),
+    )
+
+def _stock(move_type: StockMoveType, mass: float, feed_id: str = "F1", feed_name: str = "Стартовый") -> dict:
+    return {
+        'ts': '2025-05-01T08:00:00', 'feed_type_id': feed_id, 'feed_type_name': feed_name,
+        'move_type': move_type.value, 'mass_kg': mass, 'reason': '', 'user': 'op',
+    }
+
+def _feeding(mass: float, feed_name: str = "Стартовый") -> dict:
+    return {'ts': '2025-05-01T09:00:00', 'pond_id': 'P1', 'feed_type': feed_name, 'mass_kg': mass, 'user': 'op'}
+
+def _sheets(client, stock: list[dict], feedings: list[dict]):
+    client.get_sheet_data.side_effect = lambda sheet: {STOCK: stock, FEEDING: feedings}[sheet]
+
+def test_balance_combines_stock_moves_and_feedings(client, feed_stock, feed_type):
+    """Тест: остаток = приход - расход - скормлено."""
+    _sheets(
+        client,
+        [_stock(StockMoveType.INCOME, 1000), _stock(StockMoveType.OUTCOME, 50.5), _stock(StockMoveType.INCOME, 300, feed_id="F2", feed_name="Другой")],
+        [_feeding(25.2), _feeding(24.3), _feeding(10, feed_name="Другой")],
+    )
+    assert feed_stock.balance(feed_type) == 900.0
+
+def test_balance_updates_on_new_rows_without_full_scan(client, feed_stock, feed_type):
+    """Тест: новые записи бота меняют остаток сразу, без чтения всего листа."""
+    _sheets(client, [_stock(StockMoveType.INCOME, 100)], [])
+    assert feed_stock.balance(feed_type) == 100.0
+
+    feed_stock.feedings.record(FeedingRow.model_validate(_feeding(30)), 2)
+    feed_stock.moves.record(StockMoveRow.model_validate(_stock(StockMoveType.INCOME, 20)), 3)
+
+    assert feed_stock.balance(feed_type) == 90.0
+    assert client.get_sheet_data.call_count == 2  # по одному полному чтению на журнал
+
+def test_can_consume(client, feed_stock, feed_type):
+    """Тест: списать можно не больше остатка."""
+    _sheets(client, [_stock(StockMoveType.INCOME, 0.3)], [_feeding(0.1), _feeding(0.2)])
+    assert feed_stock.balance(feed_type) == 0.0
+    assert feed_stock.can_consume(feed_type, 0.0)
+    assert not feed_stock.can_consume(feed_type, 0.001)
+
+def test_stock_moves_and_feedings_share_feed_name_key(client, feed_stock, feed_type):
+    """Тест: склад и кормления сводятся по названию корма, как и партии в profit."""
+    _sheets(client, [_stock(StockMoveType.INCOME, 100, feed_id="F-OLD")], [_feeding(40)])
+    assert feed_stock.balance(feed_type) == 60.0
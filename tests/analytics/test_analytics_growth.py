@@ -0,0 +1,84 @@
+import math
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.analytics.columnar import to_unix
+from app.analytics.growth import GrowthCurve, GrowthModel, estimate_biomass
+from app.models.pond import Pond
+from app.models.weighing import WeighingRow
+from app.config.settings import settings
+
+WEIGHING = settings.SHEETS.WEIGHING_LOG
+DAY0 = datetime(2025, 5, 1)
+
+
+def _ts(days: float) -> int:
+    return int(to_unix(DAY0 + timedelta(days=days)))
+
+def _weighing(days: float, weight: float, pond_id: str = "P1") -> dict:
+    return {'ts': (DAY0 + timedelta(days=days)).isoformat(), 'pond_id': pond_id, 'avg_weight_g': weight, 'user': 'op'}
+
+@pytest.fixture
+def model(make_replica, tmp_path):
+    replica = make_replica({WEIGHING: WeighingRow})
+    return GrowthModel(state_dir=str(tmp_path), source=replica)
+
+def test_curve_interpolates_log_linearly_between_weighings():
+    """Тест: между взвешиваниями вес растёт экспоненциально (линейно в логарифме)."""
+    curve = GrowthCurve.fit([(_ts(0), 100.0), (_ts(10), 400.0)], tail_points=3)
+    assert curve.weight_at(_ts(5), 30) == pytest.approx(200.0)
+    assert curve.weight_at(_ts(-5), 30) == pytest.approx(100.0)
+
+def test_curve_extrapolates_with_tail_growth_rate_and_caps_horizon():
+    """Тест: после последнего взвешивания вес растёт с оценённой скоростью, но не дальше горизонта."""
+    curve = GrowthCurve.fit([(_ts(0), 100.0), (_ts(10), 200.0), (_ts(20), 400.0)], tail_points=3)
+    assert curve.sgr == pytest.approx(math.log(2) / 10)
+    assert curve.weight_at(_ts(30), 30) == pytest.approx(800.0)
+    assert curve.weight_at(_ts(100), 30) == pytest.approx(400.0 * 2 ** 3)
+
+def test_curve_never_extrapolates_weight_loss():
+    """Тест: отрицательная скорость роста не экстраполируется."""
+    curve = GrowthCurve.fit([(_ts(0), 300.0), (_ts(10), 250.0)], tail_points=3)
+    assert curve.sgr == 0.0
+    assert curve.weight_at(_ts(20), 30) == pytest.approx(250.0)
+
+def test_model_refits_only_after_new_weighing(model, client):
+    """Тест: кривая кэшируется и пересчитывается только после нового взвешивания водоёма."""
+    client.get_sheet_data.return_value = [_weighing(0, 100), _weighing(10, 400), _weighing(0, 50, pond_id="P2")]
+    with patch.object(GrowthCurve, 'fit', wraps=GrowthCurve.fit) as fit:
+        assert model.weight_g("P1", DAY0 + timedelta(days=5)) == pytest.approx(200.0)
+        model.weight_g("P1", DAY0 + timedelta(days=6))
+        assert fit.call_count == 1
+
+        model.record(WeighingRow.model_validate(_weighing(20, 800)), 5)
+        assert model.weight_g("P1", DAY0 + timedelta(days=15)) == pytest.approx(400 * math.sqrt(2))
+        assert fit.call_count == 2
+
+    assert model.weight_g("NOPE") is None
+
+def test_fitted_curves_survive_restart(model, client, tmp_path):
+    """Тест: параметры кривых сохраняются в контрольной точке."""
+    client.get_sheet_data.return_value = [_weighing(0, 100), _weighing(10, 400)]
+    model.curve("P1")
+    model.save_checkpoint()
+
+    restarted = GrowthModel(state_dir=str(tmp_path), source=model._source)
+    with patch.object(GrowthCurve, 'fit') as fit:
+        assert restarted.weight_g("P1", DAY0 + timedelta(days=5)) == pytest.approx(200.0)
+        fit.assert_not_called()
+
+@patch('app.analytics.growth.growth_model')
+@patch('app.analytics.growth.population_ledger')
+def test_estimate_biomass(mock_ledger, mock_growth):
+    """Тест: биомасса = поголовье × оценка веса; без взвешиваний - неизвестна."""
+    ponds = [Pond(pond_id="P1", name="Пруд 1", is_active=True), Pond(pond_id="P2", name="Пруд 2", is_active=True)]
+    mock_ledger.counts.return_value = {"P1": 1000, "P2": 500}
+    mock_growth.curve.side_effect = lambda pond_id: GrowthCurve((_ts(0),), (math.log(250.0),), 0.0) if pond_id == "P1" else None
+    mock_growth.weight_g.side_effect = lambda pond_id, when=None: 250.0 if pond_id == "P1" else None
+
+    p1, p2 = estimate_biomass(ponds)
+
+    assert p1.biomass_kg == pytest.approx(250.0)
+    assert p1.last_weighing == DAY0
+    assert p2.biomass_kg is None
@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+import pytest
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+from app.analytics.harvest import HarvestPlan, plan_harvest, simulate
+from app.analytics.ration import grid_for
+from app.analytics.water import MetricStats, RollupBucket
+from app.models.pond import Pond
+
+
+def test_growth_follows_thermal_growth_coefficient():
+    """Тест: день вылова совпадает с аналитическим решением TGC, теплее - раньше."""
+    # 125 г -> 1000 г: куб. корень растёт с 5 до 10, при 18 °C (10 градусо-дней в сутки) и TGC 2.5 - за 200 дней
+    harvest_day, count, kg, feed = simulate(
+        [1000], [125.0], [18.0], [0.0], 365, offsets_c=(-2.0, 0.0, 2.0),
+        market_weight_g=1000, tgc=2.5, base_temp_c=8.0,
+    )
+    assert harvest_day[1, 0] == 200
+    assert harvest_day[0, 0] > 200 > harvest_day[2, 0]
+    assert count[1, 0] == 1000
+    assert kg[1, 0] == pytest.approx(1000, rel=0.01)
+    # После вылова корм не нужен
+    assert feed[1, 0, 200:].sum() == 0 and feed[1, 0, :200].min() > 0
+
+def test_mortality_and_unreached_market_weight():
+    """Тест: падёж уменьшает поголовье, не успевший водоём отмечен -1 и считается на конец горизонта."""
+    harvest_day, count, kg, _ = simulate([1000, 1000], [125.0, 10.0], [18.0, 18.0], [1.0, 0.0], 30,
+                                         market_weight_g=130, tgc=2.5, base_temp_c=8.0)
+    assert harvest_day[0, 0] > 0
+    assert count[0, 0] == pytest.approx(1000 * 0.99 ** harvest_day[0, 0])
+    assert harvest_day[0, 1] == -1
+    assert count[0, 1] == 1000 and kg[0, 1] < 130
+
+def test_feed_uses_species_table_of_each_pond():
+    """Тест: корм каждого водоёма считается по таблице его вида (в холодной воде ест только форель)."""
+    *_, feed = simulate([1000, 1000], [100.0, 100.0], [5.0, 5.0], [0.0, 0.0], 10,
+                        grids=[grid_for("форель"), grid_for("карп")])
+    assert feed[0, 0].sum() > 0
+    assert feed[0, 1].sum() == 0
+
+def test_many_ponds_and_scenarios_in_milliseconds():
+    """Тест: 500 водоёмов × 5 сценариев × год считаются быстрее 0.5 с."""
+    ponds = 500
+    started = time.perf_counter()
+    harvest_day, *_ = simulate(np.full(ponds, 1000), np.linspace(5, 900, ponds), np.full(ponds, 20.0),
+                               np.full(ponds, 0.05), 365, offsets_c=(-2, -1, 0, 1, 2))
+    assert time.perf_counter() - started < 0.5
+    assert harvest_day.shape == (5, ponds)
+
+def test_plan_weekly_totals():
+    """Тест: вылов по неделям складывает биомассу водоёмов по неделе их вылова."""
+    plan = HarvestPlan(
+        date(2025, 6, 1), [], [], np.zeros(1),
+        harvest_day=np.array([[3, 6, 9, -1]]), harvest_count=np.ones((1, 4)),
+        harvest_kg=np.array([[100.0, 200.0, 50.0, 999.0]]), feed_kg=np.ones((1, 4, 14)),
+    )
+    assert plan.weekly_harvest_kg(0).tolist() == [300.0, 50.0, 0.0]
+    assert plan.weekly_feed_kg(0).tolist() == [28.0, 28.0]
+    assert plan.harvest_date(0, 2) == date(2025, 6, 10)
+    assert plan.harvest_date(0, 3) is None
+
+@patch('app.analytics.harvest.mortality_monitor')
+@patch('app.analytics.harvest.water_rollups')
+@patch('app.analytics.harvest.growth_model')
+@patch('app.analytics.harvest.population_ledger')
+def test_plan_harvest_skips_ponds_without_data(mock_population, mock_growth, mock_water, mock_mortality):
+    """Тест: план строится по данным проекций, водоёмы без данных пропускаются."""
+    ponds = [Pond(pond_id=f"P{i}", name=f"Пруд {i}", is_active=True) for i in range(3)]
+    mock_population.counts.return_value = {'P0': 1000, 'P1': 0, 'P2': 500}
+    mock_growth.weight_g.side_effect = lambda pond_id, now: {'P0': 500.0, 'P2': None}.get(pond_id)
+    bucket = RollupBucket(datetime(2025, 6, 1), 10, {'temperature_C': MetricStats(20, 24, 22.0)})
+    mock_water.summary.return_value = bucket
+    mock_mortality.rate.return_value = MagicMock(pct_7d=0.7)
+
+    plan = plan_harvest(ponds, now=datetime(2025, 6, 1, 12), horizon_days=120)
+    assert plan.ponds == [ponds[0]] and plan.skipped == [ponds[1], ponds[2]]
+    assert plan.harvest_day.shape == (3, 1)
+    assert plan.harvest_date(1, 0) is not None
+    assert plan.start == date(2025, 6, 1)
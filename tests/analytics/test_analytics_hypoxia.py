@@ -0,0 +1,85 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.analytics.hypoxia import HypoxiaMonitor
+from app.models.water import WaterQualityRow
+from app.config.settings import settings
+
+WATER = settings.SHEETS.WATER_QUALITY_LOG
+DAY0 = datetime(2025, 7, 1, 20, 0)
+
+
+def _reading(hours: float, do: float, temp: float = 18.0, pond_id: str = "P1") -> dict:
+    return {
+        'ts': (DAY0 + timedelta(hours=hours)).isoformat(), 'pond_id': pond_id,
+        'dissolved_O2_mgL': do, 'temperature_C': temp, 'notes': '', 'user': 'op',
+    }
+
+@pytest.fixture
+def monitor(make_replica, tmp_path):
+    replica = make_replica({WATER: WaterQualityRow})
+    return HypoxiaMonitor(state_dir=str(tmp_path), source=replica)
+
+def test_forecast_projects_threshold_crossing(monitor, client):
+    """Тест: линейно падающий DO даёт прогноз времени пересечения порога."""
+    client.get_sheet_data.return_value = [_reading(0, 8.0), _reading(1, 7.5), _reading(2, 7.0), _reading(3, 6.5)]
+    forecast = monitor.forecast("P1")
+    assert forecast.slope_per_hour == pytest.approx(-0.5)
+    assert forecast.do_now == pytest.approx(6.5)
+    assert forecast.hours_to_threshold == pytest.approx((6.5 - settings.DO_MIN) / 0.5)
+
+def test_streaming_update_matches_batch(monitor, client, make_replica, tmp_path):
+    """Тест: замеры, поступившие по одному через record, дают тот же прогноз, что и пакетная загрузка."""
+    readings = [_reading(0, 8.0), _reading(0.5, 7.9), _reading(2, 7.0), _reading(3.5, 6.2), _reading(4, 6.1)]
+    client.get_sheet_data.return_value = readings[:1]
+    monitor.forecast("P1")
+    for i, reading in enumerate(readings[1:], start=3):
+        monitor.record(WaterQualityRow.model_validate(reading), i)
+    streamed = monitor.forecast("P1")
+
+    client.get_sheet_data.return_value = readings
+    batch = HypoxiaMonitor(state_dir=str(tmp_path / "other"), source=make_replica({WATER: WaterQualityRow}))
+    expected = batch.forecast("P1")
+    assert streamed.slope_per_hour == pytest.approx(expected.slope_per_hour)
+    assert streamed.hours_to_threshold == pytest.approx(expected.hours_to_threshold)
+
+def test_no_forecast_when_stable_or_too_few_readings(monitor, client):
+    """Тест: растущий или стабильный DO и недостаток замеров не дают прогноза."""
+    client.get_sheet_data.return_value = [
+        _reading(0, 6.0), _reading(1, 6.5), _reading(2, 7.0),
+        _reading(0, 9.0, pond_id="P2"), _reading(1, 5.0, pond_id="P2"),
+    ]
+    assert monitor.forecast("P1") is None
+    assert monitor.forecast("P2") is None
+
+def test_slow_decline_beyond_lead_time_is_ignored(monitor, client):
+    """Тест: медленное снижение, при котором порог далеко, не считается угрозой."""
+    client.get_sheet_data.return_value = [_reading(0, 9.0), _reading(2, 8.9), _reading(4, 8.8)]
+    assert monitor.forecast("P1") is None
+
+def test_warm_water_raises_threshold(monitor, client):
+    """Тест: в тёплой воде порог DO выше, поэтому предупреждение приходит раньше."""
+    client.get_sheet_data.return_value = [_reading(0, 7.0, 28), _reading(1, 6.6, 28), _reading(2, 6.2, 28)]
+    with patch.object(settings, 'HYPOXIA_TEMP_COEF', 0.1), patch.object(settings, 'HYPOXIA_TEMP_REF_C', 20.0):
+        forecast = monitor.forecast("P1")
+    assert forecast.threshold == pytest.approx(settings.DO_MIN + 0.8)
+    assert forecast.hours_to_threshold == pytest.approx((6.2 - settings.DO_MIN - 0.8) / 0.4)
+
+def test_old_readings_do_not_count_toward_minimum(monitor, client):
+    """Тест: после долгого перерыва тренд по двум свежим замерам не даёт прогноза, сколько бы ни было старых."""
+    old = [_reading(h, 8.0) for h in range(-80, -70)]
+    client.get_sheet_data.return_value = old + [_reading(0, 7.0), _reading(1, 6.0)]
+    assert monitor.forecast("P1") is None
+
+    monitor.record(WaterQualityRow.model_validate(_reading(2, 5.5)), 15)
+    assert monitor.forecast("P1") is not None
+
+def test_alert_cooldown(monitor):
+    """Тест: предупреждение по водоёму не повторяется в течение паузы, начатой mark_alerted."""
+    assert monitor.should_alert("P1", now=0)
+    assert monitor.should_alert("P1", now=60)
+    monitor.mark_alerted("P1", now=0)
+    assert not monitor.should_alert("P1", now=3600)
+    assert monitor.should_alert("P2", now=3600)
+    assert monitor.should_alert("P1", now=settings.HYPOXIA_ALERT_COOLDOWN_HOURS * 3600 + 1)
@@ -0,0 +1,52 @@
+import os
+import pytest
+from datetime import datetime
+
+from app.analytics.journal_index import JournalIndex, query
+from app.config.settings import settings
+from app.models.feeding import FeedingRow
+
+FEEDING = settings.SHEETS.FEEDING_LOG
+
+
+@pytest.fixture
+def replica(make_replica):
+    return make_replica({FEEDING: FeedingRow})
+
+@pytest.fixture
+def index(replica, tmp_path):
+    return JournalIndex(FEEDING, state_dir=str(tmp_path), source=replica)
+
+def _feeding(day: int, pond_id: str, mass: float) -> dict:
+    return {'ts': f'2025-05-{day:02d}T08:00:00', 'pond_id': pond_id, 'feed_type': 'Стартер', 'mass_kg': mass, 'user': 'op'}
+
+
+def test_query_by_pond_and_time_range(index, client):
+    """Тест: выборка по водоёму и полуинтервалу [since, until) в порядке времени."""
+    client.get_sheet_data.return_value = [
+        _feeding(1, 'P1', 1), _feeding(2, 'P2', 2), _feeding(3, 'P1', 3), _feeding(5, 'P1', 5),
+        _feeding(4, 'P1', 4),  # запоздавшая запись
+    ]
+    rows = index.query('P1', since=datetime(2025, 5, 2), until=datetime(2025, 5, 5))
+    assert [r.mass_kg for r in rows] == [3, 4]
+    assert [r.mass_kg for r in index.query(until=datetime(2025, 5, 3))] == [1, 2]
+    assert [r.mass_kg for r in index.query('P1')] == [1, 3, 4, 5]
+    assert index.query('P9') == []
+    assert index.row_numbers('P1', since=datetime(2025, 5, 4)) == [6, 5]
+
+def test_index_is_rebuilt_from_replica_and_follows_new_rows(index, replica, client, tmp_path):
+    """Тест: индекс не пишется на диск - при запуске собирается из локальной реплики и дочитывает хвост."""
+    client.get_sheet_data.return_value = [_feeding(1, 'P1', 1), _feeding(2, 'P1', 2)]
+    assert len(index.query('P1')) == 2
+
+    client.get_records_from.return_value = [_feeding(3, 'P1', 3)]
+    replica.invalidate(FEEDING)
+    restored = JournalIndex(FEEDING, state_dir=str(tmp_path), source=replica)
+    assert [r.mass_kg for r in restored.query('P1', since=datetime(2025, 5, 2))] == [2, 3]
+    assert restored.row_count == 3
+    assert not os.listdir(tmp_path)
+
+def test_query_rejects_unindexed_sheet():
+    """Тест: запрос к листу без индекса - понятная ошибка."""
+    with pytest.raises(ValueError):
+        query(settings.SHEETS.PONDS)
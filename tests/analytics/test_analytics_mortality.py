@@ -0,0 +1,68 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.analytics.mortality import MortalityMonitor, RING_HOURS
+from app.config.settings import settings
+from app.models.fish import FishMoveRow, FishMoveType
+from app.models.pond import Pond
+
+MOVES = settings.SHEETS.FISH_MOVES_LOG
+NOW = datetime(2025, 6, 10, 12, 30)
+
+
+@pytest.fixture
+def monitor(make_replica, tmp_path):
+    replica = make_replica({MOVES: FishMoveRow})
+    return MortalityMonitor(state_dir=str(tmp_path), source=replica)
+
+@pytest.fixture
+def pond():
+    return Pond(pond_id="P1", name="Пруд 1", is_active=True, initial_qty=1000)
+
+def _move(ts: datetime, quantity: int, move_type: FishMoveType = FishMoveType.DEATH, pond_id: str = "P1") -> dict:
+    return {
+        'ts': ts.isoformat(), 'pond_id': pond_id, 'move_type': move_type.value,
+        'quantity': quantity, 'reason': '', 'user': 'op',
+    }
+
+def test_windows_count_only_recent_deaths(client, monitor):
+    """Тест: окна 24 ч и 7 дней, продажи и другие водоёмы не учитываются."""
+    client.get_sheet_data.return_value = [
+        _move(NOW - timedelta(hours=2), 5),
+        _move(NOW - timedelta(hours=2), 3),
+        _move(NOW - timedelta(days=3), 10),
+        _move(NOW - timedelta(days=8), 100),
+        _move(NOW - timedelta(hours=1), 50, FishMoveType.SALE),
+        _move(NOW - timedelta(hours=1), 7, pond_id="P2"),
+    ]
+    assert monitor.deaths("P1", 24, NOW) == 8
+    assert monitor.deaths("P1", RING_HOURS, NOW) == 18
+    # Через 2 суток вчерашние 8 шт. выпадают из окна 24 ч, но остаются в недельном
+    assert monitor.deaths("P1", 24, NOW + timedelta(days=2)) == 0
+    assert monitor.deaths("P1", RING_HOURS, NOW + timedelta(days=2)) == 18
+
+def test_ring_slot_is_reused_after_a_week(client, monitor):
+    """Тест: ячейка часа недельной давности перезаписывается новым часом."""
+    client.get_sheet_data.return_value = [_move(NOW - timedelta(days=7), 40)]
+    monitor.catch_up()
+    monitor.record(FishMoveRow.model_validate(_move(NOW, 2)), 3)
+    assert monitor.deaths("P1", RING_HOURS, NOW, sync=False) == 2
+
+@patch('app.analytics.mortality.population_ledger')
+def test_rate_and_threshold(mock_ledger, client, monitor, pond):
+    """Тест: процент считается от поголовья на начало окна, порог - из настроек."""
+    client.get_sheet_data.return_value = [_move(NOW - timedelta(hours=3), 15), _move(NOW - timedelta(days=2), 10)]
+    mock_ledger.count.return_value = 985
+
+    rate = monitor.rate(pond, NOW)
+
+    assert (rate.deaths_24h, rate.deaths_7d) == (15, 25)
+    assert rate.pct_24h == pytest.approx(1.5)
+    assert rate.pct_7d == pytest.approx(100 * 25 / 1010)
+    assert rate.exceeded  # 1.5% >= MORTALITY_ALERT_PCT_24H
+    assert monitor.should_alert("P1", now=0.0)
+    # Пока предупреждение не отправлено, пауза не начинается
+    assert monitor.should_alert("P1", now=60.0)
+    monitor.mark_alerted("P1", now=60.0)
+    assert not monitor.should_alert("P1", now=3600.0)
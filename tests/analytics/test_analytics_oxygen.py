@@ -0,0 +1,21 @@
+import pytest
+import numpy as np
+
+from app.analytics.oxygen import SOLUBILITY_MG_L, build_table, saturation_pct, solubility_mg_l
+
+
+def test_solubility_table_matches_reference():
+    """Тест: растворимость на уровне моря совпадает со справочной (14.62 / 11.29 / 9.09 / 7.56 мг/л)."""
+    assert SOLUBILITY_MG_L[[0, 10, 20, 30]] == pytest.approx([14.62, 11.29, 9.09, 7.56], abs=0.01)
+    # Между узлами - линейная интерполяция, за пределами таблицы - крайнее значение
+    assert solubility_mg_l(20.5) == pytest.approx((SOLUBILITY_MG_L[20] + SOLUBILITY_MG_L[21]) / 2)
+    assert solubility_mg_l(-1.0) == SOLUBILITY_MG_L[0]
+
+def test_altitude_correction():
+    """Тест: на высоте 1000 м растворимость ниже примерно на 11.5%."""
+    assert build_table(1000.0)[20] / build_table(0.0)[20] == pytest.approx(0.885, abs=0.003)
+
+def test_saturation_is_vectorized():
+    """Тест: насыщение считается и для массивов замеров."""
+    pct = saturation_pct(np.array([9.09, 4.545]), np.array([20.0, 20.0]))
+    assert pct == pytest.approx([100.0, 50.0], abs=0.1)
@@ -0,0 +1,117 @@
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+
+from app.analytics.growth import GrowthModel
+from app.analytics.plausibility import WaterPlausibility, WeighingPlausibility
+from app.models.water import WaterQualityRow
+from app.models.weighing import WeighingRow
+from app.config.settings import settings
+
+WATER = settings.SHEETS.WATER_QUALITY_LOG
+WEIGHING = settings.SHEETS.WEIGHING_LOG
+DAY0 = datetime(2025, 7, 1, 8, 0)
+
+
+def _reading(day: float, do: float, temp: float, pond_id: str = "P1") -> dict:
+    return {
+        'ts': (DAY0 + timedelta(days=day)).isoformat(), 'pond_id': pond_id,
+        'dissolved_O2_mgL': do, 'temperature_C': temp, 'notes': '', 'user': 'op',
+    }
+
+def _weighing(day: float, weight: float, pond_id: str = "P1") -> dict:
+    return {'ts': (DAY0 + timedelta(days=day)).isoformat(), 'pond_id': pond_id, 'avg_weight_g': weight, 'user': 'op'}
+
+@pytest.fixture
+def replica(make_replica):
+    return make_replica({WATER: WaterQualityRow, WEIGHING: WeighingRow})
+
+@pytest.fixture
+def water(replica, tmp_path):
+    return WaterPlausibility(state_dir=str(tmp_path), source=replica)
+
+@pytest.fixture
+def weighing(replica, tmp_path):
+    return WeighingPlausibility(GrowthModel(state_dir=str(tmp_path), source=replica))
+
+
+def test_running_stats_match_weighted_numpy(water, client):
+    """Тест: бегущие среднее и отклонение совпадают с экспоненциально взвешенным пересчётом по истории."""
+    days = np.array([0, 1, 3, 4, 8, 15, 20])
+    temps = np.array([14.0, 15.5, 16.0, 15.0, 14.5, 17.0, 19.0])
+    client.get_sheet_data.return_value = [_reading(int(d), 7.0, float(t)) for d, t in zip(days, temps)]
+    weights = 2.0 ** (-(days[-1] - days) / settings.PLAUSIBILITY_HALF_LIFE_DAYS)
+    mean = np.average(temps, weights=weights)
+
+    n, ew_mean, std = water.stats("P1", 'temperature_C')
+    assert n == len(temps)
+    assert ew_mean == pytest.approx(mean)
+    assert std == pytest.approx(np.sqrt(np.average((temps - mean) ** 2, weights=weights)))
+    # Свежие замеры весят больше старых
+    assert ew_mean > temps.mean()
+    assert water.stats("P2", 'temperature_C') is None
+
+def test_late_rows_give_same_stats(replica, client, tmp_path):
+    """Тест: запоздавшие строки дают ту же статистику, что и строки по порядку."""
+    rows = [_reading(d, 6.0 + d * 0.1, 14.0 + (d % 4)) for d in range(12)]
+    client.get_sheet_data.return_value = rows
+    ordered = WaterPlausibility(state_dir=str(tmp_path / "a"), source=replica).stats("P1", 'dissolved_O2_mgL')
+    shuffled = rows[5:] + rows[:5][::-1]
+    client.get_sheet_data.return_value = shuffled
+    replica.sync(WATER)
+    late = WaterPlausibility(state_dir=str(tmp_path / "b"), source=replica).stats("P1", 'dissolved_O2_mgL')
+    assert late == pytest.approx(ordered)
+
+def test_check_flags_typo_beyond_sigmas(water, client):
+    """Тест: опечатка 65 вместо 6.5 помечается, обычное значение - нет; статистика по водоёму своя."""
+    client.get_sheet_data.return_value = (
+        [_reading(i, 6.5 + (i % 3) * 0.2, 15.0 + (i % 2)) for i in range(10)]
+        + [_reading(i, 12.0, 25.0, pond_id="P2") for i in range(10)]
+    )
+    deviations = water.check("P1", {'dissolved_O2_mgL': 6.6, 'temperature_C': 25.0})
+    assert [d.metric for d in deviations] == ['temperature_C']
+    assert deviations[0].sigmas > settings.PLAUSIBILITY_SIGMAS
+    # Для P2 те же 25 °C - норма; почти постоянная история не даёт ложной тревоги благодаря PLAUSIBILITY_MIN_STD
+    assert water.check("P2", {'dissolved_O2_mgL': 12.2, 'temperature_C': 25.0}) == []
+
+def test_seasonal_drift_does_not_warn(water, client):
+    """Тест: после долгой зимы и весеннего прогрева норма следует за сезоном - тёплый замер не помечается."""
+    winter = [_reading(d, 9.0, 8.0 + (d % 2) * 0.5) for d in range(200)]
+    spring = [_reading(d, 8.0, 8.0 + 0.5 * (d - 199)) for d in range(200, 220)]
+    client.get_sheet_data.return_value = winter + spring
+    # По всей истории (среднее ~8.7 °C, σ ~1.7 °C) 18.5 °C было бы отклонением почти в 6σ
+    assert water.check("P1", {'temperature_C': 18.5}) == []
+
+def test_check_needs_min_readings(water, client):
+    """Тест: пока замеров меньше PLAUSIBILITY_MIN_READINGS, проверка не делается."""
+    client.get_sheet_data.return_value = [_reading(i, 7.0, 15.0) for i in range(settings.PLAUSIBILITY_MIN_READINGS - 1)]
+    assert water.check("P1", {'temperature_C': 30.0}) == []
+
+def test_record_and_restart_from_checkpoint(replica, client, tmp_path):
+    """Тест: строки бота учитываются сразу, состояние переживает перезапуск."""
+    client.get_sheet_data.return_value = [_reading(i, 7.0, 15.0) for i in range(5)]
+    water = WaterPlausibility(state_dir=str(tmp_path), source=replica)
+    assert water.stats("P1", 'temperature_C')[0] == 5
+    row = WaterQualityRow(ts=DAY0 + timedelta(days=5), pond_id='P1', dissolved_O2_mgL=7.0, temperature_C=21.0, user='op')
+    water.record(row, 7)
+    n, mean, _ = water.stats("P1", 'temperature_C', sync=False)
+    assert n == 6 and 15.0 < mean < 21.0
+
+    restarted = WaterPlausibility(state_dir=str(tmp_path), source=replica)
+    n, mean, _ = restarted.stats("P1", 'temperature_C', sync=False)
+    assert (n, mean) == (5, pytest.approx(15.0))
+
+def test_growing_weight_does_not_warn(weighing, client):
+    """Тест: вес, растущий по кривой роста, не помечается, хотя далёк от среднего прошлых взвешиваний."""
+    client.get_sheet_data.return_value = [_weighing(14 * i, 20.0 * 2 ** i) for i in range(5)]
+    # Через 14 дней после 320 г по кривой ожидается ~640 г
+    assert weighing.check("P1", {'avg_weight_g': 600.0}, when=DAY0 + timedelta(days=70)) == []
+
+def test_weight_typo_against_growth_prediction(weighing, client):
+    """Тест: опечатка в весе помечается по отклонению от прогноза роста; по одному взвешиванию проверки нет."""
+    client.get_sheet_data.return_value = [_weighing(14 * i, 20.0 * 2 ** i) for i in range(5)] + [_weighing(0, 50.0, "P2")]
+    deviations = weighing.check("P1", {'avg_weight_g': 64.0}, when=DAY0 + timedelta(days=70))
+    assert [d.metric for d in deviations] == ['avg_weight_g']
+    assert deviations[0].mean == pytest.approx(640.0, rel=0.01)
+    assert deviations[0].std == pytest.approx(64.0, rel=0.01)
+    assert weighing.check("P2", {'avg_weight_g': 5000.0}) == []
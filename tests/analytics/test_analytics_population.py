@@ -0,0 +1,149 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.analytics.population import PopulationLedger
+from app.analytics.projection import JournalProjection
+from app.models.fish import FishMoveRow, FishMoveType
+from app.models.pond import Pond
+from app.config.settings import settings
+
+FISH = settings.SHEETS.FISH_MOVES_LOG
+
+
+@pytest.fixture
+def replica(make_replica):
+    return make_replica({FISH: FishMoveRow})
+
+@pytest.fixture
+def pond():
+    return Pond(pond_id="P1", name="Пруд 1", initial_qty=1000, is_active=True)
+
+def _move(move_type: FishMoveType, quantity: int, pond_id: str = "P1") -> dict:
+    return {
+        'ts': '2025-05-01T08:00:00', 'pond_id': pond_id, 'move_type': move_type.value,
+        'quantity': quantity, 'avg_weight_g': '', 'reason': '', 'ref': '', 'user': 'op',
+    }
+
+def _row(move_type: FishMoveType, quantity: int, pond_id: str = "P1") -> FishMoveRow:
+    return FishMoveRow.model_validate(_move(move_type, quantity, pond_id) | {'avg_weight_g': None})
+
+def test_count_replays_journal_over_initial_qty(replica, client, pond, tmp_path):
+    """Тест: поголовье = initial_qty + приходы - расходы по журналу."""
+    client.get_sheet_data.return_value = [
+        _move(FishMoveType.STOCKING, 500),
+        _move(FishMoveType.DEATH, 20),
+        _move(FishMoveType.SALE, 100),
+        _move(FishMoveType.TRANSFER_OUT, 80),
+        _move(FishMoveType.TRANSFER_IN, 80, pond_id="P2"),
+    ]
+    ledger = PopulationLedger(state_dir=str(tmp_path), source=replica)
+
+    assert ledger.count(pond) == 1300
+    assert ledger.delta("P2") == 80
+    assert ledger.row_count == 5
+
+def test_record_applies_new_row_once(replica, client, pond, tmp_path):
+    """Тест: строка, записанная ботом, учитывается сразу и не задваивается при дочитывании хвоста."""
+    client.get_sheet_data.return_value = [_move(FishMoveType.STOCKING, 500)]
+    ledger = PopulationLedger(state_dir=str(tmp_path), source=replica)
+    assert ledger.count(pond) == 1500
+
+    ledger.record(_row(FishMoveType.DEATH, 10), 3)
+    # Запись ещё не дочитана из Sheets, но уже учтена в памяти
+    assert ledger._deltas["P1"] == 490
+
+    client.get_records_from.return_value = [_move(FishMoveType.DEATH, 10)]
+    replica.invalidate(FISH)
+    assert ledger.count(pond) == 1490
+    assert ledger.row_count == 2
+
+def test_record_before_load_is_ignored(replica, client, pond, tmp_path):
+    """Тест: до первой загрузки record ничего не применяет, строка придёт из журнала."""
+    ledger = PopulationLedger(state_dir=str(tmp_path), source=replica)
+    ledger.record(_row(FishMoveType.STOCKING, 100), 2)
+
+    client.get_sheet_data.return_value = [_move(FishMoveType.STOCKING, 100)]
+    assert ledger.count(pond) == 1100
+
+def test_checkpoint_restores_state_and_reads_only_tail(replica, client, pond, tmp_path):
+    """Тест: после перезапуска состояние берётся из контрольной точки, журнал дочитывается с хвоста."""
+    client.get_sheet_data.return_value = [_move(FishMoveType.STOCKING, 500), _move(FishMoveType.SALE, 50)]
+    PopulationLedger(state_dir=str(tmp_path), source=replica).catch_up()
+
+    # Новый процесс: реплика уже синхронизирована, в журнале появилась одна строка
+    client.get_records_from.return_value = [_move(FishMoveType.DEATH, 5)]
+    replica.invalidate(FISH)
+    restarted = PopulationLedger(state_dir=str(tmp_path), source=replica)
+    restarted.apply = MagicMock(wraps=restarted.apply)
+
+    assert restarted.count(pond) == 1445
+    assert restarted.apply.call_count == 1
+
+def test_shrunk_journal_triggers_rebuild(replica, client, pond, tmp_path):
+    """Тест: если журнал стал короче учтённого, проекция пересобирается с нуля."""
+    client.get_sheet_data.return_value = [_move(FishMoveType.STOCKING, 500), _move(FishMoveType.SALE, 50)]
+    ledger = PopulationLedger(state_dir=str(tmp_path), source=replica)
+    assert ledger.count(pond) == 1450
+
+    client.get_sheet_data.return_value = [_move(FishMoveType.STOCKING, 500)]
+    replica._sync_diff(FISH)  # полная сверка листа после ручного удаления строки
+
+    assert ledger.count(pond) == 1500
+
+def test_invalid_rows_are_skipped(replica, client, pond, tmp_path):
+    """Тест: некорректная строка журнала пропускается и не ломает расчёт."""
+    client.get_sheet_data.return_value = [_move(FishMoveType.STOCKING, 500), _move(FishMoveType.SALE, 0)]
+    ledger = PopulationLedger(state_dir=str(tmp_path), source=replica)
+    assert ledger.count(pond) == 1500
+    assert ledger.row_count == 2
+
+def test_incomplete_projection_fails_on_instantiation(tmp_path):
+    """Тест: наследник без всех обязательных методов не создаётся (а не падает на первой строке)."""
+    class Incomplete(JournalProjection):
+        name = "incomplete"
+        sheet_name = FISH
+        model = FishMoveRow
+
+        def reset(self) -> None:
+            self.count = 0
+
+    with pytest.raises(TypeError):
+        Incomplete(state_dir=str(tmp_path))
+
+def test_config_change_rebuilds_from_journal(replica, client, tmp_path):
+    """Тест: при смене настроек проекции (config_key) контрольная точка отбрасывается без ошибки."""
+    class Counter(JournalProjection):
+        name = "counter"
+        sheet_name = FISH
+        model = FishMoveRow
+        scale = 1
+
+        def reset(self) -> None:
+            self.total = 0
+
+        def apply(self, row: FishMoveRow) -> None:
+            self.total += row.quantity * self.scale
+
+        def config_key(self):
+            return {'scale': self.scale}
+
+        def dump_state(self) -> dict:
+            return {'total': self.total}
+
+        def load_state(self, state: dict) -> None:
+            self.total = state['total']
+
+    client.get_sheet_data.return_value = [_move(FishMoveType.STOCKING, 500), _move(FishMoveType.SALE, 50)]
+    counter = Counter(state_dir=str(tmp_path), source=replica)
+    counter.catch_up()
+    assert counter.total == 550
+
+    same = Counter(state_dir=str(tmp_path), source=replica)
+    same.apply = MagicMock(wraps=same.apply)
+    same.catch_up()
+    assert same.total == 550 and same.apply.call_count == 0
+
+    Counter.scale = 2
+    rescaled = Counter(state_dir=str(tmp_path), source=replica)
+    rescaled.catch_up()
+    assert rescaled.total == 1100
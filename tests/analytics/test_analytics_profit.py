@@ -0,0 +1,107 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.analytics.profit import FeedLots, FeedUsage, FishSales, ProfitLedger
+from app.config.settings import settings
+from app.models.feeding import FeedingRow
+from app.models.fish import FishMoveRow, FishMoveType
+from app.models.pond import Pond
+from app.models.stock import StockMoveRow, StockMoveType
+
+STOCK = settings.SHEETS.STOCK_MOVES_LOG
+FEEDING = settings.SHEETS.FEEDING_LOG
+MOVES = settings.SHEETS.FISH_MOVES_LOG
+
+
+@pytest.fixture
+def replica(make_replica):
+    return make_replica({STOCK: StockMoveRow, FEEDING: FeedingRow, MOVES: FishMoveRow})
+
+@pytest.fixture
+def ponds():
+    return [Pond(pond_id="P1", name="Пруд 1", is_active=True), Pond(pond_id="P2", name="Пруд 2", is_active=True)]
+
+def _ledger(replica, tmp_path, method: str) -> ProfitLedger:
+    return ProfitLedger(
+        FeedLots(state_dir=str(tmp_path), source=replica),
+        FeedUsage(state_dir=str(tmp_path), source=replica),
+        FishSales(state_dir=str(tmp_path), source=replica),
+        method=method,
+    )
+
+def _income(mass: float, unit_cost: float | None, feed: str = "Стартовый") -> dict:
+    return {
+        'ts': '2025-05-01T08:00:00', 'feed_type_id': 'F1', 'feed_type_name': feed,
+        'move_type': StockMoveType.INCOME.value, 'mass_kg': mass, 'reason': 'Закупка', 'user': 'op',
+        'unit_cost': unit_cost,
+    }
+
+def _feeding(pond_id: str, mass: float, feed: str = "Стартовый") -> dict:
+    return {'ts': '2025-05-02T09:00:00', 'pond_id': pond_id, 'feed_type': feed, 'mass_kg': mass, 'user': 'op'}
+
+def _sale(pond_id: str, amount: float | str) -> dict:
+    return {
+        'ts': '2025-06-01T10:00:00', 'pond_id': pond_id, 'move_type': FishMoveType.SALE.value,
+        'quantity': 100, 'avg_weight_g': 500, 'reason': '', 'ref': '', 'user': 'op', 'amount': amount,
+    }
+
+def _sheets(client, stock: list[dict], feedings: list[dict], moves: list[dict]):
+    client.get_sheet_data.side_effect = lambda sheet: {STOCK: stock, FEEDING: feedings, MOVES: moves}[sheet]
+
+@pytest.fixture
+def data(client):
+    # Партии: 100 кг по 10 грн, затем 100 кг по 20 грн
+    _sheets(
+        client,
+        [_income(100, 10.0), _income(100, 20.0)],
+        [_feeding("P1", 80), _feeding("P2", 40), _feeding("P1", 30)],
+        [_sale("P1", 5000.0), _sale("P2", '')],
+    )
+
+def test_fifo_profit(replica, tmp_path, ponds, data):
+    """Тест: FIFO - кормление, пересекающее границу партий, оценивается по обеим ценам."""
+    p1, p2 = _ledger(replica, tmp_path, 'fifo').profit(ponds)
+    assert p1.feed_cost == pytest.approx(80 * 10 + 30 * 20)
+    assert p2.feed_cost == pytest.approx(20 * 10 + 20 * 20)
+    assert p1.revenue == 5000.0 and p2.revenue == 0.0
+    assert p1.profit == pytest.approx(5000 - 1400)
+    assert p1.unvalued_feed_kg == 0.0
+
+def test_weighted_average_profit(replica, tmp_path, ponds, data):
+    """Тест: средневзвешенная - по средней цене партий, покрывающих кормление."""
+    p1, p2 = _ledger(replica, tmp_path, 'average').profit(ponds)
+    assert p1.feed_cost == pytest.approx(80 * 10 + 30 * 15)
+    assert p2.feed_cost == pytest.approx(40 * 15)
+
+def test_feeding_beyond_lots_is_valued_when_lot_arrives(client, replica, tmp_path, ponds):
+    """Тест: корм сверх известных партий ждёт прихода, новые строки учитываются инкрементально."""
+    _sheets(client, [_income(50, 10.0)], [_feeding("P1", 40), _feeding("P1", 30)], [])
+    ledger = _ledger(replica, tmp_path, 'fifo')
+    p1 = ledger.profit(ponds)[0]
+    assert p1.feed_cost == pytest.approx(400.0)
+    assert p1.unvalued_feed_kg == pytest.approx(30.0)
+
+    ledger.lots.record(StockMoveRow.model_validate(_income(100, None)), 3)
+    ledger.sales.record(FishMoveRow.model_validate(_sale("P1", 900.0)), 2)
+    p1 = ledger.profit(ponds)[0]
+    # Партия без цены - по средней цене предыдущих (10 грн/кг)
+    assert p1.feed_cost == pytest.approx(700.0)
+    assert p1.unvalued_feed_kg == 0.0
+    assert p1.revenue == 900.0
+    assert client.get_sheet_data.call_count == 3  # по одному полному чтению на журнал
+
+def test_checkpoint_keeps_only_unvalued_tail(client, replica, tmp_path, ponds):
+    """Тест: оценённые кормления свёрнуты в суммы, после перезапуска они не оцениваются заново."""
+    _sheets(client, [_income(50, 10.0)], [_feeding("P1", 10)] * 4 + [_feeding("P2", 30)], [])
+    ledger = _ledger(replica, tmp_path, 'fifo')
+    assert ledger.profit(ponds)[0].feed_cost == pytest.approx(400.0)
+    ledger.usage.save_checkpoint()
+    assert ledger.usage.dump_state()['unvalued'] == {"Стартовый": [("P2", 40.0, 70.0)]}
+
+    restarted = _ledger(replica, tmp_path, 'average')
+    restarted.lots.fifo_cost = restarted.lots.average_cost = MagicMock(return_value=0.0)
+    restarted.lots.record(StockMoveRow.model_validate(_income(10, 10.0)), 3)
+    p1, p2 = restarted.profit(ponds)
+    assert p1.feed_cost == pytest.approx(400.0)
+    assert p2.feed_cost == 0.0 and p2.unvalued_feed_kg == pytest.approx(30.0)
+    restarted.lots.fifo_cost.assert_not_called()
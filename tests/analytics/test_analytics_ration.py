@@ -0,0 +1,112 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.analytics.ration import (
+    FeedingByDay, RationGrid, grid_for, ration_grid, suggest_ration,
+    CARP_WEIGHT_CLASSES_G, CARP_TEMPERATURES_C, CARP_FEEDING_RATE_PCT, TROUT_FEEDING_RATE_PCT,
+)
+from app.analytics.water import MetricStats, RollupBucket
+from app.config.settings import settings
+from app.models.feeding import FeedingRow
+from app.models.pond import Pond
+
+FEEDING = settings.SHEETS.FEEDING_LOG
+
+NOW = datetime(2025, 7, 1, 12, 0)
+
+
+@pytest.fixture
+def pond():
+    return Pond(pond_id="P1", name="Пруд 1", is_active=True)
+
+def test_grid_matches_table_nodes():
+    """Тест: в узлах таблицы сетка совпадает с табличной нормой."""
+    grid = RationGrid()
+    for i, weight in enumerate(CARP_WEIGHT_CLASSES_G):
+        for j, temp in enumerate(CARP_TEMPERATURES_C):
+            assert grid.rate_pct(weight, temp) == pytest.approx(CARP_FEEDING_RATE_PCT[i][j], abs=0.05)
+
+def test_grid_interpolates_and_clamps():
+    """Тест: между узлами - промежуточное значение, за краями - ближайший край, в холодной воде - ноль."""
+    grid = RationGrid()
+    assert 2.9 < grid.rate_pct(150, 22) < 3.6
+    assert grid.rate_pct(5000, 24) == pytest.approx(1.6, abs=0.01)
+    assert grid.rate_pct(100, 35) == pytest.approx(2.8, abs=0.05)
+    assert grid.rate_pct(100, 4) == 0.0
+
+def test_grid_chosen_by_species_with_fallback():
+    """Тест: таблица выбирается по виду рыбы без учёта регистра, неизвестный вид - таблица по умолчанию."""
+    trout = grid_for(" Форель ")
+    assert trout.rate_pct(100, 14) == pytest.approx(TROUT_FEEDING_RATE_PCT[4][3], abs=0.05)
+    # Карп при 4 °C не питается, форель - питается
+    assert trout.rate_pct(100, 4) > 0 and grid_for("карп").rate_pct(100, 4) == 0.0
+    assert grid_for(None) is ration_grid
+    assert grid_for("осётр") is ration_grid
+
+def _rollup(hours_ago: float, temp: float) -> RollupBucket:
+    stats = MetricStats(temp, temp, temp)
+    return RollupBucket(NOW - timedelta(hours=hours_ago), 1, {'temperature_C': stats, 'dissolved_O2_mgL': stats})
+
+@patch('app.analytics.ration.water_rollups')
+@patch('app.analytics.ration.growth_model')
+@patch('app.analytics.ration.population_ledger')
+def test_suggest_ration_uses_only_local_state(mock_ledger, mock_growth, mock_rollups, pond):
+    """Тест: рацион = биомасса × норма; проекции читаются без синхронизации с Sheets."""
+    mock_ledger.count.return_value = 2000
+    mock_growth.weight_g.return_value = 200.0
+    mock_rollups.latest.return_value = _rollup(3, 24.0)
+
+    suggestion = suggest_ration(pond, NOW)
+
+    assert suggestion.biomass_kg == pytest.approx(400.0)
+    assert suggestion.ration_kg == pytest.approx(400.0 * 3.2 / 100, rel=0.02)
+    mock_ledger.count.assert_called_once_with(pond, sync=False)
+    mock_growth.weight_g.assert_called_once_with("P1", NOW, sync=False)
+    mock_rollups.latest.assert_called_once_with("P1", sync=False)
+
+@patch('app.analytics.ration.feeding_by_day')
+@patch('app.analytics.ration.water_rollups')
+@patch('app.analytics.ration.growth_model')
+@patch('app.analytics.ration.population_ledger')
+def test_suggestion_subtracts_fed_today(mock_ledger, mock_growth, mock_rollups, mock_fed, pond):
+    """Тест: из суточного рациона вычитается уже скормленное сегодня, остаток не отрицательный."""
+    mock_ledger.count.return_value = 2000
+    mock_growth.weight_g.return_value = 200.0
+    mock_rollups.latest.return_value = _rollup(3, 24.0)
+    mock_fed.fed_kg.return_value = 5.0
+
+    suggestion = suggest_ration(pond, NOW)
+
+    assert suggestion.fed_today_kg == 5.0
+    assert suggestion.remaining_kg == pytest.approx(suggestion.ration_kg - 5.0)
+    mock_fed.fed_kg.assert_called_once_with("P1", NOW.date(), sync=False)
+    mock_fed.fed_kg.return_value = 100.0
+    assert suggest_ration(pond, NOW).remaining_kg == 0.0
+
+def test_feeding_by_day_sums_pond_day_and_new_rows(make_replica, client, tmp_path):
+    """Тест: кормления суммируются по водоёму и дню, строки бота учитываются сразу."""
+    replica = make_replica({FEEDING: FeedingRow})
+    client.get_sheet_data.return_value = [
+        {'ts': '2025-07-01T08:00:00', 'pond_id': 'P1', 'feed_type': 'Гровер', 'mass_kg': 4.0, 'user': 'op'},
+        {'ts': '2025-07-01T18:00:00', 'pond_id': 'P1', 'feed_type': 'Стартер', 'mass_kg': 1.5, 'user': 'op'},
+        {'ts': '2025-06-30T18:00:00', 'pond_id': 'P1', 'feed_type': 'Гровер', 'mass_kg': 7.0, 'user': 'op'},
+        {'ts': '2025-07-01T09:00:00', 'pond_id': 'P2', 'feed_type': 'Гровер', 'mass_kg': 3.0, 'user': 'op'},
+    ]
+    fed = FeedingByDay(state_dir=str(tmp_path), source=replica)
+    assert fed.fed_kg("P1", NOW.date()) == 5.5
+    fed.record(FeedingRow(ts=NOW, pond_id='P1', feed_type='Гровер', mass_kg=2.0, user='op'), 6)
+    assert fed.fed_kg("P1", NOW.date(), sync=False) == 7.5
+    assert fed.fed_kg("P3", NOW.date(), sync=False) == 0.0
+
+@patch('app.analytics.ration.water_rollups')
+@patch('app.analytics.ration.growth_model')
+@patch('app.analytics.ration.population_ledger')
+def test_no_suggestion_without_fresh_temperature(mock_ledger, mock_growth, mock_rollups, pond):
+    """Тест: без свежего замера температуры рацион не предлагается."""
+    mock_ledger.count.return_value = 2000
+    mock_growth.weight_g.return_value = 200.0
+    mock_rollups.latest.return_value = _rollup(72, 24.0)
+    assert suggest_ration(pond, NOW) is None
+    mock_rollups.latest.return_value = None
+    assert suggest_ration(pond, NOW) is None
@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+from app.analytics.reconcile import Reconciler
+from app.config.settings import settings
+from app.sheets.schema import SHEET_TO_MODEL_MAP
+
+S = settings.SHEETS
+TS = '2025-05-01T08:00:00'
+
+
+@pytest.fixture
+def sheets():
+    return {
+        S.PONDS: [
+            {'pond_id': 'P1', 'name': 'Пруд 1', 'initial_qty': 100, 'is_active': 'TRUE'},
+            {'pond_id': 'P2', 'name': 'Пруд 2', 'initial_qty': 0, 'is_active': 'FALSE'},
+        ],
+        S.FEED_TYPES: [{'feed_id': 'F1', 'name': 'Стартер', 'is_active': 'TRUE'}],
+    }
+
+@pytest.fixture
+def replica(sheets, client, make_replica):
+    client.get_sheet_data.side_effect = lambda sheet: sheets.get(sheet, [])
+    return make_replica(SHEET_TO_MODEL_MAP)
+
+def _move(pond_id: str, move_type: str, quantity, ts: str = TS, ref: str = '') -> dict:
+    return {'ts': ts, 'pond_id': pond_id, 'move_type': move_type, 'quantity': quantity,
+            'reason': '', 'ref': ref, 'user': 'op'}
+
+def _violations(report) -> set[tuple[str, int, str]]:
+    return {(v.sheet, v.row, v.rule) for v in report.violations}
+
+
+def test_consistent_journals_have_no_violations(sheets, replica):
+    """Тест: согласованные журналы проходят сверку без нарушений."""
+    sheets[S.FISH_MOVES_LOG] = [
+        _move('P1', 'transfer_out', 30, ref='T1'),
+        _move('P2', 'transfer_in', 30, ref='T1'),
+        _move('P2', 'sale', 30),
+    ]
+    sheets[S.FEEDING_LOG] = [{'ts': TS, 'pond_id': 'P1', 'feed_type': 'Стартер', 'mass_kg': 2, 'user': 'op'}]
+    sheets[S.STOCK_MOVES_LOG] = [{'ts': TS, 'feed_type_id': 'F1', 'feed_type_name': 'Стартер',
+                                  'move_type': 'income', 'mass_kg': 50, 'reason': '', 'user': 'op'}]
+    sheets[S.SALES_ORDERS] = [{'order_id': 'O1', 'ts': TS, 'client_id': 1, 'client_name': 'К',
+                               'phone': '-', 'status': 'new', 'total_amount': 250.0}]
+    sheets[S.SALES_ORDER_ITEMS] = [
+        {'order_id': 'O1', 'product_id': 'A', 'product_name': 'Карп', 'quantity': 2, 'price_per_unit': 100},
+        {'order_id': 'O1', 'product_id': 'B', 'product_name': 'Икра', 'quantity': 1, 'price_per_unit': 50},
+    ]
+
+    report = Reconciler(replica).run()
+    assert report.violations == []
+    assert report.rows_checked == 8
+
+def test_violations_are_reported_with_row_numbers(sheets, replica):
+    """Тест: каждое нарушение найдено со своим листом, номером строки и правилом."""
+    sheets[S.FISH_MOVES_LOG] = [
+        _move('P1', 'transfer_out', 30, ref='T1'),   # строка 2: нет прихода
+        _move('P2', 'transfer_in', 20, ref='T2'),    # строка 3: нет расхода
+        _move('P1', 'death', 80),                    # строка 4: 100 - 30 - 80 < 0
+        _move('P1', 'death', 1),                     # строка 5: о том же водоёме повторно не сообщаем
+        _move('PX', 'stocking', 10),                 # строка 6: неизвестный водоём
+        _move('P1', 'moved', 'много'),               # строка 7: неверное движение
+    ]
+    sheets[S.FEEDING_LOG] = [
+        {'ts': TS, 'pond_id': 'P2', 'feed_type': 'Стартер', 'mass_kg': 2, 'user': 'op'},
+        {'ts': TS, 'pond_id': 'P1', 'feed_type': 'Гранулы', 'mass_kg': 2, 'user': 'op'},
+    ]
+    sheets[S.WATER_QUALITY_LOG] = [{'ts': TS, 'pond_id': 'PX', 'dissolved_O2_mgL': 7, 'temperature_C': 20, 'user': 'op'}]
+    sheets[S.STOCK_MOVES_LOG] = [{'ts': TS, 'feed_type_id': 'F9', 'feed_type_name': '?',
+                                  'move_type': 'income', 'mass_kg': 50, 'reason': '', 'user': 'op'}]
+    sheets[S.SALES_ORDERS] = [
+        {'order_id': 'O1', 'ts': TS, 'client_id': 1, 'client_name': 'К', 'phone': '-', 'total_amount': 300.0},
+    ]
+    sheets[S.SALES_ORDER_ITEMS] = [
+        {'order_id': 'O1', 'product_id': 'A', 'product_name': 'Карп', 'quantity': 2, 'price_per_unit': 100},
+        {'order_id': 'O2', 'product_id': 'A', 'product_name': 'Карп', 'quantity': 1, 'price_per_unit': 100},
+    ]
+
+    report = Reconciler(replica).run()
+    assert _violations(report) == {
+        (S.FISH_MOVES_LOG, 2, 'unmatched_transfer_out'),
+        (S.FISH_MOVES_LOG, 3, 'unmatched_transfer_in'),
+        (S.FISH_MOVES_LOG, 4, 'negative_population'),
+        (S.FISH_MOVES_LOG, 6, 'unknown_pond'),
+        (S.FISH_MOVES_LOG, 7, 'invalid_move'),
+        (S.FEEDING_LOG, 2, 'inactive_pond'),
+        (S.FEEDING_LOG, 3, 'unknown_feed'),
+        (S.WATER_QUALITY_LOG, 2, 'unknown_pond'),
+        (S.STOCK_MOVES_LOG, 2, 'unknown_feed'),
+        (S.SALES_ORDER_ITEMS, 3, 'missing_order'),
+        (S.SALES_ORDERS, 2, 'order_total_mismatch'),
+    }
+    assert report.by_rule['unknown_pond'] == 2
+
+def test_large_journal_is_reconciled_quickly(sheets, replica):
+    """Тест: 100 тыс. строк движений сверяются за один проход за секунды."""
+    moves = []
+    for i in range(50_000):
+        moves.append(_move('P1', 'transfer_out', 1, ts=f'T{i}'))
+        moves.append(_move('P2', 'transfer_in', 1, ts=f'T{i}'))
+    sheets[S.PONDS][0]['initial_qty'] = 50_000
+    sheets[S.FISH_MOVES_LOG] = moves
+    replica.sync_all()
+
+    started = time.perf_counter()
+    report = Reconciler(replica).run(sync=False)
+    assert time.perf_counter() - started < 3
+    assert report.violations == []
+    assert report.rows_checked == 100_000
@@ -0,0 +1,122 @@
+import os
+import time
+from datetime import date, datetime
+
+import pytest
+
+from app.analytics.sales import SalesAnalytics, SalesItems, SalesOrders
+from app.config.settings import settings
+from app.models.order import SalesOrderItemRow, SalesOrderRow
+
+ORDERS = settings.SHEETS.SALES_ORDERS
+ITEMS = settings.SHEETS.SALES_ORDER_ITEMS
+
+
+@pytest.fixture
+def replica(make_replica):
+    return make_replica({ORDERS: SalesOrderRow, ITEMS: SalesOrderItemRow})
+
+@pytest.fixture
+def sales(replica, tmp_path):
+    return SalesAnalytics(
+        SalesOrders(state_dir=str(tmp_path), source=replica),
+        SalesItems(state_dir=str(tmp_path), source=replica),
+    )
+
+def _order(order_id: str, ts: str, client_id: int, status: str = "new") -> dict:
+    return {
+        'order_id': order_id, 'ts': ts, 'client_id': client_id, 'client_name': f"Клиент {client_id}",
+        'phone': '380000000', 'status': status, 'total_amount': 0,
+    }
+
+def _item(order_id: str, product_id: str, quantity: float, price: float) -> dict:
+    return {
+        'order_id': order_id, 'product_id': product_id, 'product_name': f"Товар {product_id}",
+        'quantity': quantity, 'price_per_unit': price,
+    }
+
+def _sheets(client, orders: list[dict], items: list[dict]):
+    client.get_sheet_data.side_effect = lambda sheet: {ORDERS: orders, ITEMS: items}[sheet]
+
+@pytest.fixture
+def data(client):
+    orders = [
+        _order("ORD-1", "2025-05-01T10:00:00", 1, "confirmed"),
+        _order("ORD-2", "2025-05-01T15:00:00", 2, "confirmed"),
+        _order("ORD-3", "2025-05-03T09:00:00", 1, "cancelled"),
+    ]
+    items = [
+        _item("ORD-1", "PR1", 2, 100.0),
+        _item("ORD-1", "PR2", 1, 50.0),
+        _item("ORD-2", "PR1", 1, 100.0),
+        _item("ORD-3", "PR2", 4, 50.0),
+    ]
+    _sheets(client, orders, items)
+    return orders, items
+
+def test_group_by_product_and_client(sales, data):
+    """Тест: выручка, количество и число заказов по товарам и клиентам, по убыванию выручки."""
+    by_product = sales.aggregate('product')
+    assert [(g.key, g.revenue, g.quantity, g.orders) for g in by_product] == [
+        ("PR1", 300.0, 3.0, 2), ("PR2", 250.0, 5.0, 2),
+    ]
+    assert by_product[0].label == "Товар PR1"
+    by_client = sales.aggregate('client', exclude_statuses=["cancelled"])
+    assert [(g.key, g.label, g.revenue, g.orders) for g in by_client] == [
+        ("1", "Клиент 1", 250.0, 1), ("2", "Клиент 2", 100.0, 1),
+    ]
+
+def test_group_by_day_and_status_with_time_range(sales, data):
+    """Тест: разрезы по дням и статусам, фильтр по времени [since, until)."""
+    by_day = sales.aggregate('day')
+    assert [(g.key, g.revenue, g.orders) for g in by_day] == [(date(2025, 5, 1), 350.0, 2), (date(2025, 5, 3), 200.0, 1)]
+    by_status = sales.aggregate('status', since=datetime(2025, 5, 1, 12), until=datetime(2025, 5, 4))
+    assert [(g.key, g.revenue, g.orders) for g in by_status] == [("cancelled", 200.0, 1), ("confirmed", 100.0, 1)]
+    assert sales.aggregate('product', statuses=["new"]) == []
+    with pytest.raises(ValueError):
+        sales.aggregate('pond')
+
+def test_incremental_record_and_status_change(sales, data, replica):
+    """Тест: новый заказ учитывается без перечитывания, смена статуса подхватывается после синхронизации."""
+    orders, items = data
+    sales.aggregate('status')
+    sales.orders.record(SalesOrderRow.model_validate(_order("ORD-4", "2025-05-04T10:00:00", 3)), 5)
+    sales.items.record(SalesOrderItemRow.model_validate(_item("ORD-4", "PR3", 1, 70.0)), 6)
+    by_status = {g.key: g.revenue for g in sales.aggregate('status', sync=False)}
+    assert by_status["new"] == 70.0
+
+    orders[0]['status'] = "cancelled"
+    replica.invalidate(ORDERS)
+    by_status = {g.key: g.revenue for g in sales.aggregate('status')}
+    assert by_status == {"cancelled": 450.0, "confirmed": 100.0, "new": 70.0}
+
+def test_state_survives_restart(sales, data, replica, tmp_path):
+    """Тест: заказы восстанавливаются из контрольной точки, позиции - из локальной реплики (на диск не пишутся)."""
+    expected = sales.aggregate('product')
+    assert sorted(os.listdir(tmp_path)) == ["sales_orders.json"]
+    restored = SalesAnalytics(
+        SalesOrders(state_dir=str(tmp_path), source=replica),
+        SalesItems(state_dir=str(tmp_path), source=replica),
+    )
+    assert restored.aggregate('product', sync=False) == expected
+
+def test_aggregate_is_fast_on_large_history(sales):
+    """Тест: группировка по 80 тыс. позиций укладывается в доли секунды."""
+    orders, items = sales.orders, sales.items
+    orders._loaded = items._loaded = True
+    base = datetime(2022, 1, 1)
+    for i in range(20_000):
+        order_id = f"ORD-{i}"
+        orders.apply(SalesOrderRow.model_construct(
+            id=order_id, ts=base.replace(day=1 + i % 28, month=1 + i % 12, year=2022 + i % 3),
+            client_id=i % 500, client_name=f"К{i % 500}", phone='', status="confirmed", total_amount=0.0,
+        ))
+        for j in range(4):
+            items.apply(SalesOrderItemRow.model_construct(
+                order_id=order_id, product_id=f"PR{j + i % 20}", product_name='', quantity=1.0, price_per_unit=10.0,
+            ))
+    started = time.perf_counter()
+    for by in ('product', 'day', 'client', 'status'):
+        groups = sales.aggregate(by, sync=False)
+        assert sum(g.revenue for g in groups) == pytest.approx(800_000.0)
+    assert time.perf_counter() - started < 1.0
@@ -0,0 +1,71 @@
+import pytest
+from datetime import datetime, timedelta
+
+from app.analytics.water import WaterRollups
+from app.models.water import WaterQualityRow
+from app.config.settings import settings
+
+WATER = settings.SHEETS.WATER_QUALITY_LOG
+DAY0 = datetime(2025, 5, 1)
+
+
+def _reading(hours: float, do: float, temp: float, pond_id: str = "P1") -> dict:
+    return {
+        'ts': (DAY0 + timedelta(hours=hours)).isoformat(), 'pond_id': pond_id,
+        'dissolved_O2_mgL': do, 'temperature_C': temp, 'notes': '', 'user': 'op',
+    }
+
+@pytest.fixture
+def rollups(make_replica, client, tmp_path):
+    client.get_sheet_data.return_value = [
+        _reading(8.1, 6.0, 18.0), _reading(8.5, 8.0, 20.0), _reading(9.2, 5.0, 19.0),
+        _reading(30, 7.0, 17.0), _reading(8.3, 9.0, 25.0, pond_id="P2"),
+    ]
+    replica = make_replica({WATER: WaterQualityRow})
+    return WaterRollups(state_dir=str(tmp_path), source=replica)
+
+def test_hourly_rollups(rollups):
+    """Тест: почасовые агрегаты min/max/mean/count по водоёму."""
+    first, second, third = rollups.query("P1", 'hour')
+    assert first.start == DAY0 + timedelta(hours=8)
+    assert first.count == 2
+    do = first.metrics['dissolved_O2_mgL']
+    assert (do.min, do.max, do.mean) == (6.0, 8.0, 7.0)
+    assert second.count == 1 and third.start == DAY0 + timedelta(hours=30)
+
+def test_daily_rollups_and_range(rollups):
+    """Тест: посуточные агрегаты и выборка по диапазону [since, until)."""
+    day1, day2 = rollups.query("P1", 'day')
+    assert day1.count == 3
+    assert day1.metrics['temperature_C'].mean == pytest.approx(19.0)
+    assert rollups.query("P1", 'day', since=DAY0 + timedelta(days=1)) == [day2]
+    assert rollups.query("P1", 'hour', since=DAY0 + timedelta(hours=9), until=DAY0 + timedelta(hours=30)) == [
+        rollups.query("P1", 'hour')[1]
+    ]
+
+def test_new_reading_updates_rollups_incrementally(rollups):
+    """Тест: замер, записанный ботом, сразу попадает в агрегаты."""
+    rollups.query("P1")
+    rollups.record(WaterQualityRow.model_validate(_reading(8.9, 4.5, 21.0)), 7)
+    hour = rollups.query("P1", 'hour')[0]
+    assert hour.count == 3
+    assert hour.metrics['dissolved_O2_mgL'].min == 4.5
+    assert hour.metrics['temperature_C'].max == 21.0
+
+def test_summary_and_checkpoint(rollups, tmp_path):
+    """Тест: сводка за период собирается из посуточных агрегатов и переживает перезапуск."""
+    summary = rollups.summary("P1", DAY0)
+    assert summary.count == 4
+    assert summary.metrics['dissolved_O2_mgL'].mean == pytest.approx(6.5)
+    assert rollups.summary("P1", DAY0 + timedelta(days=5)) is None
+
+    restarted = WaterRollups(state_dir=str(tmp_path), source=rollups._source)
+    assert restarted.query("P1", 'day') == rollups.query("P1", 'day')
+
+def test_saturation_rollup_uses_stored_value_or_table(rollups):
+    """Тест: насыщение из строки берётся как есть, для старых строк - по таблице растворимости."""
+    day1 = rollups.query("P1", 'day')[0]
+    # 18, 20 и 19 °C: растворимость ≈ 9.45, 9.09 и 9.26 мг/л
+    assert day1.metrics['do_saturation_pct'].min == pytest.approx(100 * 5.0 / 9.26, abs=0.2)
+    rollups.record(WaterQualityRow.model_validate({**_reading(9.5, 6.0, 19.0), 'do_saturation_pct': 12.5}), 7)
+    assert rollups.query("P1", 'day')[0].metrics['do_saturation_pct'].min == 12.5
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from app.analytics.weighing import decode_sample, encode_sample, parse_csv, parse_sample, summarize
+
+
+def test_parse_sample_message_separators_and_limits():
+    """Тест: веса через пробел, перевод строки и ";", дробная часть через запятую; веса вне пределов - ошибка."""
+    assert parse_sample("350 360,5\n370;380").tolist() == [350, 360.5, 370, 380]
+    with pytest.raises(ValueError):
+        parse_sample("350 0")
+    with pytest.raises(ValueError):
+        parse_sample("350 десять")
+    with pytest.raises(ValueError):
+        parse_sample("   ")
+
+def test_parse_csv_skips_non_numeric_cells():
+    """Тест: из строки CSV берётся последнее число (номер рыбы перед ним пропускается), заголовок - тоже."""
+    data = '﻿fish;weight_g;note\n1;"410";ok\n2;390;\n400\n'.encode('utf-8')
+    assert parse_csv(data).tolist() == [410, 390, 400]
+
+def test_summarize_statistics_and_histogram():
+    """Тест: среднее, выборочное σ, CV и размерные классы."""
+    sample = np.array([100.0, 200.0, 300.0, 400.0])
+    stats = summarize(sample, bins=2)
+    assert stats.size == 4
+    assert stats.mean_g == 250.0
+    assert stats.std_g == pytest.approx(129.0994, rel=1e-4)
+    assert stats.cv_pct == pytest.approx(51.64, rel=1e-3)
+    assert stats.histogram == [(100.0, 250.0, 2), (250.0, 400.0, 2)]
+    assert summarize(np.array([350.0])).std_g == 0.0
+
+def test_sample_round_trip_is_compact():
+    """Тест: выборка кодируется компактно и восстанавливается с точностью 0.1 г."""
+    sample = np.round(np.random.default_rng(1).normal(350, 40, 1000), 1)
+    encoded = encode_sample(sample)
+    assert len(encoded) < len(" ".join(map(str, sample))) / 2
+    assert np.allclose(decode_sample(encoded), sample)
@@ -0,0 +1,74 @@
+# tests/bot/test_jobs.py
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.analytics.feed_forecast import FeedForecast
+from app.bot.jobs import feed_depletion_job, schedule_jobs
+from app.models.feeding import FeedType
+
+pytestmark = pytest.mark.asyncio
+
+FEEDS = [
+    FeedType(feed_id="F1", name="Стартовый", is_active=True),
+    FeedType(feed_id="F2", name="Гроуэр", is_active=True),
+]
+
+
+@patch('app.bot.jobs.notify_admins', new_callable=AsyncMock)
+@patch('app.bot.jobs.feed_depletion')
+@patch('app.bot.jobs.references')
+async def test_job_notifies_only_low_feeds(mock_references, mock_forecast, mock_notify):
+    """Тест: оповещение только по кормам, которых хватит меньше чем на заданный срок."""
+    mock_references.get_active_feed_types.return_value = FEEDS
+    mock_forecast.forecast.side_effect = lambda ft: {
+        "F1": FeedForecast(ft, 60.0, 20.0, 3.0),
+        "F2": FeedForecast(ft, 900.0, 30.0, 30.0),
+    }[ft.id]
+    mock_forecast.should_alert.return_value = True
+    mock_notify.return_value = True
+
+    await feed_depletion_job(MagicMock())
+
+    mock_notify.assert_awaited_once()
+    text = mock_notify.call_args[0][1]
+    assert "Стартовый: остаток 60.0 кг, расход ≈ 20.0 кг/сут - хватит на 3.0 дн." in text
+    assert "Гроуэр" not in text
+    mock_forecast.mark_alerted.assert_called_once_with("F1")
+
+@patch('app.bot.jobs.notify_admins', new_callable=AsyncMock)
+@patch('app.bot.jobs.feed_depletion')
+@patch('app.bot.jobs.references')
+async def test_job_does_not_start_cooldown_when_delivery_fails(mock_references, mock_forecast, mock_notify):
+    """Тест: если предупреждение никому не доставлено, пауза не начинается и следующий запуск повторит его."""
+    mock_references.get_active_feed_types.return_value = FEEDS[:1]
+    mock_forecast.forecast.return_value = FeedForecast(FEEDS[0], 10.0, 20.0, 0.5)
+    mock_forecast.should_alert.return_value = True
+    mock_notify.return_value = False
+
+    await feed_depletion_job(MagicMock())
+
+    mock_notify.assert_awaited_once()
+    mock_forecast.mark_alerted.assert_not_called()
+
+@patch('app.bot.jobs.notify_admins', new_callable=AsyncMock)
+@patch('app.bot.jobs.feed_depletion')
+@patch('app.bot.jobs.references')
+async def test_job_respects_cooldown(mock_references, mock_forecast, mock_notify):
+    """Тест: повторное предупреждение в пределах паузы не отправляется."""
+    mock_references.get_active_feed_types.return_value = FEEDS[:1]
+    mock_forecast.forecast.return_value = FeedForecast(FEEDS[0], 10.0, 20.0, 0.5)
+    mock_forecast.should_alert.return_value = False
+
+    await feed_depletion_job(MagicMock())
+
+    mock_notify.assert_not_awaited()
+
+async def test_schedule_jobs_without_job_queue():
+    """Тест: без JobQueue регистрация задач не падает."""
+    application = MagicMock()
+    application.job_queue = None
+    schedule_jobs(application)
+
+    application = MagicMock()
+    schedule_jobs(application)
+    application.job_queue.run_repeating.assert_called_once()
@@ -2,7 +2,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.bot.middleware import restricted
+from app.bot.middleware import restricted, SHEETS_STALE_TEXT, SHEETS_UNAVAILABLE_TEXT
 from app.models.user import User, UserRole
 
 pytestmark = pytest.mark.asyncio
@@ -81,4 +81,28 @@ async def test_restricted_pending_user(mock_update, mock_context, mock_decorated
         await wrapped_func(mock_update, mock_context)
 
     mock_decorated_func.assert_not_called()
-    mock_update.message.reply_text.assert_called_with("Ваша заявка на регистрацию ожидает подтверждения администратором.")
\ No newline at end of file
+    mock_update.message.reply_text.assert_called_with("Ваша заявка на регистрацию ожидает подтверждения администратором.")
+
+async def test_restricted_sheets_unavailable(mock_update, mock_context, mock_decorated_func):
+    """Тест: при недоступном Google Sheets пользователь не получает сообщение 'не зарегистрирован'."""
+    with patch('app.bot.middleware.get_user_by_id', return_value=None), \
+         patch('app.bot.middleware.is_sheet_unavailable', return_value=True):
+        decorator = restricted(allowed_roles=[UserRole.ADMIN])
+        wrapped_func = decorator(mock_decorated_func)
+        await wrapped_func(mock_update, mock_context)
+
+    mock_decorated_func.assert_not_called()
+    mock_update.message.reply_text.assert_called_with(SHEETS_UNAVAILABLE_TEXT)
+
+async def test_restricted_stale_sheets_warns_and_continues(mock_update, mock_context, mock_decorated_func):
+    """Тест: при устаревших данных пользователь предупреждается, но команда выполняется."""
+    user = User(user_id=123, user_name="Admin", role=UserRole.ADMIN)
+
+    with patch('app.bot.middleware.get_user_by_id', return_value=user), \
+         patch('app.bot.middleware.is_sheet_stale', return_value=True):
+        decorator = restricted(allowed_roles=[UserRole.ADMIN])
+        wrapped_func = decorator(mock_decorated_func)
+        await wrapped_func(mock_update, mock_context)
+
+    mock_update.message.reply_text.assert_called_once_with(SHEETS_STALE_TEXT)
+    mock_decorated_func.assert_called_once_with(mock_update, mock_context)
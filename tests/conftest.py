@@ -0,0 +1,23 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.config.settings import settings
+from app.sheets.client import ReadStatus
+from app.sheets.replica import SheetReplica
+
+# Модули, которые держат ссылку на общую реплику
+_REPLICA_HOLDERS = ('app.sheets.replica', 'app.sheets.references', 'app.sheets.logs', 'app.analytics.projection')
+
+
+@pytest.fixture(autouse=True)
+def isolated_storage(monkeypatch, tmp_path):
+    """Тесты не трогают рабочую реплику data/replica.sqlite3 и контрольные точки проекций в data/state."""
+    client = MagicMock()
+    client.get_read_status.return_value = ReadStatus.FRESH
+    client.get_sheet_data.return_value = []
+    client.get_records_from.return_value = []
+    local = SheetReplica(':memory:', client=client)
+    for module in _REPLICA_HOLDERS:
+        monkeypatch.setattr(f"{module}.replica", local)
+    monkeypatch.setattr(settings, 'ANALYTICS_STATE_DIR', str(tmp_path / 'state'))
+    return local
@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch, ANY
 
 from telegram import Update
@@ -7,8 +8,21 @@ from telegram import Update
 from app.flows.admin import (
     admin_panel_start, AdminState, show_user_menu, show_user_list,
     show_user_actions, ask_for_role_change, update_user_role,
-    show_new_orders, show_order_details, change_order_status
+    show_new_orders, show_order_details, change_order_status, show_biomass,
+    show_water_report, show_sales_report, show_profit_report, show_reconcile_report,
+    show_cohorts_report, show_harvest_plan, show_feed_pivot
 )
+from app.analytics.growth import BiomassEstimate
+from app.analytics.water import MetricStats, RollupBucket
+from app.analytics.sales import SalesGroup
+from app.analytics.profit import PondProfit
+from app.analytics.reconcile import ReconcileReport, Violation
+from app.analytics.cohorts import Cohort, CohortShare
+from app.analytics.harvest import HarvestPlan
+from app.analytics.feed_pivot import FeedPivotTable
+import numpy as np
+from datetime import date
+from app.models.pond import Pond
 from app.models.user import User, UserRole
 # Import create_main_menu_keyboard for assertion, or patch it. Patching is generally preferred.
 # from app.bot.keyboards import create_main_menu_keyboard
@@ -188,4 +202,182 @@ async def test_admin_order_cancellation_flow(mock_references, mock_update, mock_
     mock_context.bot.send_message.assert_called_once()
     assert "<b>отменен</b>" in mock_context.bot.send_message.call_args.kwargs['text']
     # FIX: Final state should be ADMIN_MENU if no new orders are left
-    assert next_state == AdminState.ADMIN_MENU
\ No newline at end of file
+    assert next_state == AdminState.ADMIN_MENU
+@patch('app.flows.admin.references')
+@patch('app.flows.admin.estimate_biomass')
+@patch('app.flows.admin.degree_days')
+async def test_admin_biomass_report(mock_degree_days, mock_estimate, mock_references, mock_update, mock_context):
+    """Тест: отчёт о биомассе выводит оценку по водоёмам и итог."""
+    ponds = [Pond(pond_id="P1", name="Пруд 1", is_active=True), Pond(pond_id="P2", name="Пруд <2>", is_active=True)]
+    mock_references.get_active_ponds.return_value = ponds
+    mock_degree_days.since_stocking.return_value = 1234.4
+    mock_estimate.return_value = [
+        BiomassEstimate(ponds[0], 1000, 350.0, datetime(2025, 5, 1)),
+        BiomassEstimate(ponds[1], 200, None, None),
+    ]
+
+    assert await show_biomass(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "Пруд 1: 1000 шт. × 350 г ≈ <b>350.0 кг</b> (взвешивание 01.05.2025), 1234 °C·сут с зарыбления" in text
+    # Название водоёма экранируется для parse_mode='HTML'
+    assert "Пруд &lt;2&gt;: 200 шт., взвешиваний не было" in text
+    assert "Итого: 350.0 кг" in text
+
+@patch('app.flows.admin.references')
+@patch('app.flows.admin.estimate_biomass')
+@patch('app.flows.admin.degree_days')
+async def test_admin_biomass_report_degree_days_error(mock_degree_days, mock_estimate, mock_references, mock_update, mock_context):
+    """Тест: ошибка расчёта градусо-дней обрабатывается так же, как ошибка оценки биомассы."""
+    pond = Pond(pond_id="P1", name="Пруд 1", is_active=True)
+    mock_estimate.return_value = [BiomassEstimate(pond, 1000, 350.0, datetime(2025, 5, 1))]
+    mock_degree_days.since_stocking.side_effect = RuntimeError("replica is broken")
+
+    assert await show_biomass(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    assert mock_update.callback_query.edit_message_text.call_args[0][0] == "❌ Не удалось рассчитать биомассу."
+
+@patch('app.flows.admin.references')
+@patch('app.flows.admin.water_rollups')
+async def test_admin_water_report(mock_rollups, mock_references, mock_update, mock_context):
+    """Тест: сводка качества воды строится по агрегатам, а не по сырым строкам."""
+    ponds = [Pond(pond_id="P1", name="Пруд 1", is_active=True), Pond(pond_id="P2", name="Пруд & Ко", is_active=True)]
+    mock_references.get_active_ponds.return_value = ponds
+    mock_rollups.summary.side_effect = lambda pond_id, since: RollupBucket(
+        since, 14, {
+            'dissolved_O2_mgL': MetricStats(4.2, 9.0, 6.8), 'temperature_C': MetricStats(17.0, 21.5, 19.0),
+            'do_saturation_pct': MetricStats(46.0, 101.0, 75.0),
+        }
+    ) if pond_id == "P1" else None
+
+    assert await show_water_report(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "Пруд 1: DO мин 4.2 / ср 6.8 мг/л (46…101% насыщения), t 17.0…21.5 °C, замеров: 14" in text
+    # Название водоёма экранируется для parse_mode='HTML'
+    assert "Пруд &amp; Ко: замеров не было" in text
+
+@patch('app.flows.admin.sales_analytics')
+async def test_admin_sales_report(mock_sales, mock_update, mock_context):
+    """Тест: отчёт по продажам строится по колоночным агрегатам."""
+    mock_sales.aggregate.side_effect = lambda by, **kwargs: {
+        'status': [SalesGroup("confirmed", "confirmed", 550.0, 5.0, 3), SalesGroup("cancelled", "cancelled", 100.0, 1.0, 1)],
+        'product': [SalesGroup("PR1", "Карп живой", 400.0, 4.0, 2), SalesGroup("PR2", "Филе <premium>", 150.0, 1.0, 1)],
+    }[by]
+
+    assert await show_sales_report(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    mock_sales.aggregate.assert_any_call('product', since=ANY, exclude_statuses=["cancelled"])
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "confirmed: 3 заказов на 550.00 грн" in text
+    assert "Карп живой: 4 ед. в 2 заказах, <b>400.00 грн</b>" in text
+    # Название товара экранируется для parse_mode='HTML'
+    assert "Филе &lt;premium&gt;: 1 ед." in text
+    assert "Итого: 550.00 грн" in text
+
+@patch('app.flows.admin.references')
+@patch('app.flows.admin.profit_ledger')
+async def test_admin_profit_report(mock_ledger, mock_references, mock_update, mock_context):
+    """Тест: прибыль по водоёмам, неоценённый корм отмечается отдельно."""
+    ponds = [Pond(pond_id="P1", name="Пруд 1", is_active=True), Pond(pond_id="P2", name="Пруд <2>", is_active=True)]
+    mock_references.get_all_ponds.return_value = ponds
+    mock_ledger.profit.return_value = [
+        PondProfit(ponds[0], 5000.0, 110.0, 1400.0, 0.0),
+        PondProfit(ponds[1], 0.0, 40.0, 300.0, 10.0),
+    ]
+
+    assert await show_profit_report(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "Пруд 1: выручка 5000.00 грн, корм 110.0 кг на 1400.00 грн → <b>3600.00 грн</b>" in text
+    assert "не оценено 10.0 кг" in text
+    # Название водоёма экранируется для parse_mode='HTML'
+    assert "• Пруд &lt;2&gt;: выручка 0.00 грн" in text
+    assert "Итого: 3300.00 грн" in text
+
+@patch('app.flows.admin.reconciler')
+async def test_admin_reconcile_report(mock_reconciler, mock_update, mock_context):
+    """Тест: сверка данных показывает число нарушений по правилам и сами нарушения."""
+    report = ReconcileReport(rows_checked=120, elapsed_s=0.4)
+    report.add("FISH_MOVES_LOG", 7, 'unmatched_transfer_out', "30 шт., 2025-05-01T08:00:00")
+    report.add("FEEDING_LOG", 3, 'unknown_pond', "Водоём 'P<9>' не найден")
+    mock_reconciler.run.return_value = report
+
+    assert await show_reconcile_report(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "проверено 120 строк" in text
+    assert "• Перевод-расход без перевода-прихода: 1" in text
+    assert "• FISH_MOVES_LOG, строка 7: 30 шт., 2025-05-01T08:00:00" in text
+    assert "P&lt;9&gt;" in text
+
+@patch('app.flows.admin.references')
+@patch('app.flows.admin.cohort_ledger')
+async def test_admin_cohorts_report(mock_ledger, mock_references, mock_update, mock_context):
+    """Тест: партии рыбы выводятся по водоёмам с выживаемостью и приростом."""
+    ponds = [Pond(pond_id="P1", name="Пруд <1> & Ко", is_active=True), Pond(pond_id="P2", name="Пруд 2", is_active=True)]
+    mock_references.get_active_ponds.return_value = ponds
+    cohort = Cohort("Весна", "P1", datetime(2025, 4, 1), 1000, 100, 0, 900, 10.0, 70.0, datetime(2025, 5, 1))
+    mock_ledger.pond_cohorts.side_effect = lambda pond_id: [CohortShare(cohort, 900)] if pond_id == "P1" else []
+
+    assert await show_cohorts_report(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "• Весна (зарыбление 01.04.2025): 900 шт., выживаемость 90.0%, прирост 2.0 г/сут" in text
+    # Название водоёма экранируется для parse_mode='HTML'
+    assert "<b>Пруд &lt;1&gt; &amp; Ко</b>" in text
+    assert "Пруд 2" not in text
+
+@patch('app.flows.admin.references')
+@patch('app.flows.admin.cohort_ledger')
+async def test_admin_cohorts_report_fits_one_message(mock_ledger, mock_references, mock_update, mock_context):
+    """Тест: длинный список партий сокращается до лимита сообщения Telegram."""
+    ponds = [Pond(pond_id=f"P{i}", name=f"Пруд {i}", is_active=True) for i in range(200)]
+    mock_references.get_active_ponds.return_value = ponds
+    mock_ledger.pond_cohorts.side_effect = lambda pond_id: [
+        CohortShare(Cohort(f"{pond_id}#{n}", pond_id, datetime(2025, 4, 1), 1000, 100, 0, 900, 10.0, 70.0, datetime(2025, 5, 1)), 900)
+        for n in range(3)
+    ]
+
+    assert await show_cohorts_report(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert len(text) <= 4096
+    assert text.startswith("<b>Партии рыбы в водоёмах:</b>")
+    assert text.endswith("… список сокращён: не помещается в одно сообщение.")
+
+@patch('app.flows.admin.references')
+@patch('app.flows.admin.feed_pivot')
+async def test_admin_feed_pivot(mock_pivot, mock_references, mock_update, mock_context):
+    """Тест: таблица кормления водоём × день по типам корма и CSV-выгрузка за месяц."""
+    today = datetime.now().date()
+    mock_references.get_active_ponds.return_value = [Pond(pond_id="P1", name="Пруд 1", is_active=True)]
+    mass = np.zeros((2, 2, 31))
+    mass[0, 0, today.day - 1] = 25.0
+    mass[1, 1, today.day - 1] = 4.0
+    mock_pivot.pivot.return_value = FeedPivotTable(date(today.year, today.month, 1), ["P1", "P9"], ["Старт", "Гроуэр"], mass)
+    mock_update.callback_query.message.chat_id = 555
+
+    assert await show_feed_pivot(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    mock_pivot.pivot.assert_called_once_with(today.year, today.month)
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "🌾 Старт" in text and "🌾 Гроуэр" in text
+    assert f"{'Пруд 1':<10}" in text and "  25    25" in text
+    # Водоём не из справочника активных - по pond_id
+    assert "P9" in text
+    mock_context.bot.send_document.assert_awaited_once()
+    sent = mock_context.bot.send_document.call_args.kwargs
+    assert sent['chat_id'] == 555 and sent['filename'] == f"feeding_{today:%Y_%m}.csv"
+
+@patch('app.flows.admin.references')
+@patch('app.flows.admin.plan_harvest')
+async def test_admin_harvest_plan(mock_plan, mock_references, mock_update, mock_context):
+    """Тест: план вылова показывает даты по сценариям и вылов по неделям."""
+    ponds = [Pond(pond_id="P1", name="Пруд 1", is_active=True), Pond(pond_id="P2", name="Пруд <2>", is_active=True)]
+    skipped = [Pond(pond_id="P3", name="Пруд & Ко", is_active=True)]
+    mock_plan.return_value = HarvestPlan(
+        date(2025, 6, 2), ponds, skipped, np.array([-2.0, 0.0, 2.0]),
+        harvest_day=np.array([[20, -1], [10, -1], [5, 90]]), harvest_count=np.ones((3, 2)),
+        harvest_kg=np.array([[900.0, 1.0], [950.0, 1.0], [970.0, 800.0]]), feed_kg=np.ones((3, 2, 120)),
+    )
+
+    assert await show_harvest_plan(mock_update, mock_context) == AdminState.ANALYTICS_MENU
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "• Пруд 1: <b>12.06.2025</b>, ≈950 кг (-2 °C: 22.06, +2 °C: 07.06)" in text
+    # Названия водоёмов экранируются для parse_mode='HTML'
+    assert "• Пруд &lt;2&gt;: не достигнет за 120 дн." in text
+    assert "Нет данных: Пруд &amp; Ко" in text
+    assert "• неделя с 09.06: 950 кг" in text
+    assert "Корм на ближайшие 4 недели: ≈56 кг" in text
@@ -95,7 +95,8 @@ async def test_client_order_full_flow(mock_logs, mock_references, mock_get_user,
     assert final_state == ConversationHandler.END
 
     mock_logs.append_sales_order.assert_called_once()
-    mock_logs.append_sales_order_item.assert_called_once()
+    mock_logs.append_sales_order_items.assert_called_once()
+    assert [item.product_name for item in mock_logs.append_sales_order_items.call_args[0][0]] == ["Карп"]
     
     order_row: SalesOrderRow = mock_logs.append_sales_order.call_args[0][0]
     assert order_row.client_id == 789
@@ -66,4 +66,14 @@ async def test_ask_for_pond_selection_no_ponds(mock_references, mock_update):
     assert result is False
     mock_update.message.reply_text.assert_called_with(
         "В системе нет активных водоёмов. Обратитесь к администратору, чтобы добавить или активировать их."
-    )
\ No newline at end of file
+    )
+
+@patch('app.flows.common.is_sheet_stale', return_value=True)
+@patch('app.flows.common.references')
+async def test_ask_for_pond_selection_warns_when_stale(mock_references, mock_stale, mock_update):
+    """Тест: если список водоёмов взят из локальной копии без связи с Sheets, пользователь предупреждается."""
+    mock_references.get_active_ponds.return_value = [Pond(pond_id='P1', name='Pond One', is_active=True)]
+
+    assert await ask_for_pond_selection(mock_update, "Select a pond:") is True
+    text = mock_update.message.reply_text.call_args[0][0]
+    assert text.startswith("⚠️ Нет связи с Google Sheets") and text.endswith("Select a pond:")
@@ -9,15 +9,21 @@ from app.flows.operator import (
     State, water_quality_start, pond_selected_for_water, do_received,
     temp_received, save_water_data, feeding_start, pond_selected_for_feeding, 
     feed_type_selected, mass_received_feeding, save_feeding_data, weighing_start, 
-    pond_selected_for_weighing, weight_received, save_weighing_data, fish_move_start, 
+    pond_selected_for_weighing, weight_received, sample_file_received, save_weighing_data, fish_move_start, 
     pond_src_selected_for_move, move_type_selected, quantity_received_fm, 
-    save_fish_move_data, pond_dest_selected_for_move, avg_weight_received_fm, 
+    save_fish_move_data, pond_dest_selected_for_move, avg_weight_received_fm, amount_received_fm, 
     reason_received_fm, ref_received_fm
 )
+from app.analytics.hypoxia import HypoxiaForecast
+from app.analytics.ration import RationSuggestion
+from app.analytics.mortality import MortalityRate
+from app.analytics.plausibility import Deviation
+from app.config.settings import settings
 from app.models.pond import Pond
 from app.models.user import User
 from app.models.feeding import FeedType, FeedingRow
 from app.models.weighing import WeighingRow
+from app.analytics.weighing import decode_sample
 from app.models.fish import FishMoveType, FishMoveRow
 from unittest.mock import ANY # Нужен для сравнения в fish_move_transfer
 
@@ -44,6 +50,45 @@ def mock_context():
 def mock_pond():
     return Pond(pond_id="P-TEST", name="Тестовый пруд", is_active=True)
 
+@pytest.fixture(autouse=True)
+def mock_population():
+    # Журнал поголовья читает реплику таблицы; в тестах сценариев он не нужен
+    with patch('app.flows.operator.population_ledger') as ledger:
+        ledger.count.return_value = 0
+        yield ledger
+
+@pytest.fixture(autouse=True)
+def mock_feed_stock():
+    with patch('app.flows.operator.feed_stock') as feed_stock, patch('app.flows.common.feed_stock', feed_stock):
+        feed_stock.balance.return_value = 1000.0
+        feed_stock.can_consume.return_value = True
+        yield feed_stock
+
+@pytest.fixture(autouse=True)
+def mock_hypoxia():
+    with patch('app.flows.operator.hypoxia_monitor') as monitor:
+        monitor.forecast.return_value = None
+        yield monitor
+
+@pytest.fixture(autouse=True)
+def mock_mortality():
+    with patch('app.flows.operator.mortality_monitor') as monitor:
+        monitor.rate.return_value.exceeded = False
+        yield monitor
+
+@pytest.fixture(autouse=True)
+def mock_suggest_ration():
+    with patch('app.flows.operator.suggest_ration', return_value=None) as suggest:
+        yield suggest
+
+@pytest.fixture(autouse=True)
+def mock_plausibility():
+    with patch('app.flows.operator.water_plausibility') as water, \
+         patch('app.flows.operator.weighing_plausibility') as weighing:
+        water.check.return_value = []
+        weighing.check.return_value = []
+        yield water, weighing
+
 # =============================================================
 # === Тесты для сценария /water (из test_operator_flow.py) ===
 # =============================================================
@@ -93,10 +138,27 @@ async def test_water_quality_start_flow(mock_ask_pond, mock_update, mock_context
         final_state = await save_water_data(mock_update, mock_context)
 
     mock_append.assert_called_once()
+    # Насыщение сохраняется вместе с замером: 8.5 мг/л при 16 °C ≈ 86%
+    assert mock_append.call_args[0][0].do_saturation_pct == pytest.approx(86.1, abs=0.1)
     mock_update.callback_query.edit_message_text.assert_called_with("✅ Данные успешно сохранены.")
     assert final_state == ConversationHandler.END
     assert not mock_context.user_data.get('pond') # Проверяем, что временные данные удалены
 
+async def test_temp_received_flags_implausible_reading(mock_update, mock_context, mock_pond, mock_plausibility):
+    """Тест: значение далеко от истории водоёма - предупреждение на шаге подтверждения."""
+    water, _ = mock_plausibility
+    water.check.return_value = [Deviation('temperature_C', 35.0, 15.2, 0.8, 24.8)]
+    mock_context.user_data.update({'pond': mock_pond, 'do': 8.5})
+    mock_update.message.text = "35"
+
+    next_state = await temp_received(mock_update, mock_context)
+
+    assert next_state == State.CONFIRM_WATER
+    water.check.assert_called_once_with("P-TEST", {'dissolved_O2_mgL': 8.5, 'temperature_C': 35.0})
+    summary = mock_update.message.reply_text.call_args[0][0]
+    assert "⚠️ Проверьте значения" in summary
+    assert "Температура: 35 °C - обычно 15.2 ± 0.8 °C (отклонение 24.8σ)" in summary
+
 async def test_do_received_invalid_input(mock_update, mock_context):
     """Тест: ввод некорректного DO возвращает на тот же шаг."""
     mock_update.message.text = "не число"
@@ -155,6 +217,37 @@ async def test_weighing_flow_happy_path(mock_get_ponds, mock_ask_pond, mock_logs
     assert saved_row.avg_weight_g == 350.5
     assert final_state == ConversationHandler.END
 
+@patch('app.flows.operator.logs')
+async def test_weighing_sample_flow(mock_logs, mock_update, mock_context, mock_pond):
+    """Тест: выборка весов через пробел - в журнал пишется среднее и статистика, выборка - в отдельный лист."""
+    mock_context.user_data['pond'] = mock_pond
+    mock_update.message.text = "300 320,5 340 360 379.5"
+    assert await weight_received(mock_update, mock_context) == State.CONFIRM_WEIGHING
+    summary = mock_update.message.reply_text.call_args[0][0]
+    assert "Выборка: 5 шт., 300…379.5 г" in summary
+    assert "Средний вес: 340.0 г" in summary
+
+    assert await save_weighing_data(mock_update, mock_context) == ConversationHandler.END
+    saved_row: WeighingRow = mock_logs.append_weighing.call_args[0][0]
+    assert saved_row.avg_weight_g == 340.0
+    assert saved_row.sample_size == 5
+    assert saved_row.cv_pct == pytest.approx(9.23, abs=0.01)
+    sample_row = mock_logs.append_weighing_sample.call_args[0][0]
+    assert decode_sample(sample_row.weights).tolist() == [300, 320.5, 340, 360, 379.5]
+
+async def test_weighing_sample_from_csv_file(mock_update, mock_context, mock_pond):
+    """Тест: выборка из CSV-файла (заголовок пропускается), неверный вес - повторный ввод."""
+    mock_context.user_data['pond'] = mock_pond
+    file = AsyncMock()
+    file.download_as_bytearray.return_value = bytearray(b"fish,weight_g\n1,410\n2,390\n3,400\n")
+    mock_update.message.document.get_file = AsyncMock(return_value=file)
+    assert await sample_file_received(mock_update, mock_context) == State.CONFIRM_WEIGHING
+    assert mock_context.user_data['weight'] == 400.0
+    assert mock_context.user_data['sample_stats'].size == 3
+
+    mock_update.message.text = "350 abc"
+    assert await weight_received(mock_update, mock_context) == State.ENTER_WEIGHT
+
 @patch('app.flows.operator.logs')
 @patch('app.flows.operator.ask_for_pond_selection', new_callable=AsyncMock)
 @patch('app.flows.operator.references.get_active_ponds')
@@ -171,7 +264,11 @@ async def test_fish_move_sale_flow(mock_get_ponds, mock_ask_pond, mock_logs, moc
     mock_update.message.text = "100"
     assert await quantity_received_fm(mock_update, mock_context) == State.ENTER_AVG_WEIGHT_FM
     mock_update.message.text = "450"
-    assert await avg_weight_received_fm(mock_update, mock_context) == State.ENTER_REASON_FM
+    assert await avg_weight_received_fm(mock_update, mock_context) == State.ENTER_AMOUNT_FM
+    mock_update.message.text = "-5"
+    assert await amount_received_fm(mock_update, mock_context) == State.ENTER_AMOUNT_FM
+    mock_update.message.text = "6750,5"
+    assert await amount_received_fm(mock_update, mock_context) == State.ENTER_REASON_FM
     mock_update.message.text = "Продажа клиенту"
     assert await reason_received_fm(mock_update, mock_context) == State.ENTER_REF_FM
     mock_update.message.text = "Заказ #123"
@@ -186,6 +283,7 @@ async def test_fish_move_sale_flow(mock_get_ponds, mock_ask_pond, mock_logs, moc
     assert saved_row.avg_weight_g == 450
     assert saved_row.reason == "Продажа клиенту"
     assert saved_row.ref == "Заказ #123"
+    assert saved_row.amount == 6750.5
 
 @patch('app.flows.operator.logs')
 @patch('app.flows.operator.ask_for_pond_selection', new_callable=AsyncMock)
@@ -253,8 +351,9 @@ async def test_fish_move_transfer_flow(mock_get_ponds, mock_ask_pond, mock_logs,
     mock_update.callback_query.data = "confirm_save"
     await save_fish_move_data(mock_update, mock_context)
 
-    assert mock_logs.append_fish_move.call_count == 2
-    calls = mock_logs.append_fish_move.call_args_list
+    mock_logs.append_fish_move.assert_not_called()
+    mock_logs.append_fish_moves.assert_called_once()
+    row_out_actual, row_in_actual = mock_logs.append_fish_moves.call_args[0][0]
     
     # --- FIX: Define expected values as dictionaries, not Pydantic models ---
     row_out_expected_dict = {
@@ -263,7 +362,8 @@ async def test_fish_move_transfer_flow(mock_get_ponds, mock_ask_pond, mock_logs,
         'quantity': 250, 
         'avg_weight_g': 300, 
         'reason': 'Плановая сортировка', 
-        'ref': 'Акт #42'
+        'ref': 'Акт #42',
+        'amount': None,
     }
     row_in_expected_dict = {
         'pond_id': pond_dest.id, 
@@ -271,12 +371,187 @@ async def test_fish_move_transfer_flow(mock_get_ponds, mock_ask_pond, mock_logs,
         'quantity': 250, 
         'avg_weight_g': 300, 
         'reason': 'Плановая сортировка', 
-        'ref': 'Акт #42'
+        'ref': 'Акт #42',
+        'amount': None,
     }
-    
-    row_out_actual: FishMoveRow = calls[0].args[0]
-    row_in_actual: FishMoveRow = calls[1].args[0]
 
     # --- FIX: Compare the actual model dump with the expected dictionary ---
     assert row_out_actual.model_dump(exclude={'ts', 'user'}) == row_out_expected_dict
-    assert row_in_actual.model_dump(exclude={'ts', 'user'}) == row_in_expected_dict
\ No newline at end of file
+    assert row_in_actual.model_dump(exclude={'ts', 'user'}) == row_in_expected_dict
+
+@patch('app.flows.operator.references.get_active_ponds')
+async def test_fish_move_shows_population(mock_get_ponds, mock_update, mock_context, mock_pond, mock_population):
+    """Тест: при выборе исходного водоёма показывается текущее поголовье."""
+    mock_get_ponds.return_value = [mock_pond]
+    mock_population.count.return_value = 1250
+    mock_update.callback_query.data = f"pond_{mock_pond.id}"
+
+    assert await pond_src_selected_for_move(mock_update, mock_context) == State.SELECT_MOVE_TYPE
+    mock_population.count.assert_called_once_with(mock_pond)
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "Сейчас в водоёме: 1250 шт." in text
+
+@patch('app.flows.operator.references.get_active_ponds')
+async def test_fish_move_population_error_does_not_break_flow(mock_get_ponds, mock_update, mock_context, mock_pond, mock_population):
+    """Тест: ошибка расчёта поголовья не прерывает сценарий движения рыбы."""
+    mock_get_ponds.return_value = [mock_pond]
+    mock_population.count.side_effect = RuntimeError("replica is broken")
+    mock_update.callback_query.data = f"pond_{mock_pond.id}"
+
+    assert await pond_src_selected_for_move(mock_update, mock_context) == State.SELECT_MOVE_TYPE
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "Сейчас в водоёме" not in text
+
+@pytest.fixture
+def enforce_stock(monkeypatch):
+    monkeypatch.setattr(settings, 'FEED_STOCK_ENFORCE', True)
+
+async def test_feeding_not_checked_against_stock_by_default(mock_update, mock_context, mock_feed_stock):
+    """Тест: пока проверка остатка не включена, кормление принимается без неё."""
+    mock_context.user_data['pond'] = Pond(pond_id="P1", name="Пруд 1", is_active=True)
+    mock_context.user_data['feed_type'] = FeedType(feed_id="F1", name="Стартовый", is_active=True)
+    mock_feed_stock.can_consume.return_value = False
+    mock_update.message.text = "25"
+
+    assert await mass_received_feeding(mock_update, mock_context) == State.CONFIRM_FEED
+    mock_feed_stock.can_consume.assert_not_called()
+
+@pytest.mark.usefixtures("enforce_stock")
+async def test_feeding_blocked_when_stock_is_insufficient(mock_update, mock_context, mock_feed_stock):
+    """Тест: кормление, уводящее остаток корма в минус, не принимается."""
+    feed_type = FeedType(feed_id="F1", name="Стартовый", is_active=True)
+    mock_context.user_data['pond'] = Pond(pond_id="P1", name="Пруд 1", is_active=True)
+    mock_context.user_data['feed_type'] = feed_type
+    mock_feed_stock.can_consume.return_value = False
+    mock_feed_stock.balance.return_value = 10.0
+    mock_update.message.text = "25"
+
+    assert await mass_received_feeding(mock_update, mock_context) == State.ENTER_MASS_F
+    mock_feed_stock.can_consume.assert_called_once_with(feed_type, 25.0)
+    assert 'mass' not in mock_context.user_data
+    assert "Недостаточно корма" in mock_update.message.reply_text.call_args[0][0]
+
+@pytest.mark.usefixtures("enforce_stock")
+async def test_feeding_not_blocked_when_stock_check_fails(mock_update, mock_context, mock_feed_stock):
+    """Тест: если остаток посчитать не удалось, кормление не блокируется."""
+    mock_context.user_data['pond'] = Pond(pond_id="P1", name="Пруд 1", is_active=True)
+    mock_context.user_data['feed_type'] = FeedType(feed_id="F1", name="Стартовый", is_active=True)
+    mock_feed_stock.can_consume.side_effect = RuntimeError("replica is broken")
+    mock_update.message.text = "25"
+
+    assert await mass_received_feeding(mock_update, mock_context) == State.CONFIRM_FEED
+    assert mock_context.user_data['mass'] == 25.0
+
+@pytest.mark.usefixtures("enforce_stock")
+async def test_feeding_not_blocked_when_balance_fails(mock_update, mock_context, mock_feed_stock):
+    """Тест: сбой при подсчёте остатка для сообщения об отказе тоже не блокирует кормление."""
+    mock_context.user_data['pond'] = Pond(pond_id="P1", name="Пруд 1", is_active=True)
+    mock_context.user_data['feed_type'] = FeedType(feed_id="F1", name="Стартовый", is_active=True)
+    mock_feed_stock.can_consume.return_value = False
+    mock_feed_stock.balance.side_effect = RuntimeError("replica is broken")
+    mock_update.message.text = "25"
+
+    assert await mass_received_feeding(mock_update, mock_context) == State.CONFIRM_FEED
+
+@patch('app.flows.operator.notify_admins', new_callable=AsyncMock)
+@patch('app.flows.operator.logs')
+async def test_save_water_warns_on_hypoxia_forecast(mock_logs, mock_notify, mock_update, mock_context, mock_pond, mock_hypoxia):
+    """Тест: если по тренду DO скоро упадёт ниже порога, администраторы предупреждаются заранее."""
+    mock_context.user_data.update({'pond': mock_pond, 'do': 6.0, 'temp': 24.0})
+    mock_hypoxia.forecast.return_value = HypoxiaForecast("P-TEST", 6.0, -0.5, 24.0, 4.4, 3.2)
+    mock_hypoxia.should_alert.return_value = True
+    mock_notify.return_value = True
+
+    assert await save_water_data(mock_update, mock_context) == ConversationHandler.END
+
+    mock_hypoxia.forecast.assert_called_once_with("P-TEST")
+    alert = mock_notify.call_args[0][1]
+    assert "Прогноз гипоксии" in alert and "через 3.2 ч" in alert
+    assert "администраторы предупреждены" in mock_update.callback_query.edit_message_text.call_args[0][0]
+    mock_hypoxia.mark_alerted.assert_called_once_with("P-TEST")
+
+@patch('app.flows.operator.notify_admins', new_callable=AsyncMock)
+@patch('app.flows.operator.logs')
+async def test_hypoxia_cooldown_not_started_when_delivery_fails(mock_logs, mock_notify, mock_update, mock_context, mock_pond, mock_hypoxia):
+    """Тест: если предупреждение о гипоксии никому не доставлено, пауза не начинается."""
+    mock_context.user_data.update({'pond': mock_pond, 'do': 6.0, 'temp': 24.0})
+    mock_hypoxia.forecast.return_value = HypoxiaForecast("P-TEST", 6.0, -0.5, 24.0, 4.4, 3.2)
+    mock_hypoxia.should_alert.return_value = True
+    mock_notify.return_value = False
+
+    await save_water_data(mock_update, mock_context)
+
+    mock_notify.assert_awaited_once()
+    mock_hypoxia.mark_alerted.assert_not_called()
+    mock_update.callback_query.edit_message_text.assert_called_with("✅ Данные успешно сохранены.")
+
+@patch('app.flows.operator.notify_admins', new_callable=AsyncMock)
+@patch('app.flows.operator.logs')
+async def test_save_water_hypoxia_alert_respects_cooldown(mock_logs, mock_notify, mock_update, mock_context, mock_pond, mock_hypoxia):
+    """Тест: повторное предупреждение в пределах паузы не отправляется."""
+    mock_context.user_data.update({'pond': mock_pond, 'do': 6.0, 'temp': 18.0})
+    mock_hypoxia.forecast.return_value = HypoxiaForecast("P-TEST", 6.0, -0.5, 18.0, 4.0, 4.0)
+    mock_hypoxia.should_alert.return_value = False
+
+    await save_water_data(mock_update, mock_context)
+
+    mock_notify.assert_not_called()
+    mock_update.callback_query.edit_message_text.assert_called_with("✅ Данные успешно сохранены.")
+
+@patch('app.flows.operator.references.get_active_feed_types')
+async def test_feed_type_selected_shows_ration(mock_get_feeds, mock_update, mock_context, mock_pond, mock_suggest_ration):
+    """Тест: после выбора корма показывается рекомендуемый суточный рацион."""
+    feed_type = FeedType(feed_id="F1", name="Стартовый", is_active=True)
+    mock_get_feeds.return_value = [feed_type]
+    mock_context.user_data['pond'] = mock_pond
+    mock_suggest_ration.return_value = RationSuggestion(mock_pond, 2000, 250.0, 22.0, 2.5)
+    mock_update.callback_query.data = "feed_F1"
+
+    assert await feed_type_selected(mock_update, mock_context) == State.ENTER_MASS_F
+    mock_suggest_ration.assert_called_once_with(mock_pond)
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "Рекомендуемый суточный рацион: 12.5 кг" in text
+    assert "уже скормлено" not in text
+
+    mock_suggest_ration.return_value = RationSuggestion(mock_pond, 2000, 250.0, 22.0, 2.5, fed_today_kg=8.0)
+    await feed_type_selected(mock_update, mock_context)
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "Сегодня уже скормлено 8.0 кг, осталось 4.5 кг." in text
+
+@patch('app.flows.operator.notify_admins', new_callable=AsyncMock)
+@patch('app.flows.operator.logs')
+async def test_death_move_alerts_on_high_mortality(mock_logs, mock_notify, mock_update, mock_context, mock_pond, mock_mortality):
+    """Тест: после записи гибели при превышении порога администраторы получают оповещение."""
+    mock_context.user_data.update({
+        'move_type': FishMoveType.DEATH, 'pond_src': mock_pond, 'quantity': 30, 'reason': 'Замор',
+    })
+    mock_mortality.rate.return_value = MortalityRate(mock_pond, 970, 30, 45)
+    mock_mortality.should_alert.return_value = True
+    mock_notify.return_value = True
+    mock_update.callback_query.data = "confirm_save"
+
+    await save_fish_move_data(mock_update, mock_context)
+
+    mock_notify.assert_awaited_once()
+    assert "За 24 ч: 30 шт. (3.00%" in mock_notify.call_args[0][1]
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "администраторы предупреждены" in text
+    mock_mortality.mark_alerted.assert_called_once_with(mock_pond.id)
+
+@patch('app.flows.operator.notify_admins', new_callable=AsyncMock)
+@patch('app.flows.operator.logs')
+async def test_mortality_cooldown_not_started_when_delivery_fails(mock_logs, mock_notify, mock_update, mock_context, mock_pond, mock_mortality):
+    """Тест: если оповещение о падеже никому не доставлено, пауза не начинается."""
+    mock_context.user_data.update({
+        'move_type': FishMoveType.DEATH, 'pond_src': mock_pond, 'quantity': 30, 'reason': 'Замор',
+    })
+    mock_mortality.rate.return_value = MortalityRate(mock_pond, 970, 30, 45)
+    mock_mortality.should_alert.return_value = True
+    mock_notify.return_value = False
+    mock_update.callback_query.data = "confirm_save"
+
+    await save_fish_move_data(mock_update, mock_context)
+
+    mock_notify.assert_awaited_once()
+    mock_mortality.mark_alerted.assert_not_called()
+    assert "администраторы предупреждены" not in mock_update.callback_query.edit_message_text.call_args[0][0]
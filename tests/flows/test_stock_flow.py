@@ -3,7 +3,8 @@ from unittest.mock import AsyncMock, MagicMock, patch, ANY
 
 from telegram.ext import ConversationHandler
 from app.flows.stock import (
-    StockState, stock_start, feed_selected, type_selected, mass_received, reason_received, save_stock_move
+    StockState, stock_start, feed_selected, type_selected, mass_received, cost_received, reason_received,
+    save_stock_move
 )
 from app.models.feeding import FeedType
 from app.models.stock import StockMoveType
@@ -29,6 +30,12 @@ def mock_context():
 def mock_feed_type():
     return FeedType(feed_id="FT-GROWER", name="Grower Feed", is_active=True)
 
+@pytest.fixture(autouse=True)
+def mock_feed_stock():
+    with patch('app.flows.common.feed_stock') as feed_stock:
+        feed_stock.balance.return_value = 0.0
+        yield feed_stock
+
 @patch('app.flows.stock.references')
 @patch('app.flows.stock.logs')
 async def test_stock_full_flow(mock_logs, mock_references, mock_update, mock_context, mock_feed_type):
@@ -61,9 +68,17 @@ async def test_stock_full_flow(mock_logs, mock_references, mock_update, mock_con
     # --- Шаг 4: Ввод массы -> mass_received
     mock_update.message.text = "1250.5"
     next_state = await mass_received(mock_update, mock_context)
-    assert next_state == StockState.ENTER_REASON
+    assert next_state == StockState.ENTER_COST
     assert mock_context.user_data['stock_mass'] == 1250.5
 
+    # --- Шаг 4.1: Цена за кг (только для прихода) -> cost_received
+    mock_update.message.text = "abc"
+    assert await cost_received(mock_update, mock_context) == StockState.ENTER_COST
+    mock_update.message.text = "32,5"
+    next_state = await cost_received(mock_update, mock_context)
+    assert next_state == StockState.ENTER_REASON
+    assert mock_context.user_data['stock_unit_cost'] == 32.5
+
     # --- Шаг 5: Ввод причины -> reason_received
     mock_update.message.text = "Закупка по накладной #123"
     next_state = await reason_received(mock_update, mock_context)
@@ -81,4 +96,25 @@ async def test_stock_full_flow(mock_logs, mock_references, mock_update, mock_con
     saved_row = mock_logs.append_stock_move.call_args[0][0]
     assert saved_row.feed_type_id == "FT-GROWER"
     assert saved_row.move_type == StockMoveType.INCOME
-    assert saved_row.mass_kg == 1250.5
\ No newline at end of file
+    assert saved_row.mass_kg == 1250.5
+    assert saved_row.unit_cost == 32.5
+
+
+@patch('app.flows.stock.references')
+async def test_stock_feed_selected_shows_balance(mock_references, mock_update, mock_context, mock_feed_type, mock_feed_stock):
+    """Тест: после выбора корма показывается его текущий остаток на складе."""
+    mock_references.get_active_feed_types.return_value = [mock_feed_type]
+    mock_feed_stock.balance.return_value = 1250.5
+    mock_update.callback_query.data = "feed_FT-GROWER"
+
+    assert await feed_selected(mock_update, mock_context) == StockState.SELECT_TYPE
+    mock_feed_stock.balance.assert_called_once_with(mock_feed_type)
+    text = mock_update.callback_query.edit_message_text.call_args[0][0]
+    assert "Остаток на складе: 1250.5 кг." in text
+
+
+async def test_stock_outcome_skips_cost(mock_update, mock_context):
+    """Тест: для расхода цена не запрашивается."""
+    mock_context.user_data['stock_move_type'] = StockMoveType.OUTCOME
+    mock_update.message.text = "10"
+    assert await mass_received(mock_update, mock_context) == StockState.ENTER_REASON
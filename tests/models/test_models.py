@@ -62,6 +62,12 @@ def test_water_quality_is_critical():
     row_to_test.temperature_C = settings.TEMP_MAX + 0.1
     assert row_to_test.is_critical()
 
+    # DO выше DO_MIN, но насыщение ниже DO_SATURATION_MIN_PCT
+    low_saturation = WaterQualityRow(
+        **base_data, dissolved_O2_mgL=4.5, temperature_C=30, do_saturation_pct=settings.DO_SATURATION_MIN_PCT - 1
+    )
+    assert low_saturation.is_critical()
+
     
 def test_water_quality_to_sheet_row():
     """Тест: Метод to_sheet_row для WaterQualityRow формирует корректный список."""
@@ -71,13 +77,14 @@ def test_water_quality_to_sheet_row():
     sheet_list = row.to_sheet_row()
 
     assert isinstance(sheet_list, list)
-    # FIX: The list should have 6 elements, including the default 'notes'
-    assert len(sheet_list) == 6
+    # 7 elements: the default 'notes' and the trailing optional 'do_saturation_pct'
+    assert len(sheet_list) == 7
     assert sheet_list[0] == now.isoformat()
     assert sheet_list[2] == 7.5
     # The 'notes' field will be at index 4, so the 'user' field is at index 5
     assert sheet_list[4] == "" # The default value for notes
     assert sheet_list[5] == 'tester'
+    assert sheet_list[6] is None
 
   
 
@@ -122,8 +129,9 @@ def test_weighing_row_to_sheet_row():
     row = WeighingRow(ts=now, pond_id='P3', avg_weight_g=512.7, user='tester3')
     sheet_list = row.to_sheet_row()
 
-    assert len(sheet_list) == 4
-    assert sheet_list == [now.isoformat(), 'P3', 512.7, 'tester3']
+    # Колонки статистики выборки - в конце, пустые для простого среднего веса
+    assert len(sheet_list) == 7
+    assert sheet_list == [now.isoformat(), 'P3', 512.7, 'tester3', None, None, None]
 
 
 # --- Тесты для Pond ---
@@ -173,9 +181,9 @@ def test_fish_move_row_to_sheet_row():
                       quantity=50, avg_weight_g=150.0, reason='Плановый перевод', user='op1')
     sheet_list = row.to_sheet_row()
 
-    assert len(sheet_list) == 8
+    assert len(sheet_list) == 9
     assert sheet_list[2] == "transfer_out" # Проверяем, что Enum преобразован в строку
-    assert sheet_list == [now.isoformat(), 'P1', 'transfer_out', 50, 150.0, 'Плановый перевод', None, 'op1']
+    assert sheet_list == [now.isoformat(), 'P1', 'transfer_out', 50, 150.0, 'Плановый перевод', None, 'op1', None]
 
 
 # --- Тесты для StockMoveRow ---
@@ -199,6 +207,49 @@ def test_stock_move_row_to_sheet_row():
                        move_type=StockMoveType.OUTCOME, mass_kg=25.0, reason='Списание', user='sklad')
     sheet_list = row.to_sheet_row()
 
-    assert len(sheet_list) == 7
+    assert len(sheet_list) == 8
     assert sheet_list[3] == "outcome" # Проверяем, что Enum преобразован в строку
-    assert sheet_list == [now.isoformat(), 'F-GRW', 'Grower 3mm', 'outcome', 25.0, 'Списание', 'sklad']
\ No newline at end of file
+    assert sheet_list == [now.isoformat(), 'F-GRW', 'Grower 3mm', 'outcome', 25.0, 'Списание', 'sklad', None]
+
+# --- Тесты для предсобранного сериализатора строк ---
+
+def _legacy_to_sheet_row(item) -> list:
+    """Эталон: прежняя реализация через model_dump и hasattr."""
+    result = []
+    for value in item.model_dump(by_alias=True).values():
+        if hasattr(value, 'value'):
+            result.append(value.value)
+        elif hasattr(value, 'isoformat'):
+            result.append(value.isoformat())
+        else:
+            result.append(value)
+    return result
+
+@pytest.mark.parametrize("item", [
+    User(user_id=1, user_name="Admin", phone_number="111", role=UserRole.ADMIN),
+    User(user_id=2, user_name="Client"),
+    Pond(pond_id='P1', name='Пруд', stocking_date=date(2025, 4, 1), initial_qty=10, is_active=True),
+    Pond(pond_id='P2', name='Пруд 2', is_active=False),
+    Product(product_id="PR1", name="Карп", description="", price=1.5, unit="кг", is_available=True),
+    FishMoveRow(ts=datetime.now(), pond_id='P1', move_type=FishMoveType.DEATH, quantity=1, user='u'),
+    StockMoveRow(ts=datetime.now(), feed_type_id='F1', feed_type_name='G', move_type=StockMoveType.INCOME,
+                 mass_kg=1.0, reason='r', user='u'),
+])
+def test_compiled_serializer_matches_model_dump(item):
+    """Тест: предсобранный сериализатор даёт тот же результат, что и model_dump."""
+    assert item.to_sheet_row() == _legacy_to_sheet_row(item)
+
+def test_serializer_is_built_once_per_class():
+    """Тест: сериализатор кэшируется на уровне класса модели."""
+    assert FeedingRow.get_row_serializer() is FeedingRow.get_row_serializer()
+    assert FeedingRow.get_row_serializer() is not WeighingRow.get_row_serializer()
+
+def test_to_sheet_rows_batch():
+    """Тест: пакетная сериализация возвращает строки в исходном порядке."""
+    now = datetime.now()
+    rows = [WeighingRow(ts=now, pond_id=f'P{i}', avg_weight_g=100 + i, user='u') for i in range(3)]
+    assert WeighingRow.to_sheet_rows(rows) == [
+        [now.isoformat(), 'P0', 100.0, 'u', None, None, None],
+        [now.isoformat(), 'P1', 101.0, 'u', None, None, None],
+        [now.isoformat(), 'P2', 102.0, 'u', None, None, None],
+    ]
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from google.auth.transport.requests import AuthorizedSession
+
+from app.sheets import auth
+from app.sheets.auth import TokenRefresher, build_session
+from app.config.settings import settings
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def test_seconds_until_refresh_respects_margin():
+    """Тест: обновление планируется за margin секунд до истечения токена."""
+    creds = MagicMock(token="t", expiry=_utcnow() + timedelta(seconds=3600))
+    refresher = TokenRefresher(creds, MagicMock(), margin_s=300)
+    assert 3290 < refresher.seconds_until_refresh() <= 3300
+
+def test_seconds_until_refresh_without_token_is_immediate():
+    """Тест: без токена или с истёкшим токеном обновление нужно сразу."""
+    assert TokenRefresher(MagicMock(token=None, expiry=None), MagicMock(), 300).seconds_until_refresh() == 0
+    expired = MagicMock(token="t", expiry=_utcnow() - timedelta(seconds=10))
+    assert TokenRefresher(expired, MagicMock(), 300).seconds_until_refresh() == 0
+
+def test_refresh_now_uses_plain_token_transport():
+    """Тест: обмен токена идёт через обычный сеанс с пулом, а не через AuthorizedSession."""
+    creds = MagicMock()
+    token_request = auth.build_token_request()
+    TokenRefresher(creds, token_request, 300).refresh_now()
+    request = creds.refresh.call_args[0][0]
+    assert request is token_request
+    assert not isinstance(request.session, AuthorizedSession)
+    adapter = request.session.get_adapter("https://oauth2.googleapis.com/")
+    assert adapter._pool_maxsize == settings.SHEETS_HTTP_POOL_SIZE
+
+def test_build_session_mounts_pooled_adapter():
+    """Тест: сеанс использует пул соединений заданного размера."""
+    session = build_session(MagicMock())
+    adapter = session.get_adapter("https://sheets.googleapis.com/")
+    assert adapter._pool_maxsize == settings.SHEETS_HTTP_POOL_SIZE
+
+@patch('app.sheets.auth.gspread.Client')
+@patch('app.sheets.auth.Credentials')
+def test_authorize_service_account_shares_session(mock_credentials, mock_client):
+    """Тест: gspread.Client получает общий сеанс, токен получен заранее, поток запущен."""
+    creds = mock_credentials.from_service_account_file.return_value
+    with patch.object(TokenRefresher, 'start') as mock_start:
+        client, refresher = auth.authorize_service_account("creds.json")
+
+    creds.refresh.assert_called_once()
+    mock_start.assert_called_once()
+    session = mock_client.call_args.kwargs['session']
+    assert session.credentials is creds
+    # Сеанс и фоновый поток обновляют токен через один и тот же обычный транспорт
+    assert session._auth_request is refresher._request
+    assert not isinstance(refresher._request.session, AuthorizedSession)
+    assert client is mock_client.return_value
@@ -0,0 +1,124 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+import gspread
+from app.sheets.breaker import CircuitBreaker, BreakerState
+from app.sheets.client import GoogleSheetsClient, ReadStatus
+from app.utils import metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=2, reset_timeout=10, clock=clock)
+
+# --- CircuitBreaker ---
+
+def test_breaker_opens_after_threshold(breaker):
+    """Тест: breaker открывается после failure_threshold ошибок подряд."""
+    breaker.record_failure()
+    assert breaker.state == BreakerState.CLOSED
+    breaker.record_failure()
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.allow_request() is False
+
+def test_breaker_half_open_allows_single_trial(breaker, clock):
+    """Тест: после reset_timeout пропускается ровно одна пробная операция."""
+    breaker.record_failure(); breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow_request() is True
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert breaker.allow_request() is False
+    breaker.record_success()
+    assert breaker.state == BreakerState.CLOSED
+
+def test_breaker_trial_failure_reopens(breaker, clock):
+    """Тест: ошибка пробной операции снова открывает breaker и вызывает on_open."""
+    on_open = MagicMock()
+    breaker._on_open = on_open
+    breaker.record_failure(); breaker.record_failure()
+    clock.now = 10
+    breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == BreakerState.OPEN
+    assert on_open.call_count == 2
+
+def test_breaker_records_transitions_as_metrics(breaker):
+    """Тест: переходы состояний попадают в счётчики метрик."""
+    metrics.reset()
+    breaker.record_failure(); breaker.record_failure()
+    assert metrics.get("sheets_breaker_transition", breaker="test", from_state="closed", to_state="open") == 1
+
+# --- GoogleSheetsClient: last-known-good ---
+
+@pytest.fixture
+def client():
+    with patch('app.sheets.client.authorize_service_account', return_value=(MagicMock(), MagicMock())):
+        client = GoogleSheetsClient()
+    client._schedule_probe = MagicMock()
+    return client
+
+def test_client_serves_last_known_good_on_failure(client):
+    """Тест: при ошибке чтения клиент отдаёт последний удачный снимок с пометкой STALE."""
+    worksheet = client.spreadsheet.worksheet.return_value
+    worksheet.get_all_records.return_value = [{'pond_id': 'P1'}]
+    assert client.get_sheet_data("PONDS") == [{'pond_id': 'P1'}]
+    assert client.get_read_status("PONDS") == ReadStatus.FRESH
+
+    worksheet.get_all_records.side_effect = ConnectionError("timeout")
+    assert client.get_sheet_data("PONDS") == [{'pond_id': 'P1'}]
+    assert client.get_read_status("PONDS") == ReadStatus.STALE
+
+def test_client_without_snapshot_is_unavailable(client):
+    """Тест: без снимка при ошибке возвращается [] и статус UNAVAILABLE."""
+    client.spreadsheet.worksheet.side_effect = ConnectionError("timeout")
+    assert client.get_sheet_data("USERS") == []
+    assert client.get_read_status("USERS") == ReadStatus.UNAVAILABLE
+
+def test_client_stops_calling_sheets_when_open(client):
+    """Тест: при открытом breaker запросы в Sheets не выполняются, probe запланирован."""
+    client.spreadsheet.worksheet.side_effect = ConnectionError("timeout")
+    for _ in range(client.breaker.failure_threshold):
+        client.get_sheet_data("USERS")
+    calls = client.spreadsheet.worksheet.call_count
+    client.get_sheet_data("USERS")
+    assert client.spreadsheet.worksheet.call_count == calls
+    client._schedule_probe.assert_called_once()
+
+def test_client_probe_closes_breaker(client):
+    """Тест: удачная фоновая проверка закрывает breaker."""
+    client.spreadsheet.worksheet.side_effect = ConnectionError("timeout")
+    for _ in range(client.breaker.failure_threshold):
+        client.get_sheet_data("USERS")
+    client.breaker._opened_at -= client.breaker.reset_timeout
+    client._probe()
+    client.spreadsheet.fetch_sheet_metadata.assert_called_once()
+    assert client.breaker.state == BreakerState.CLOSED
+
+def test_client_missing_worksheet_does_not_trip_breaker(client):
+    """Тест: отсутствующий лист - не сбой соединения, breaker остаётся закрытым."""
+    client.spreadsheet.worksheet.side_effect = gspread.exceptions.WorksheetNotFound("X")
+    for _ in range(client.breaker.failure_threshold + 1):
+        assert client.get_sheet_data("X") == []
+    assert client.breaker.state == BreakerState.CLOSED
+    assert client.get_read_status("X") == ReadStatus.MISSING
+
+def test_append_row_returns_written_row_number(client):
+    """Тест: append_row возвращает номер записанной строки из ответа Sheets."""
+    worksheet = client.spreadsheet.worksheet.return_value
+    worksheet.append_row.return_value = {'updates': {'updatedRange': "'FEEDING_LOG'!A17:E17"}}
+    assert client.append_row("FEEDING_LOG", [1, 2]) == 17
+
+    worksheet.append_row.side_effect = ConnectionError("timeout")
+    assert client.append_row("FEEDING_LOG", [1, 2]) is None
@@ -116,4 +116,40 @@ def test_append_fish_move(mock_gs_client: MagicMock):
     logs.append_fish_move(row)
     mock_gs_client.append_row.assert_called_once_with(
         settings.SHEETS.FISH_MOVES_LOG, row.to_sheet_row()
-    )
\ No newline at end of file
+    )
+
+def test_journal_append_notifies_subscribers_with_row_number(mock_gs_client: MagicMock):
+    """Тест: после записи в журнал подписчики получают строку и её номер в листе."""
+    mock_gs_client.append_row.return_value = 42
+    listener = MagicMock()
+    logs.subscribe(settings.SHEETS.FEEDING_LOG, listener)
+    try:
+        row = FeedingRow(ts=datetime.now(), pond_id="P-1", feed_type="Starter", mass_kg=1.5, user="test")
+        assert logs.append_feeding(row) == 42
+        listener.assert_called_once_with(row, 42)
+
+        # Неудачная запись подписчикам не передаётся
+        mock_gs_client.append_row.return_value = None
+        logs.append_feeding(row)
+        listener.assert_called_once()
+    finally:
+        logs.unsubscribe(settings.SHEETS.FEEDING_LOG, listener)
+
+def test_append_fish_moves_writes_rows_in_one_request(mock_gs_client: MagicMock):
+    """Тест: пара записей перевода пишется одним запросом, подписчики получают номер каждой строки."""
+    mock_gs_client.append_rows.return_value = 10
+    listener = MagicMock()
+    logs.subscribe(settings.SHEETS.FISH_MOVES_LOG, listener)
+    try:
+        common = dict(ts=datetime.now(), quantity=50, avg_weight_g=200, reason="sort", ref="", user="test")
+        row_out = FishMoveRow(pond_id="P-1", move_type=FishMoveType.TRANSFER_OUT, **common)
+        row_in = FishMoveRow(pond_id="P-2", move_type=FishMoveType.TRANSFER_IN, **common)
+        assert logs.append_fish_moves([row_out, row_in]) == 10
+
+        mock_gs_client.append_rows.assert_called_once_with(
+            settings.SHEETS.FISH_MOVES_LOG, [row_out.to_sheet_row(), row_in.to_sheet_row()]
+        )
+        mock_gs_client.append_row.assert_not_called()
+        assert listener.call_args_list == [((row_out, 10),), ((row_in, 11),)]
+    finally:
+        logs.unsubscribe(settings.SHEETS.FISH_MOVES_LOG, listener)
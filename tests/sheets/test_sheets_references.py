@@ -14,7 +14,10 @@ from app.config.settings import settings
 def mock_gs_client():
     """Фикстура для мокинга gs_client."""
     # FIX 1: Patch gs_client where it is USED
-    with patch('app.sheets.references.gs_client', autospec=True) as mock_client:
+    # Чтения идут через локальную реплику; в тестах она просто проксирует данные из мока клиента
+    with patch('app.sheets.references.gs_client', autospec=True) as mock_client, \
+         patch('app.sheets.references.replica') as mock_replica:
+        mock_replica.read.side_effect = lambda sheet_name: mock_client.get_sheet_data(sheet_name)
         yield mock_client
 
 @pytest.fixture(autouse=True)
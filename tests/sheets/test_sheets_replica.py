@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+
+from app.sheets.client import ReadStatus
+from app.sheets.replica import SheetReplica
+from app.models.feeding import FeedType, FeedingRow
+from app.models.weighing import WeighingRow
+from app.config.settings import settings
+
+FEEDS = settings.SHEETS.FEED_TYPES
+FEEDING = settings.SHEETS.FEEDING_LOG
+
+
+@pytest.fixture
+def client():
+    client = MagicMock()
+    client.get_read_status.return_value = ReadStatus.FRESH
+    return client
+
+@pytest.fixture
+def replica(client):
+    return SheetReplica(':memory:', client=client, models={FEEDS: FeedType, FEEDING: FeedingRow})
+
+def _feeding(i: int) -> dict:
+    return {'ts': f'2025-05-01T08:0{i}:00', 'pond_id': 'P1', 'feed_type': 'Стартер', 'mass_kg': 1.5 + i, 'user': 'op'}
+
+def test_first_read_syncs_and_then_serves_locally(replica, client):
+    """Тест: первое чтение синхронизирует таблицу, повторное - обслуживается локально."""
+    client.get_sheet_data.return_value = [{'feed_id': 'F1', 'name': 'Стартер', 'is_active': 'TRUE'}]
+    assert replica.read(FEEDS) == [{'feed_id': 'F1', 'name': 'Стартер', 'is_active': 'TRUE'}]
+    assert replica.read(FEEDS) == [{'feed_id': 'F1', 'name': 'Стартер', 'is_active': 'TRUE'}]
+    client.get_sheet_data.assert_called_once_with(FEEDS)
+    assert replica.watermark(FEEDS).row_count == 1
+
+def test_diff_sync_rewrites_only_changed_rows_and_drops_deleted(replica, client):
+    """Тест: diff-синхронизация справочника обновляет изменённые строки и удаляет лишние."""
+    client.get_sheet_data.return_value = [
+        {'feed_id': 'F1', 'name': 'A', 'is_active': 'TRUE'},
+        {'feed_id': 'F2', 'name': 'B', 'is_active': 'TRUE'},
+    ]
+    replica.sync(FEEDS)
+    client.get_sheet_data.return_value = [{'feed_id': 'F1', 'name': 'A2', 'is_active': 'TRUE'}]
+    replica.sync(FEEDS)
+    assert replica.rows(FEEDS) == [{'feed_id': 'F1', 'name': 'A2', 'is_active': 'TRUE'}]
+
+def test_journal_tail_sync_reads_only_new_rows(replica, client):
+    """Тест: журнал после первой синхронизации дочитывается только с хвоста."""
+    client.get_sheet_data.return_value = [_feeding(0), _feeding(1)]
+    replica.sync(FEEDING)
+    client.get_records_from.return_value = [_feeding(2)]
+    replica.invalidate(FEEDING)
+
+    rows = replica.read(FEEDING)
+
+    client.get_records_from.assert_called_once_with(FEEDING, 4)
+    assert [r['mass_kg'] for r in rows] == [1.5, 2.5, 3.5]
+    assert replica.watermark(FEEDING).row_count == 3
+
+def test_unavailable_sheets_keeps_local_rows(replica, client):
+    """Тест: при недоступности Sheets реплика отдаёт локальные данные и остаётся помеченной."""
+    client.get_sheet_data.return_value = [{'feed_id': 'F1', 'name': 'A', 'is_active': 'TRUE'}]
+    replica.sync(FEEDS)
+    client.get_read_status.return_value = ReadStatus.STALE
+    replica.invalidate(FEEDS)
+    assert replica.read(FEEDS) == [{'feed_id': 'F1', 'name': 'A', 'is_active': 'TRUE'}]
+    assert replica.sync(FEEDS) is False
+
+def test_missing_worksheet_keeps_local_rows(replica, client):
+    """Тест: ненайденный лист не стирает реплику и не обнуляет число строк."""
+    client.get_sheet_data.return_value = [{'feed_id': 'F1', 'name': 'A', 'is_active': 'TRUE'}]
+    replica.sync(FEEDS)
+    client.get_sheet_data.return_value = []
+    client.get_read_status.return_value = ReadStatus.MISSING
+    assert replica.sync(FEEDS) is False
+    assert replica.read(FEEDS) == [{'feed_id': 'F1', 'name': 'A', 'is_active': 'TRUE'}]
+    assert replica.watermark(FEEDS).row_count == 1
+
+def test_missing_columns_are_omitted(replica, client):
+    """Тест: колонки, которых нет в листе, не попадают в результат (как в get_all_records)."""
+    client.get_sheet_data.return_value = [{'feed_id': 'F1', 'name': 'A'}]
+    assert replica.read(FEEDS) == [{'feed_id': 'F1', 'name': 'A'}]
+
+def test_local_read_is_fast(replica, client):
+    """Тест: локальное чтение небольшого справочника укладывается в миллисекунду."""
+    client.get_sheet_data.return_value = [{'feed_id': f'F{i}', 'name': 'A', 'is_active': 'TRUE'} for i in range(50)]
+    replica.read(FEEDS)
+    start = time.perf_counter()
+    for _ in range(100):
+        replica.read(FEEDS)
+    assert (time.perf_counter() - start) / 100 < 1e-3
+
+def test_iter_rows_streams_chunks_with_row_numbers(replica, client):
+    """Тест: потоковое чтение отдаёт все строки с номерами строк листа, порция за порцией."""
+    client.get_sheet_data.return_value = [_feeding(i) for i in range(5)]
+    replica.sync(FEEDING)
+    rows = list(replica.iter_rows(FEEDING, chunk_size=2))
+    assert [row for row, _ in rows] == [2, 3, 4, 5, 6]
+    assert [record['mass_kg'] for _, record in rows] == [1.5, 2.5, 3.5, 4.5, 5.5]
+    assert [row for row, _ in replica.iter_rows(FEEDING, start_row=5, chunk_size=2)] == [5, 6]
+
+def test_outdated_table_schema_is_recreated_and_fully_reloaded(client, tmp_path):
+    """Тест: таблица со старым набором колонок пересоздаётся, лист перечитывается целиком."""
+    weighing = settings.SHEETS.WEIGHING_LOG
+    db_path = str(tmp_path / 'replica.sqlite3')
+    # БД до добавления колонок sample_size / std_g / cv_pct
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE _watermarks (sheet_name TEXT PRIMARY KEY, synced_at REAL NOT NULL, "
+                 "row_count INTEGER NOT NULL, full_synced_at REAL NOT NULL DEFAULT 0)")
+    conn.execute(f'CREATE TABLE "{weighing}" (_row INTEGER PRIMARY KEY, _hash INTEGER NOT NULL, '
+                 '"ts", "pond_id", "avg_weight_g", "user")')
+    conn.execute(f'INSERT INTO "{weighing}" VALUES (2, 0, "2025-05-01T08:00:00", "P1", 100.0, "op")')
+    conn.execute("INSERT INTO _watermarks VALUES (?, ?, 1, ?)", (weighing, time.time(), time.time()))
+    conn.commit()
+    conn.close()
+
+    client.get_sheet_data.return_value = [
+        {'ts': '2025-05-01T08:00:00', 'pond_id': 'P1', 'avg_weight_g': 100.0, 'user': 'op'},
+        {'ts': '2025-05-08T08:00:00', 'pond_id': 'P1', 'avg_weight_g': 130.0, 'user': 'op',
+         'sample_size': 30, 'std_g': 12.0, 'cv_pct': 9.2},
+    ]
+    replica = SheetReplica(db_path, client=client, models={weighing: WeighingRow})
+    assert replica.watermark(weighing) is None
+    assert replica.sync(weighing)
+
+    client.get_records_from.assert_not_called()
+    rows = replica.rows(weighing)
+    assert len(rows) == 2 and rows[1]['sample_size'] == 30
+
+def test_reads_do_not_wait_for_network_during_sync(replica, client):
+    """Тест: пока синхронизация ждёт ответа Sheets, локальные чтения не блокируются."""
+    client.get_sheet_data.return_value = [_feeding(0)]
+    replica.sync(FEEDING)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_fetch(sheet_name, start_row):
+        started.set()
+        release.wait(5)
+        return [_feeding(1)]
+
+    client.get_records_from.side_effect = slow_fetch
+    sync = threading.Thread(target=replica.sync, args=(FEEDING,))
+    sync.start()
+    assert started.wait(5)
+
+    result = {}
+    reader = threading.Thread(target=lambda: result.update(rows=replica.rows(FEEDING), mark=replica.watermark(FEEDING)))
+    reader.start()
+    reader.join(2)
+    finished = not reader.is_alive()
+    release.set()
+    sync.join(5)
+
+    assert finished
+    assert len(result['rows']) == 1 and result['mark'].row_count == 1
+    assert replica.watermark(FEEDING).row_count == 2
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.sheets.snapshots import ReferenceSnapshot
+from app.models.feeding import FeedType
+
+
+@pytest.fixture
+def decode():
+    """Декодер-шпион, чтобы считать, сколько строк реально прошло через Pydantic."""
+    return MagicMock(side_effect=FeedType.model_validate)
+
+@pytest.fixture
+def snapshot(decode):
+    return ReferenceSnapshot("TEST_FEEDS", decode, key=lambda ft: ft.id)
+
+ROWS = [
+    {'feed_id': 'F1', 'name': 'Стартер', 'is_active': True},
+    {'feed_id': 'F2', 'name': 'Гровер', 'is_active': True},
+]
+
+def test_first_refresh_decodes_all_rows(snapshot, decode):
+    """Тест: первое чтение декодирует все строки."""
+    items = snapshot.refresh([dict(r) for r in ROWS])
+    assert [ft.id for ft in items] == ['F1', 'F2']
+    assert decode.call_count == 2
+
+def test_refresh_decodes_only_changed_rows(snapshot, decode):
+    """Тест: неизменённые строки не декодируются повторно, изменённая - декодируется."""
+    snapshot.refresh([dict(r) for r in ROWS])
+    decode.reset_mock()
+
+    rows = [dict(r) for r in ROWS]
+    rows[1]['name'] = 'Гровер 3мм'
+    items = snapshot.refresh(rows)
+
+    assert decode.call_count == 1
+    assert snapshot.get('F2').name == 'Гровер 3мм'
+    assert items[0] is snapshot.get('F1')
+
+def test_refresh_drops_removed_rows(snapshot):
+    """Тест: удалённая строка пропадает из индекса."""
+    snapshot.refresh([dict(r) for r in ROWS])
+    snapshot.refresh([dict(ROWS[0])])
+    assert snapshot.get('F2') is None
+    assert [ft.id for ft in snapshot.items] == ['F1']
+
+def test_refresh_without_changes_decodes_nothing(snapshot, decode):
+    """Тест: повторное чтение тех же данных не декодирует строки."""
+    snapshot.refresh([dict(r) for r in ROWS])
+    decode.reset_mock()
+    snapshot.refresh([dict(r) for r in ROWS])
+    assert decode.call_count == 0
+
+def test_hash_collision_does_not_reuse_other_row(snapshot):
+    """Тест: строки с одинаковым хэшем, но разными значениями, не подменяют друг друга."""
+    with patch('app.sheets.snapshots.row_key', side_effect=lambda row: _Colliding(tuple(row.items()))):
+        snapshot.refresh([dict(ROWS[0])])
+        snapshot.refresh([dict(ROWS[1])])
+    assert snapshot.get('F2').name == 'Гровер'
+    assert snapshot.get('F1') is None
+
+
+class _Colliding(tuple):
+    """Кортеж с постоянным хэшем - моделирует коллизию хэшей."""
+    def __hash__(self):
+        return 0